@@ -0,0 +1,228 @@
+"""Coalesced ``last_activity`` touches for user documents.
+
+An active quiz used to write ``leaderboard.last_activity`` on nearly every
+interaction (answer, presentation callback, achievements screen), each as its
+own ``update_one``. ``last_activity`` only feeds "online in 24h" style
+statistics, so touches are kept in memory instead: the latest timestamp per
+user, written by a background flusher as one unordered ``bulk_write`` every
+``flush_interval`` seconds.
+
+Two granularity checks keep redundant writes out:
+
+* in memory — a touch within ``granularity`` of a timestamp this process
+  knows is stored (flushed here, or written by a result/battle/start write
+  reported through :meth:`ActivityTouchBuffer.note_written`) is skipped;
+* on the server — the writer only matches documents whose stored value is
+  older than ``granularity`` before the touch.
+
+Memory is bounded by ``max_pending`` users; a new user arriving while the
+buffer is full is dropped and counted. A failed flush puts the touches back
+(up to the same bound). ``close()`` stops the flusher and writes what is
+left; it is also registered with ``atexit`` when the flusher starts.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+
+from runtime_metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityTouchBuffer:
+    """Thread-safe latest-timestamp-per-user buffer with a lazy background flusher.
+
+    ``writer`` receives ``[(user_id, at), ...]`` and returns ``(modified,
+    failed_indices)``; raising means the whole batch failed.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[list[tuple[str, datetime]]], tuple[int, list[int]]],
+        *,
+        flush_interval: float,
+        granularity: float,
+        max_pending: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._writer = writer
+        self.flush_interval = max(0.05, float(flush_interval))
+        self.granularity = timedelta(seconds=max(0.0, float(granularity)))
+        self.max_pending = max(1, int(max_pending))
+        self._clock = clock
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._pending: dict[str, datetime] = {}
+        # Lower bound of what is stored, per recently seen user (LRU-bounded).
+        self._stored: OrderedDict[str, datetime] = OrderedDict()
+        self._oldest: float | None = None
+        self._wake = Event()
+        self._stopped = Event()
+        self._thread: Thread | None = None
+        self._touches = 0
+        self._skipped_recent = 0
+        self._coalesced = 0
+        self._superseded = 0
+        self._dropped = 0
+        self._sent = 0
+        self._written = 0
+        self._skipped_stored = 0
+        self._requeued = 0
+        self._lost = 0
+        self._flushes = 0
+        self._flush_failures = 0
+        self._last_flush_at: float | None = None
+        self._flush_latency = LatencyHistogram()
+
+    # ── touch path ─────────────────────────────────────────────
+
+    def touch(self, user_id: str, at: datetime) -> bool:
+        """Remember the touch; return ``False`` when it needs no write."""
+        with self._lock:
+            self._touches += 1
+            stored = self._stored.get(user_id)
+            if stored is not None and at - stored < self.granularity:
+                self._skipped_recent += 1
+                return False
+            if user_id in self._pending:
+                self._coalesced += 1
+            elif len(self._pending) >= self.max_pending:
+                self._dropped += 1
+                return False
+            self._merge_locked(user_id, at)
+        self._ensure_started()
+        return True
+
+    def note_written(self, user_id: str, at: datetime) -> None:
+        """Another write already stored ``last_activity=at`` for ``user_id``."""
+        with self._lock:
+            self._remember_locked(user_id, at)
+            pending = self._pending.get(user_id)
+            if pending is not None and pending - at < self.granularity:
+                del self._pending[user_id]
+                self._superseded += 1
+                if not self._pending:
+                    self._oldest = None
+
+    def _merge_locked(self, user_id: str, at: datetime) -> None:
+        current = self._pending.get(user_id)
+        if current is None or at > current:
+            self._pending[user_id] = at
+        if self._oldest is None:
+            self._oldest = self._clock()
+
+    def _remember_locked(self, user_id: str, at: datetime) -> None:
+        current = self._stored.get(user_id)
+        if current is None or at > current:
+            self._stored[user_id] = at
+        self._stored.move_to_end(user_id)
+        while len(self._stored) > self.max_pending:
+            self._stored.popitem(last=False)
+
+    # ── flushing ───────────────────────────────────────────────
+
+    def flush(self) -> int:
+        """Write everything pending now; return the number of documents modified."""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                self._pending = {}
+                self._oldest = None
+            if not batch:
+                return 0
+            rows = list(batch.items())
+            started = time.perf_counter()
+            try:
+                modified, failed = self._writer(rows)
+                failed = sorted(set(failed))
+            except Exception as exc:
+                logger.warning("activity touch flush failed (%d users): %s", len(rows), exc)
+                modified, failed = 0, list(range(len(rows)))
+            self._flush_latency.observe(time.perf_counter() - started)
+
+            failed_set = set(failed)
+            applied = [row for index, row in enumerate(rows) if index not in failed_set]
+            # When the server skipped some rows we do not know which; their
+            # stored value is only known to be within ``granularity``.
+            exact = modified >= len(applied)
+            with self._lock:
+                self._flushes += 1
+                self._sent += len(rows)
+                self._written += modified
+                self._skipped_stored += max(0, len(applied) - modified)
+                self._last_flush_at = self._clock()
+                for user_id, at in applied:
+                    self._remember_locked(user_id, at if exact else at - self.granularity)
+                if failed:
+                    self._flush_failures += 1
+                for index in failed:
+                    user_id, at = rows[index]
+                    if user_id in self._pending or len(self._pending) < self.max_pending:
+                        self._merge_locked(user_id, at)
+                        self._requeued += 1
+                    else:
+                        self._lost += 1
+            return modified
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("activity touch flusher iteration failed")
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = Thread(target=self._run, name="activity-touch-flush", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def close(self, timeout: float = 5.0) -> int:
+        """Stop the flusher and write the remainder; safe to call repeatedly."""
+        self._stopped.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        return self.flush()
+
+    # ── observability ──────────────────────────────────────────
+
+    def metrics(self) -> dict:
+        with self._lock:
+            now = self._clock()
+            return {
+                "pending_users": len(self._pending),
+                "lag_seconds": None if self._oldest is None else round(now - self._oldest, 3),
+                "last_flush_age_seconds": (
+                    None if self._last_flush_at is None else round(now - self._last_flush_at, 3)
+                ),
+                "touches": self._touches,
+                "skipped_recent": self._skipped_recent,
+                "coalesced": self._coalesced,
+                "superseded": self._superseded,
+                "dropped": self._dropped,
+                "sent": self._sent,
+                "written": self._written,
+                "skipped_stored": self._skipped_stored,
+                "requeued": self._requeued,
+                "lost": self._lost,
+                "write_reduction": (
+                    round(1 - self._written / self._touches, 4) if self._touches else None
+                ),
+                "flushes": self._flushes,
+                "flush_failures": self._flush_failures,
+                "flush": self._flush_latency.snapshot(),
+            }
@@ -10,6 +10,8 @@ from datetime import timedelta
 from pymongo import ReturnDocument
 from pymongo.errors import PyMongoError
 
+from profile_cache import invalidate_profile
+
 logger = logging.getLogger(__name__)
 
 BATTLE_DELIVERY_PROTOCOL_LEGACY_DIRECT = "legacy_direct_v1"
@@ -251,6 +253,8 @@ def _apply_battle_outcome_once(
     try:
         write = apply_once()
         if write.modified_count == 1:
+            invalidate_profile(user_id)
+            database.LEADERBOARD_RANK_INDEX.apply_delta(uid, inc.get("total_points", 0))
             return
 
         existing = collection.find_one(
@@ -263,6 +267,8 @@ def _apply_battle_outcome_once(
             database.init_user_stats(user_id, "", first_name or "Игрок")
             write = apply_once()
             if write.modified_count == 1:
+                invalidate_profile(user_id)
+                database.LEADERBOARD_RANK_INDEX.apply_delta(uid, inc.get("total_points", 0))
                 return
             existing = collection.find_one(
                 {"_id": uid},
@@ -11,9 +11,12 @@ import logging
 from pymongo import ASCENDING
 from pymongo.errors import PyMongoError
 
+from schema_readiness import SCHEMA_READINESS, SchemaRequirement
+
 logger = logging.getLogger(__name__)
 
 _RETENTION_SECONDS = 90 * 24 * 60 * 60
+SCHEMA_NAME = "broadcasts.indexes"
 
 _BROADCAST_TTL = (
     "ttl_broadcast_retention",
@@ -129,6 +132,38 @@ def _audit_lookup_contract(
         )
 
 
+def audit_broadcast_indexes(db) -> None:
+    """Read-only proof that the exact broadcast index contract is present."""
+    final = {
+        name: db[name].index_information()
+        for name in ("broadcasts", "broadcast_deliveries")
+    }
+    _audit_ttl_contract(
+        collection_name="broadcasts",
+        info=final["broadcasts"],
+        expected_name=_BROADCAST_TTL[0],
+        expected_key=_BROADCAST_TTL[1],
+        expire_after=_BROADCAST_TTL[2],
+        allow_missing=False,
+    )
+    _audit_ttl_contract(
+        collection_name="broadcast_deliveries",
+        info=final["broadcast_deliveries"],
+        expected_name=_DELIVERY_TTL[0],
+        expected_key=_DELIVERY_TTL[1],
+        expire_after=_DELIVERY_TTL[2],
+        allow_missing=False,
+    )
+    for collection_name, index_name, key in _LOOKUP_INDEXES:
+        _audit_lookup_contract(
+            collection_name=collection_name,
+            info=final[collection_name],
+            expected_name=index_name,
+            expected_key=key,
+            allow_missing=False,
+        )
+
+
 def ensure_broadcast_indexes() -> None:
     """Prove/create the exact non-destructive broadcast index contract."""
     db = _database()
@@ -185,34 +220,8 @@ def ensure_broadcast_indexes() -> None:
             if index_name not in initial[collection_name]:
                 collections[collection_name].create_index(key, name=index_name)
 
-        final = {
-            name: collection.index_information()
-            for name, collection in collections.items()
-        }
-        _audit_ttl_contract(
-            collection_name="broadcasts",
-            info=final["broadcasts"],
-            expected_name=_BROADCAST_TTL[0],
-            expected_key=_BROADCAST_TTL[1],
-            expire_after=_BROADCAST_TTL[2],
-            allow_missing=False,
-        )
-        _audit_ttl_contract(
-            collection_name="broadcast_deliveries",
-            info=final["broadcast_deliveries"],
-            expected_name=_DELIVERY_TTL[0],
-            expected_key=_DELIVERY_TTL[1],
-            expire_after=_DELIVERY_TTL[2],
-            allow_missing=False,
-        )
-        for collection_name, index_name, key in _LOOKUP_INDEXES:
-            _audit_lookup_contract(
-                collection_name=collection_name,
-                info=final[collection_name],
-                expected_name=index_name,
-                expected_key=key,
-                allow_missing=False,
-            )
+        audit_broadcast_indexes(db)
+        SCHEMA_READINESS.mark_ready(SCHEMA_NAME, db)
     except BroadcastIndexSafetyUnavailable:
         raise
     except PyMongoError as exc:
@@ -220,3 +229,23 @@ def ensure_broadcast_indexes() -> None:
         raise BroadcastIndexSafetyUnavailable(
             "broadcast index safety bootstrap is unavailable"
         ) from exc
+
+
+def _broadcast_database():
+    import database
+
+    return getattr(database, "db", None)
+
+
+SCHEMA_READINESS.register(
+    SchemaRequirement(
+        name=SCHEMA_NAME,
+        spec={
+            "ttl": [_BROADCAST_TTL, _DELIVERY_TTL],
+            "lookup": list(_LOOKUP_INDEXES),
+        },
+        handle=_broadcast_database,
+        ensure=lambda _db: ensure_broadcast_indexes(),
+        audit=audit_broadcast_indexes,
+    )
+)
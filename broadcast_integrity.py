@@ -22,6 +22,7 @@ _RETENTION_SECONDS = 90 * 24 * 60 * 60
 _FANOUT_CHUNK = 500
 _MAX_TEXT_LENGTH = 3500
 _MAX_RECIPIENT_SNAPSHOT_BYTES = 4 * 1024 * 1024
+_MAX_CLAIM_BATCH = 500
 
 
 class BroadcastStoreUnavailable(RuntimeError):
@@ -301,6 +302,71 @@ def claim_next_broadcast_delivery(
         raise BroadcastStoreUnavailable("broadcast delivery claim failed") from exc
 
 
+def claim_broadcast_deliveries(
+    *,
+    limit: int,
+    broadcast_id: str | None = None,
+    lease_seconds: int = 120,
+) -> list[dict]:
+    """Lease up to ``limit`` claimable delivery rows in three round trips.
+
+    Candidates are selected in claim order, then leased with one conditional
+    ``update_many`` that re-checks claimability, so a row leased concurrently by
+    another drain is skipped instead of double-claimed. The batch shares one
+    claim token; settlement still compares that token per delivery row.
+    """
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0:
+        raise ValueError("limit must be a positive integer")
+    limit = min(limit, _MAX_CLAIM_BATCH)
+    if broadcast_id is not None:
+        broadcast_id = _required_string(broadcast_id, "broadcast_id", max_length=128)
+    if isinstance(lease_seconds, bool) or not isinstance(lease_seconds, int) or lease_seconds <= 0:
+        raise ValueError("lease_seconds must be a positive integer")
+    database, _broadcasts, deliveries = _collections()
+    now = database._now_utc()
+    token = uuid.uuid4().hex
+    claimable = {
+        "done": {"$ne": True},
+        "$or": [
+            {"lease_until": {"$exists": False}},
+            {"lease_until": {"$lte": now}},
+        ],
+    }
+    if broadcast_id is not None:
+        claimable["broadcast_id"] = broadcast_id
+    try:
+        candidates = [
+            doc["_id"]
+            for doc in deliveries.find(claimable, {"_id": 1})
+            .sort([("created_at_dt", ASCENDING), ("_id", ASCENDING)])
+            .limit(limit)
+            if isinstance(doc, dict) and isinstance(doc.get("_id"), str)
+        ]
+        if not candidates:
+            return []
+        deliveries.update_many(
+            {**claimable, "_id": {"$in": candidates}},
+            {
+                "$set": {
+                    "claim_token": token,
+                    "lease_until": now + timedelta(seconds=lease_seconds),
+                    "last_attempt_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+        )
+        claimed = [
+            doc
+            for doc in deliveries.find({"_id": {"$in": candidates}, "claim_token": token})
+            if isinstance(doc, dict)
+        ]
+    except PyMongoError as exc:
+        raise BroadcastStoreUnavailable("broadcast delivery batch claim failed") from exc
+    order = {delivery_id: index for index, delivery_id in enumerate(candidates)}
+    claimed.sort(key=lambda doc: order.get(doc.get("_id"), len(order)))
+    return claimed
+
+
 def _settle_delivery(
     delivery_id: str,
     claim_token: str,
@@ -26,7 +26,69 @@ BATTLE_EXPIRY         = 600   # TTL незавершённой битвы = 10 
 BATTLE_CLEANUP_INTERVAL = 300 # как часто чистить устаревшие битвы (сек)
 
 # ── Broadcast ────────────────────────────────────────────────────────────────
-BROADCAST_SLEEP       = 0.035 # ~28 сообщений/сек — в пределах лимита Telegram
+BROADCAST_SLEEP       = 0.035 # ~28 сообщений/сек — интервал token bucket рассылки (0 = без лимита)
+BROADCAST_CONCURRENCY = 4     # параллельных отправок внутри одного drain
+BROADCAST_CLAIM_BATCH = 50    # строк доставки, арендуемых за один round trip
+BROADCAST_DRAIN_LIMIT = 50    # получателей за один тик broadcast job (~2 сек при 28/сек)
+
+# ── Outbox-очереди доставки ──────────────────────────────────────────────────
+# Постановка в outbox будит drain сразу; пустой outbox опрашивается всё реже:
+# интервал удваивается от *_MIN до *_MAX и сбрасывается к *_MIN после работы.
+BROADCAST_OUTBOX_MIN_INTERVAL = 2    # пауза между тиками, пока есть строки рассылки (сек)
+BROADCAST_OUTBOX_MAX_INTERVAL = 30   # потолок опроса пустой рассылки (сек)
+OUTBOX_MIN_INTERVAL           = 10   # reports / карточки результата / битвы (сек)
+OUTBOX_MAX_INTERVAL           = 120  # потолок опроса пустых outbox (сек)
+
+# ── Карточка результата (картинка) ──────────────────────────────────────────
+RESULT_CARD_RENDER_BUDGET  = 1.5    # сек на аватар + рендер; дольше — текстовая карточка
+RESULT_CARD_AVATAR_TTL     = 86400  # кеш обработанной аватарки (сек)
+RESULT_CARD_AVATAR_NEG_TTL = 3600   # кеш «нет фото»/ошибки загрузки (сек)
+RESULT_CARD_AVATAR_CACHE   = 512    # пользователей в LRU-кеше аватарок
+
+# ── Лидерборд ────────────────────────────────────────────────────────────────
+LEADERBOARD_RECONCILE_INTERVAL = 300  # полная сверка in-process индекса рангов с MongoDB (сек)
+LEADERBOARD_INDEX_MAX_AGE      = 900  # старше — индекс не используется, чтение идёт в MongoDB (сек)
+LEADERBOARD_CACHE_TTL          = 10   # общий кеш первых страниц всех трёх лидербордов (сек)
+
+# ── Профиль Mini App (/api/me) ───────────────────────────────────────────────
+PROFILE_CACHE_TTL      = 15    # собранный профиль живёт столько, если не сброшен записью результата (сек)
+PROFILE_CACHE_SIZE     = 2048  # пользователей в LRU-кеше профилей
+PROFILE_FANOUT_WORKERS = 4     # потоки для параллельных запросов истории
+
+# ── Аналитика вопросов (questions_stats) ─────────────────────────────────────
+QUESTION_STATS_FLUSH_INTERVAL = 5     # фоновый bulk_write накопленных ответов (сек)
+QUESTION_STATS_FLUSH_BATCH    = 200   # столько разных вопросов в буфере — flush сразу
+QUESTION_STATS_MAX_PENDING    = 5000  # предел разных вопросов в памяти; новые сверх — отбрасываются
+HARDEST_MIN_ATTEMPTS          = 5     # меньше попыток — вопрос не попадает в «самые сложные»
+HARDEST_TOP_K                 = 50    # in-memory топ самых сложных, обновляется после каждого flush
+QUESTION_ANALYTICS_PAGE_MAX   = 100   # предел страницы admin API аналитики вопросов
+
+# ── Касания активности (leaderboard.last_activity) ──────────────────────────
+ACTIVITY_TOUCH_FLUSH_INTERVAL = 10     # фоновый bulk_write последних касаний пользователей (сек)
+ACTIVITY_TOUCH_GRANULARITY    = 60     # сохранённое last_activity свежее этого — касание не пишется (сек)
+ACTIVITY_TOUCH_MAX_PENDING    = 20000  # предел пользователей в буфере; новые сверх — отбрасываются
+
+# ── Чистка квитанций Mini App (miniapp_result_receipts) ─────────────────────
+RECEIPT_PRUNE_INTERVAL = 600  # фоновая чистка старых квитанций отмеченных пользователей (сек)
+RECEIPT_PRUNE_BATCH    = 200  # пользователей за один проход
+
+# ── Схема MongoDB ────────────────────────────────────────────────────────────
+SCHEMA_REVALIDATE_INTERVAL = 300  # фоновая сверка индексов/TTL; при расхождении hot path закрывается (сек)
+
+# ── Потоки для блокирующих вызовов хранилища (storage_executor.py) ───────────
+STORAGE_INTERACTIVE_WORKERS = 8   # обработчики, которых ждёт пользователь (ответы, бои, результаты)
+STORAGE_INTERACTIVE_QUEUE   = 64  # сверх workers + queue вызовы ждут в event loop
+STORAGE_BACKGROUND_WORKERS  = 4   # outbox/рассылки и периодические задачи боёв
+STORAGE_BACKGROUND_QUEUE    = 32  # сверх workers + queue дренажи ждут в event loop
+
+# ── Клиент MongoDB (mongo_client.py) ────────────────────────────────────────
+MONGO_MAX_POOL_SIZE               = 50      # соединений на сервер: потоки waitress + asyncio.to_thread
+MONGO_MIN_POOL_SIZE               = 2       # держим тёплыми, чтобы первый запрос не платил за TLS
+MONGO_MAX_IDLE_TIME_MS            = 300000  # простаивающее соединение закрывается (мс)
+MONGO_WAIT_QUEUE_TIMEOUT_MS       = 5000    # дольше ждать свободное соединение — ошибка, а не зависание (мс)
+MONGO_SERVER_SELECTION_TIMEOUT_MS = 5000    # выбор сервера (мс)
+MONGO_COMPRESSORS                 = ("zstd", "snappy", "zlib")  # по приоритету; без модулей — пропускаются
+MONGO_COMMAND_SERIES_MAX          = 256     # предел рядов <коллекция>.<команда> в метриках
 
 # ═══════════════════════════════════════════════
 # РЕЖИМЫ ТЕСТИРОВАНИЯ (timeouts)
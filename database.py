@@ -7,7 +7,57 @@ import uuid
 import logging
 import functools
 from datetime import UTC, datetime, timedelta
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from config import (
+    ACTIVITY_TOUCH_FLUSH_INTERVAL,
+    ACTIVITY_TOUCH_GRANULARITY,
+    ACTIVITY_TOUCH_MAX_PENDING,
+    LEADERBOARD_INDEX_MAX_AGE,
+    QUESTION_ANALYTICS_PAGE_MAX,
+    QUESTION_STATS_FLUSH_BATCH,
+    QUESTION_STATS_FLUSH_INTERVAL,
+    QUESTION_STATS_MAX_PENDING,
+)
+from activity_touch_buffer import ActivityTouchBuffer
+from leaderboard_categories import (
+    CONTEXT_CORRECT,
+    CONTEXT_FILTER,
+    CONTEXT_LEVEL_KEYS,
+    CONTEXT_SORT,
+    CONTEXT_TOTAL,
+    HARD_CORRECT,
+    HARD_FILTER,
+    HARD_LEVEL_KEYS,
+    HARD_SORT,
+    HARD_TOTAL,
+    LEADERBOARD_CACHE,
+    category_increments,
+    category_leaderboard_ready,
+)
+from leaderboard_rank_index import RANK_FIELDS, LeaderboardRankIndex
+from mongo_client import create_mongo_client
+from profile_cache import invalidate_profile
+from question_analytics import (
+    ATTEMPTS_SORT,
+    analytics_page,
+    hardest_questions,
+    invalidate_hardest,
+    refresh_hardest,
+    stat_update_pipeline,
+)
+from question_stats_buffer import QuestionStatBuffer
+from runtime_metrics import register_metrics_source
+from user_records import (
+    ACHIEVEMENT_FIELDS,
+    BONUS_FIELDS,
+    IDENTITY_FIELDS,
+    PROFILE_FIELDS,
+    RANKING_FIELDS,
+    UserFieldSet,
+    read_user,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +69,7 @@ MONGO_URL = os.getenv("MONGO_URL")
 
 if MONGO_URL:
     try:
-        cluster = MongoClient(MONGO_URL, serverSelectionTimeoutMS=5000)
+        cluster = create_mongo_client(MONGO_URL)
         db = cluster["bible_bot_db"]
         collection = db["leaderboard"]
         battles_collection = db["battles"]
@@ -68,6 +118,10 @@ POINTS_PER_QUESTION = {
 
 REPORT_COOLDOWN_SECONDS = 60
 
+# Read model для общего лидерборда: позиция/разрыв/страницы без скана коллекции.
+LEADERBOARD_RANK_INDEX = LeaderboardRankIndex(max_age_seconds=LEADERBOARD_INDEX_MAX_AGE)
+register_metrics_source("leaderboard_rank_index", LEADERBOARD_RANK_INDEX.metrics)
+
 
 # ═══════════════════════════════════════════════
 # HELPERS
@@ -169,6 +223,11 @@ def _ensure_indexes():
                 name="idx_total_points",
                 background=True,
             )
+            collection.create_index(
+                [("total_points", DESCENDING), ("_id", ASCENDING)],
+                name="idx_total_points_keyset",
+                background=True,
+            )
             collection.create_index(
                 [("created_at", ASCENDING)],
                 name="idx_created_at",
@@ -393,7 +452,7 @@ def get_user_history(user_id: int, limit: int = 10) -> list:
                 "level_key": 1,
                 "correct_count": 1,
                 "total_questions": {
-                    "$size": {"$ifNull": ["$questions_data", []]}
+                    "$size": {"$ifNull": ["$question_ids", {"$ifNull": ["$questions_data", []]}]}
                 },
                 "updated_at_dt": 1,
                 "end_time": 1,
@@ -506,11 +565,12 @@ def cleanup_stale_battles() -> int:
 # ПОЛЬЗОВАТЕЛИ
 # ═══════════════════════════════════════════════
 
-def get_user_stats(user_id):
+def get_user_stats(user_id, fields: UserFieldSet = PROFILE_FIELDS):
+    """Документ пользователя без карт квитанций (или только набор ``fields``)."""
     if collection is None:
         return None
     try:
-        return collection.find_one({"_id": _uid(user_id)})
+        return read_user(collection, _uid(user_id), fields)
     except Exception:
         return None
 
@@ -519,7 +579,7 @@ def init_user_stats(user_id, username, first_name):
     if collection is None:
         return False
     uid = _uid(user_id)
-    entry = collection.find_one({"_id": uid})
+    entry = read_user(collection, uid, IDENTITY_FIELDS)
     now = _now_utc()
 
     if not entry:
@@ -559,35 +619,77 @@ def init_user_stats(user_id, username, first_name):
             new_entry[f"{key}_best_score"] = 0
         try:
             collection.insert_one(new_entry)
-            return True
         except Exception as e:
             logger.error("init_user_stats error: %s", e)
             return False
+        ACTIVITY_TOUCHES.note_written(uid, now)
+        LEADERBOARD_RANK_INDEX.observe(new_entry)
+        return True
     else:
+        names = {
+            "username": username or entry.get("username", ""),
+            "first_name": first_name or entry.get("first_name", ""),
+        }
+        if all(entry.get(field) == value for field, value in names.items()):
+            # Имена не изменились — остаётся только касание активности.
+            ACTIVITY_TOUCHES.touch(uid, now)
+            return False
         try:
             collection.update_one(
                 {"_id": uid},
-                {"$set": {
-                    "last_activity": now,
-                    "username": username or entry.get("username", ""),
-                    "first_name": first_name or entry.get("first_name", ""),
-                }}
+                {"$set": {"last_activity": now, **names}}
             )
         except Exception:
-            pass
+            return False
+        ACTIVITY_TOUCHES.note_written(uid, now)
         return False
 
 
+def _write_activity_touches(rows: list[tuple[str, datetime]]) -> tuple[int, list[int]]:
+    """Один unordered bulk_write касаний; возвращает (изменено, индексы ошибок).
+
+    Документ обновляется, только если сохранённое last_activity старше
+    гранулярности — иначе запись на сервере пропускается.
+    """
+    if collection is None or not rows:
+        return 0, []
+    granularity = timedelta(seconds=ACTIVITY_TOUCH_GRANULARITY)
+    operations = [
+        UpdateOne(
+            {"_id": uid, "last_activity": {"$not": {"$gte": at - granularity}}},
+            {"$set": {"last_activity": at}},
+        )
+        for uid, at in rows
+    ]
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        failed = [error["index"] for error in e.details.get("writeErrors", [])]
+        return int(e.details.get("nModified", 0) or 0), failed
+    return int(result.modified_count or 0), []
+
+
+# Касания активности копятся в памяти (последнее время на пользователя) и
+# пишутся фоновым bulk_write; результаты, бои и /start сообщают о своей записи.
+ACTIVITY_TOUCHES = ActivityTouchBuffer(
+    _write_activity_touches,
+    flush_interval=ACTIVITY_TOUCH_FLUSH_INTERVAL,
+    granularity=ACTIVITY_TOUCH_GRANULARITY,
+    max_pending=ACTIVITY_TOUCH_MAX_PENDING,
+)
+register_metrics_source("activity_touches", ACTIVITY_TOUCHES.metrics)
+
+
 def touch_user_activity(user_id: int):
+    """Неблокирующее касание last_activity (без обращения к MongoDB)."""
     if collection is None:
         return
-    try:
-        collection.update_one(
-            {"_id": _uid(user_id)},
-            {"$set": {"last_activity": _now_utc()}}
-        )
-    except Exception:
-        pass
+    ACTIVITY_TOUCHES.touch(_uid(user_id), _now_utc())
+
+
+def flush_activity_touches() -> int:
+    """Останавливает фоновый flush касаний и дописывает накопленное (shutdown)."""
+    return ACTIVITY_TOUCHES.close()
 
 
 def update_daily_streak(user_id: int) -> int:
@@ -760,6 +862,7 @@ def add_to_leaderboard(user_id, username, first_name,
         f"{level_key}_correct": score,
         f"{level_key}_total": total,
         "total_points": round(score * ppq * score_multiplier),
+        **category_increments(level_key, score, total),
     }
 
     try:
@@ -774,6 +877,16 @@ def add_to_leaderboard(user_id, username, first_name,
         )
     except Exception as e:
         logger.error("add_to_leaderboard error: %s", e)
+        return
+    invalidate_profile(uid)
+    ACTIVITY_TOUCHES.note_written(uid, now)
+    LEADERBOARD_RANK_INDEX.apply_delta(
+        uid,
+        inc_fields["total_points"],
+        tests=1,
+        username=set_fields["username"],
+        first_name=set_fields["first_name"],
+    )
 
 
 def update_battle_stats(user_id, result):
@@ -789,43 +902,60 @@ def update_battle_stats(user_id, result):
     elif result == "draw":
         inc["battles_draw"] = 1
         inc["total_points"] = 2
+    now = _now_utc()
     try:
         collection.update_one(
             {"_id": uid},
-            {"$inc": inc, "$set": {"last_activity": _now_utc()}},
+            {"$inc": inc, "$set": {"last_activity": now}},
             upsert=True,
         )
     except Exception as e:
         logger.error("update_battle_stats error: %s", e)
+        return
+    invalidate_profile(uid)
+    ACTIVITY_TOUCHES.note_written(uid, now)
+    LEADERBOARD_RANK_INDEX.apply_delta(uid, inc.get("total_points", 0))
 
 
-def get_user_position(user_id):
+def get_user_position(user_id, fields: UserFieldSet = PROFILE_FIELDS):
+    """(место, документ) — документ читается в проекции ``fields``."""
     if collection is None:
         return None, None
     uid = _uid(user_id)
     try:
-        entry = collection.find_one({"_id": uid})
+        entry = read_user(collection, uid, fields)
     except Exception:
         return None, None
     if not entry:
         return None, None
+    return user_position_from(entry), entry
+
+
+def user_position_from(entry: dict) -> int:
+    """Место пользователя по уже прочитанному документу (без повторного find_one)."""
     pts = entry.get("total_points", 0)
+    LEADERBOARD_RANK_INDEX.observe(entry)
+    position = LEADERBOARD_RANK_INDEX.position(pts)
+    if position is not None:
+        return position
     try:
-        position = collection.count_documents(
+        return collection.count_documents(
             {"total_points": {"$gt": pts}}
         ) + 1
     except Exception:
-        position = 0
-    return position, entry
+        return 0
 
 
 def get_leaderboard_page(page=0, per_page=10):
     if collection is None:
         return []
+    rows = LEADERBOARD_RANK_INDEX.page(page * per_page, per_page)
+    if rows is not None:
+        return rows
     try:
         return list(
             collection.find()
-            .sort("total_points", DESCENDING)
+            .sort([("total_points", DESCENDING), ("_id", ASCENDING)])
             .skip(page * per_page)
             .limit(per_page)
         )
@@ -833,9 +963,46 @@ def get_leaderboard_page(page=0, per_page=10):
         return []
 
 
+def get_leaderboard_page_after(after_points, after_id, per_page=10):
+    """Keyset-страница: строки строго после курсора (total_points, _id).
+
+    Каждая строка несёт ``_rank`` — её порядковый номер в общем лидерборде.
+    """
+    if collection is None:
+        return []
+    after_points = int(after_points)
+    after_id = _uid(after_id)
+    rows = LEADERBOARD_RANK_INDEX.page_after(after_points, after_id, per_page)
+    if rows is not None:
+        return rows
+    before_cursor = {"$or": [
+        {"total_points": {"$gt": after_points}},
+        {"total_points": after_points, "_id": {"$lte": after_id}},
+    ]}
+    after_cursor = {"$or": [
+        {"total_points": {"$lt": after_points}},
+        {"total_points": after_points, "_id": {"$gt": after_id}},
+    ]}
+    try:
+        offset = collection.count_documents(before_cursor)
+        rows = list(
+            collection.find(after_cursor)
+            .sort([("total_points", DESCENDING), ("_id", ASCENDING)])
+            .limit(per_page)
+        )
+    except Exception:
+        return []
+    for rank, row in enumerate(rows, start=offset + 1):
+        row["_rank"] = rank
+    return rows
+
+
 def get_total_users():
     if collection is None:
         return 0
+    total = LEADERBOARD_RANK_INDEX.total()
+    if total is not None:
+        return total
     try:
         return collection.count_documents({})
     except Exception:
@@ -847,12 +1014,16 @@ def get_points_to_next_place(user_id):
         return None
     uid = _uid(user_id)
     try:
-        entry = collection.find_one({"_id": uid})
+        entry = read_user(collection, uid, RANKING_FIELDS)
     except Exception:
         return None
     if not entry:
         return None
     pts = entry.get("total_points", 0)
+    LEADERBOARD_RANK_INDEX.observe(entry)
+    served, gap = LEADERBOARD_RANK_INDEX.points_to_next_place(pts)
+    if served:
+        return gap
     try:
         above = collection.find_one(
             {"total_points": {"$gt": pts}},
@@ -865,6 +1036,20 @@ def get_points_to_next_place(user_id):
     return above.get("total_points", pts) - pts
 
 
+def reconcile_leaderboard_rank_index() -> bool:
+    """Перестраивает in-process индекс рангов по полной выборке коллекции leaderboard."""
+    if collection is None:
+        return False
+    try:
+        drift = LEADERBOARD_RANK_INDEX.reconcile(collection.find({}, RANK_FIELDS))
+    except Exception as e:
+        logger.error("reconcile_leaderboard_rank_index error: %s", e)
+        return False
+    if drift:
+        logger.info("leaderboard rank index reconciled, %d users drifted", drift)
+    return True
+
+
 def get_category_leaderboard(category_key, limit=10):
     if collection is None:
         return []
@@ -881,51 +1066,112 @@ def get_category_leaderboard(category_key, limit=10):
         return []
 
 
+def _context_leaderboard_aggregate(limit):
+    pipeline = [
+        {"$match": {"$or": [
+            {f"{k}_correct": {"$gt": 0}} for k in CONTEXT_LEVEL_KEYS
+        ]}},
+        {"$addFields": {
+            "_context_correct": {"$add": [
+                {"$ifNull": [f"${k}_correct", 0]} for k in CONTEXT_LEVEL_KEYS
+            ]},
+            "_context_total": {"$add": [
+                {"$ifNull": [f"${k}_total", 0]} for k in CONTEXT_LEVEL_KEYS
+            ]},
+        }},
+        {"$addFields": {
+            "_context_acc": {
+                "$cond": [
+                    {"$gt": ["$_context_total", 0]},
+                    {"$round": [
+                        {"$multiply": [
+                            {"$divide": [
+                                "$_context_correct",
+                                "$_context_total"
+                            ]},
+                            100,
+                        ]},
+                        0,
+                    ]},
+                    0,
+                ]
+            }
+        }},
+        {"$sort": {"_context_correct": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    return list(collection.aggregate(pipeline))
+
+
+def _context_leaderboard_indexed(limit):
+    rows = list(collection.find(CONTEXT_FILTER).sort(CONTEXT_SORT).limit(limit))
+    for row in rows:
+        correct = row.get(CONTEXT_CORRECT, 0)
+        total = row.get(CONTEXT_TOTAL, 0)
+        row["_context_correct"] = correct
+        row["_context_total"] = total
+        row["_context_acc"] = round(correct / total * 100) if total > 0 else 0
+    return rows
+
+
 def get_context_leaderboard(limit=10):
-    """Лидерборд по историческому контексту (aggregation pipeline)."""
+    """Лидерборд по историческому контексту.
+
+    Читает предвычисленные category_context_* по частичному индексу; пока схема
+    не подтверждена (индексы + backfill), считает aggregation pipeline.
+    """
     if collection is None:
         return []
-    ctx_keys = ["nero", "geography", "intro1", "intro2", "intro3"]
+    handle = collection
     try:
-        pipeline = [
-            {"$match": {"$or": [
-                {f"{k}_correct": {"$gt": 0}} for k in ctx_keys
-            ]}},
-            {"$addFields": {
-                "_context_correct": {"$add": [
-                    {"$ifNull": [f"${k}_correct", 0]} for k in ctx_keys
-                ]},
-                "_context_total": {"$add": [
-                    {"$ifNull": [f"${k}_total", 0]} for k in ctx_keys
-                ]},
-            }},
-            {"$addFields": {
-                "_context_acc": {
-                    "$cond": [
-                        {"$gt": ["$_context_total", 0]},
-                        {"$round": [
-                            {"$multiply": [
-                                {"$divide": [
-                                    "$_context_correct",
-                                    "$_context_total"
-                                ]},
-                                100,
-                            ]},
-                            0,
-                        ]},
-                        0,
-                    ]
-                }
-            }},
-            {"$sort": {"_context_correct": -1}},
-            {"$limit": limit},
-        ]
-        return list(collection.aggregate(pipeline))
+        if category_leaderboard_ready(handle):
+            loader = functools.partial(_context_leaderboard_indexed, limit)
+        else:
+            loader = functools.partial(_context_leaderboard_aggregate, limit)
+        return LEADERBOARD_CACHE.get(handle, ("context", limit), loader)
     except Exception as e:
         logger.error("get_context_leaderboard error: %s", e)
         return []
 
 
+def _hard_leaderboard_aggregate(limit):
+    pipeline = [
+        {"$match": {"$or": [{f"{key}_attempts": {"$gt": 0}} for key in HARD_LEVEL_KEYS]}},
+        {"$addFields": {
+            "_hard_correct": {"$add": [{"$ifNull": [f"${key}_correct", 0]} for key in HARD_LEVEL_KEYS]},
+            "_hard_total": {"$add": [{"$ifNull": [f"${key}_total", 0]} for key in HARD_LEVEL_KEYS]},
+        }},
+        {"$sort": {"_hard_correct": -1, "_hard_total": 1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    return list(collection.aggregate(pipeline))
+
+
+def _hard_leaderboard_indexed(limit):
+    rows = list(collection.find(HARD_FILTER).sort(HARD_SORT).limit(limit))
+    for row in rows:
+        row["_hard_correct"] = row.get(HARD_CORRECT, 0)
+        row["_hard_total"] = row.get(HARD_TOTAL, 0)
+    return rows
+
+
+def get_hard_leaderboard(limit=20):
+    """Лидерборд по богословским уровням (hard, hard_p1, hard_p2)."""
+    if collection is None:
+        return []
+    limit = max(1, min(int(limit), 100))
+    handle = collection
+    try:
+        if category_leaderboard_ready(handle):
+            loader = functools.partial(_hard_leaderboard_indexed, limit)
+        else:
+            loader = functools.partial(_hard_leaderboard_aggregate, limit)
+        return LEADERBOARD_CACHE.get(handle, ("hard", limit), loader)
+    except Exception as e:
+        logger.error("get_hard_leaderboard error: %s", e)
+        return []
+
+
 # ═══════════════════════════════════════════════
 # CHALLENGE STATS
 # ═══════════════════════════════════════════════
@@ -939,10 +1185,10 @@ def get_current_week_id():
 def is_bonus_eligible(user_id: int, mode: str) -> bool:
     if collection is None:
         return True
-    entry = collection.find_one({"_id": _uid(user_id)})
+    last_bonus_key = f"{mode}_last_bonus_date"
+    entry = read_user(collection, _uid(user_id), BONUS_FIELDS, extra=(last_bonus_key,))
     if not entry:
         return True
-    last_bonus_key = f"{mode}_last_bonus_date"
     last_date = entry.get(last_bonus_key, "")
     return last_date != _today_utc()
 
@@ -979,7 +1225,7 @@ def update_challenge_stats(user_id, username, first_name, mode,
     bonus = compute_bonus(score, mode, eligible)
     total_earned = earned_base + bonus
 
-    entry = collection.find_one({"_id": uid}) or {}
+    entry = read_user(collection, uid, ACHIEVEMENT_FIELDS) or {}
     achievements = entry.get("achievements", {})
     new_achievements = []
 
@@ -1059,6 +1305,16 @@ def update_challenge_stats(user_id, username, first_name, mode,
         )
     except Exception as e:
         logger.error("update_challenge_stats error: %s", e)
+        return total_earned, new_achievements
+    invalidate_profile(uid)
+    ACTIVITY_TOUCHES.note_written(uid, upd["last_activity"])
+    LEADERBOARD_RANK_INDEX.apply_delta(
+        uid,
+        total_earned,
+        tests=1,
+        username=upd["username"],
+        first_name=upd["first_name"],
+    )
 
     return total_earned, new_achievements
 
@@ -1115,7 +1371,10 @@ def get_weekly_leaderboard(mode, limit=10):
 def get_user_achievements(user_id):
     if collection is None:
         return {}, 0, ""
-    entry = collection.find_one({"_id": _uid(user_id)})
+    return user_achievements_from(read_user(collection, _uid(user_id), ACHIEVEMENT_FIELDS))
+
+
+def user_achievements_from(entry: dict | None):
     if not entry:
         return {}, 0, ""
     return (
@@ -1151,30 +1410,65 @@ def calculate_accuracy(correct: int, total: int) -> int:
     return round(correct / total * 100)
 
 
+def _write_question_stats(rows: list[tuple]) -> list[int]:
+    """Один unordered bulk_write на пачку; возвращает индексы неудавшихся строк.
+
+    Pipeline-upsert вместе со счётчиками пересчитывает accuracy и
+    difficulty_bucket, после чего записанные вопросы вливаются в top-K кеш.
+    """
+    if questions_stats_collection is None or not rows:
+        return []
+    operations = [
+        UpdateOne(
+            {"_id": q_id},
+            stat_update_pipeline(attempts, correct, total_time, category),
+            upsert=True,
+        )
+        for q_id, attempts, correct, total_time, category in rows
+    ]
+    failed: list[int] = []
+    try:
+        questions_stats_collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        failed = [error["index"] for error in e.details.get("writeErrors", [])]
+    except PyMongoError:
+        # Часть пачки могла примениться — кеш больше не точен.
+        invalidate_hardest()
+        raise
+    skipped = set(failed)
+    refresh_hardest(
+        questions_stats_collection,
+        [row[0] for index, row in enumerate(rows) if index not in skipped],
+    )
+    return failed
+
+
+# Write-behind: ответы копятся в памяти по вопросу и пишутся фоновым bulk_write.
+QUESTION_STATS_BUFFER = QuestionStatBuffer(
+    _write_question_stats,
+    flush_interval=QUESTION_STATS_FLUSH_INTERVAL,
+    flush_batch=QUESTION_STATS_FLUSH_BATCH,
+    max_pending=QUESTION_STATS_MAX_PENDING,
+)
+register_metrics_source("question_stats", QUESTION_STATS_BUFFER.metrics)
+
+
 def record_question_stat(q_id: str, category: str,
                          is_correct: bool, elapsed: float):
+    """Неблокирующая запись аналитики ответа (без обращения к MongoDB)."""
     if questions_stats_collection is None:
         return
-    try:
-        questions_stats_collection.update_one(
-            {"_id": q_id},
-            {
-                "$inc": {
-                    "total_attempts": 1,
-                    "correct_attempts": 1 if is_correct else 0,
-                    "total_time": elapsed,
-                },
-                "$set": {"category": category},
-            },
-            upsert=True,
-        )
-    except Exception:
-        pass
+    QUESTION_STATS_BUFFER.record(q_id, category, is_correct, elapsed)
+
 
+def flush_question_stats() -> int:
+    """Останавливает фоновый flush и дописывает накопленное (graceful shutdown)."""
+    return QUESTION_STATS_BUFFER.close()
 
-def get_question_stats(q_id: str = None):
+
+def get_question_stats(q_id: str = None, limit: int = QUESTION_ANALYTICS_PAGE_MAX):
     """Если q_id задан — возвращает стат одного вопроса.
-    Иначе — список всех вопросов (для admin)."""
+    Иначе — до ``limit`` самых отвечаемых вопросов (для admin, по индексу)."""
     if questions_stats_collection is None:
         return None if q_id else []
     if q_id:
@@ -1185,39 +1479,41 @@ def get_question_stats(q_id: str = None):
     try:
         return list(
             questions_stats_collection.find()
-            .sort("total_attempts", DESCENDING)
+            .sort(ATTEMPTS_SORT)
+            .limit(max(1, int(limit)))
         )
     except Exception:
         return []
 
 
 def get_hardest_questions(limit: int = 10) -> list:
-    """Топ самых сложных вопросов (наименьший % правильных)."""
+    """Топ самых сложных вопросов (наименьший % правильных).
+
+    Обслуживается in-memory top-K кешем, который обновляется после каждого
+    flush аналитики; промах читает частичный индекс по accuracy.
+    """
     if questions_stats_collection is None:
         return []
     try:
-        pipeline = [
-            {"$match": {"total_attempts": {"$gte": 5}}},
-            {"$addFields": {
-                "accuracy": {
-                    "$multiply": [
-                        {"$divide": [
-                            "$correct_attempts",
-                            "$total_attempts"
-                        ]},
-                        100,
-                    ]
-                }
-            }},
-            {"$sort": {"accuracy": 1}},
-            {"$limit": limit},
-        ]
-        return list(questions_stats_collection.aggregate(pipeline))
+        return hardest_questions(questions_stats_collection, limit)
     except Exception as e:
         logger.error("get_hardest_questions error: %s", e)
         return []
 
 
+def get_question_analytics_page(sort: str = "hardest", bucket: str | None = None,
+                                after: str | None = None, limit: int = 20) -> dict:
+    """Страница admin-аналитики вопросов с keyset-курсором ``next``.
+
+    ``ValueError`` — неизвестная сортировка, бакет или курсор.
+    """
+    if questions_stats_collection is None:
+        return {"items": [], "next": None}
+    return analytics_page(
+        questions_stats_collection, sort=sort, bucket=bucket, after=after, limit=limit
+    )
+
+
 # ═══════════════════════════════════════════════
 # REPORTS
 # ═══════════════════════════════════════════════
@@ -1349,7 +1645,7 @@ def update_achievement_stats(user_id: int, is_perfect: bool, max_streak: int) ->
 
     uid   = _uid(user_id)
     today = _today_utc()
-    entry = collection.find_one({"_id": uid})
+    entry = read_user(collection, uid, ACHIEVEMENT_FIELDS)
     if not entry:
         return {}
 
@@ -1391,6 +1687,7 @@ def update_achievement_stats(user_id: int, is_perfect: bool, max_streak: int) ->
     if update_query:
         try:
             collection.update_one({"_id": uid}, update_query)
+            invalidate_profile(uid)
         except Exception as e:
             logger.error("update_achievement_stats error: %s", e)
 
@@ -1409,7 +1706,7 @@ def check_daily_bonus(user_id: int) -> int:
 
     uid   = _uid(user_id)
     today = _today_utc()
-    entry = collection.find_one({"_id": uid})
+    entry = read_user(collection, uid, BONUS_FIELDS)
     if not entry:
         return 0
 
@@ -1432,5 +1729,6 @@ def check_daily_bonus(user_id: int) -> int:
     except Exception as e:
         logger.error("check_daily_bonus error: %s", e)
         return 0
-
+    invalidate_profile(uid)
+    LEADERBOARD_RANK_INDEX.apply_delta(uid, bonus)
     return bonus
@@ -0,0 +1,241 @@
+"""Write-time category totals behind the context and hard leaderboards.
+
+The context board (``nero``, ``geography``, ``intro1-3``) and the hard board
+(``hard``, ``hard_p1``, ``hard_p2``) used to be full-collection aggregations
+that summed per-level counters for every user on every read. Result writers
+now ``$inc`` the category sums next to the per-level counters in the same
+update (:func:`category_increments`), and partial indexes serve each board as
+an ordered index scan.
+
+The sums are named ``category_<board>_*`` because ``hard_correct`` and
+``hard_total`` are already the per-level counters of the legacy ``hard`` level.
+
+Documents written before these fields existed are backfilled by one
+server-side pipeline update (atomic per document, so it composes with live
+``$inc``). :func:`ensure_category_leaderboard_schema` runs it once per database,
+recorded by a marker in ``schema_migrations``; ``migrate_db.py`` runs it too.
+Until the schema is proven ready, readers keep using the aggregation.
+
+A short-TTL cache shared by all three boards sits in front of the reads.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable, Hashable
+from threading import Lock
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+from config import LEADERBOARD_CACHE_TTL
+from runtime_metrics import register_metrics_source
+from schema_readiness import SCHEMA_READINESS, SchemaRequirement, same_handle
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_LEVEL_KEYS = ("nero", "geography", "intro1", "intro2", "intro3")
+HARD_LEVEL_KEYS = ("hard", "hard_p1", "hard_p2")
+
+CONTEXT_CORRECT = "category_context_correct"
+CONTEXT_TOTAL = "category_context_total"
+HARD_CORRECT = "category_hard_correct"
+HARD_TOTAL = "category_hard_total"
+HARD_ATTEMPTS = "category_hard_attempts"
+
+CONTEXT_FILTER = {CONTEXT_CORRECT: {"$gt": 0}}
+HARD_FILTER = {HARD_ATTEMPTS: {"$gt": 0}}
+CONTEXT_SORT = [(CONTEXT_CORRECT, DESCENDING), ("_id", ASCENDING)]
+HARD_SORT = [(HARD_CORRECT, DESCENDING), (HARD_TOTAL, ASCENDING), ("_id", ASCENDING)]
+
+_INDEXES = {
+    "leaderboard_category_context": (CONTEXT_SORT, CONTEXT_FILTER),
+    "leaderboard_category_hard": (HARD_SORT, HARD_FILTER),
+}
+SCHEMA_NAME = "leaderboard.category_totals"
+MIGRATIONS_COLLECTION = "schema_migrations"
+BACKFILL_MARKER = "leaderboard_category_totals_v1"
+
+
+class CategoryLeaderboardSchemaInvalid(RuntimeError):
+    """A category leaderboard index exists with incompatible options."""
+
+
+def category_increments(level_key: str, score: int, total: int) -> dict:
+    """Extra ``$inc`` fields for one result on ``level_key``."""
+    if level_key in CONTEXT_LEVEL_KEYS:
+        return {CONTEXT_CORRECT: score, CONTEXT_TOTAL: total}
+    if level_key in HARD_LEVEL_KEYS:
+        return {HARD_CORRECT: score, HARD_TOTAL: total, HARD_ATTEMPTS: 1}
+    return {}
+
+
+def _level_sum(keys: tuple[str, ...], suffix: str) -> dict:
+    return {"$add": [{"$ifNull": [f"${key}_{suffix}", 0]} for key in keys]}
+
+
+def backfill_pipeline() -> list[dict]:
+    """Update pipeline recomputing every category sum from per-level counters."""
+    return [
+        {
+            "$set": {
+                CONTEXT_CORRECT: _level_sum(CONTEXT_LEVEL_KEYS, "correct"),
+                CONTEXT_TOTAL: _level_sum(CONTEXT_LEVEL_KEYS, "total"),
+                HARD_CORRECT: _level_sum(HARD_LEVEL_KEYS, "correct"),
+                HARD_TOTAL: _level_sum(HARD_LEVEL_KEYS, "total"),
+                HARD_ATTEMPTS: _level_sum(HARD_LEVEL_KEYS, "attempts"),
+            }
+        }
+    ]
+
+
+def backfill_category_totals(collection) -> int:
+    """Recompute the category sums on every user document; return matched count."""
+    result = collection.update_many({}, backfill_pipeline())
+    return int(getattr(result, "matched_count", 0) or 0)
+
+
+def _index_matches(existing: dict | None, key: list, partial: dict) -> bool:
+    return (
+        existing is not None
+        and existing.get("key") == key
+        and existing.get("partialFilterExpression") == partial
+    )
+
+
+def audit_category_leaderboard_indexes(collection) -> None:
+    """Read-only drift check used by background schema revalidation."""
+    info = collection.index_information()
+    for name, (key, partial) in _INDEXES.items():
+        if not _index_matches(info.get(name), key, partial):
+            raise CategoryLeaderboardSchemaInvalid(f"category leaderboard index {name} drifted")
+
+
+def ensure_category_leaderboard_schema(collection, *, force_backfill: bool = False) -> bool:
+    """Create the partial indexes and run the one-time backfill for ``collection``.
+
+    ``force_backfill`` recomputes the sums even when the marker exists (used by
+    ``migrate_db.py``). Failures are recorded as drift instead of raised: the
+    boards keep using the aggregation and background revalidation retries.
+    """
+    if collection is None:
+        return False
+    try:
+        info = collection.index_information()
+        for name, (key, partial) in _INDEXES.items():
+            existing = info.get(name)
+            if existing is None:
+                collection.create_index(key, name=name, partialFilterExpression=partial)
+            elif not _index_matches(existing, key, partial):
+                raise CategoryLeaderboardSchemaInvalid(
+                    f"category leaderboard index {name} has incompatible options"
+                )
+        markers = collection.database[MIGRATIONS_COLLECTION]
+        if force_backfill or markers.find_one({"_id": BACKFILL_MARKER}, {"_id": 1}) is None:
+            started = time.perf_counter()
+            matched = backfill_category_totals(collection)
+            markers.update_one(
+                {"_id": BACKFILL_MARKER},
+                {"$set": {"users": matched, "completed_at": time.time()}},
+                upsert=True,
+            )
+            logger.info(
+                "category leaderboard totals backfilled for %d users in %.2fs",
+                matched,
+                time.perf_counter() - started,
+            )
+    except (PyMongoError, CategoryLeaderboardSchemaInvalid) as exc:
+        logger.warning("category leaderboard schema not ready; using aggregation: %s", exc)
+        SCHEMA_READINESS.mark_failed(SCHEMA_NAME, collection, str(exc))
+        return False
+    SCHEMA_READINESS.mark_ready(SCHEMA_NAME, collection)
+    return True
+
+
+def category_leaderboard_ready(collection) -> bool:
+    return collection is not None and SCHEMA_READINESS.is_ready(SCHEMA_NAME, collection)
+
+
+class LeaderboardCache:
+    """Short-TTL, handle-bound cache of leaderboard rows shared by every board.
+
+    Concurrent misses for one key are coalesced into a single load; loader
+    exceptions propagate and are never cached.
+    """
+
+    def __init__(self, ttl_seconds: float, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self._clock = clock
+        self._lock = Lock()
+        self._load_locks: dict[Hashable, Lock] = {}
+        self._entries: dict[Hashable, tuple[object, float, list]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def _fresh(self, handle: object, key: Hashable) -> list | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_handle, expires_at, rows = entry
+        if not same_handle(stored_handle, handle) or self._clock() >= expires_at:
+            return None
+        return rows
+
+    def get(self, handle: object, key: Hashable, loader: Callable[[], list]) -> list:
+        with self._lock:
+            rows = self._fresh(handle, key)
+            if rows is not None:
+                self._hits += 1
+                return list(rows)
+            load_lock = self._load_locks.setdefault(key, Lock())
+        with load_lock:
+            with self._lock:
+                rows = self._fresh(handle, key)
+                if rows is not None:
+                    self._hits += 1
+                    return list(rows)
+                self._misses += 1
+            rows = list(loader())
+            with self._lock:
+                self._entries[key] = (handle, self._clock() + self.ttl_seconds, rows)
+            return list(rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+LEADERBOARD_CACHE = LeaderboardCache(LEADERBOARD_CACHE_TTL)
+register_metrics_source("leaderboard_cache", LEADERBOARD_CACHE.metrics)
+
+
+def _leaderboard_handle():
+    import database
+
+    return getattr(database, "collection", None)
+
+
+SCHEMA_READINESS.register(
+    SchemaRequirement(
+        name=SCHEMA_NAME,
+        spec={
+            "indexes": {
+                name: {"key": [list(item) for item in key], "partialFilterExpression": partial}
+                for name, (key, partial) in _INDEXES.items()
+            },
+            "backfill": BACKFILL_MARKER,
+        },
+        handle=_leaderboard_handle,
+        ensure=ensure_category_leaderboard_schema,
+        audit=audit_category_leaderboard_indexes,
+    )
+)
@@ -0,0 +1,258 @@
+"""In-process materialized rank index for the global ``total_points`` leaderboard.
+
+MongoDB stays the only authority for points. This index is a read model: a
+sorted list of ``(-total_points, user_id)`` keys plus the few display fields the
+leaderboard renders. Position, next-place gap and page reads are ``bisect``
+lookups instead of ``count_documents``/``skip`` scans over the user collection.
+
+The index is fed from the database write helpers and the exactly-once result
+stores after each acknowledged ``total_points`` write (new users are inserted
+when ``init_user_stats`` creates them), refreshed per user whenever a caller
+reads that user's authoritative document, and rebuilt by a periodic full
+reconciliation. Until the first reconciliation, or when the last one is older
+than ``max_age_seconds``, every query returns ``None`` and callers fall back to
+MongoDB, so a stale or empty index can never replace the durable answer.
+"""
+from __future__ import annotations
+
+import bisect
+import time
+from collections.abc import Callable, Iterable
+from threading import Lock
+
+from runtime_metrics import LatencyHistogram
+
+RANK_FIELDS = {"_id": 1, "total_points": 1, "total_tests": 1, "username": 1, "first_name": 1}
+_DEFAULT_FIRST_NAME = "Пользователь"
+
+
+def _points(value) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class LeaderboardRankIndex:
+    """Thread-safe sorted rank structure with O(log n) rank and page lookups."""
+
+    def __init__(
+        self,
+        *,
+        max_age_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_age_seconds = max(0.0, float(max_age_seconds))
+        self._clock = clock
+        self._lock = Lock()
+        self._keys: list[tuple[int, str]] = []
+        self._rows: dict[str, dict] = {}
+        self._loaded_at: float | None = None
+        self._scanning = False
+        self._touched_during_scan: set[str] = set()
+        self._hits = 0
+        self._fallbacks = 0
+        self._last_drift = 0
+        self._reconcile_latency = LatencyHistogram()
+
+    # ── readiness ──────────────────────────────────────────────
+
+    def _fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return self._clock() - self._loaded_at <= self.max_age_seconds
+
+    def ready(self) -> bool:
+        with self._lock:
+            return self._fresh()
+
+    def _serve(self) -> bool:
+        if self._fresh():
+            self._hits += 1
+            return True
+        self._fallbacks += 1
+        return False
+
+    # ── mutation ───────────────────────────────────────────────
+
+    def _put(self, user_id: str, row: dict) -> None:
+        previous = self._rows.get(user_id)
+        if previous is not None:
+            old_key = (-previous["total_points"], user_id)
+            index = bisect.bisect_left(self._keys, old_key)
+            if index < len(self._keys) and self._keys[index] == old_key:
+                del self._keys[index]
+        self._rows[user_id] = row
+        bisect.insort(self._keys, (-row["total_points"], user_id))
+
+    def _mark_touched(self, user_id: str) -> None:
+        if self._scanning:
+            self._touched_during_scan.add(user_id)
+
+    def observe(self, document: dict | None) -> None:
+        """Replace one user's row with an authoritative document read from MongoDB."""
+        if not document or document.get("_id") is None:
+            return
+        user_id = str(document["_id"])
+        row = {
+            "_id": user_id,
+            "total_points": _points(document.get("total_points")),
+            "total_tests": _points(document.get("total_tests")),
+            "username": document.get("username", ""),
+            "first_name": document.get("first_name") or _DEFAULT_FIRST_NAME,
+        }
+        with self._lock:
+            if self._loaded_at is None and not self._scanning:
+                return
+            self._mark_touched(user_id)
+            self._put(user_id, row)
+
+    def apply_delta(
+        self,
+        user_id,
+        points: int = 0,
+        *,
+        tests: int = 0,
+        username: str | None = None,
+        first_name: str | None = None,
+    ) -> None:
+        """Mirror one acknowledged ``$inc`` on ``total_points`` (and display fields)."""
+        user_id = str(user_id)
+        with self._lock:
+            # Before the first full load a delta has no base row to apply to.
+            if self._loaded_at is None:
+                return
+            current = self._rows.get(user_id)
+            row = dict(current) if current is not None else {
+                "_id": user_id,
+                "total_points": 0,
+                "total_tests": 0,
+                "username": "",
+                "first_name": _DEFAULT_FIRST_NAME,
+            }
+            row["total_points"] += _points(points)
+            row["total_tests"] += _points(tests)
+            if username is not None:
+                row["username"] = username
+            if first_name:
+                row["first_name"] = first_name
+            self._mark_touched(user_id)
+            self._put(user_id, row)
+
+    def reconcile(self, documents: Iterable[dict]) -> int:
+        """Rebuild from a full scan; returns how many users had drifted.
+
+        Users written while the scan was running keep their live row: their
+        delta was applied to the live index exactly once, while the scanned
+        value may or may not include it.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._scanning = True
+            self._touched_during_scan = set()
+        try:
+            rows: dict[str, dict] = {}
+            for document in documents:
+                if document.get("_id") is None:
+                    continue
+                user_id = str(document["_id"])
+                rows[user_id] = {
+                    "_id": user_id,
+                    "total_points": _points(document.get("total_points")),
+                    "total_tests": _points(document.get("total_tests")),
+                    "username": document.get("username", ""),
+                    "first_name": document.get("first_name") or _DEFAULT_FIRST_NAME,
+                }
+            with self._lock:
+                for user_id in self._touched_during_scan:
+                    live = self._rows.get(user_id)
+                    if live is not None:
+                        rows[user_id] = live
+                drift = 0
+                if self._loaded_at is not None:
+                    drift = sum(
+                        1
+                        for user_id, row in rows.items()
+                        if self._rows.get(user_id, {}).get("total_points") != row["total_points"]
+                    )
+                self._rows = rows
+                self._keys = sorted((-row["total_points"], user_id) for user_id, row in rows.items())
+                self._loaded_at = self._clock()
+                self._last_drift = drift
+                return drift
+        finally:
+            with self._lock:
+                self._scanning = False
+                self._touched_during_scan = set()
+            self._reconcile_latency.observe(time.perf_counter() - started)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys = []
+            self._rows = {}
+            self._loaded_at = None
+
+    # ── queries (None means "not ready, ask MongoDB") ─────────
+
+    def position(self, points: int) -> int | None:
+        """1-based rank: users with strictly more points, plus one (ties share a place)."""
+        with self._lock:
+            if not self._serve():
+                return None
+            return bisect.bisect_left(self._keys, (-_points(points), "")) + 1
+
+    def points_to_next_place(self, points: int) -> tuple[bool, int | None]:
+        """Return ``(served, gap)``; ``gap`` is ``None`` when nobody scores higher."""
+        points = _points(points)
+        with self._lock:
+            if not self._serve():
+                return False, None
+            index = bisect.bisect_left(self._keys, (-points, ""))
+            if index == 0:
+                return True, None
+            return True, -self._keys[index - 1][0] - points
+
+    def total(self) -> int | None:
+        with self._lock:
+            if not self._serve():
+                return None
+            return len(self._keys)
+
+    def page(self, offset: int, limit: int) -> list[dict] | None:
+        offset = max(0, int(offset))
+        limit = max(0, int(limit))
+        with self._lock:
+            if not self._serve():
+                return None
+            keys = self._keys[offset:offset + limit]
+            return [
+                {**self._rows[user_id], "_rank": offset + index}
+                for index, (_, user_id) in enumerate(keys, start=1)
+            ]
+
+    def page_after(self, points: int, user_id, limit: int) -> list[dict] | None:
+        """Keyset page: rows strictly after the ``(points, user_id)`` cursor."""
+        limit = max(0, int(limit))
+        with self._lock:
+            if not self._serve():
+                return None
+            start = bisect.bisect_right(self._keys, (-_points(points), str(user_id)))
+            keys = self._keys[start:start + limit]
+            return [
+                {**self._rows[key_user_id], "_rank": start + index}
+                for index, (_, key_user_id) in enumerate(keys, start=1)
+            ]
+
+    def metrics(self) -> dict:
+        with self._lock:
+            age = None if self._loaded_at is None else round(self._clock() - self._loaded_at, 3)
+            snapshot = {
+                "ready": self._fresh(),
+                "users": len(self._keys),
+                "age_seconds": age,
+                "hits": self._hits,
+                "fallbacks": self._fallbacks,
+                "last_reconcile_drift": self._last_drift,
+            }
+        snapshot["reconcile"] = self._reconcile_latency.snapshot()
+        return snapshot
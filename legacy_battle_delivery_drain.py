@@ -1,13 +1,13 @@
 """Battle-only durable outbox drain for production Telegram PvP results."""
 from __future__ import annotations
 
-import asyncio
 from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
 from typing import Any
 
 from battle_integrity import BattleStoreUnavailable, get_pending_final_battles
 from legacy_battle_delivery_flow import deliver_final_battle_once
+from storage_executor import StorageRunner, run_background
 from telegram_delivery_retry import send_with_durable_retry_after
 
 
@@ -38,12 +38,13 @@ async def drain_pending_battles(
     *,
     sender: Callable[[dict, str], Awaitable[Any]],
     limit: int = 50,
+    run_storage: StorageRunner = run_background,
 ) -> BattleDeliveryDrainSummary:
     """Drain retained outbox-v1 battle results with per-battle failure isolation."""
     if isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0:
         raise ValueError("limit must be a positive integer")
     try:
-        battles = await asyncio.to_thread(get_pending_final_battles, limit)
+        battles = await run_storage(get_pending_final_battles, limit)
     except BattleStoreUnavailable as exc:
         return BattleDeliveryDrainSummary(
             errors=(f"battle-list:<queue>:{type(exc).__name__}:{exc}"[:500],)
@@ -63,7 +64,9 @@ async def drain_pending_battles(
         identifier = "<unknown>"
         try:
             identifier = _battle_id(battle)
-            outcome = await deliver_final_battle_once(battle, durable_sender)
+            outcome = await deliver_final_battle_once(
+                battle, durable_sender, run_storage=run_storage
+            )
             sends += int(outcome.creator_sent) + int(outcome.opponent_sent)
             deferred += int(outcome.creator_pending) + int(outcome.opponent_pending)
             errors.extend(
@@ -7,6 +7,7 @@ from typing import Any
 
 from battle_integrity import BATTLE_DELIVERY_PROTOCOL_OUTBOX
 from legacy_delivery_worker import deliver_battle_recipient_once
+from storage_executor import StorageRunner, run_background
 
 
 class LegacyBattleDeliveryStateInvalid(RuntimeError):
@@ -52,6 +53,8 @@ def _error(role: str, exc: Exception) -> str:
 async def deliver_final_battle_once(
     battle: dict,
     sender: Callable[[dict, str], Awaitable[Any]],
+    *,
+    run_storage: StorageRunner = run_background,
 ) -> BattleDeliveryOutcome:
     battle_id, creator_id, opponent_id = _battle_identity(battle)
     sent = {"creator": False, "opponent": False}
@@ -59,7 +62,9 @@ async def deliver_final_battle_once(
     errors: list[str] = []
     for role, user_id in (("creator", creator_id), ("opponent", opponent_id)):
         try:
-            delivered_now = await deliver_battle_recipient_once(battle_id, user_id, sender)
+            delivered_now = await deliver_battle_recipient_once(
+                battle_id, user_id, sender, run_storage=run_storage
+            )
             sent[role] = delivered_now
             pending[role] = not delivered_now
         except Exception as exc:
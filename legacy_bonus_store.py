@@ -14,6 +14,8 @@ from pymongo.errors import PyMongoError
 
 import database
 from legacy_result_store import LegacyResultStoreUnavailable
+from profile_cache import invalidate_profile
+from result_receipts import ResultReceiptsUnavailable, read_receipt, write_once
 
 _CHALLENGE_MODES = frozenset({"random20", "hardcore20"})
 
@@ -81,19 +83,13 @@ def _stage(receipt, *, owner: str, claimed_now: bool) -> dict:
 
 def _backfill_legacy_receipt(collection, *, uid: str, receipt_path: str) -> dict:
     receipt = {"bonus": 0, "eligible": False, "legacy": True}
-    result = collection.update_one(
-        {"_id": uid, receipt_path: {"$exists": False}},
-        {"$set": {receipt_path: receipt}},
+    write = write_once(
+        collection, {"_id": uid}, {}, uid=uid, path=receipt_path, receipt=receipt
     )
-    if result.modified_count == 1:
+    if write.applied:
         return {"bonus": 0, "eligible": False, "claimed_now": False}
     refreshed = collection.find_one({"_id": uid}, {receipt_path: 1}) or {}
-    current: object = refreshed
-    for part in receipt_path.split("."):
-        if not isinstance(current, dict) or part not in current:
-            current = None
-            break
-        current = current[part]
+    current, _found = read_receipt(refreshed, uid, receipt_path)
     if isinstance(current, dict) and current.get("legacy") is True:
         return {"bonus": 0, "eligible": False, "claimed_now": False}
     raise LegacyResultStoreUnavailable("legacy bonus receipt could not be backfilled")
@@ -124,8 +120,7 @@ def claim_daily_bonus_for_result(
         if not entry:
             raise LegacyResultStoreUnavailable("daily bonus user document is missing")
 
-        receipts = entry.get("daily_bonus_receipts", {})
-        stored_receipt = receipts.get(day_key) if isinstance(receipts, dict) else None
+        stored_receipt, _found = read_receipt(entry, uid, receipt_path)
         owner_marker, owner_exists = _entry_field(entry, owner_path)
 
         if isinstance(stored_receipt, dict) and stored_receipt.get("legacy") is True:
@@ -155,19 +150,20 @@ def claim_daily_bonus_for_result(
             "eligible": True,
             "result_owner": owner,
         }
-        result = collection.update_one(
+        write = write_once(
+            collection,
+            {"_id": uid, owner_path: owner},
             {
-                "_id": uid,
-                receipt_path: {"$exists": False},
-                owner_path: owner,
-            },
-            {
-                "$set": {receipt_path: receipt},
                 "$max": {"last_daily_bonus": day},
                 "$inc": {"total_points": bonus},
             },
+            uid=uid,
+            path=receipt_path,
+            receipt=receipt,
         )
-        if result.modified_count == 1:
+        if write.applied:
+            invalidate_profile(uid)
+            database.LEADERBOARD_RANK_INDEX.apply_delta(uid, bonus)
             return _stage(receipt, owner=owner, claimed_now=True)
 
         refreshed = collection.find_one(
@@ -179,13 +175,13 @@ def claim_daily_bonus_for_result(
             raise LegacyResultStoreUnavailable(
                 "daily bonus owner changed or disappeared during claim"
             )
-        stored = refreshed.get("daily_bonus_receipts", {}).get(day_key)
+        stored, _found = read_receipt(refreshed, uid, receipt_path)
         if stored is not None:
             return _stage(stored, owner=owner, claimed_now=False)
         raise LegacyResultStoreUnavailable("daily bonus receipt could not be persisted")
     except LegacyResultStoreUnavailable:
         raise
-    except PyMongoError as exc:
+    except (PyMongoError, ResultReceiptsUnavailable) as exc:
         raise LegacyResultStoreUnavailable("daily bonus write failed") from exc
 
 
@@ -219,11 +215,7 @@ def claim_challenge_bonus_for_result(
         if not entry:
             raise LegacyResultStoreUnavailable("challenge bonus user document is missing")
 
-        receipts = entry.get("challenge_bonus_receipts", {})
-        mode_receipts = receipts.get(mode, {}) if isinstance(receipts, dict) else {}
-        stored_receipt = (
-            mode_receipts.get(day_key) if isinstance(mode_receipts, dict) else None
-        )
+        stored_receipt, _found = read_receipt(entry, uid, receipt_path)
         owner_marker, owner_exists = _entry_field(entry, owner_path)
 
         if isinstance(stored_receipt, dict) and stored_receipt.get("legacy") is True:
@@ -251,21 +243,20 @@ def claim_challenge_bonus_for_result(
             "eligible": True,
             "result_owner": owner,
         }
-        update: dict = {
-            "$set": {receipt_path: receipt},
-            "$max": {date_field: day},
-        }
+        update: dict = {"$max": {date_field: day}}
         if bonus:
             update["$inc"] = {"total_points": bonus}
-        result = collection.update_one(
-            {
-                "_id": uid,
-                receipt_path: {"$exists": False},
-                owner_path: owner,
-            },
+        write = write_once(
+            collection,
+            {"_id": uid, owner_path: owner},
             update,
+            uid=uid,
+            path=receipt_path,
+            receipt=receipt,
         )
-        if result.modified_count == 1:
+        if write.applied:
+            invalidate_profile(uid)
+            database.LEADERBOARD_RANK_INDEX.apply_delta(uid, bonus)
             return _stage(receipt, owner=owner, claimed_now=True)
 
         refreshed = collection.find_one(
@@ -277,13 +268,11 @@ def claim_challenge_bonus_for_result(
             raise LegacyResultStoreUnavailable(
                 "challenge bonus owner changed or disappeared during claim"
             )
-        stored = (
-            refreshed.get("challenge_bonus_receipts", {}).get(mode, {}).get(day_key)
-        )
+        stored, _found = read_receipt(refreshed, uid, receipt_path)
         if stored is not None:
             return _stage(stored, owner=owner, claimed_now=False)
         raise LegacyResultStoreUnavailable("challenge bonus receipt could not be persisted")
     except LegacyResultStoreUnavailable:
         raise
-    except PyMongoError as exc:
+    except (PyMongoError, ResultReceiptsUnavailable) as exc:
         raise LegacyResultStoreUnavailable("challenge bonus write failed") from exc
@@ -13,6 +13,8 @@ import logging
 from pymongo import ASCENDING
 from pymongo.errors import PyMongoError
 
+from schema_readiness import SCHEMA_READINESS, SchemaRequirement
+
 logger = logging.getLogger(__name__)
 
 _BATTLE_LEGACY_TTL = "ttl_battles_created_at"
@@ -28,6 +30,7 @@ _REPORT_LEGACY_TTL = "ttl_reports_created_at"
 _REPORT_DELIVERED_TTL = "ttl_reports_delivered_created_at"
 _REPORT_RETENTION_SECONDS = 90 * 24 * 60 * 60
 _REPORT_DELIVERED_FILTER = {"admin_delivered": True}
+SCHEMA_NAME = "delivery_evidence.retention"
 
 
 class DeliveryRetentionUnavailable(RuntimeError):
@@ -69,6 +72,47 @@ def _ensure_partial_ttl(
         )
 
 
+def _partial_ttl_matches(info: dict, *, target_name: str, expire_after: int, partial_filter: dict) -> bool:
+    target = info.get(target_name)
+    return (
+        target is not None
+        and target.get("key") == [("created_at_dt", ASCENDING)]
+        and target.get("expireAfterSeconds") == expire_after
+        and target.get("partialFilterExpression") == partial_filter
+    )
+
+
+def _delivery_collections():
+    import database
+
+    battles = getattr(database, "battles_collection", None)
+    reports = getattr(database, "reports_collection", None)
+    if battles is None and reports is None:
+        return None
+    return battles, reports
+
+
+def audit_state_aware_delivery_ttl(collections) -> None:
+    """Read-only check that only delivered-terminal evidence can expire."""
+    battles, reports = collections
+    for collection, legacy_name, target_name, expire_after, partial_filter in (
+        (battles, _BATTLE_LEGACY_TTL, _BATTLE_DELIVERED_TTL, _BATTLE_RETENTION_SECONDS, _BATTLE_DELIVERED_FILTER),
+        (reports, _REPORT_LEGACY_TTL, _REPORT_DELIVERED_TTL, _REPORT_RETENTION_SECONDS, _REPORT_DELIVERED_FILTER),
+    ):
+        if collection is None:
+            continue
+        info = collection.index_information()
+        if legacy_name in info or not _partial_ttl_matches(
+            info,
+            target_name=target_name,
+            expire_after=expire_after,
+            partial_filter=partial_filter,
+        ):
+            raise DeliveryRetentionUnavailable(
+                f"delivery retention index {target_name} drifted"
+            )
+
+
 def ensure_state_aware_delivery_ttl() -> bool:
     """Replace generic battle/report TTL indexes with delivered-only TTL indexes.
 
@@ -76,12 +120,10 @@ def ensure_state_aware_delivery_ttl() -> bool:
     no-Mongo test process). If either configured collection cannot be migrated,
     the function fails closed instead of claiming pending delivery is protected.
     """
-    import database
-
-    battles = getattr(database, "battles_collection", None)
-    reports = getattr(database, "reports_collection", None)
-    if battles is None and reports is None:
+    collections = _delivery_collections()
+    if collections is None:
         return False
+    battles, reports = collections
 
     try:
         if battles is not None:
@@ -100,9 +142,24 @@ def ensure_state_aware_delivery_ttl() -> bool:
                 expire_after=_REPORT_RETENTION_SECONDS,
                 partial_filter=_REPORT_DELIVERED_FILTER,
             )
+        SCHEMA_READINESS.mark_ready(SCHEMA_NAME, collections)
         return True
     except PyMongoError as exc:
         logger.exception("failed to install state-aware delivery retention")
         raise DeliveryRetentionUnavailable(
             "battle/report delivery retention migration failed"
         ) from exc
+
+
+SCHEMA_READINESS.register(
+    SchemaRequirement(
+        name=SCHEMA_NAME,
+        spec={
+            _BATTLE_DELIVERED_TTL: [_BATTLE_RETENTION_SECONDS, _BATTLE_DELIVERED_FILTER],
+            _REPORT_DELIVERED_TTL: [_REPORT_RETENTION_SECONDS, _REPORT_DELIVERED_FILTER],
+        },
+        handle=_delivery_collections,
+        ensure=lambda _collections: ensure_state_aware_delivery_ttl(),
+        audit=audit_state_aware_delivery_ttl,
+    )
+)
@@ -10,12 +10,15 @@ Mongo acknowledgement later fails, the lease is left to expire rather than
 being released immediately, reducing duplicate-send risk.
 
 All durable storage boundaries are synchronous PyMongo operations. They are
-executed in worker threads so lease acquisition/acknowledgement cannot stall the
-PTB asyncio loop around latency-sensitive Telegram sends.
+executed in a ``storage_executor`` lane so lease acquisition/acknowledgement
+cannot stall the PTB asyncio loop around latency-sensitive Telegram sends. The
+caller picks the lane through ``run_storage``: scheduled drains keep the
+default background lane, while a drain a handler awaits inline (a finished
+battle, a confirmed report) passes ``run_interactive`` so it does not queue
+behind bulk outbox work.
 """
 from __future__ import annotations
 
-import asyncio
 import math
 from collections.abc import Awaitable, Callable
 from typing import Any
@@ -41,6 +44,7 @@ from report_integrity import (
     mark_report_delivery_stage_delivered,
     release_report_delivery_stage,
 )
+from storage_executor import StorageRunner, run_background
 
 
 class LegacyDeliveryStateInvalid(RuntimeError):
@@ -80,9 +84,11 @@ async def deliver_battle_recipient_once(
     battle_id: str,
     user_id: int,
     sender: Callable[[dict, str], Awaitable[Any]],
+    *,
+    run_storage: StorageRunner = run_background,
 ) -> bool:
     """Attempt one leased battle-result delivery for one participant."""
-    claim = await asyncio.to_thread(claim_battle_result_delivery, battle_id, user_id)
+    claim = await run_storage(claim_battle_result_delivery, battle_id, user_id)
     if claim is None:
         return False
     battle = claim.get("battle")
@@ -96,7 +102,7 @@ async def deliver_battle_recipient_once(
     try:
         await sender(battle, role)
     except LegacyDeliveryPermanentFailure as exc:
-        settled = await asyncio.to_thread(
+        settled = await run_storage(
             settle_battle_result_delivery_failure,
             battle_id,
             user_id,
@@ -109,7 +115,7 @@ async def deliver_battle_recipient_once(
             ) from exc
         return False
     except LegacyDeliveryDeferred as exc:
-        deferred = await asyncio.to_thread(
+        deferred = await run_storage(
             defer_battle_result_delivery,
             battle_id,
             user_id,
@@ -123,7 +129,7 @@ async def deliver_battle_recipient_once(
             ) from exc
         return False
     except Exception as exc:
-        await asyncio.to_thread(
+        await run_storage(
             release_battle_result_delivery,
             battle_id,
             user_id,
@@ -132,7 +138,7 @@ async def deliver_battle_recipient_once(
         )
         raise
 
-    acknowledged = await asyncio.to_thread(
+    acknowledged = await run_storage(
         mark_battle_result_delivered,
         battle_id,
         user_id,
@@ -149,8 +155,10 @@ async def _deliver_report_stage_once(
     report_id: str,
     stage: str,
     sender: Callable[[dict], Awaitable[Any]],
+    *,
+    run_storage: StorageRunner = run_background,
 ) -> bool:
-    claim = await asyncio.to_thread(claim_report_delivery_stage, report_id, stage)
+    claim = await run_storage(claim_report_delivery_stage, report_id, stage)
     if claim is None:
         return False
     report = claim.get("report")
@@ -160,7 +168,7 @@ async def _deliver_report_stage_once(
     if not isinstance(token, str) or not token:
         raise LegacyDeliveryStateInvalid("report delivery claim token is missing")
     if stage == "photo" and not report.get("photo_file_id"):
-        await asyncio.to_thread(
+        await run_storage(
             release_report_delivery_stage,
             report_id,
             stage,
@@ -174,7 +182,7 @@ async def _deliver_report_stage_once(
     try:
         await sender(report)
     except LegacyDeliveryPermanentFailure as exc:
-        settled = await asyncio.to_thread(
+        settled = await run_storage(
             settle_report_delivery_stage_failure,
             report_id,
             stage,
@@ -187,7 +195,7 @@ async def _deliver_report_stage_once(
             ) from exc
         return False
     except LegacyDeliveryDeferred as exc:
-        deferred = await asyncio.to_thread(
+        deferred = await run_storage(
             defer_report_delivery_stage,
             report_id,
             stage,
@@ -201,7 +209,7 @@ async def _deliver_report_stage_once(
             ) from exc
         return False
     except Exception as exc:
-        await asyncio.to_thread(
+        await run_storage(
             release_report_delivery_stage,
             report_id,
             stage,
@@ -210,7 +218,7 @@ async def _deliver_report_stage_once(
         )
         raise
 
-    acknowledged = await asyncio.to_thread(
+    acknowledged = await run_storage(
         mark_report_delivery_stage_delivered,
         report_id,
         stage,
@@ -227,11 +235,13 @@ async def deliver_report_once(
     report_id: str,
     photo_sender: Callable[[dict], Awaitable[Any]],
     text_sender: Callable[[dict], Awaitable[Any]],
+    *,
+    run_storage: StorageRunner = run_background,
 ) -> tuple[bool, bool]:
     """Deliver photo before text without mistaking another worker's lease for ack."""
-    photo = await _deliver_report_stage_once(report_id, "photo", photo_sender)
+    photo = await _deliver_report_stage_once(report_id, "photo", photo_sender, run_storage=run_storage)
     if not photo:
-        photo_state = await asyncio.to_thread(
+        photo_state = await run_storage(
             get_report_delivery_stage_state,
             report_id,
             "photo",
@@ -246,5 +256,5 @@ async def deliver_report_once(
             # plus terminal_failed=True so text can still be attempted.
             return False, False
 
-    text = await _deliver_report_stage_once(report_id, "text", text_sender)
+    text = await _deliver_report_stage_once(report_id, "text", text_sender, run_storage=run_storage)
     return photo, text
@@ -13,7 +13,10 @@ import re
 from pymongo.errors import PyMongoError
 
 import database
+from leaderboard_categories import category_increments
+from profile_cache import invalidate_profile
 from questions.pool_policy import is_non_scoring_learning_pool
+from result_receipts import ResultReceiptsUnavailable, read_receipt, write_once
 
 _LEVEL_KEY_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 
@@ -33,15 +36,6 @@ def _receipt_path(result_id: str) -> str:
     return f"legacy_learning_receipts.{_receipt_digest(result_id)}"
 
 
-def _nested_value(document: dict, dotted_path: str) -> tuple[object | None, bool]:
-    current: object = document
-    for part in dotted_path.split("."):
-        if not isinstance(current, dict) or part not in current:
-            return None, False
-        current = current[part]
-    return current, True
-
-
 def _score_pair(score: int, total: int) -> tuple[int, int]:
     if (
         isinstance(score, bool)
@@ -114,7 +108,7 @@ def apply_learning_progress_once(
         if existing is None:
             raise LegacyLearningProgressUnavailable("user stats document is unavailable")
 
-        stored, exists = _nested_value(existing, receipt_path)
+        stored, exists = read_receipt(existing, uid, receipt_path)
         if exists:
             validated = _validated_existing_receipt(
                 stored,
@@ -135,28 +129,33 @@ def apply_learning_progress_once(
             "new_achievements": [],
             "applied_at": now,
         }
-        result = collection.update_one(
-            {"_id": uid, receipt_path: {"$exists": False}},
+        write = write_once(
+            collection,
+            {"_id": uid},
             {
                 "$inc": {
                     f"{level_key}_attempts": 1,
                     f"{level_key}_correct": score,
                     f"{level_key}_total": total,
+                    **category_increments(level_key, score, total),
                 },
                 "$set": {
                     "username": username or "",
                     "first_name": first_name or "Пользователь",
                     "last_activity": now,
-                    receipt_path: receipt,
                 },
                 "$max": {f"{level_key}_best_score": score},
             },
+            uid=uid,
+            path=receipt_path,
+            receipt=receipt,
         )
-        if getattr(result, "modified_count", 0) == 1:
+        if write.applied:
+            invalidate_profile(uid)
             return {**receipt, "applied": True}
 
         refreshed = collection.find_one({"_id": uid})
-        stored, exists = _nested_value(refreshed or {}, receipt_path)
+        stored, exists = read_receipt(refreshed or {}, uid, receipt_path)
         if exists:
             validated = _validated_existing_receipt(
                 stored,
@@ -170,5 +169,5 @@ def apply_learning_progress_once(
         )
     except LegacyLearningProgressUnavailable:
         raise
-    except PyMongoError as exc:
+    except (PyMongoError, ResultReceiptsUnavailable) as exc:
         raise LegacyLearningProgressUnavailable("learning progress write failed") from exc
@@ -9,7 +9,6 @@ immediate release. Durable stage evidence also repairs a missing aggregate
 """
 from __future__ import annotations
 
-import asyncio
 from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
 from typing import Any
@@ -17,6 +16,7 @@ from typing import Any
 from legacy_delivery_worker import deliver_report_once
 from legacy_report_delivery_repair import repair_report_delivery_aggregate
 from report_integrity import ReportStoreUnavailable, get_pending_reports
+from storage_executor import StorageRunner, run_background
 from telegram_delivery_retry import send_with_durable_retry_after
 
 
@@ -48,6 +48,7 @@ async def drain_pending_reports(
     photo_sender: Callable[[dict], Awaitable[Any]],
     text_sender: Callable[[dict], Awaitable[Any]],
     limit: int = 50,
+    run_storage: StorageRunner = run_background,
 ) -> ReportDeliveryDrainSummary:
     """Drain only report outbox entries, isolating per-report delivery failures."""
     if isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0:
@@ -55,7 +56,7 @@ async def drain_pending_reports(
 
     errors: list[str] = []
     try:
-        reports = await asyncio.to_thread(get_pending_reports, limit)
+        reports = await run_storage(get_pending_reports, limit)
     except ReportStoreUnavailable as exc:
         return ReportDeliveryDrainSummary(
             errors=(f"report-list:<queue>:{type(exc).__name__}:{exc}"[:500],)
@@ -85,24 +86,25 @@ async def drain_pending_reports(
             identifier = report_id
             # Repair the crash window where both stage obligations were already
             # settled but the aggregate admin_delivered write did not land.
-            if await asyncio.to_thread(repair_report_delivery_aggregate, report_id):
+            if await run_storage(repair_report_delivery_aggregate, report_id):
                 continue
             try:
                 photo_sent, text_sent = await deliver_report_once(
                     report_id,
                     durable_photo_sender,
                     durable_text_sender,
+                    run_storage=run_storage,
                 )
             except Exception:
                 # A stage acknowledgement may have landed before its aggregate
                 # write failed. Prove terminal stage evidence before surfacing
                 # the error; if repair succeeds there is nothing left to send.
-                if await asyncio.to_thread(repair_report_delivery_aggregate, report_id):
+                if await run_storage(repair_report_delivery_aggregate, report_id):
                     continue
                 raise
 
             stage_sends += int(photo_sent) + int(text_sent)
-            terminal = await asyncio.to_thread(
+            terminal = await run_storage(
                 repair_report_delivery_aggregate,
                 report_id,
             )
@@ -10,6 +10,7 @@ from legacy_session_recovery import (
     persisted_result_time_seconds,
     recovery_fields,
 )
+from session_question_refs import legacy_session_questions
 
 
 class LegacyRestartStateInvalid(RuntimeError):
@@ -84,7 +85,7 @@ def classify_restart_session(session: dict) -> RestartDecision:
     if not isinstance(session, dict) or session.get("status") != "in_progress":
         raise LegacyRestartStateInvalid("restart session is not in progress")
 
-    questions = session.get("questions_data")
+    questions = legacy_session_questions(session)
     if not isinstance(questions, list) or not questions:
         raise LegacyRestartStateInvalid("restart session has no durable questions")
     total = len(questions)
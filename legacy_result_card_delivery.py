@@ -239,6 +239,66 @@ def claim_result_card_delivery(
         raise ResultCardDeliveryUnavailable("result-card claim failed") from exc
 
 
+def record_result_card_photo(
+    session_id: str,
+    user_id: int | str,
+    claim_token: str,
+    file_id: str,
+) -> bool:
+    """Remember the uploaded image card under the live lease.
+
+    Written before the delivery acknowledgement: if the acknowledgement is lost
+    after a successful upload, the lease-expiry replay resends this ``file_id``
+    instead of rendering and uploading the card again.
+    """
+    session_id = _required_session_id(session_id)
+    claim_token = _required_claim_token(claim_token)
+    if not isinstance(file_id, str) or not file_id.strip() or len(file_id) > 256:
+        raise ValueError("photo file_id is invalid")
+    collection = _collection()
+    path = "result_card_delivery"
+    try:
+        result = collection.update_one(
+            {
+                "_id": session_id,
+                "user_id": _owner_id(user_id),
+                f"{path}.protocol": RESULT_CARD_DELIVERY_PROTOCOL,
+                f"{path}.delivered": {"$ne": True},
+                f"{path}.claim_token": claim_token,
+            },
+            {"$set": {f"{path}.photo_file_id": file_id.strip()}},
+        )
+        return result.modified_count == 1
+    except PyMongoError as exc:
+        raise ResultCardDeliveryUnavailable("result-card photo write failed") from exc
+
+
+def forget_result_card_photo(
+    session_id: str,
+    user_id: int | str,
+    claim_token: str,
+) -> bool:
+    """Drop a stored ``file_id`` Telegram rejected, so replays send text instead."""
+    session_id = _required_session_id(session_id)
+    claim_token = _required_claim_token(claim_token)
+    collection = _collection()
+    path = "result_card_delivery"
+    try:
+        result = collection.update_one(
+            {
+                "_id": session_id,
+                "user_id": _owner_id(user_id),
+                f"{path}.protocol": RESULT_CARD_DELIVERY_PROTOCOL,
+                f"{path}.delivered": {"$ne": True},
+                f"{path}.claim_token": claim_token,
+            },
+            {"$unset": {f"{path}.photo_file_id": ""}},
+        )
+        return result.modified_count == 1
+    except PyMongoError as exc:
+        raise ResultCardDeliveryUnavailable("result-card photo reset failed") from exc
+
+
 def mark_result_card_delivered(
     session_id: str,
     user_id: int | str,
@@ -16,10 +16,12 @@ import logging
 import math
 from datetime import UTC, datetime
 
-from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError, PyMongoError
 
 import database
+from leaderboard_categories import category_increments
+from profile_cache import invalidate_profile
+from result_receipts import ResultReceiptsUnavailable, read_receipt, write_once
 
 logger = logging.getLogger(__name__)
 
@@ -96,12 +98,8 @@ def _receipt_streak(value, field: str) -> int:
     return parsed
 
 
-def _receipt_snapshot(doc: dict, result_id: str) -> dict:
+def _receipt_snapshot(value) -> dict:
     """Return the durable per-result snapshot, including older receipt shapes."""
-    receipts = doc.get("legacy_result_receipts", {})
-    if not isinstance(receipts, dict):
-        return {}
-    value = receipts.get(_receipt_digest(result_id))
     if isinstance(value, dict):
         completed_at = value.get("completed_at")
         if isinstance(completed_at, datetime):
@@ -488,6 +486,7 @@ def apply_base_result_once(
                 f"{level_key}_attempts": 1,
                 f"{level_key}_correct": score,
                 f"{level_key}_total": total,
+                **category_increments(level_key, score, total),
             }
             if is_perfect:
                 inc["perfect_count"] = 1
@@ -496,7 +495,6 @@ def apply_base_result_once(
                 "username": username or "",
                 "first_name": first_name or "Пользователь",
                 "last_activity": write_now,
-                receipt_path: receipt_snapshot,
                 **daily_fields,
                 **challenge_fields,
             }
@@ -505,7 +503,6 @@ def apply_base_result_once(
 
             query = {
                 "_id": uid,
-                receipt_path: {"$exists": False},
                 "total_tests": _cas_expected(entry, "total_tests"),
             }
             if daily_fields:
@@ -520,7 +517,8 @@ def apply_base_result_once(
                 query[bonus_owner_path] = {"$exists": False}
                 set_fields[bonus_owner_path] = result_owner
 
-            after = collection.find_one_and_update(
+            write = write_once(
+                collection,
                 query,
                 {
                     "$inc": inc,
@@ -530,9 +528,15 @@ def apply_base_result_once(
                         "max_streak_ever": max_streak,
                     },
                 },
-                return_document=ReturnDocument.AFTER,
+                uid=uid,
+                path=receipt_path,
+                receipt=receipt_snapshot,
+                return_after=True,
             )
-            if after is not None:
+            after = write.after
+            if write.applied and after is not None:
+                invalidate_profile(uid)
+                database.LEADERBOARD_RANK_INDEX.observe(after)
                 return {
                     "applied": True,
                     "earned_base": earned_base,
@@ -542,9 +546,10 @@ def apply_base_result_once(
                     "user": after,
                 }
 
-            existing = collection.find_one({"_id": uid, receipt_path: {"$exists": True}})
-            if existing:
-                durable_receipt = _receipt_snapshot(existing, result_id)
+            existing = collection.find_one({"_id": uid})
+            stored_receipt, receipt_exists = read_receipt(existing, uid, receipt_path)
+            if existing and receipt_exists:
+                durable_receipt = _receipt_snapshot(stored_receipt)
                 if not durable_receipt.get("completed_at"):
                     raise LegacyResultStoreUnavailable("base result receipt timestamp is invalid")
                 stored_result = durable_receipt.get("result") or durable_result
@@ -557,14 +562,14 @@ def apply_base_result_once(
                     "user": existing,
                 }
 
-            entry = collection.find_one({"_id": uid})
+            entry = existing
             if entry is None:
                 raise LegacyResultStoreUnavailable("user stats document disappeared during result CAS")
 
         raise LegacyResultStoreUnavailable("base result CAS retry budget exhausted")
     except LegacyResultStoreUnavailable:
         raise
-    except PyMongoError as exc:
+    except (PyMongoError, ResultReceiptsUnavailable) as exc:
         raise LegacyResultStoreUnavailable("base result write failed") from exc
 
 
@@ -596,6 +601,9 @@ def claim_achievement_once(
             update,
         )
         if result.modified_count == 1:
+            invalidate_profile(uid)
+            if reward:
+                database.LEADERBOARD_RANK_INDEX.apply_delta(uid, reward)
             return True
 
         existing = collection.find_one({"_id": uid}, {achievement_path: 1})
@@ -8,9 +8,12 @@ from pymongo import ASCENDING
 from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
 
 from legacy_session_spec import validated_session_spec
+from schema_readiness import SCHEMA_READINESS, SchemaRequirement
+from session_question_refs import compact_legacy_spec
 
 _ACTIVE_INDEX = "uniq_active_quiz_user"
 _ACTIVE_FILTER = {"status": "in_progress"}
+ACTIVE_SESSION_SCHEMA = "quiz_sessions.active_unique"
 
 
 class QuizSessionAccessUnavailable(RuntimeError):
@@ -62,20 +65,25 @@ def find_duplicate_active_session_users(limit: int = 50) -> list[dict]:
         ) from exc
 
 
+def _active_index_matches(existing: dict) -> bool:
+    return (
+        existing.get("key") == [("user_id", ASCENDING)]
+        and existing.get("unique") is True
+        and existing.get("partialFilterExpression") == _ACTIVE_FILTER
+    )
+
+
 def ensure_active_session_unique_index() -> bool:
     """Ensure at most one ``in_progress`` session exists per user."""
     collection = _collection()
     try:
         existing = collection.index_information().get(_ACTIVE_INDEX)
         if existing is not None:
-            if (
-                existing.get("key") != [("user_id", ASCENDING)]
-                or existing.get("unique") is not True
-                or existing.get("partialFilterExpression") != _ACTIVE_FILTER
-            ):
+            if not _active_index_matches(existing):
                 raise QuizSessionAccessSchemaInvalid(
                     "active-session unique index has incompatible options"
                 )
+            SCHEMA_READINESS.mark_ready(ACTIVE_SESSION_SCHEMA, collection)
             return True
         collection.create_index(
             [("user_id", ASCENDING)],
@@ -84,6 +92,7 @@ def ensure_active_session_unique_index() -> bool:
             name=_ACTIVE_INDEX,
             background=True,
         )
+        SCHEMA_READINESS.mark_ready(ACTIVE_SESSION_SCHEMA, collection)
         return True
     except QuizSessionAccessSchemaInvalid:
         raise
@@ -105,6 +114,30 @@ def ensure_active_session_unique_index() -> bool:
         ) from exc
 
 
+def audit_active_session_unique_index(collection) -> None:
+    """Read-only drift check used by background schema revalidation."""
+    existing = collection.index_information().get(_ACTIVE_INDEX)
+    if existing is None:
+        raise QuizSessionAccessSchemaInvalid("active-session unique index is missing")
+    if not _active_index_matches(existing):
+        raise QuizSessionAccessSchemaInvalid(
+            "active-session unique index has incompatible options"
+        )
+
+
+def _require_active_session_index(collection) -> None:
+    # Verified once per collection handle; launches after that issue no
+    # listIndexes. Drift found by revalidation fails launches closed.
+    if SCHEMA_READINESS.is_ready(ACTIVE_SESSION_SCHEMA, collection):
+        return
+    failure = SCHEMA_READINESS.failure(ACTIVE_SESSION_SCHEMA, collection)
+    if failure is not None:
+        raise QuizSessionAccessSchemaInvalid(
+            f"active-session unique index failed revalidation: {failure}"
+        )
+    ensure_active_session_unique_index()
+
+
 def create_quiz_session_strict(
     *,
     user_id: int | str,
@@ -129,9 +162,9 @@ def create_quiz_session_strict(
         is_retry=is_retry,
     )
 
-    ensure_active_session_unique_index()
     database = _database()
     collection = _collection()
+    _require_active_session_index(collection)
     now = database._now_utc()
     session_id = str(uuid.uuid4())
     uid = database._uid(user_id)
@@ -141,7 +174,7 @@ def create_quiz_session_strict(
         "session_id": session_id,
         "attempt_id": session_id,
         "status": "in_progress",
-        **spec,
+        **compact_legacy_spec(spec),
         "current_index": 0,
         "correct_count": 0,
         "answered_questions": [],
@@ -214,3 +247,23 @@ def get_quiz_session_strict(
         return _collection().find_one(query)
     except PyMongoError as exc:
         raise QuizSessionAccessUnavailable("quiz session lookup failed") from exc
+
+
+def _active_session_handle():
+    return getattr(_database(), "quiz_sessions_collection", None)
+
+
+SCHEMA_READINESS.register(
+    SchemaRequirement(
+        name=ACTIVE_SESSION_SCHEMA,
+        spec={
+            "index": _ACTIVE_INDEX,
+            "key": [["user_id", ASCENDING]],
+            "unique": True,
+            "partialFilterExpression": _ACTIVE_FILTER,
+        },
+        handle=_active_session_handle,
+        ensure=lambda _collection: ensure_active_session_unique_index(),
+        audit=audit_active_session_unique_index,
+    )
+)
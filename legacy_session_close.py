@@ -16,6 +16,7 @@ from legacy_result_card_delivery import (
     ResultCardDeliveryConflict,
     build_result_card_delivery_marker,
 )
+from profile_cache import invalidate_profile
 
 logger = logging.getLogger(__name__)
 
@@ -208,6 +209,7 @@ def finish_completed_owned_quiz_session(
             return_document=ReturnDocument.AFTER,
         )
         if finished is not None:
+            invalidate_profile(user_id)
             return finished
 
         # Lost response or a concurrent terminal transition: only an exact
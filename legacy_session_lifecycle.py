@@ -16,6 +16,12 @@ from pymongo.errors import PyMongoError
 from legacy_attempt_identity import persisted_attempt_id
 from legacy_restart_policy import LegacyRestartStateInvalid, classify_restart_session
 from legacy_session_spec import validated_session_spec
+from session_question_refs import (
+    BANK_VERSION_FIELD,
+    LEGACY_DIGESTS_FIELD,
+    LEGACY_QUESTIONS_FIELD,
+    compact_legacy_spec,
+)
 
 
 class QuizSessionLifecycleUnavailable(RuntimeError):
@@ -161,6 +167,13 @@ def restart_owned_quiz_attempt(
         time_limit=time_limit,
         chat_id=chat_id,
     )
+    stored_spec = compact_legacy_spec(spec)
+    # Drop whichever question format the replaced attempt used and this one does not.
+    stale_format = {
+        field: ""
+        for field in (LEGACY_QUESTIONS_FIELD, BANK_VERSION_FIELD, LEGACY_DIGESTS_FIELD)
+        if field not in stored_spec
+    }
     database = _database()
     collection = _collection()
     owner_filter = _owner_filter(session_id, user_id)
@@ -196,7 +209,7 @@ def restart_owned_quiz_attempt(
                     "status": "in_progress",
                     "attempt_id": new_attempt_id,
                     "previous_attempt_id": expected_attempt_id,
-                    **spec,
+                    **stored_spec,
                     "current_index": 0,
                     "correct_count": 0,
                     "answered_questions": [],
@@ -211,6 +224,7 @@ def restart_owned_quiz_attempt(
                 "$unset": {
                     "end_time": "",
                     "cancelled_at": "",
+                    **stale_format,
                 },
             },
             return_document=ReturnDocument.AFTER,
@@ -10,6 +10,7 @@ from datetime import UTC, datetime
 
 from config import SPEED_MODE_TIMEOUT, TIMED_MODE_TIMEOUT
 from legacy_attempt_identity import persisted_attempt_id
+from session_question_refs import legacy_session_questions
 
 _CHALLENGE_MODES = frozenset({"random20", "hardcore20"})
 _PERSISTED_QUIZ_MODES = frozenset({"level", *_CHALLENGE_MODES})
@@ -35,7 +36,7 @@ def _strict_nonnegative_int(value, field: str) -> int:
 
 
 def session_is_complete(session: dict) -> bool:
-    questions = session.get("questions_data", [])
+    questions = legacy_session_questions(session)
     total = len(questions) if isinstance(questions, list) else 0
     current = session.get("current_index", 0)
     if isinstance(current, bool) or not isinstance(current, int) or current < 0:
@@ -219,7 +220,7 @@ def recovery_fields(session: dict) -> dict:
     return {
         "session_id": session.get("_id"),
         "attempt_id": attempt_id,
-        "questions": session.get("questions_data", []),
+        "questions": legacy_session_questions(session) or [],
         "level_name": session.get("level_name", "Тест"),
         "quiz_chat_id": session.get("chat_id"),
         "current_question": current_question,
@@ -13,18 +13,43 @@ import logging
 from pymongo import ASCENDING
 from pymongo.errors import PyMongoError
 
+from schema_readiness import SCHEMA_READINESS, SchemaRequirement
+
 logger = logging.getLogger(__name__)
 
 _LEGACY_TTL_NAME = "ttl_updated_at"
 _TERMINAL_TTL_NAME = "ttl_terminal_updated_at"
 _TERMINAL_RETENTION_SECONDS = 90 * 24 * 60 * 60
 _TERMINAL_FILTER = {"status": {"$in": ["finished", "cancelled"]}}
+SCHEMA_NAME = "quiz_sessions.retention"
 
 
 class QuizSessionRetentionUnavailable(RuntimeError):
     """Raised when the safety-critical quiz-session TTL migration cannot run."""
 
 
+def _terminal_matches(terminal: dict | None) -> bool:
+    return (
+        terminal is not None
+        and terminal.get("key") == [("updated_at_dt", ASCENDING)]
+        and terminal.get("expireAfterSeconds") == _TERMINAL_RETENTION_SECONDS
+        and terminal.get("partialFilterExpression") == _TERMINAL_FILTER
+    )
+
+
+def _sessions_collection():
+    import database
+
+    return getattr(database, "quiz_sessions_collection", None)
+
+
+def audit_state_aware_session_ttl(collection) -> None:
+    """Read-only check that pending sessions are still outside every TTL."""
+    info = collection.index_information()
+    if _LEGACY_TTL_NAME in info or not _terminal_matches(info.get(_TERMINAL_TTL_NAME)):
+        raise QuizSessionRetentionUnavailable("quiz-session retention index drifted")
+
+
 def ensure_state_aware_session_ttl() -> bool:
     """Install a terminal-only TTL and remove the unsafe generic six-hour TTL.
 
@@ -32,9 +57,7 @@ def ensure_state_aware_session_ttl() -> bool:
     reachable but index migration fails: callers should not pretend the pending
     result evidence is protected while the unsafe generic TTL may still exist.
     """
-    import database
-
-    collection = getattr(database, "quiz_sessions_collection", None)
+    collection = _sessions_collection()
     if collection is None:
         return False
 
@@ -46,12 +69,7 @@ def ensure_state_aware_session_ttl() -> bool:
         if legacy is not None:
             collection.drop_index(_LEGACY_TTL_NAME)
 
-        expected_terminal = (
-            terminal is not None
-            and terminal.get("key") == [("updated_at_dt", ASCENDING)]
-            and terminal.get("expireAfterSeconds") == _TERMINAL_RETENTION_SECONDS
-            and terminal.get("partialFilterExpression") == _TERMINAL_FILTER
-        )
+        expected_terminal = _terminal_matches(terminal)
         if terminal is not None and not expected_terminal:
             collection.drop_index(_TERMINAL_TTL_NAME)
             terminal = None
@@ -64,9 +82,21 @@ def ensure_state_aware_session_ttl() -> bool:
                 name=_TERMINAL_TTL_NAME,
                 background=True,
             )
+        SCHEMA_READINESS.mark_ready(SCHEMA_NAME, collection)
         return True
     except PyMongoError as exc:
         logger.exception("failed to install state-aware quiz-session retention")
         raise QuizSessionRetentionUnavailable(
             "quiz-session retention migration failed"
         ) from exc
+
+
+SCHEMA_READINESS.register(
+    SchemaRequirement(
+        name=SCHEMA_NAME,
+        spec={_TERMINAL_TTL_NAME: [_TERMINAL_RETENTION_SECONDS, _TERMINAL_FILTER]},
+        handle=_sessions_collection,
+        ensure=lambda _collection: ensure_state_aware_session_ttl(),
+        audit=audit_state_aware_session_ttl,
+    )
+)
@@ -6,14 +6,24 @@
 
 import os
 import math
-from pymongo import MongoClient
+from mongo_client import create_mongo_client
 from datetime import datetime
 
+from leaderboard_categories import ensure_category_leaderboard_schema
+from question_analytics import ensure_question_analytics_schema
+from result_receipts import (
+    LAYOUT_COLLECTION,
+    RECEIPTS_COLLECTION,
+    configured_layout,
+    ensure_result_receipts_schema,
+    migrate_embedded_receipts,
+)
+
 MONGO_URL = os.getenv("MONGO_URL")
 if not MONGO_URL:
     raise ValueError("Не задана переменная окружения MONGO_URL")
 
-cluster = MongoClient(MONGO_URL)
+cluster = create_mongo_client(MONGO_URL)
 db      = cluster["bible_bot_db"]
 collection = db["leaderboard"]
 
@@ -161,6 +171,41 @@ for user in users:
         name = user.get("first_name", uid)
         print(f"⬜ {name} ({uid}): уже актуальная схема")
 
+# 4. Категорийные суммы лидербордов «контекст» и «богословие»
+#    (category_context_*, category_hard_*) + частичные индексы под них.
+#    Пересчёт идёт pipeline-обновлением на сервере — атомарно для каждого
+#    документа, поэтому безопасен при работающем боте.
+if ensure_category_leaderboard_schema(collection, force_backfill=True):
+    print("✅ Категорийные суммы лидербордов пересчитаны, индексы на месте")
+else:
+    print("❌ Не удалось пересчитать категорийные суммы лидербордов")
+    errors += 1
+
+# 5. Аналитика вопросов: accuracy и difficulty_bucket хранятся в документе
+#    questions_stats и поддерживаются индексами «самые сложные» / по бакету /
+#    по числу попыток. Пересчёт — тот же серверный pipeline, что и при записи.
+if ensure_question_analytics_schema(db["questions_stats"], force_backfill=True):
+    print("✅ Точность вопросов пересчитана, индексы аналитики на месте")
+else:
+    print("❌ Не удалось пересчитать точность вопросов")
+    errors += 1
+
+# 6. Квитанции результатов в отдельной коллекции result_receipts — только при
+#    RESULT_RECEIPT_STORE=collection (то же значение должно стоять у бота).
+#    Каждая квитанция сначала вставляется в коллекцию и лишь потом снимается
+#    из документа, если не изменилась, — бот может работать во время переноса.
+if configured_layout() == LAYOUT_COLLECTION:
+    receipts = db[RECEIPTS_COLLECTION]
+    if ensure_result_receipts_schema(receipts):
+        report = migrate_embedded_receipts(collection, receipts)
+        print(
+            f"✅ Квитанции перенесены в {RECEIPTS_COLLECTION}: {report['receipts']} "
+            f"у {report['users']} пользователей за {report['seconds']:.1f} с"
+        )
+    else:
+        print("❌ result_receipts недоступна (нужен replica set) — квитанции остались в документах")
+        errors += 1
+
 print("─" * 50)
 print(f"✅ Обновлено: {fixed} | ⬜ Без изменений: {total - fixed - errors} | ❌ Ошибок: {errors}")
 print("🎉 Миграция завершена!")
@@ -0,0 +1,227 @@
+"""Central, instrumented ``MongoClient`` factory.
+
+Every process (bot, Mini App, ``migrate_db.py``) shares one client built
+here. Pool sizing, idle reaping, the pool wait-queue timeout and wire
+compression come from ``config.py``. Compressors whose optional modules
+are not installed are left out, so the client still starts with only
+``zlib``.
+
+The client carries two monitoring listeners. Their data is exposed in the
+``mongo`` metrics source (``/production/metrics``):
+
+* a ``CommandListener`` that records a latency histogram per
+  ``<collection>.<command>`` series (for example ``leaderboard.update``,
+  ``quiz_sessions.find``), plus failure counts by error code;
+* a ``ConnectionPoolListener`` that records pool wait time (check-out
+  started → checked out), check-out failures by reason, and connection
+  churn.
+
+Series are capped at ``MONGO_COMMAND_SERIES_MAX``; later ones fold into
+``_other.<command>``. Listener callbacks run on the calling thread and only
+update in-memory counters.
+"""
+from __future__ import annotations
+
+import importlib.util
+import logging
+from threading import Lock
+
+from pymongo import MongoClient, monitoring
+
+from config import (
+    MONGO_COMMAND_SERIES_MAX,
+    MONGO_COMPRESSORS,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+)
+from runtime_metrics import LatencyHistogram, register_metrics_source
+
+logger = logging.getLogger(__name__)
+
+# Modules pymongo needs for each wire compressor (first importable wins).
+_COMPRESSOR_MODULES = {
+    "zstd": ("backports.zstd", "compression.zstd"),
+    "snappy": ("snappy",),
+    "zlib": ("zlib",),
+}
+_NO_COLLECTION = "-"
+_OTHER_SERIES = "_other"
+
+
+def _module_available(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def available_compressors(preferred=MONGO_COMPRESSORS) -> list[str]:
+    """``preferred`` compressors whose optional modules are installed."""
+    return [
+        name
+        for name in preferred
+        if any(_module_available(module) for module in _COMPRESSOR_MODULES.get(name, ()))
+    ]
+
+
+def _command_collection(event) -> str:
+    command = event.command or {}
+    if event.command_name == "getMore":
+        target = command.get("collection")
+    else:
+        target = command.get(event.command_name)
+    return target if isinstance(target, str) and target else _NO_COLLECTION
+
+
+class _Series:
+    __slots__ = ("failures", "latency")
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.failures: dict[str, int] = {}
+
+
+class MongoMetrics(monitoring.CommandListener, monitoring.ConnectionPoolListener):
+    """Per-collection command latency and pool-wait histograms for one process."""
+
+    def __init__(self, *, max_series: int = MONGO_COMMAND_SERIES_MAX) -> None:
+        self.max_series = max(1, int(max_series))
+        self._lock = Lock()
+        self._inflight: dict[tuple, str] = {}
+        self._series: dict[str, _Series] = {}
+        self.pool_wait = LatencyHistogram()
+        self._checkouts = 0
+        self._checkout_failures: dict[str, int] = {}
+        self._connections_created = 0
+        self._connections_closed = 0
+        self._pool_cleared = 0
+
+    # ── commands ───────────────────────────────────────────────
+
+    def started(self, event) -> None:
+        key = (event.connection_id, event.request_id)
+        with self._lock:
+            self._inflight[key] = _command_collection(event)
+
+    def succeeded(self, event) -> None:
+        self._finish(event, None)
+
+    def failed(self, event) -> None:
+        failure = event.failure or {}
+        code = failure.get("codeName") or failure.get("code") or "error"
+        self._finish(event, str(code))
+
+    def _finish(self, event, failure: str | None) -> None:
+        key = (event.connection_id, event.request_id)
+        with self._lock:
+            collection = self._inflight.pop(key, _NO_COLLECTION)
+            name = f"{collection}.{event.command_name}"
+            series = self._series.get(name)
+            if series is None:
+                if len(self._series) >= self.max_series:
+                    name = f"{_OTHER_SERIES}.{event.command_name}"
+                    series = self._series.get(name)
+                if series is None:
+                    series = self._series[name] = _Series()
+            if failure is not None:
+                series.failures[failure] = series.failures.get(failure, 0) + 1
+        series.latency.observe(event.duration_micros / 1_000_000)
+
+    # ── connection pool ────────────────────────────────────────
+
+    def connection_checked_out(self, event) -> None:
+        with self._lock:
+            self._checkouts += 1
+        self.pool_wait.observe(event.duration)
+
+    def connection_check_out_failed(self, event) -> None:
+        with self._lock:
+            reason = str(event.reason)
+            self._checkout_failures[reason] = self._checkout_failures.get(reason, 0) + 1
+        self.pool_wait.observe(event.duration)
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self._connections_created += 1
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self._connections_closed += 1
+
+    def pool_cleared(self, event) -> None:
+        with self._lock:
+            self._pool_cleared += 1
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_checked_in(self, event) -> None:
+        pass
+
+    # ── observability ──────────────────────────────────────────
+
+    def metrics(self) -> dict:
+        with self._lock:
+            series = list(self._series.items())
+            pool = {
+                "checkouts": self._checkouts,
+                "checkout_failures": dict(self._checkout_failures),
+                "connections_created": self._connections_created,
+                "connections_closed": self._connections_closed,
+                "pool_cleared": self._pool_cleared,
+            }
+        commands = {
+            name: {**item.latency.snapshot(), "failures": dict(item.failures)}
+            for name, item in series
+        }
+        # Where the time goes: largest total first.
+        ordered = dict(
+            sorted(commands.items(), key=lambda item: item[1]["sum_seconds"], reverse=True)
+        )
+        return {
+            "settings": {
+                "max_pool_size": MONGO_MAX_POOL_SIZE,
+                "min_pool_size": MONGO_MIN_POOL_SIZE,
+                "max_idle_time_ms": MONGO_MAX_IDLE_TIME_MS,
+                "wait_queue_timeout_ms": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                "compressors": available_compressors(),
+            },
+            "pool": {**pool, "wait": self.pool_wait.snapshot()},
+            "commands": ordered,
+        }
+
+
+MONGO_METRICS = MongoMetrics()
+register_metrics_source("mongo", MONGO_METRICS.metrics)
+
+
+def create_mongo_client(url: str, **overrides) -> MongoClient:
+    """A ``MongoClient`` with the tuned pool settings and monitoring listeners."""
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [MONGO_METRICS],
+    }
+    compressors = available_compressors()
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    options.update(overrides)
+    return MongoClient(url, **options)
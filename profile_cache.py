@@ -0,0 +1,117 @@
+"""Per-user cache of the assembled Mini App profile (``/api/me``).
+
+The profile combines the leaderboard user document, its rank and the two
+history sources. It is cached per user for a short TTL and dropped by every
+result writer through :func:`invalidate_profile`, so a finished quiz, a claimed
+bonus or an achievement shows up on the next read instead of after the TTL.
+The bot and the Mini App share one process, so bot-side writers reach the same
+cache.
+
+Assembly reads MongoDB outside any lock, so a write can land while a profile
+is being built. ``begin()`` hands out a token before the reads and ``put()``
+refuses to store a value when the user was invalidated after that token;
+otherwise a pre-write profile could be cached for a full TTL after the write.
+Entries are bound to the collection handle they were read from.
+"""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from threading import Lock
+
+from config import PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL
+from schema_readiness import same_handle
+
+
+class ProfileCache:
+    """Thread-safe LRU of assembled profiles with write-race protection."""
+
+    def __init__(
+        self,
+        capacity: int,
+        ttl_seconds: float,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.capacity = max(1, int(capacity))
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self._clock = clock
+        self._lock = Lock()
+        self._entries: OrderedDict[str, tuple[object, float, dict]] = OrderedDict()
+        # Last invalidation sequence per user. Bounded; tokens older than the
+        # newest forgotten sequence are treated as invalidated.
+        self._invalidated: OrderedDict[str, int] = OrderedDict()
+        self._floor = 0
+        self._seq = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._rejected = 0
+
+    def begin(self, user_id) -> int:
+        """Token to pass to :meth:`put` for a profile assembled from now on."""
+        with self._lock:
+            return self._seq
+
+    def get(self, handle: object, user_id) -> dict | None:
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_handle, expires_at, value = entry
+                if same_handle(stored_handle, handle) and self._clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, handle: object, user_id, value: dict, token: int) -> bool:
+        """Store ``value`` unless ``user_id`` was invalidated after ``token``."""
+        key = str(user_id)
+        with self._lock:
+            if max(self._floor, self._invalidated.get(key, 0)) > token:
+                self._rejected += 1
+                return False
+            self._entries[key] = (handle, self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, user_id) -> None:
+        key = str(user_id)
+        with self._lock:
+            self._seq += 1
+            self._invalidations += 1
+            self._entries.pop(key, None)
+            self._invalidated[key] = self._seq
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.capacity * 4:
+                _key, seq = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, seq)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "rejected_puts": self._rejected,
+            }
+
+
+PROFILE_CACHE = ProfileCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL)
+
+
+def invalidate_profile(user_id) -> None:
+    """Drop the cached profile of ``user_id`` after one of its documents changed."""
+    PROFILE_CACHE.invalidate(user_id)
@@ -0,0 +1,444 @@
+"""Write-time accuracy and difficulty for ``questions_stats``, plus admin reads.
+
+The admin "hardest questions" view used to run an aggregation that computed
+``accuracy`` for every document and sorted on the computed field. The full
+listing loaded the whole collection. Both costs grow with the bank.
+
+Now:
+
+* Every flush of the answer buffer is one pipeline upsert per question
+  (:func:`stat_update_pipeline`). It adds the counters and recomputes
+  ``accuracy`` (percent correct) and ``difficulty_bucket`` in the same atomic
+  document update.
+* Indexes serve every admin read as an ordered index scan. The hardest list
+  uses a partial index over questions with at least ``HARDEST_MIN_ATTEMPTS``
+  attempts. There is also a bucket index and an attempts index.
+  :func:`analytics_page` pages any of these orders with keyset cursors.
+* :class:`HardestQuestionsCache` keeps the hardest questions in memory. After
+  each flush it merges the re-read documents of the flushed questions, so
+  the admin screen reads no MongoDB in the steady state.
+
+Documents written before these fields existed are backfilled once per
+database by a server-side pipeline update. A marker in ``schema_migrations``
+records it, and ``migrate_db.py`` runs it too. Until the schema is ready,
+:func:`hardest_questions` uses the old aggregation.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable, Iterable
+from threading import Lock
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+from config import HARDEST_MIN_ATTEMPTS, HARDEST_TOP_K, QUESTION_ANALYTICS_PAGE_MAX
+from runtime_metrics import register_metrics_source
+from schema_readiness import SCHEMA_READINESS, SchemaRequirement, same_handle
+
+logger = logging.getLogger(__name__)
+
+ACCURACY = "accuracy"
+BUCKET = "difficulty_bucket"
+
+BUCKET_INSUFFICIENT = "insufficient"
+BUCKET_HARD = "hard"
+BUCKET_MEDIUM = "medium"
+BUCKET_EASY = "easy"
+BUCKETS = (BUCKET_HARD, BUCKET_MEDIUM, BUCKET_EASY, BUCKET_INSUFFICIENT)
+_BUCKET_UPPER_BOUNDS = ((BUCKET_HARD, 40), (BUCKET_MEDIUM, 70))
+
+HARDEST_FILTER = {"total_attempts": {"$gte": HARDEST_MIN_ATTEMPTS}}
+HARDEST_SORT = [(ACCURACY, ASCENDING), ("_id", ASCENDING)]
+BUCKET_SORT = [(BUCKET, ASCENDING), (ACCURACY, ASCENDING), ("_id", ASCENDING)]
+ATTEMPTS_SORT = [("total_attempts", DESCENDING), ("_id", ASCENDING)]
+
+# name -> (key, partialFilterExpression or None)
+_INDEXES = {
+    "question_stats_hardest": (HARDEST_SORT, HARDEST_FILTER),
+    "question_stats_bucket": (BUCKET_SORT, None),
+    "question_stats_attempts": (ATTEMPTS_SORT, None),
+}
+SCHEMA_NAME = "questions_stats.analytics"
+MIGRATIONS_COLLECTION = "schema_migrations"
+BACKFILL_MARKER = "question_stats_accuracy_v1"
+
+SORT_HARDEST = "hardest"
+SORT_ATTEMPTS = "attempts"
+
+
+class QuestionAnalyticsSchemaInvalid(RuntimeError):
+    """A question analytics index exists with incompatible options."""
+
+
+# ── write path ────────────────────────────────────────────────
+
+
+def _derived_stages() -> list[dict]:
+    accuracy = {
+        "$cond": [
+            {"$gt": ["$total_attempts", 0]},
+            {"$multiply": [{"$divide": ["$correct_attempts", "$total_attempts"]}, 100]},
+            0,
+        ]
+    }
+    bucket = {
+        "$switch": {
+            "branches": [
+                {
+                    "case": {"$lt": ["$total_attempts", HARDEST_MIN_ATTEMPTS]},
+                    "then": BUCKET_INSUFFICIENT,
+                },
+                *(
+                    {"case": {"$lt": [f"${ACCURACY}", bound]}, "then": name}
+                    for name, bound in _BUCKET_UPPER_BOUNDS
+                ),
+            ],
+            "default": BUCKET_EASY,
+        }
+    }
+    return [{"$set": {ACCURACY: accuracy}}, {"$set": {BUCKET: bucket}}]
+
+
+def stat_update_pipeline(attempts: int, correct: int, total_time: float, category) -> list[dict]:
+    """Upsert pipeline adding one flushed row and recomputing the derived fields."""
+
+    def add(field: str, amount) -> dict:
+        return {"$add": [{"$ifNull": [f"${field}", 0]}, amount]}
+
+    return [
+        {
+            "$set": {
+                "total_attempts": add("total_attempts", attempts),
+                "correct_attempts": add("correct_attempts", correct),
+                "total_time": add("total_time", total_time),
+                "category": {"$literal": category},
+            }
+        },
+        *_derived_stages(),
+    ]
+
+
+def difficulty_bucket(total_attempts: int, accuracy: float) -> str:
+    """Python mirror of the pipeline's bucket expression."""
+    if total_attempts < HARDEST_MIN_ATTEMPTS:
+        return BUCKET_INSUFFICIENT
+    for name, bound in _BUCKET_UPPER_BOUNDS:
+        if accuracy < bound:
+            return name
+    return BUCKET_EASY
+
+
+# ── schema ────────────────────────────────────────────────────
+
+
+def backfill_question_accuracy(collection) -> int:
+    """Recompute accuracy and bucket on every stats document; return matched count."""
+    result = collection.update_many({}, _derived_stages())
+    return int(getattr(result, "matched_count", 0) or 0)
+
+
+def _index_matches(existing: dict | None, key: list, partial: dict | None) -> bool:
+    return (
+        existing is not None
+        and existing.get("key") == key
+        and existing.get("partialFilterExpression") == partial
+    )
+
+
+def audit_question_analytics_indexes(collection) -> None:
+    """Read-only drift check used by background schema revalidation."""
+    info = collection.index_information()
+    for name, (key, partial) in _INDEXES.items():
+        if not _index_matches(info.get(name), key, partial):
+            raise QuestionAnalyticsSchemaInvalid(f"question analytics index {name} drifted")
+
+
+def ensure_question_analytics_schema(collection, *, force_backfill: bool = False) -> bool:
+    """Create the indexes and run the one-time backfill for ``collection``.
+
+    Failures are recorded as drift instead of raised: reads fall back to the
+    aggregation and background revalidation retries.
+    """
+    if collection is None:
+        return False
+    try:
+        info = collection.index_information()
+        for name, (key, partial) in _INDEXES.items():
+            existing = info.get(name)
+            if existing is None:
+                options = {"partialFilterExpression": partial} if partial is not None else {}
+                collection.create_index(key, name=name, **options)
+            elif not _index_matches(existing, key, partial):
+                raise QuestionAnalyticsSchemaInvalid(
+                    f"question analytics index {name} has incompatible options"
+                )
+        markers = collection.database[MIGRATIONS_COLLECTION]
+        if force_backfill or markers.find_one({"_id": BACKFILL_MARKER}, {"_id": 1}) is None:
+            started = time.perf_counter()
+            matched = backfill_question_accuracy(collection)
+            markers.update_one(
+                {"_id": BACKFILL_MARKER},
+                {"$set": {"questions": matched, "completed_at": time.time()}},
+                upsert=True,
+            )
+            logger.info(
+                "question accuracy backfilled for %d questions in %.2fs",
+                matched,
+                time.perf_counter() - started,
+            )
+    except (PyMongoError, QuestionAnalyticsSchemaInvalid) as exc:
+        logger.warning("question analytics schema not ready; using aggregation: %s", exc)
+        SCHEMA_READINESS.mark_failed(SCHEMA_NAME, collection, str(exc))
+        return False
+    SCHEMA_READINESS.mark_ready(SCHEMA_NAME, collection)
+    return True
+
+
+def question_analytics_ready(collection) -> bool:
+    return collection is not None and SCHEMA_READINESS.is_ready(SCHEMA_NAME, collection)
+
+
+# ── reads ─────────────────────────────────────────────────────
+
+
+def _legacy_hardest(collection, limit: int) -> list[dict]:
+    pipeline = [
+        {"$match": HARDEST_FILTER},
+        {"$addFields": {
+            ACCURACY: {
+                "$multiply": [
+                    {"$divide": ["$correct_attempts", "$total_attempts"]},
+                    100,
+                ]
+            }
+        }},
+        {"$sort": {ACCURACY: 1}},
+        {"$limit": limit},
+    ]
+    return list(collection.aggregate(pipeline))
+
+
+def load_hardest(collection, limit: int) -> list[dict]:
+    """Hardest questions straight from MongoDB (index scan once the schema is ready)."""
+    if not question_analytics_ready(collection):
+        return _legacy_hardest(collection, limit)
+    return list(collection.find(HARDEST_FILTER).sort(HARDEST_SORT).limit(limit))
+
+
+def _hardest_key(row: dict) -> tuple[float, str]:
+    return float(row.get(ACCURACY) or 0.0), str(row.get("_id"))
+
+
+class HardestQuestionsCache:
+    """The hardest questions, kept exact by merging flushed rows.
+
+    The cache holds every eligible question whose ``(accuracy, _id)`` key is at
+    most ``boundary``. ``boundary`` is the last key read by the load, or
+    unbounded when the load saw every eligible question. :meth:`merge` keeps
+    that invariant for re-read documents. A question outside the cache has
+    not been written since the load, so it still ranks after the boundary.
+    When merges shrink the cache below ``capacity``, the next read reloads.
+
+    Loads run outside the lock. ``merge`` and ``invalidate`` bump a generation
+    counter, and a load that started before the bump is returned to its caller
+    but not installed: it may predate a write that was merged meanwhile.
+    """
+
+    def __init__(self, capacity: int = HARDEST_TOP_K) -> None:
+        self.capacity = max(1, int(capacity))
+        self._lock = Lock()
+        self._handle: object = None
+        self._rows: dict[str, dict] | None = None
+        self._boundary: tuple[float, str] | None = None
+        self._generation = 0
+        self._hits = 0
+        self._loads = 0
+        self._merges = 0
+        self._stale_loads = 0
+
+    def _window(self) -> int:
+        return self.capacity * 2
+
+    def _usable_locked(self, handle: object, limit: int) -> bool:
+        return (
+            self._rows is not None
+            and same_handle(self._handle, handle)
+            and (self._boundary is None or len(self._rows) >= limit)
+        )
+
+    def top(self, handle: object, limit: int, loader: Callable[[int], list[dict]]) -> list[dict]:
+        if limit > self.capacity:
+            return loader(limit)
+        with self._lock:
+            if self._usable_locked(handle, limit):
+                self._hits += 1
+                return self._sorted_locked()[:limit]
+            generation = self._generation
+        window = self._window()
+        rows = loader(window)
+        with self._lock:
+            self._loads += 1
+            if generation != self._generation:
+                self._stale_loads += 1
+                return [dict(row) for row in rows[:limit]]
+            self._handle = handle
+            self._rows = {str(row.get("_id")): row for row in rows}
+            self._boundary = _hardest_key(rows[-1]) if len(rows) >= window else None
+            return self._sorted_locked()[:limit]
+
+    def _sorted_locked(self) -> list[dict]:
+        return [dict(row) for row in sorted(self._rows.values(), key=_hardest_key)]
+
+    def loaded(self, handle: object) -> bool:
+        with self._lock:
+            return self._rows is not None and same_handle(self._handle, handle)
+
+    def merge(self, handle: object, documents: Iterable[dict]) -> None:
+        """Apply re-read documents of questions that were just written."""
+        with self._lock:
+            self._generation += 1
+            if self._rows is None or not same_handle(self._handle, handle):
+                return
+            self._merges += 1
+            for document in documents:
+                question_id = str(document.get("_id"))
+                eligible = int(document.get("total_attempts") or 0) >= HARDEST_MIN_ATTEMPTS
+                if eligible and (
+                    self._boundary is None or _hardest_key(document) <= self._boundary
+                ):
+                    self._rows[question_id] = document
+                else:
+                    self._rows.pop(question_id, None)
+            if self._boundary is not None and len(self._rows) < self.capacity:
+                self._rows = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._rows = None
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "cached": 0 if self._rows is None else len(self._rows),
+                "hits": self._hits,
+                "loads": self._loads,
+                "merges": self._merges,
+                "stale_loads": self._stale_loads,
+            }
+
+
+HARDEST_QUESTIONS = HardestQuestionsCache()
+register_metrics_source("hardest_questions", HARDEST_QUESTIONS.metrics)
+
+
+def hardest_questions(collection, limit: int) -> list[dict]:
+    if not question_analytics_ready(collection):
+        # Documents may still lack stored accuracy; only cache index-backed reads.
+        return _legacy_hardest(collection, limit)
+    return HARDEST_QUESTIONS.top(collection, limit, lambda size: load_hardest(collection, size))
+
+
+def refresh_hardest(collection, question_ids: list[str]) -> None:
+    """Re-read flushed questions into the hardest cache; a failure drops the cache."""
+    if not question_ids or not HARDEST_QUESTIONS.loaded(collection):
+        return
+    try:
+        documents = list(collection.find({"_id": {"$in": question_ids}}))
+    except PyMongoError as exc:
+        logger.warning("hardest questions cache dropped after failed re-read: %s", exc)
+        HARDEST_QUESTIONS.invalidate()
+        return
+    HARDEST_QUESTIONS.merge(collection, documents)
+
+
+def invalidate_hardest() -> None:
+    """Drop the hardest cache after a write whose outcome is unknown."""
+    HARDEST_QUESTIONS.invalidate()
+
+
+def _page_spec(sort: str, bucket: str | None):
+    if sort == SORT_HARDEST and bucket is None:
+        return dict(HARDEST_FILTER), HARDEST_SORT
+    if sort == SORT_HARDEST:
+        return {BUCKET: bucket}, BUCKET_SORT
+    if sort == SORT_ATTEMPTS and bucket is None:
+        return {}, ATTEMPTS_SORT
+    raise ValueError("unsupported analytics order")
+
+
+def _cursor_value(sort: str, row: dict) -> str:
+    if sort == SORT_ATTEMPTS:
+        return f"{int(row.get('total_attempts') or 0)}:{row.get('_id')}"
+    return f"{float(row.get(ACCURACY) or 0.0)!r}:{row.get('_id')}"
+
+
+def _after_filter(sort: str, after: str) -> dict:
+    value, separator, question_id = after.partition(":")
+    if not separator or not question_id:
+        raise ValueError("invalid analytics cursor")
+    if sort == SORT_ATTEMPTS:
+        attempts = int(value)
+        return {"$or": [
+            {"total_attempts": {"$lt": attempts}},
+            {"total_attempts": attempts, "_id": {"$gt": question_id}},
+        ]}
+    accuracy = float(value)
+    return {"$or": [
+        {ACCURACY: {"$gt": accuracy}},
+        {ACCURACY: accuracy, "_id": {"$gt": question_id}},
+    ]}
+
+
+def analytics_page(
+    collection,
+    *,
+    sort: str = SORT_HARDEST,
+    bucket: str | None = None,
+    after: str | None = None,
+    limit: int = 20,
+) -> dict:
+    """One keyset page: ``{"items": [...], "next": cursor | None}``.
+
+    ``sort`` is ``hardest`` (accuracy ascending) or ``attempts`` (most answered
+    first); ``bucket`` narrows ``hardest`` to one difficulty bucket. Raises
+    ``ValueError`` for unsupported parameters.
+    """
+    if bucket is not None and bucket not in BUCKETS:
+        raise ValueError("unknown difficulty bucket")
+    limit = max(1, min(int(limit), QUESTION_ANALYTICS_PAGE_MAX))
+    query, order = _page_spec(sort, bucket)
+    if after:
+        query = {"$and": [query, _after_filter(sort, after)]} if query else _after_filter(sort, after)
+    rows = list(collection.find(query).sort(order).limit(limit + 1))
+    items = rows[:limit]
+    return {
+        "items": items,
+        "next": _cursor_value(sort, items[-1]) if len(rows) > limit else None,
+    }
+
+
+def _stats_handle():
+    import database
+
+    return getattr(database, "questions_stats_collection", None)
+
+
+SCHEMA_READINESS.register(
+    SchemaRequirement(
+        name=SCHEMA_NAME,
+        spec={
+            "indexes": {
+                name: {"key": [list(item) for item in key], "partialFilterExpression": partial}
+                for name, (key, partial) in _INDEXES.items()
+            },
+            "backfill": BACKFILL_MARKER,
+        },
+        handle=_stats_handle,
+        ensure=ensure_question_analytics_schema,
+        audit=audit_question_analytics_indexes,
+    )
+)
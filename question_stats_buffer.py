@@ -0,0 +1,218 @@
+"""Write-behind aggregation for per-question answer analytics.
+
+Every answered question used to issue its own ``questions_stats`` upsert on
+the answer path (inside the Mini App per-user lock, and as a thread hop in the
+bot). Analytics do not need per-answer durability, so answers are coalesced in
+memory per question id and written by a background flusher as one unordered
+``bulk_write`` on an interval or when enough distinct questions are pending.
+
+Memory is bounded by ``max_pending`` distinct question ids. Increments for an
+already pending id always merge; a new id arriving while the buffer is full is
+dropped and counted. Rows the writer reports as failed were not applied and
+are put back (up to the same bound). When the writer raises instead, part of
+the batch may already be applied, so those increments are counted as lost
+rather than retried: a lost answer is cheaper than a double-counted one.
+Whatever cannot be put back is counted as lost too. ``close()``
+stops the flusher and writes what is left; it is also registered with
+``atexit`` when the flusher starts.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import time
+from collections.abc import Callable
+from threading import Event, Lock, Thread
+
+from runtime_metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class _Pending:
+    __slots__ = ("attempts", "category", "correct", "total_time")
+
+    def __init__(self) -> None:
+        self.attempts = 0
+        self.correct = 0
+        self.total_time = 0.0
+        self.category = None
+
+    def merge(self, other: _Pending) -> None:
+        self.attempts += other.attempts
+        self.correct += other.correct
+        self.total_time += other.total_time
+        if self.category is None:
+            self.category = other.category
+
+
+class QuestionStatBuffer:
+    """Thread-safe coalescing buffer with a lazily started background flusher.
+
+    ``writer`` receives ``[(question_id, attempts, correct, total_time,
+    category), ...]`` and returns the indices that were not applied (empty
+    when all were); raising means the outcome of the batch is unknown.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[list[tuple]], list[int]],
+        *,
+        flush_interval: float,
+        flush_batch: int,
+        max_pending: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._writer = writer
+        self.flush_interval = max(0.05, float(flush_interval))
+        self.flush_batch = max(1, int(flush_batch))
+        self.max_pending = max(self.flush_batch, int(max_pending))
+        self._clock = clock
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._pending: dict[str, _Pending] = {}
+        self._pending_events = 0
+        self._oldest: float | None = None
+        self._wake = Event()
+        self._stopped = Event()
+        self._thread: Thread | None = None
+        self._recorded = 0
+        self._written = 0
+        self._dropped = 0
+        self._lost = 0
+        self._requeued = 0
+        self._flushes = 0
+        self._flush_failures = 0
+        self._last_flush_at: float | None = None
+        self._flush_latency = LatencyHistogram()
+
+    # ── answer path ────────────────────────────────────────────
+
+    def record(self, question_id: str, category, is_correct: bool, elapsed: float) -> bool:
+        """Coalesce one answer; return ``False`` when it was dropped."""
+        item = _Pending()
+        item.attempts = 1
+        item.correct = 1 if is_correct else 0
+        item.total_time = float(elapsed or 0.0)
+        item.category = category
+        with self._lock:
+            self._recorded += 1
+            if not self._merge_locked(str(question_id), item):
+                self._dropped += 1
+                return False
+            wake = len(self._pending) >= self.flush_batch
+        self._ensure_started()
+        if wake:
+            self._wake.set()
+        return True
+
+    def _merge_locked(self, question_id: str, item: _Pending) -> bool:
+        current = self._pending.get(question_id)
+        if current is None:
+            if len(self._pending) >= self.max_pending:
+                return False
+            self._pending[question_id] = current = _Pending()
+        current.merge(item)
+        self._pending_events += item.attempts
+        if self._oldest is None:
+            self._oldest = self._clock()
+        return True
+
+    # ── flushing ───────────────────────────────────────────────
+
+    def flush(self) -> int:
+        """Write everything pending now; return the number of answers written."""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                self._pending = {}
+                self._pending_events = 0
+                self._oldest = None
+            if not batch:
+                return 0
+            items = list(batch.items())
+            rows = [
+                (qid, item.attempts, item.correct, item.total_time, item.category)
+                for qid, item in items
+            ]
+            started = time.perf_counter()
+            unknown = 0
+            try:
+                failed = sorted(set(self._writer(rows)))
+            except Exception as exc:
+                logger.warning(
+                    "question stats flush failed (%d questions), counted as lost: %s",
+                    len(rows),
+                    exc,
+                )
+                failed = []
+                unknown = sum(item.attempts for _qid, item in items)
+            self._flush_latency.observe(time.perf_counter() - started)
+
+            failed_items = [items[index] for index in failed]
+            written = sum(item.attempts for _qid, item in items) - unknown - sum(
+                item.attempts for _qid, item in failed_items
+            )
+            with self._lock:
+                self._flushes += 1
+                self._written += written
+                self._lost += unknown
+                self._last_flush_at = self._clock()
+                if failed_items or unknown:
+                    self._flush_failures += 1
+                for qid, item in failed_items:
+                    if self._merge_locked(qid, item):
+                        self._requeued += item.attempts
+                    else:
+                        self._lost += item.attempts
+            return written
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("question stats flusher iteration failed")
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = Thread(target=self._run, name="question-stats-flush", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def close(self, timeout: float = 5.0) -> int:
+        """Stop the flusher and write the remainder; safe to call repeatedly."""
+        self._stopped.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        return self.flush()
+
+    # ── observability ──────────────────────────────────────────
+
+    def metrics(self) -> dict:
+        with self._lock:
+            now = self._clock()
+            return {
+                "pending_questions": len(self._pending),
+                "pending_answers": self._pending_events,
+                "lag_seconds": None if self._oldest is None else round(now - self._oldest, 3),
+                "last_flush_age_seconds": (
+                    None if self._last_flush_at is None else round(now - self._last_flush_at, 3)
+                ),
+                "recorded": self._recorded,
+                "written": self._written,
+                "dropped": self._dropped,
+                "requeued": self._requeued,
+                "lost": self._lost,
+                "flushes": self._flushes,
+                "flush_failures": self._flush_failures,
+                "flush": self._flush_latency.snapshot(),
+            }
@@ -4,60 +4,95 @@ from __future__ import annotations
 
 import random
 
-from .chapter1 import (
-    easy_questions as _raw_easy_p1,
-    easy_questions_v17_25 as _raw_easy_p2,
-    geography_questions as _raw_geography,
-    hard_questions as _raw_hard_p1,
-    hard_questions_v17_25 as _raw_hard_p2,
-    linguistics_ch1_questions as _raw_linguistics_1,
-    linguistics_ch1_questions_2 as _raw_linguistics_2,
-    linguistics_v17_25_questions as _raw_linguistics_3,
-    medium_questions as _raw_medium_p1,
-    medium_questions_v17_25 as _raw_medium_p2,
-    nero_questions as _raw_nero,
-    practical_ch1_questions as _raw_practical_p1,
-    practical_v17_25_questions as _raw_practical_p2,
-)
+from . import bank_snapshot
+from .bank import QuestionBank, normalized_id
 from .chapter2.reviewed import CHAPTER2_REVIEWED_QUESTIONS
 from .chapter3.challenge_taxonomy import CHAPTER3_CHALLENGE_TAXONOMY
 from .chapter3.ranking_authority import CHAPTER3_RANKING_AUTHORIZED_IDS
 from .chapter3.reviewed import CHAPTER3_REVIEWED_QUESTIONS
 from .chapter4.reviewed import CHAPTER4_REVIEWED_QUESTIONS
 from .chapter5.reviewed import CHAPTER5_REVIEWED_QUESTIONS
-from .content_truth import RANKING_QUARANTINE_IDS, curate_pool
-from .content_truth_review import apply_review_overrides
-from .intro import (
-    intro_part1_questions as _raw_intro1,
-    intro_part2_questions as _raw_intro2,
-    intro_part3_questions as _raw_intro3,
-)
+from .content_truth import RANKING_QUARANTINE_IDS
 from .ranking_policy import SOURCE_REVIEWED_RANKING_IDS, ranking_eligible
 from .source_registry import SOURCE_CATALOG
 
 
-def _canonical(raw: list[dict], key: str) -> list[dict]:
-    return apply_review_overrides(curate_pool(raw, pool_key=key))
+def _curate_leaf_pools() -> dict[str, list[dict]]:
+    """Canonicalize the Chapter-1/intro authoring corpus (deep copies).
+
+    This is the expensive part of ``import questions``; a build-time snapshot
+    (``python -m questions.build_snapshot``) stores its result.
+    """
+    from .chapter1 import (
+        easy_questions as _raw_easy_p1,
+        easy_questions_v17_25 as _raw_easy_p2,
+        geography_questions as _raw_geography,
+        hard_questions as _raw_hard_p1,
+        hard_questions_v17_25 as _raw_hard_p2,
+        linguistics_ch1_questions as _raw_linguistics_1,
+        linguistics_ch1_questions_2 as _raw_linguistics_2,
+        linguistics_v17_25_questions as _raw_linguistics_3,
+        medium_questions as _raw_medium_p1,
+        medium_questions_v17_25 as _raw_medium_p2,
+        nero_questions as _raw_nero,
+        practical_ch1_questions as _raw_practical_p1,
+        practical_v17_25_questions as _raw_practical_p2,
+    )
+    from .content_truth import curate_pool
+    from .content_truth_review import apply_review_overrides
+    from .intro import (
+        intro_part1_questions as _raw_intro1,
+        intro_part2_questions as _raw_intro2,
+        intro_part3_questions as _raw_intro3,
+    )
+
+    def _canonical(raw: list[dict], key: str) -> list[dict]:
+        return apply_review_overrides(curate_pool(raw, pool_key=key))
+
+    return {
+        "easy_p1": _canonical(_raw_easy_p1, "easy_p1"),
+        "easy_p2": _canonical(_raw_easy_p2, "easy_p2"),
+        "medium_p1": _canonical(_raw_medium_p1, "medium_p1"),
+        "medium_p2": _canonical(_raw_medium_p2, "medium_p2"),
+        "hard_p1": _canonical(_raw_hard_p1, "hard_p1"),
+        "hard_p2": _canonical(_raw_hard_p2, "hard_p2"),
+        "practical_p1": _canonical(_raw_practical_p1, "practical_p1"),
+        "practical_p2": _canonical(_raw_practical_p2, "practical_p2"),
+        "linguistics_ch1": _canonical(_raw_linguistics_1, "linguistics_ch1"),
+        "linguistics_ch1_2": _canonical(_raw_linguistics_2, "linguistics_ch1_2"),
+        "linguistics_ch1_3": _canonical(_raw_linguistics_3, "linguistics_ch1_3"),
+        "nero": _canonical(_raw_nero, "nero"),
+        "geography": _canonical(_raw_geography, "geography"),
+        "intro1": _canonical(_raw_intro1, "intro1"),
+        "intro2": _canonical(_raw_intro2, "intro2"),
+        "intro3": _canonical(_raw_intro3, "intro3"),
+    }
 
 
 # Production-facing canonical leaf pools. Raw chapter1.py/intro.py remain an
 # authoring/migration corpus only; handlers and APIs consume these curated copies.
-easy_questions = _canonical(_raw_easy_p1, "easy_p1")
-easy_questions_v17_25 = _canonical(_raw_easy_p2, "easy_p2")
-medium_questions = _canonical(_raw_medium_p1, "medium_p1")
-medium_questions_v17_25 = _canonical(_raw_medium_p2, "medium_p2")
-hard_questions = _canonical(_raw_hard_p1, "hard_p1")
-hard_questions_v17_25 = _canonical(_raw_hard_p2, "hard_p2")
-practical_ch1_questions = _canonical(_raw_practical_p1, "practical_p1")
-practical_v17_25_questions = _canonical(_raw_practical_p2, "practical_p2")
-linguistics_ch1_questions = _canonical(_raw_linguistics_1, "linguistics_ch1")
-linguistics_ch1_questions_2 = _canonical(_raw_linguistics_2, "linguistics_ch1_2")
-linguistics_v17_25_questions = _canonical(_raw_linguistics_3, "linguistics_ch1_3")
-nero_questions = _canonical(_raw_nero, "nero")
-geography_questions = _canonical(_raw_geography, "geography")
-intro_part1_questions = _canonical(_raw_intro1, "intro1")
-intro_part2_questions = _canonical(_raw_intro2, "intro2")
-intro_part3_questions = _canonical(_raw_intro3, "intro3")
+# The snapshot is used only when its source hash matches the current sources.
+_LEAF_POOLS = bank_snapshot.load_snapshot()
+_FROM_SNAPSHOT = _LEAF_POOLS is not None
+if _LEAF_POOLS is None:
+    _LEAF_POOLS = _curate_leaf_pools()
+
+easy_questions = _LEAF_POOLS["easy_p1"]
+easy_questions_v17_25 = _LEAF_POOLS["easy_p2"]
+medium_questions = _LEAF_POOLS["medium_p1"]
+medium_questions_v17_25 = _LEAF_POOLS["medium_p2"]
+hard_questions = _LEAF_POOLS["hard_p1"]
+hard_questions_v17_25 = _LEAF_POOLS["hard_p2"]
+practical_ch1_questions = _LEAF_POOLS["practical_p1"]
+practical_v17_25_questions = _LEAF_POOLS["practical_p2"]
+linguistics_ch1_questions = _LEAF_POOLS["linguistics_ch1"]
+linguistics_ch1_questions_2 = _LEAF_POOLS["linguistics_ch1_2"]
+linguistics_v17_25_questions = _LEAF_POOLS["linguistics_ch1_3"]
+nero_questions = _LEAF_POOLS["nero"]
+geography_questions = _LEAF_POOLS["geography"]
+intro_part1_questions = _LEAF_POOLS["intro1"]
+intro_part2_questions = _LEAF_POOLS["intro2"]
+intro_part3_questions = _LEAF_POOLS["intro3"]
 
 # Chapters 2-5 cross the product boundary only through reviewed aggregates.
 # Their normal-learning pools remain non-scoring through questions.pool_policy.
@@ -101,7 +136,7 @@ def _dedupe_pool(keys: list[str]) -> list[dict]:
     result: list[dict] = []
     for key in keys:
         for question in _POOLS[key]:
-            qid = str(question.get("id") or "").strip()
+            qid = normalized_id(question)
             if not qid or qid in seen:
                 continue
             seen.add(qid)
@@ -156,9 +191,9 @@ def _build_chapter3_authorized_competitive_pool() -> list[dict]:
     result = [
         question
         for question in chapter3_questions
-        if str(question.get("id") or "").strip() in CHAPTER3_RANKING_AUTHORIZED_IDS
+        if normalized_id(question) in CHAPTER3_RANKING_AUTHORIZED_IDS
     ]
-    resolved_ids = {str(question.get("id") or "").strip() for question in result}
+    resolved_ids = {normalized_id(question) for question in result}
     if resolved_ids != set(CHAPTER3_RANKING_AUTHORIZED_IDS):
         missing = sorted(set(CHAPTER3_RANKING_AUTHORIZED_IDS) - resolved_ids)
         extra = sorted(resolved_ids - set(CHAPTER3_RANKING_AUTHORIZED_IDS))
@@ -192,7 +227,7 @@ BATTLE_POOL = COMPETITIVE_POOL
 def _resolve_chapter3_challenge_taxonomy() -> dict[str, list[dict]]:
     """Resolve reviewed taxonomy IDs against the exact authorized Chapter-3 pool."""
     authorized_by_id = {
-        str(question.get("id") or "").strip(): question
+        normalized_id(question): question
         for question in CHAPTER3_AUTHORIZED_COMPETITIVE_POOL
     }
     resolved: dict[str, list[dict]] = {}
@@ -234,6 +269,23 @@ CHALLENGE_POOLS: dict[str, list[dict]] = {
 # Fallback stays Chapter-1-only. Chapters 4/5 are absent from all Challenge paths.
 CHALLENGE_FALLBACK_POOL = CHAPTER1_COMPETITIVE_POOL
 
+# Compiled once at import; Challenge and Battle starts sample its index arrays.
+# The list-valued exports above stay the authoring/registry view of the same
+# question objects.
+QUESTION_BANK = QuestionBank(
+    _POOLS,
+    selections={
+        "challenge_easy": CHALLENGE_POOLS["easy"],
+        "challenge_medium": CHALLENGE_POOLS["medium"],
+        "challenge_hard": CHALLENGE_POOLS["hard"],
+        "challenge_fallback": CHALLENGE_FALLBACK_POOL,
+        "battle": BATTLE_POOL
+        + intro_part1_questions
+        + intro_part2_questions
+        + intro_part3_questions,
+    },
+)
+
 _CHALLENGE_DISTRIBUTION = {
     "random20": (("easy", 6), ("medium", 6), ("hard", 8)),
     "hardcore20": (("easy", 4), ("medium", 4), ("hard", 12)),
@@ -247,38 +299,37 @@ def pick_competitive_challenge_questions(mode: str, *, rng=None) -> list[dict]:
         raise ValueError(f"Неизвестный competitive Challenge mode: {mode!r}")
 
     source = rng or random
-    selected: list[dict] = []
+    bank = QUESTION_BANK
+    ids = bank.ids
+    selected: list[int] = []
     seen: set[str] = set()
 
     for key, requested in distribution:
         candidates = [
-            question
-            for question in CHALLENGE_POOLS[key]
-            if str(question.get("id") or "").strip() not in seen
+            slot for slot in bank.selection_indices(f"challenge_{key}") if ids[slot] not in seen
         ]
         take = min(requested, len(candidates))
-        for question in source.sample(candidates, take):
-            qid = str(question.get("id") or "").strip()
+        for slot in source.sample(candidates, take):
+            qid = ids[slot]
             if not qid or qid in seen:
                 continue
             seen.add(qid)
-            selected.append(question)
+            selected.append(slot)
 
     if len(selected) < 20:
         remainder = [
-            question
-            for question in CHALLENGE_FALLBACK_POOL
-            if str(question.get("id") or "").strip() not in seen
+            slot
+            for slot in bank.selection_indices("challenge_fallback")
+            if ids[slot] not in seen
         ]
         needed = 20 - len(selected)
         if len(remainder) < needed:
             raise ValueError(
                 "Challenge-authorized question bank contains fewer than 20 unique questions"
             )
-        for question in source.sample(remainder, needed):
-            qid = str(question.get("id") or "").strip()
-            seen.add(qid)
-            selected.append(question)
+        for slot in source.sample(remainder, needed):
+            seen.add(ids[slot])
+            selected.append(slot)
 
     if len(selected) != 20 or len(seen) != 20:
         raise ValueError(
@@ -286,7 +337,7 @@ def pick_competitive_challenge_questions(mode: str, *, rng=None) -> list[dict]:
         )
 
     source.shuffle(selected)
-    return selected
+    return bank.materialize(selected)
 
 
 def get_pool_by_key(key: str) -> list[dict]:
@@ -322,6 +373,8 @@ __all__ = [
     "chapter4_questions",
     "chapter5_questions",
     "POOL_REGISTRY",
+    "QUESTION_BANK",
+    "QuestionBank",
     "SOURCE_CATALOG",
     "RANKING_QUARANTINE_IDS",
     "SOURCE_REVIEWED_RANKING_IDS",
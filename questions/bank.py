@@ -0,0 +1,166 @@
+"""Compiled, read-only index over the canonical question pools.
+
+``questions/__init__.py`` curates the pools once at import. ``QuestionBank``
+then stores every distinct question object exactly once in a slot table and
+describes each pool as a tuple of integer slots. Normalized ids
+(``str(id).strip()``) are computed once per slot, so sampling and de-duplication
+work on small ints and precomputed strings instead of re-reading question
+dicts on every quiz, Challenge or Battle start.
+
+Pool containers are immutable. Question dicts stay the same plain dict objects
+the list-valued exports hold, because prepared payloads, snapshots and JSON
+encoders consume them directly.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Iterable, Mapping, Sequence
+from types import MappingProxyType
+
+
+def normalized_id(question: Mapping) -> str:
+    return str(question.get("id") or "").strip()
+
+
+class QuestionBank:
+    """Slot table plus named index arrays for public pools and internal selections.
+
+    ``pools`` mirrors the public ``POOL_REGISTRY`` (``/api/pools``, course
+    catalog, stats). ``selections`` are internal index arrays such as the
+    Challenge levels that must not leak into that registry.
+    """
+
+    __slots__ = (
+        "_by_id",
+        "_content_hash",
+        "_ids",
+        "_pool_ids",
+        "_pool_indices",
+        "_pools",
+        "_questions",
+        "_selection_ids",
+        "_selection_indices",
+        "_selections",
+    )
+
+    def __init__(
+        self,
+        pools: Mapping[str, Sequence[Mapping]],
+        *,
+        selections: Mapping[str, Sequence[Mapping]] | None = None,
+    ) -> None:
+        questions: list = []
+        slots_by_object: dict[int, int] = {}
+
+        def compile_indices(pool: Iterable[Mapping]) -> tuple[int, ...]:
+            indices = []
+            for question in pool:
+                slot = slots_by_object.get(id(question))
+                if slot is None:
+                    slot = len(questions)
+                    slots_by_object[id(question)] = slot
+                    questions.append(question)
+                indices.append(slot)
+            return tuple(indices)
+
+        pool_indices = {key: compile_indices(pool) for key, pool in pools.items()}
+        selection_indices = {
+            key: compile_indices(pool) for key, pool in (selections or {}).items()
+        }
+
+        self._questions = tuple(questions)
+        self._content_hash: str | None = None
+        self._ids = tuple(normalized_id(question) for question in questions)
+        by_id: dict[str, int] = {}
+        for slot, qid in enumerate(self._ids):
+            if qid:
+                by_id.setdefault(qid, slot)
+        self._by_id = MappingProxyType(by_id)
+
+        self._pool_indices = MappingProxyType(pool_indices)
+        self._pools = MappingProxyType(
+            {key: self._materialize(indices) for key, indices in pool_indices.items()}
+        )
+        self._pool_ids = MappingProxyType(
+            {key: self._id_array(indices) for key, indices in pool_indices.items()}
+        )
+        self._selection_indices = MappingProxyType(selection_indices)
+        self._selections = MappingProxyType(
+            {key: self._materialize(indices) for key, indices in selection_indices.items()}
+        )
+        self._selection_ids = MappingProxyType(
+            {key: self._id_array(indices) for key, indices in selection_indices.items()}
+        )
+
+    def _materialize(self, indices: tuple[int, ...]) -> tuple:
+        return tuple(self._questions[slot] for slot in indices)
+
+    def _id_array(self, indices: tuple[int, ...]) -> tuple[str, ...]:
+        return tuple(self._ids[slot] for slot in indices)
+
+    # ── slots ──────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    @property
+    def ids(self) -> tuple[str, ...]:
+        """Normalized id for every slot (empty string when a card has none)."""
+        return self._ids
+
+    @property
+    def content_hash(self) -> str:
+        """sha256 prefix over every slot's full content; computed on first use.
+
+        Sessions that reference questions by id record it, so a session read
+        after a deploy that edited the bank can be told apart.
+        """
+        if self._content_hash is None:
+            digest = hashlib.sha256()
+            for question in self._questions:
+                material = json.dumps(question, sort_keys=True, ensure_ascii=False, default=str)
+                digest.update(material.encode("utf-8") + b"\x1e")
+            self._content_hash = digest.hexdigest()[:16]
+        return self._content_hash
+
+    def at(self, slot: int) -> Mapping:
+        return self._questions[slot]
+
+    def slot_of(self, question_id) -> int | None:
+        return self._by_id.get(str(question_id or "").strip())
+
+    def question(self, question_id) -> Mapping | None:
+        slot = self.slot_of(question_id)
+        return None if slot is None else self._questions[slot]
+
+    # ── public pools ───────────────────────────────────────────
+
+    @property
+    def pools(self) -> Mapping[str, tuple]:
+        return self._pools
+
+    def pool(self, key: str) -> tuple:
+        return self._pools[key]
+
+    def pool_indices(self, key: str) -> tuple[int, ...]:
+        return self._pool_indices[key]
+
+    def pool_ids(self, key: str) -> tuple[str, ...]:
+        return self._pool_ids[key]
+
+    # ── internal selections ────────────────────────────────────
+
+    def selection(self, name: str) -> tuple:
+        return self._selections[name]
+
+    def selection_indices(self, name: str) -> tuple[int, ...]:
+        return self._selection_indices[name]
+
+    def selection_ids(self, name: str) -> tuple[str, ...]:
+        return self._selection_ids[name]
+
+    def materialize(self, slots: Iterable[int]) -> list:
+        """Return a fresh list of question objects for sampled slots."""
+        questions = self._questions
+        return [questions[slot] for slot in slots]
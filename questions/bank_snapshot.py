@@ -0,0 +1,143 @@
+"""Versioned, hash-checked snapshot of the curated Chapter-1/intro leaf pools.
+
+Curation (``curate_pool`` + ``apply_review_overrides`` over the Chapter-1 and
+intro authoring corpus) dominates ``import questions``. The build step
+``python -m questions.build_snapshot`` runs it once and stores the resulting
+deep-copied pools next to this package. Reviewed Chapter 2-5 aggregates and
+the source catalog are not stored: they are imported live so their objects
+stay identical to the owning modules.
+
+At import the snapshot is used only when its recorded source hash equals the
+hash of ``CURATION_SOURCES`` (every module leaf curation reads, plus this
+loader and the package ``__init__``) and the interpreter minor version;
+anything else — a missing file, an edited card, a truncated or tampered
+payload — falls back to full curation.
+
+File layout: ``MAGIC`` + 32-byte source hash + 32-byte payload sha256 + pickle
+payload. The file is a build artifact written by the image build and is never
+committed.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import sys
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MAGIC = b"BBQBANK" + bytes([FORMAT_VERSION])
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+SNAPSHOT_PATH = PACKAGE_DIR / "_bank_snapshot.pickle"
+
+# Closed import set of ``questions._curate_leaf_pools``: the authoring corpus,
+# the curation rules and every module that registers review overrides.
+# tests/test_question_bank_snapshot.py fails when a relative import escapes it.
+CURATION_SOURCES = (
+    "__init__.py",
+    "bank_snapshot.py",
+    "chapter1.py",
+    "content_truth.py",
+    "content_truth_review.py",
+    "geography_review.py",
+    "intro.py",
+    "intro_review_extra.py",
+    "nero_review.py",
+    "nero_review_extra.py",
+    "ranking_policy.py",
+)
+
+# Operators can force full curation without deleting the artifact.
+DISABLE_ENV = "QUESTION_BANK_SNAPSHOT_DISABLED"
+
+_HASH_SIZE = hashlib.sha256().digest_size
+
+
+def source_hash(
+    package_dir: Path = PACKAGE_DIR,
+    sources: tuple[str, ...] = CURATION_SOURCES,
+) -> bytes:
+    """Digest of every input curation reads, plus format and interpreter version."""
+    digest = hashlib.sha256()
+    digest.update(MAGIC)
+    digest.update(f"{sys.version_info.major}.{sys.version_info.minor}".encode())
+    for name in sources:
+        digest.update(name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update((package_dir / name).read_bytes())
+        digest.update(b"\0")
+    return digest.digest()
+
+
+def write_snapshot(
+    state: dict,
+    path: Path = SNAPSHOT_PATH,
+    *,
+    expected_hash: bytes | None = None,
+) -> Path:
+    """Atomically write ``state`` tagged with the current source hash."""
+    payload = pickle.dumps(state, protocol=5)
+    header = MAGIC + (expected_hash or source_hash()) + hashlib.sha256(payload).digest()
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(header + payload)
+    os.replace(tmp, path)
+    return path
+
+
+def load_snapshot(
+    path: Path = SNAPSHOT_PATH,
+    *,
+    expected_hash: bytes | None = None,
+) -> dict | None:
+    """Return the stored state, or ``None`` when curation must run instead."""
+    if os.environ.get(DISABLE_ENV):
+        return None
+    path = Path(path)
+    try:
+        blob = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        logger.warning("question bank snapshot unreadable (%s); curating", exc)
+        return None
+
+    header_size = len(MAGIC) + 2 * _HASH_SIZE
+    if len(blob) < header_size or not blob.startswith(MAGIC):
+        logger.warning("question bank snapshot %s has an unknown format; curating", path)
+        return None
+    stored_source = blob[len(MAGIC) : len(MAGIC) + _HASH_SIZE]
+    stored_payload = blob[len(MAGIC) + _HASH_SIZE : header_size]
+    payload = blob[header_size:]
+
+    try:
+        current_source = expected_hash or source_hash()
+    except OSError as exc:
+        logger.warning("question bank sources unreadable (%s); curating", exc)
+        return None
+    if stored_source != current_source:
+        logger.info("question bank snapshot is stale; curating from sources")
+        return None
+    if hashlib.sha256(payload).digest() != stored_payload:
+        logger.warning("question bank snapshot %s failed its checksum; curating", path)
+        return None
+    try:
+        state = pickle.loads(payload)
+    except Exception as exc:
+        logger.warning("question bank snapshot %s could not be decoded (%s); curating", path, exc)
+        return None
+    if not isinstance(state, dict):
+        return None
+    return state
+
+
+def build(path: Path = SNAPSHOT_PATH) -> Path:
+    """Run full curation and store its leaf pools; the build-step entry point."""
+    import questions
+
+    return write_snapshot(questions._curate_leaf_pools(), path)
+
@@ -0,0 +1,11 @@
+"""Build step for the question-bank snapshot (Dockerfile / Render build).
+
+    python -m questions.build_snapshot
+"""
+from __future__ import annotations
+
+from questions.bank_snapshot import build
+
+if __name__ == "__main__":
+    written = build()
+    print(f"question bank snapshot written: {written} ({written.stat().st_size} bytes)")
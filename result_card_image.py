@@ -0,0 +1,244 @@
+"""Budgeted Pillow image cards for the durable quiz result-card outbox.
+
+``utils.render_result_png`` draws the card from process-wide cached fonts,
+gradient and avatar mask. This module decides whether a card is affordable for
+one delivery. Profile name and avatar come from an LRU cache, and misses are
+cached too (no photo, download failure). Fetch and render share one latency
+budget and run off the event loop. ``None`` always means "send the text card":
+a slow Telegram file API or a Pillow failure can delay a result by at most the
+budget and can never lose it.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from threading import Lock
+
+from config import (
+    RESULT_CARD_AVATAR_CACHE,
+    RESULT_CARD_AVATAR_NEG_TTL,
+    RESULT_CARD_AVATAR_TTL,
+    RESULT_CARD_RENDER_BUDGET,
+)
+from runtime_metrics import LatencyHistogram, register_metrics_source
+
+logger = logging.getLogger(__name__)
+
+# A failed lookup (network, 5xx) is retried sooner than a confirmed "no photo".
+_FAILURE_TTL_SECONDS = 300.0
+
+
+@dataclass(frozen=True)
+class CachedProfile:
+    first_name: str
+    avatar: object | None
+    expires_at: float
+
+
+class ProfileAvatarCache:
+    """Thread-safe LRU of processed avatars with positive and negative TTLs."""
+
+    def __init__(
+        self,
+        *,
+        capacity: int,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if capacity <= 0:
+            raise ValueError("avatar cache capacity must be positive")
+        self.capacity = int(capacity)
+        self.ttl_seconds = float(ttl_seconds)
+        self.negative_ttl_seconds = float(negative_ttl_seconds)
+        self._clock = clock
+        self._entries: OrderedDict[int, CachedProfile] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+
+    def get(self, user_id: int) -> CachedProfile | None:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            if entry.avatar is None:
+                self._negative_hits += 1
+            else:
+                self._hits += 1
+            return entry
+
+    def put(
+        self,
+        user_id: int,
+        *,
+        first_name: str,
+        avatar: object | None,
+        ttl_seconds: float | None = None,
+    ) -> CachedProfile:
+        if ttl_seconds is None:
+            ttl_seconds = self.ttl_seconds if avatar is not None else self.negative_ttl_seconds
+        entry = CachedProfile(first_name or "", avatar, self._clock() + float(ttl_seconds))
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+            }
+
+
+def _draw_card(first_name: str, avatar, score: int, total: int) -> bytes:
+    from utils import _avatar_initial, _placeholder_avatar, get_rank_name, render_result_png
+
+    if avatar is None:
+        avatar = _placeholder_avatar(_avatar_initial(first_name))
+    return render_result_png(
+        first_name=first_name or "Игрок",
+        score=score,
+        total=total,
+        rank_name=get_rank_name(score / max(total, 1) * 100),
+        avatar_img=avatar,
+    )
+
+
+class ResultCardImagePipeline:
+    """Render one result card within ``budget_seconds`` or give up cleanly."""
+
+    def __init__(
+        self,
+        *,
+        budget_seconds: float,
+        avatars: ProfileAvatarCache,
+        draw: Callable[[str, object, int, int], bytes] = _draw_card,
+    ) -> None:
+        if budget_seconds <= 0:
+            raise ValueError("result-card render budget must be positive")
+        self.budget_seconds = float(budget_seconds)
+        self.avatars = avatars
+        self._draw = draw
+        self._fetches: dict[int, asyncio.Task] = {}
+        self._counters_lock = Lock()
+        self._rendered = 0
+        self._budget_exceeded = 0
+        self._failed = 0
+        self._render_latency = LatencyHistogram()
+
+    def _count(self, name: str) -> None:
+        with self._counters_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    async def _fetch_profile(self, bot, user_id: int) -> CachedProfile:
+        from utils import _avatar_from_bytes
+
+        try:
+            chat = await bot.get_chat(user_id)
+            first_name = getattr(chat, "first_name", None) or ""
+            photo = getattr(chat, "photo", None)
+            if photo is None:
+                return self.avatars.put(user_id, first_name=first_name, avatar=None)
+            file_obj = await bot.get_file(photo.big_file_id)
+            payload = await file_obj.download_as_bytearray()
+            avatar = await asyncio.to_thread(_avatar_from_bytes, bytes(payload))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.debug("result-card profile lookup failed for %s: %s", user_id, exc)
+            return self.avatars.put(
+                user_id,
+                first_name="",
+                avatar=None,
+                ttl_seconds=min(_FAILURE_TTL_SECONDS, self.avatars.negative_ttl_seconds),
+            )
+        return self.avatars.put(user_id, first_name=first_name, avatar=avatar)
+
+    def _profile_task(self, bot, user_id: int) -> asyncio.Task:
+        task = self._fetches.get(user_id)
+        if task is not None and not task.done():
+            return task
+        task = asyncio.ensure_future(self._fetch_profile(bot, user_id))
+        self._fetches[user_id] = task
+        task.add_done_callback(functools.partial(self._forget_fetch, user_id))
+        return task
+
+    def _forget_fetch(self, user_id: int, task: asyncio.Task) -> None:
+        if self._fetches.get(user_id) is task:
+            del self._fetches[user_id]
+
+    async def render(self, bot, *, user_id: int, score: int, total: int) -> bytes | None:
+        started = time.perf_counter()
+        deadline = started + self.budget_seconds
+        try:
+            profile = self.avatars.get(user_id)
+            if profile is None:
+                # Shielded: a fetch that misses this card's budget still warms
+                # the cache for the next card instead of being thrown away.
+                profile = await asyncio.wait_for(
+                    asyncio.shield(self._profile_task(bot, user_id)),
+                    timeout=max(0.0, deadline - time.perf_counter()),
+                )
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise TimeoutError
+            payload = await asyncio.wait_for(
+                asyncio.to_thread(self._draw, profile.first_name, profile.avatar, score, total),
+                timeout=remaining,
+            )
+        except TimeoutError:
+            self._count("_budget_exceeded")
+            return None
+        except Exception:
+            logger.warning("result-card image render failed for %s", user_id, exc_info=True)
+            self._count("_failed")
+            return None
+        finally:
+            self._render_latency.observe(time.perf_counter() - started)
+        self._count("_rendered")
+        return payload
+
+    def metrics(self) -> dict:
+        with self._counters_lock:
+            snapshot = {
+                "budget_seconds": self.budget_seconds,
+                "rendered": self._rendered,
+                "budget_exceeded": self._budget_exceeded,
+                "failed": self._failed,
+            }
+        snapshot["avatars"] = self.avatars.snapshot()
+        snapshot["render_latency"] = self._render_latency.snapshot()
+        return snapshot
+
+
+RESULT_CARD_IMAGES = ResultCardImagePipeline(
+    budget_seconds=RESULT_CARD_RENDER_BUDGET,
+    avatars=ProfileAvatarCache(
+        capacity=RESULT_CARD_AVATAR_CACHE,
+        ttl_seconds=RESULT_CARD_AVATAR_TTL,
+        negative_ttl_seconds=RESULT_CARD_AVATAR_NEG_TTL,
+    ),
+)
+register_metrics_source("result_card_image", RESULT_CARD_IMAGES.metrics)
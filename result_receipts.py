@@ -0,0 +1,439 @@
+"""Idempotency receipts in a dedicated collection, beside the embedded maps.
+
+The result stores make results exactly-once. Each receipt is written in the
+same atomic update as the points it guards. Until now, that receipt was a key
+in a non-evicting map inside the ``leaderboard`` user document
+(``legacy_result_receipts``, ``daily_bonus_receipts``, ...). Those maps
+never shrink. They ride along on every user read, and
+``scripts/check_result_storage_growth.py`` tracks how close they bring heavy
+players to the 16 MB BSON limit.
+
+With ``RESULT_RECEIPT_STORE=collection``, a receipt is instead one document
+in ``result_receipts``:
+
+* ``_id`` is ``<user_id>:<embedded path>``, and a unique
+  ``(user_id, kind, key)`` index enforces one receipt per user and result.
+  ``kind`` is the old map name and ``key`` is the path inside it.
+* :func:`write_once` inserts the receipt and applies the guarded user update
+  in one multi-document transaction. A duplicate receipt or a lost user CAS
+  aborts both, which keeps the exactly-once semantics of the embedded
+  layout. The user update still requires the embedded path to be absent, so
+  a receipt not yet migrated also blocks a replay.
+* :func:`read_receipt` is the dual read: the embedded map of the document
+  already in hand first, then the collection.
+* :func:`migrate_embedded_receipts` moves existing map entries online. Each
+  entry is inserted first and then unset only if unchanged, so a concurrent
+  writer always sees it in at least one place. ``migrate_db.py`` runs it once
+  the layout is enabled.
+
+The collection layout needs transactions (a replica set or sharded cluster).
+Once enabled, it never falls back to embedded receipts: after the migration
+a receipt may exist only in the collection, and an embedded write would not
+see it. While schema readiness is failed (standalone server, index drift,
+a transient error at startup), :func:`read_receipt` and :func:`write_once`
+raise :class:`ResultReceiptsUnavailable` and each store reports itself
+unavailable. Rollback is safe only before the migration has moved any
+entries. ``python scripts/bench_receipt_layout.py`` compares
+document sizes and decode latency of the two layouts.
+
+Per-day first-result owner markers (``*_bonus_result_owners``) stay in the
+user document. They take part in the base-result CAS itself.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+
+from runtime_metrics import LatencyHistogram, register_metrics_source
+from schema_readiness import SCHEMA_READINESS, SchemaRequirement
+
+logger = logging.getLogger(__name__)
+
+RECEIPTS_COLLECTION = "result_receipts"
+LAYOUT_ENV = "RESULT_RECEIPT_STORE"
+LAYOUT_EMBEDDED = "embedded"
+LAYOUT_COLLECTION = "collection"
+SCHEMA_NAME = "result_receipts"
+
+# Embedded receipt maps and how many path segments a receipt key spans.
+RECEIPT_MAPS = {
+    "legacy_result_receipts": 1,
+    "legacy_learning_receipts": 1,
+    "miniapp_result_receipts": 1,
+    "daily_bonus_receipts": 1,
+    "challenge_bonus_receipts": 2,
+}
+
+_INDEXES = {
+    "result_receipts_identity": (
+        [("user_id", ASCENDING), ("kind", ASCENDING), ("key", ASCENDING)],
+        {"unique": True},
+    ),
+    "result_receipts_applied": (
+        [("kind", ASCENDING), ("applied_at", ASCENDING)],
+        {},
+    ),
+}
+
+
+class ResultReceiptSchemaInvalid(RuntimeError):
+    """The receipts collection cannot guarantee exactly-once writes."""
+
+
+class ResultReceiptsUnavailable(RuntimeError):
+    """The collection layout is enabled but its schema is not ready."""
+
+
+class _UserCasLost(Exception):
+    """Aborts the receipt transaction when the guarded user update misses."""
+
+
+@dataclass(frozen=True)
+class ReceiptWrite:
+    applied: bool
+    after: dict | None = None
+    acknowledged: bool = True
+
+
+def configured_layout() -> str:
+    value = os.getenv(LAYOUT_ENV, LAYOUT_EMBEDDED).strip().lower()
+    return LAYOUT_COLLECTION if value == LAYOUT_COLLECTION else LAYOUT_EMBEDDED
+
+
+def split_path(path: str) -> tuple[str, str]:
+    kind, separator, key = path.partition(".")
+    if not separator or not key or kind not in RECEIPT_MAPS:
+        raise ValueError(f"not a receipt path: {path}")
+    return kind, key
+
+
+def receipt_doc_id(uid: str, path: str) -> str:
+    return f"{uid}:{path}"
+
+
+def _path_value(entry: dict | None, path: str) -> tuple[object | None, bool]:
+    current: object = entry or {}
+    for part in path.split("."):
+        if not isinstance(current, dict) or part not in current:
+            return None, False
+        current = current[part]
+    return current, True
+
+
+# ── schema ────────────────────────────────────────────────────
+
+
+def _transactions_supported(collection) -> bool:
+    hello = collection.database.client.admin.command("hello")
+    return hello.get("msg") == "isdbgrid" or bool(hello.get("setName"))
+
+
+def _index_matches(existing: dict | None, key: list, options: dict) -> bool:
+    return (
+        existing is not None
+        and existing.get("key") == key
+        and bool(existing.get("unique")) == bool(options.get("unique"))
+    )
+
+
+def audit_result_receipt_indexes(collection) -> None:
+    """Read-only drift check used by background schema revalidation."""
+    info = collection.index_information()
+    for name, (key, options) in _INDEXES.items():
+        if not _index_matches(info.get(name), key, options):
+            raise ResultReceiptSchemaInvalid(f"result receipt index {name} drifted")
+
+
+def ensure_result_receipts_schema(collection) -> bool:
+    """Create the unique indexes and prove the deployment runs transactions."""
+    if collection is None:
+        return False
+    try:
+        info = collection.index_information()
+        for name, (key, options) in _INDEXES.items():
+            existing = info.get(name)
+            if existing is None:
+                collection.create_index(key, name=name, **options)
+            elif not _index_matches(existing, key, options):
+                raise ResultReceiptSchemaInvalid(
+                    f"result receipt index {name} has incompatible options"
+                )
+        if not _transactions_supported(collection):
+            raise ResultReceiptSchemaInvalid(
+                "standalone MongoDB cannot update receipts and users atomically"
+            )
+    except (PyMongoError, ResultReceiptSchemaInvalid) as exc:
+        logger.warning("result receipts collection not ready; result writes are refused: %s", exc)
+        SCHEMA_READINESS.mark_failed(SCHEMA_NAME, collection, str(exc))
+        return False
+    SCHEMA_READINESS.mark_ready(SCHEMA_NAME, collection)
+    return True
+
+
+def receipts_collection():
+    """The receipts collection when the collection layout is enabled, else ``None``."""
+    if configured_layout() != LAYOUT_COLLECTION:
+        return None
+    import database
+
+    db = getattr(database, "db", None)
+    return None if db is None else db[RECEIPTS_COLLECTION]
+
+
+def active_receipts():
+    """The receipts collection in the collection layout, ``None`` when embedded.
+
+    Raises :class:`ResultReceiptsUnavailable` while the collection layout is
+    enabled but not ready.
+    """
+    receipts = receipts_collection()
+    if receipts is None:
+        return None
+    if not SCHEMA_READINESS.is_ready(SCHEMA_NAME, receipts):
+        raise ResultReceiptsUnavailable("result receipts collection is not ready")
+    return receipts
+
+
+def _collection_ready() -> bool:
+    receipts = receipts_collection()
+    return receipts is not None and SCHEMA_READINESS.is_ready(SCHEMA_NAME, receipts)
+
+
+# ── metrics ───────────────────────────────────────────────────
+
+
+class ReceiptMetrics:
+    def __init__(self) -> None:
+        self.transaction = LatencyHistogram()
+        self.external_reads = 0
+        self.external_hits = 0
+        self.duplicates = 0
+        self.cas_aborts = 0
+        self.migrated = 0
+
+    def metrics(self) -> dict:
+        return {
+            "layout": configured_layout(),
+            "active": _collection_ready(),
+            "external_reads": self.external_reads,
+            "external_hits": self.external_hits,
+            "duplicates": self.duplicates,
+            "cas_aborts": self.cas_aborts,
+            "migrated": self.migrated,
+            "transaction": self.transaction.snapshot(),
+        }
+
+
+RECEIPT_METRICS = ReceiptMetrics()
+register_metrics_source("result_receipts", RECEIPT_METRICS.metrics)
+
+
+# ── reads and writes ──────────────────────────────────────────
+
+
+def read_receipt(entry: dict | None, uid: str, path: str) -> tuple[object | None, bool]:
+    """Dual read: ``(value, found)`` from ``entry``'s embedded map, else the collection.
+
+    In the embedded layout only ``entry`` is consulted. Raises
+    :class:`ResultReceiptsUnavailable` when the receipt is not embedded and
+    the collection is enabled but not ready.
+    """
+    value, found = _path_value(entry, path)
+    if found:
+        return value, True
+    receipts = active_receipts()
+    if receipts is None:
+        return None, False
+    RECEIPT_METRICS.external_reads += 1
+    doc = receipts.find_one({"_id": receipt_doc_id(uid, path)}, {"receipt": 1})
+    if doc is None:
+        return None, False
+    RECEIPT_METRICS.external_hits += 1
+    return doc.get("receipt"), True
+
+
+def write_once(
+    users,
+    query: dict,
+    update: dict,
+    *,
+    uid: str,
+    path: str,
+    receipt,
+    return_after: bool = False,
+) -> ReceiptWrite:
+    """Apply ``update`` to the user matched by ``query`` together with one receipt.
+
+    The receipt at ``path`` must not exist yet in either layout. Returns
+    ``applied=False`` when it already does or the caller's CAS predicate
+    missed; callers then re-read with :func:`read_receipt` as before. With
+    ``return_after`` the post-update user document is returned. Raises
+    :class:`ResultReceiptsUnavailable` before writing anything when the
+    collection is enabled but not ready.
+    """
+    query = {**query, path: {"$exists": False}}
+    receipts = active_receipts()
+    if receipts is None:
+        update = {**update, "$set": {**update.get("$set", {}), path: receipt}}
+        return _apply_user_update(users, query, update, return_after=return_after)
+
+    kind, key = split_path(path)
+    document = {
+        "_id": receipt_doc_id(uid, path),
+        "user_id": uid,
+        "kind": kind,
+        "key": key,
+        "receipt": receipt,
+        "applied_at": _receipt_time(receipt),
+    }
+    started = time.perf_counter()
+    try:
+        with users.database.client.start_session() as session:
+            with session.start_transaction():
+                receipts.insert_one(document, session=session)
+                write = _apply_user_update(
+                    users, query, update, return_after=return_after, session=session
+                )
+                if not write.applied:
+                    raise _UserCasLost
+    except DuplicateKeyError:
+        RECEIPT_METRICS.duplicates += 1
+        return ReceiptWrite(applied=False)
+    except _UserCasLost:
+        RECEIPT_METRICS.cas_aborts += 1
+        return ReceiptWrite(applied=False)
+    except OperationFailure as exc:
+        if not exc.has_error_label("TransientTransactionError"):
+            raise
+        # A concurrent writer won the user document; the caller re-reads.
+        RECEIPT_METRICS.cas_aborts += 1
+        return ReceiptWrite(applied=False)
+    finally:
+        RECEIPT_METRICS.transaction.observe(time.perf_counter() - started)
+    return write
+
+
+def _receipt_time(receipt):
+    if isinstance(receipt, dict):
+        for field in ("applied_at", "completed_at"):
+            if field in receipt:
+                return receipt[field]
+    return None
+
+
+def _apply_user_update(users, query, update, *, return_after, session=None) -> ReceiptWrite:
+    options = {} if session is None else {"session": session}
+    if not update:
+        # Receipt-only write (legacy backfill): the user must still exist.
+        found = users.find_one(query, {"_id": 1}, **options)
+        return ReceiptWrite(applied=found is not None)
+    if return_after:
+        after = users.find_one_and_update(
+            query, update, return_document=ReturnDocument.AFTER, **options
+        )
+        return ReceiptWrite(applied=after is not None, after=after)
+    result = users.update_one(query, update, **options)
+    # Embedded: the receipt $set always modifies a matched user. In a
+    # transaction the receipt insert already guarantees exactly-once, and the
+    # user update alone may be a no-op (e.g. a $max with an older date).
+    counter = "modified_count" if session is None else "matched_count"
+    return ReceiptWrite(
+        applied=getattr(result, counter, 0) == 1,
+        acknowledged=getattr(result, "acknowledged", True) is True,
+    )
+
+
+def delete_receipts(receipts, uid: str, paths: list[str]) -> int:
+    if receipts is None or not paths:
+        return 0
+    result = receipts.delete_many({"_id": {"$in": [receipt_doc_id(uid, path) for path in paths]}})
+    return int(getattr(result, "deleted_count", 0) or 0)
+
+
+# ── online migration ──────────────────────────────────────────
+
+
+def _embedded_paths(entry: dict) -> list[tuple[str, object]]:
+    found = []
+    for kind, depth in RECEIPT_MAPS.items():
+        level = [(kind, entry.get(kind))]
+        for _ in range(depth):
+            level = [
+                (f"{prefix}.{key}", value)
+                for prefix, mapping in level
+                if isinstance(mapping, dict)
+                for key, value in mapping.items()
+            ]
+        found.extend(level)
+    return found
+
+
+def migrate_user_receipts(users, receipts, entry: dict) -> int:
+    """Copy one user's embedded receipts to ``receipts`` and unset the unchanged ones."""
+    uid = str(entry["_id"])
+    moved = []
+    for path, value in _embedded_paths(entry):
+        kind, key = split_path(path)
+        try:
+            receipts.insert_one(
+                {
+                    "_id": receipt_doc_id(uid, path),
+                    "user_id": uid,
+                    "kind": kind,
+                    "key": key,
+                    "receipt": value,
+                    "applied_at": _receipt_time(value),
+                }
+            )
+        except DuplicateKeyError:
+            existing = receipts.find_one({"_id": receipt_doc_id(uid, path)}, {"receipt": 1})
+            if existing is None or existing.get("receipt") != value:
+                logger.error("receipt %s differs between layouts; left embedded", path)
+                continue
+        moved.append((path, value))
+    unset = 0
+    for path, value in moved:
+        result = users.update_one({"_id": uid, path: value}, {"$unset": {path: ""}})
+        unset += int(getattr(result, "modified_count", 0) or 0)
+    # Nested maps (challenge receipts per mode) are dropped once empty.
+    for prefix in sorted({path.rpartition(".")[0] for path, _value in moved}):
+        if prefix not in RECEIPT_MAPS:
+            users.update_one({"_id": uid, prefix: {}}, {"$unset": {prefix: ""}})
+    RECEIPT_METRICS.migrated += unset
+    return unset
+
+
+def migrate_embedded_receipts(users, receipts, *, batch: int = 200) -> dict:
+    """Move every embedded receipt map entry into ``receipts``; safe while serving."""
+    started = time.perf_counter()
+    query = {"$or": [{kind: {"$exists": True}} for kind in RECEIPT_MAPS]}
+    projection = {kind: 1 for kind in RECEIPT_MAPS}
+    users_seen = moved = 0
+    for entry in users.find(query, projection).batch_size(batch):
+        users_seen += 1
+        moved += migrate_user_receipts(users, receipts, entry)
+    for kind in RECEIPT_MAPS:
+        users.update_many({kind: {}}, {"$unset": {kind: ""}})
+    return {"users": users_seen, "receipts": moved, "seconds": time.perf_counter() - started}
+
+
+SCHEMA_READINESS.register(
+    SchemaRequirement(
+        name=SCHEMA_NAME,
+        spec={
+            "indexes": {
+                name: {"key": [list(item) for item in key], **options}
+                for name, (key, options) in _INDEXES.items()
+            },
+            "transactions": True,
+        },
+        handle=receipts_collection,
+        ensure=ensure_result_receipts_schema,
+        audit=audit_result_receipt_indexes,
+    )
+)
@@ -0,0 +1,139 @@
+"""Process-local runtime metrics shared by the bot runtime and the HTTP service.
+
+Metrics are non-authoritative observability data. They live in memory, reset on
+restart and must never influence quiz, result or delivery decisions. Each
+subsystem owns its counters and registers one snapshot provider here; the
+``/production/metrics`` route only aggregates those snapshots.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+_SOURCES_LOCK = Lock()
+_SOURCES: dict[str, Callable[[], dict]] = {}
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket latency histogram with cheap percentile estimates."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        bounds = tuple(sorted(float(bound) for bound in buckets))
+        if not bounds or any(not math.isfinite(bound) or bound <= 0 for bound in bounds):
+            raise ValueError("histogram buckets must be finite positive numbers")
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = Lock()
+
+    def observe(self, seconds: float) -> None:
+        value = float(seconds)
+        if not math.isfinite(value) or value < 0:
+            return
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def _quantile(self, counts: list[int], total: int, quantile: float) -> float | None:
+        if total <= 0:
+            return None
+        rank = max(1, math.ceil(total * quantile))
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                if index < len(self._bounds):
+                    return self._bounds[index]
+                return self._max
+        return self._max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            total_sum = self._sum
+            maximum = self._max
+        buckets = {f"le_{bound:g}": count for bound, count in zip(self._bounds, counts[:-1], strict=True)}
+        buckets["le_inf"] = counts[-1]
+        return {
+            "count": total,
+            "sum_seconds": round(total_sum, 6),
+            "max_seconds": round(maximum, 6),
+            "p50_seconds": self._quantile(counts, total, 0.50),
+            "p90_seconds": self._quantile(counts, total, 0.90),
+            "p99_seconds": self._quantile(counts, total, 0.99),
+            "buckets": buckets,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self._bounds) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._max = 0.0
+
+
+def register_metrics_source(name: str, provider: Callable[[], dict]) -> None:
+    """Register or replace one named snapshot provider."""
+    clean = str(name or "").strip()
+    if not clean:
+        raise ValueError("metrics source name is required")
+    with _SOURCES_LOCK:
+        _SOURCES[clean] = provider
+
+
+def unregister_metrics_source(name: str) -> None:
+    with _SOURCES_LOCK:
+        _SOURCES.pop(str(name or "").strip(), None)
+
+
+def metrics_snapshot() -> dict[str, dict]:
+    """Collect every registered source; one failing provider never hides the rest."""
+    with _SOURCES_LOCK:
+        sources = sorted(_SOURCES.items())
+    snapshot: dict[str, dict] = {}
+    for name, provider in sources:
+        try:
+            snapshot[name] = provider()
+        except Exception:
+            logger.warning("metrics source %s failed", name, exc_info=True)
+            snapshot[name] = {"error": "unavailable"}
+    return snapshot
@@ -0,0 +1,264 @@
+"""Process-wide registry of verified MongoDB index and TTL contracts.
+
+Index contracts are proven once per storage handle: at boot, or lazily by the
+first caller when a handle was never verified. After that, hot paths such as
+quiz launch ask :meth:`SchemaReadinessRegistry.is_ready`, which reads one
+immutable snapshot without a lock or a ``listIndexes`` round trip.
+
+A periodic read-only audit re-checks every verified contract. Drift (an index
+dropped or rewritten behind the process's back) marks the requirement failed,
+and hot paths then fail closed instead of silently running without the
+guarantee. The next revalidation pass retries the owning module's idempotent
+``ensure`` so a repaired schema becomes ready again without a restart.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
+
+from runtime_metrics import LatencyHistogram, register_metrics_source
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SchemaRequirement:
+    """One storage contract owned by the module that registers it.
+
+    ``handle`` returns the current Mongo handle (``None`` when storage is not
+    configured). ``ensure`` creates/proves the contract and must call
+    :meth:`SchemaReadinessRegistry.mark_ready` on success. ``audit`` is
+    read-only and raises when the live indexes no longer match ``spec``.
+    """
+
+    name: str
+    spec: object
+    handle: Callable[[], object | None]
+    ensure: Callable[[object], object]
+    audit: Callable[[object], None]
+
+
+@dataclass(frozen=True)
+class _State:
+    handle: object
+    failure: str | None
+
+
+def same_handle(stored: object, handle: object) -> bool:
+    """Whether ``handle`` is the storage handle ``stored`` was bound to.
+
+    pymongo builds a fresh Collection per ``db[name]`` lookup and compares
+    them by database and name, so identity alone would miss equal handles.
+    """
+    return stored is handle or (handle is not None and stored == handle)
+
+
+class SchemaReadinessRegistry:
+    """Verify-once, audit-periodically readiness for registered requirements."""
+
+    def __init__(self, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = Lock()
+        self._requirements: dict[str, SchemaRequirement] = {}
+        # Copy-on-write: readers take one reference and never see a partial map.
+        self._states: dict[str, _State] = {}
+        self._schema_version: str | None = None
+        self._verified_at: float | None = None
+        self._revalidations = 0
+        self._drift_events = 0
+        self._repairs = 0
+        self._revalidate_latency = LatencyHistogram()
+
+    # ── registration ───────────────────────────────────────────
+
+    def register(self, requirement: SchemaRequirement) -> SchemaRequirement:
+        with self._lock:
+            self._requirements[requirement.name] = requirement
+        return requirement
+
+    def requirements(self) -> tuple[SchemaRequirement, ...]:
+        with self._lock:
+            return tuple(self._requirements.values())
+
+    # ── hot path (lock-free) ───────────────────────────────────
+
+    def is_ready(self, name: str, handle: object) -> bool:
+        state = self._states.get(name)
+        return state is not None and state.failure is None and same_handle(state.handle, handle)
+
+    def failure(self, name: str, handle: object) -> str | None:
+        """Return the drift reason recorded for ``handle``, if any."""
+        state = self._states.get(name)
+        if state is None or not same_handle(state.handle, handle):
+            return None
+        return state.failure
+
+    # ── state transitions ──────────────────────────────────────
+
+    def _set_state(self, name: str, state: _State | None) -> None:
+        with self._lock:
+            states = dict(self._states)
+            if state is None:
+                states.pop(name, None)
+            else:
+                states[name] = state
+            self._states = states
+
+    def mark_ready(self, name: str, handle: object) -> None:
+        self._set_state(name, _State(handle, None))
+
+    def mark_failed(self, name: str, handle: object, reason: str) -> None:
+        self._set_state(name, _State(handle, reason or "schema drift"))
+
+    def reset(self, name: str | None = None) -> None:
+        with self._lock:
+            self._states = {} if name is None else {
+                key: value for key, value in self._states.items() if key != name
+            }
+            if name is None:
+                self._schema_version = None
+                self._verified_at = None
+
+    # ── boot verification ──────────────────────────────────────
+
+    def _spec_version(self, requirements: tuple[SchemaRequirement, ...]) -> str:
+        payload = json.dumps(
+            sorted((item.name, item.spec) for item in requirements),
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _ensure(self, requirement: SchemaRequirement) -> bool:
+        handle = requirement.handle()
+        if handle is None:
+            return False
+        if self.is_ready(requirement.name, handle):
+            return True
+        requirement.ensure(handle)
+        return self.is_ready(requirement.name, handle)
+
+    def verify_all(self, *, max_workers: int | None = None) -> str | None:
+        """Prove every registered contract concurrently; return the schema version.
+
+        Requirements whose storage is not configured are skipped. The first
+        failure in registration order is re-raised after all checks finish, so
+        one broken collection cannot hide another in the boot log.
+        """
+        requirements = self.requirements()
+        if not requirements:
+            return None
+        workers = max_workers or min(8, len(requirements))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="schema-verify") as pool:
+            futures = [(item, pool.submit(self._ensure, item)) for item in requirements]
+        first_error: BaseException | None = None
+        for requirement, future in futures:
+            error = future.exception()
+            if error is None:
+                continue
+            logger.error("schema requirement %s failed boot verification: %s", requirement.name, error)
+            if first_error is None:
+                first_error = error
+        if first_error is not None:
+            raise first_error
+        version = self._spec_version(requirements)
+        with self._lock:
+            self._schema_version = version
+            self._verified_at = self._clock()
+        logger.info("storage schema %s verified (%d requirements)", version, len(requirements))
+        return version
+
+    @property
+    def schema_version(self) -> str | None:
+        return self._schema_version
+
+    # ── background revalidation ────────────────────────────────
+
+    def revalidate(self) -> dict[str, bool]:
+        """Audit verified contracts and retry failed ones; return readiness by name."""
+        started = time.perf_counter()
+        results: dict[str, bool] = {}
+        try:
+            for requirement in self.requirements():
+                state = self._states.get(requirement.name)
+                if state is None:
+                    continue
+                try:
+                    handle = requirement.handle()
+                except Exception:
+                    handle = None
+                if handle is None or not same_handle(state.handle, handle):
+                    continue
+                if state.failure is not None:
+                    results[requirement.name] = self._repair(requirement, handle)
+                    continue
+                try:
+                    requirement.audit(handle)
+                except Exception as exc:
+                    self.mark_failed(requirement.name, handle, str(exc))
+                    with self._lock:
+                        self._drift_events += 1
+                    logger.error(
+                        "schema requirement %s drifted; failing closed: %s",
+                        requirement.name,
+                        exc,
+                    )
+                    results[requirement.name] = False
+                    continue
+                results[requirement.name] = True
+        finally:
+            with self._lock:
+                self._revalidations += 1
+            self._revalidate_latency.observe(time.perf_counter() - started)
+        return results
+
+    def _repair(self, requirement: SchemaRequirement, handle: object) -> bool:
+        try:
+            requirement.ensure(handle)
+        except Exception as exc:
+            logger.warning("schema requirement %s still unsafe: %s", requirement.name, exc)
+            return False
+        if not self.is_ready(requirement.name, handle):
+            return False
+        with self._lock:
+            self._repairs += 1
+        logger.info("schema requirement %s verified again", requirement.name)
+        return True
+
+    def metrics(self) -> dict:
+        states = self._states
+        with self._lock:
+            names = list(self._requirements)
+            snapshot = {
+                "schema_version": self._schema_version,
+                "verified_age_seconds": (
+                    None
+                    if self._verified_at is None
+                    else round(self._clock() - self._verified_at, 3)
+                ),
+                "revalidations": self._revalidations,
+                "drift_events": self._drift_events,
+                "repairs": self._repairs,
+            }
+        requirements = {}
+        for name in names:
+            state = states.get(name)
+            if state is None:
+                requirements[name] = "unverified"
+            elif state.failure is None:
+                requirements[name] = "ready"
+            else:
+                requirements[name] = "failed"
+        snapshot["requirements"] = requirements
+        snapshot["revalidate"] = self._revalidate_latency.snapshot()
+        return snapshot
+
+
+SCHEMA_READINESS = SchemaReadinessRegistry()
+register_metrics_source("schema_readiness", SCHEMA_READINESS.metrics)
@@ -0,0 +1,138 @@
+"""Offline benchmark for ``/api/me`` profile assembly.
+
+Replays the request against in-memory collections that sleep ``--latency-ms``
+per MongoDB round trip, and reports p50/p99 for three paths: the previous
+serial sequence (five calls, three reads of the user document), a cold
+assembly (one user-document read, history reads on the thread pool) and a
+cached read. No network or MongoDB access is used. Output is one JSON document.
+
+    python scripts/bench_profile_assembly.py --requests 200 --latency-ms 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import database  # noqa: E402
+import profile_cache  # noqa: E402
+from web_api import profile  # noqa: E402
+from web_api.routes import (  # noqa: E402
+    _history_timestamp,
+    _public_user_document,
+    _render_profile,
+    _serialize_history,
+)
+
+_LATENCY = 0.0
+
+
+def _round_trip() -> None:
+    time.sleep(_LATENCY)
+
+
+class _Users:
+    def __init__(self, users: int) -> None:
+        self.docs = {
+            str(uid): {"_id": str(uid), "first_name": f"User {uid}", "total_points": uid * 3,
+                       "achievements": {"first_test": "01.01.2026"}}
+            for uid in range(users)
+        }
+
+    def find_one(self, query, projection=None):
+        _round_trip()
+        return self.docs.get(query["_id"])
+
+    def count_documents(self, query):
+        _round_trip()
+        threshold = query["total_points"]["$gt"]
+        return sum(1 for doc in self.docs.values() if doc["total_points"] > threshold)
+
+
+def _bot_history(user_id, limit=10):
+    _round_trip()
+    return [{"level_key": "easy_p1", "correct_count": 8, "total_questions": 10}]
+
+
+def _miniapp_history(user_id, limit=10):
+    _round_trip()
+    return [{"source": "miniapp", "level_key": "easy_p2", "correct_count": 9}]
+
+
+def _serial_profile(uid: int) -> dict:
+    position, entry = database.get_user_position(uid)
+    stats_data = database.get_user_stats(uid) or {}
+    history = sorted(
+        _miniapp_history(uid) + database.get_user_history(uid), key=_history_timestamp, reverse=True
+    )[:10]
+    achievements, streak_count, streak_date = database.get_user_achievements(uid)
+    return {
+        "position": position,
+        "entry": _public_user_document(entry),
+        "stats": _public_user_document(stats_data),
+        "history": _serialize_history(history),
+        "achievements": achievements,
+        "streak": {"count": streak_count, "last": streak_date},
+    }
+
+
+def _summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "requests": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _timed(call, uids) -> list[float]:
+    samples = []
+    for uid in uids:
+        started = time.perf_counter()
+        call(uid)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main() -> int:
+    global _LATENCY
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=4.0)
+    args = parser.parse_args()
+    _LATENCY = max(0.0, args.latency_ms) / 1000
+
+    database.collection = _Users(args.users)
+    database.get_user_history = _bot_history
+    database.LEADERBOARD_RANK_INDEX.position = lambda points: None
+    profile.get_miniapp_history = _miniapp_history
+    cache = profile_cache.ProfileCache(args.requests, 60)
+    profile.PROFILE_CACHE = profile_cache.PROFILE_CACHE = cache
+
+    uids = [index % args.users for index in range(args.requests)]
+    serial = _timed(_serial_profile, uids)
+    cold = _timed(lambda uid: (cache.invalidate(uid), profile.profile_for(uid, _render_profile)), uids)
+    cached = _timed(lambda uid: profile.profile_for(uid, _render_profile), uids)
+
+    print(json.dumps({
+        "latency_ms_per_round_trip": args.latency_ms,
+        "serial": _summary(serial),
+        "assembled_cold": _summary(cold),
+        "cached": _summary(cached),
+        "cache": cache.metrics(),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
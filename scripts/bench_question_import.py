@@ -0,0 +1,113 @@
+"""Cold-start benchmark for ``import questions`` with and without the snapshot.
+
+Each cold sample is a fresh interpreter that imports only the ``questions``
+package, so the numbers include curation (or snapshot verification and
+decoding) but not the rest of the bot. The step itself is also timed
+in-process: leaf-pool curation against snapshot load. The snapshot is built
+first when it is missing or stale. Output is one JSON document.
+
+    python scripts/bench_question_import.py --runs 15
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from questions import bank_snapshot  # noqa: E402
+
+_PROBE = (
+    "import time; started = time.perf_counter(); import questions; "
+    "print(time.perf_counter() - started, questions._FROM_SNAPSHOT)"
+)
+
+
+def _sample(snapshot: bool) -> tuple[float, bool]:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    if snapshot:
+        env.pop(bank_snapshot.DISABLE_ENV, None)
+    else:
+        env[bank_snapshot.DISABLE_ENV] = "1"
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return float(output[0]), output[1] == "True"
+
+
+def _summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+    runs = max(1, args.runs)
+
+    if bank_snapshot.load_snapshot() is None:
+        bank_snapshot.build()
+
+    curated = []
+    snapshot = []
+    for _ in range(runs):
+        elapsed, used = _sample(snapshot=False)
+        if used:
+            raise RuntimeError("snapshot was used although it was disabled")
+        curated.append(elapsed)
+        elapsed, used = _sample(snapshot=True)
+        if not used:
+            raise RuntimeError("snapshot was rejected; rebuild it before benchmarking")
+        snapshot.append(elapsed)
+
+    import questions
+
+    curate_step = []
+    load_step = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        questions._curate_leaf_pools()
+        curate_step.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        bank_snapshot.load_snapshot()
+        load_step.append(time.perf_counter() - started)
+
+    print(
+        json.dumps(
+            {
+                "snapshot_bytes": bank_snapshot.SNAPSHOT_PATH.stat().st_size,
+                "full_curation": _summary(curated),
+                "snapshot": _summary(snapshot),
+                "speedup": round(statistics.median(curated) / statistics.median(snapshot), 2),
+                "step_leaf_curation": _summary(curate_step),
+                "step_snapshot_load": _summary(load_step),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+"""Offline benchmark: embedded receipt maps vs the ``result_receipts`` collection.
+
+Builds the same representative ``leaderboard`` user as
+``bench_user_projection.py`` with ``--receipts`` entries per receipt map.
+It then compares the two layouts:
+
+* user document BSON bytes (what every whole-document read and write-back
+  carries) and decode latency;
+* the external layout's per-receipt document size, and the decode latency
+  of the single receipt a replay lookup fetches by ``_id``.
+
+No MongoDB access is used. Output is one JSON document.
+
+    python scripts/bench_receipt_layout.py --receipts 200 --rounds 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import bson  # noqa: E402
+
+from result_receipts import (  # noqa: E402
+    RECEIPT_MAPS,
+    _embedded_paths,
+    receipt_doc_id,
+    split_path,
+)
+from scripts.bench_user_projection import _user  # noqa: E402
+
+
+def _external(doc: dict) -> tuple[dict, list[dict]]:
+    uid = str(doc["_id"])
+    user = {key: value for key, value in doc.items() if key not in RECEIPT_MAPS}
+    receipts = []
+    for path, value in _embedded_paths(doc):
+        kind, key = split_path(path)
+        receipts.append(
+            {
+                "_id": receipt_doc_id(uid, path),
+                "user_id": uid,
+                "kind": kind,
+                "key": key,
+                "receipt": value,
+                "applied_at": value.get("applied_at") if isinstance(value, dict) else None,
+            }
+        )
+    return user, receipts
+
+
+def _decode_us(payload: bytes, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        bson.decode(payload)
+    return round((time.perf_counter() - started) / rounds * 1_000_000, 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--receipts", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    embedded = _user(args.receipts)
+    # Challenge receipts are keyed by mode, then day.
+    embedded["challenge_bonus_receipts"] = {"random20": embedded["challenge_bonus_receipts"]}
+    user, receipts = _external(embedded)
+    embedded_bytes = bson.encode(embedded)
+    user_bytes = bson.encode(user)
+    receipt_sizes = [len(bson.encode(receipt)) for receipt in receipts] or [0]
+    one_receipt = bson.encode(receipts[0]) if receipts else bson.encode({})
+    report = {
+        "receipts_per_map": args.receipts,
+        "receipt_documents": len(receipts),
+        "embedded": {
+            "user_bytes": len(embedded_bytes),
+            "user_decode_us": _decode_us(embedded_bytes, args.rounds),
+        },
+        "collection": {
+            "user_bytes": len(user_bytes),
+            "user_decode_us": _decode_us(user_bytes, args.rounds),
+            "receipt_bytes_avg": round(sum(receipt_sizes) / len(receipt_sizes), 1),
+            "receipt_bytes_total": sum(receipt_sizes),
+            "receipt_lookup_decode_us": _decode_us(one_receipt, args.rounds),
+        },
+        "user_bytes_ratio": round(len(user_bytes) / len(embedded_bytes), 4),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
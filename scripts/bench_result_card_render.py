@@ -0,0 +1,105 @@
+"""Offline benchmark for the Pillow result-card renderer.
+
+Measures per-card render time for a cold process, where fonts, gradient and
+placeholder avatars are loaded on the first card, and for warm cached renders.
+It also times the full budgeted pipeline with a cached avatar. No network,
+MongoDB or Bot API access is used. Output is one JSON document.
+
+    python scripts/bench_result_card_render.py --cards 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import utils  # noqa: E402
+from result_card_image import ProfileAvatarCache, ResultCardImagePipeline  # noqa: E402
+
+
+class _NoProfileBot:
+    async def get_chat(self, user_id):
+        return type("Chat", (), {"first_name": "Читатель", "photo": None})()
+
+
+def _summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "cards": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p90_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _render_once(score: int) -> float:
+    started = time.perf_counter()
+    utils.render_result_png(
+        first_name="Читатель",
+        score=score,
+        total=10,
+        rank_name=utils.get_rank_name(score * 10),
+        avatar_img=utils._placeholder_avatar("Ч"),
+    )
+    return time.perf_counter() - started
+
+
+def _cold_render() -> float:
+    utils._load_fonts.cache_clear()
+    utils._gradient_background.cache_clear()
+    utils._placeholder_avatar.cache_clear()
+    utils._avatar_mask.cache_clear()
+    return _render_once(7)
+
+
+async def _pipeline_samples(cards: int) -> list[float]:
+    pipeline = ResultCardImagePipeline(
+        budget_seconds=5.0,
+        avatars=ProfileAvatarCache(capacity=8, ttl_seconds=3600, negative_ttl_seconds=3600),
+    )
+    bot = _NoProfileBot()
+    await pipeline.render(bot, user_id=1, score=5, total=10)
+    samples = []
+    for index in range(cards):
+        started = time.perf_counter()
+        payload = await pipeline.render(bot, user_id=1, score=index % 11, total=10)
+        samples.append(time.perf_counter() - started)
+        if payload is None:
+            raise RuntimeError("pipeline unexpectedly fell back to the text card")
+    return samples
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=100)
+    args = parser.parse_args(argv)
+    cards = max(1, args.cards)
+
+    cold = _cold_render()
+    warm = [_render_once(index % 11) for index in range(cards)]
+    pipeline = asyncio.run(_pipeline_samples(cards))
+    print(
+        json.dumps(
+            {
+                "cold_first_card_ms": round(cold * 1000, 3),
+                "warm_render": _summary(warm),
+                "budgeted_pipeline_cached_avatar": _summary(pipeline),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+"""Offline benchmark for quiz session storage: embedded copies vs bank references.
+
+Builds representative 20-question bot (``quiz_sessions``) and Mini App
+(``miniapp_sessions``) documents from the real question bank in both formats,
+reports their BSON sizes, and times hydration of the reference format. No
+MongoDB access is used. Output is one JSON document.
+
+    python scripts/bench_session_storage.py --questions 20 --reads 2000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import bson  # noqa: E402
+
+from question_identity import get_qid  # noqa: E402
+from questions import QUESTION_BANK  # noqa: E402
+from session_question_refs import compact_legacy_spec, legacy_session_questions  # noqa: E402
+from web_api import quiz  # noqa: E402
+
+
+def _summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "reads": len(ordered),
+        "mean_us": round(statistics.fmean(ordered) * 1_000_000, 2),
+        "p50_us": round(ordered[len(ordered) // 2] * 1_000_000, 2),
+        "p90_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))] * 1_000_000, 2),
+        "max_us": round(ordered[-1] * 1_000_000, 2),
+    }
+
+
+def _session_base(user_id: str) -> dict:
+    return {
+        "_id": "00000000-0000-0000-0000-000000000000",
+        "user_id": user_id,
+        "status": "in_progress",
+        "current_index": 0,
+        "correct_count": 0,
+        "answered_questions": [],
+        "start_time": time.time(),
+    }
+
+
+def _sizes(embedded: dict, referenced: dict) -> dict:
+    embedded_bytes = len(bson.encode(embedded))
+    referenced_bytes = len(bson.encode(referenced))
+    return {
+        "embedded_bytes": embedded_bytes,
+        "referenced_bytes": referenced_bytes,
+        "ratio": round(referenced_bytes / embedded_bytes, 3),
+    }
+
+
+def _timed(reads: int, read) -> list[float]:
+    samples = []
+    for _ in range(reads):
+        started = time.perf_counter()
+        if not read():
+            raise RuntimeError("hydration unexpectedly failed")
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    slots = random.Random(7).sample(range(len(QUESTION_BANK)), args.questions)
+    selected = [QUESTION_BANK.at(slot) for slot in slots]
+
+    legacy_spec = {
+        "mode": "level",
+        "question_ids": [get_qid(question) for question in selected],
+        "questions_data": selected,
+    }
+    bot_embedded = {**_session_base("42"), **legacy_spec}
+    bot_referenced = {**_session_base("42"), **compact_legacy_spec(legacy_spec)}
+    if "questions_data" in bot_referenced:
+        raise RuntimeError("bank questions were not compacted")
+
+    prepared, fields = quiz.prepare_session_questions(selected)
+    if "question_refs" not in fields:
+        raise RuntimeError("bank questions were not referenced")
+    miniapp_embedded = {**_session_base("42"), "question_count": len(prepared), "questions": prepared}
+    miniapp_referenced = {**_session_base("42"), "question_count": len(prepared), **fields}
+
+    legacy_session_questions(bot_referenced)
+    report = {
+        "questions": args.questions,
+        "bank_version": QUESTION_BANK.content_hash,
+        "bot_session": _sizes(bot_embedded, bot_referenced),
+        "miniapp_session": _sizes(miniapp_embedded, miniapp_referenced),
+        "bot_hydration": _summary(
+            _timed(args.reads, lambda: legacy_session_questions(bot_referenced))
+        ),
+        "miniapp_hydration": _summary(
+            _timed(args.reads, lambda: quiz.session_questions(miniapp_referenced))
+        ),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Offline benchmark: BSON bytes per user read, whole document vs named field set.
+
+Builds a representative ``leaderboard`` user document from the same defaults
+that ``init_user_stats`` seeds: 92 per-level counters, achievements and
+streaks. It then adds ``--receipts`` entries to each idempotency receipt map.
+For each request type, it reports the bytes a full ``find_one`` returns and
+the bytes its ``user_records`` projection returns. The projection is applied
+in Python the way MongoDB applies it, and no MongoDB access is used. Output
+is one JSON document.
+
+    python scripts/bench_user_projection.py --receipts 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import bson  # noqa: E402
+
+from database import ALL_LEVEL_KEYS  # noqa: E402
+from user_records import (  # noqa: E402
+    ACHIEVEMENT_FIELDS,
+    BONUS_FIELDS,
+    IDENTITY_FIELDS,
+    PROFILE_FIELDS,
+    RANKING_FIELDS,
+    RECEIPT_AGE_FIELDS,
+    RECEIPT_MAP_FIELDS,
+    UserFieldSet,
+)
+
+REQUEST_TYPES = {
+    "miniapp_profile": PROFILE_FIELDS,
+    "stats_screen": PROFILE_FIELDS,
+    "quiz_result_position": RANKING_FIELDS,
+    "points_to_next_place": RANKING_FIELDS,
+    "achievement_update": ACHIEVEMENT_FIELDS,
+    "daily_bonus": BONUS_FIELDS,
+    "quiz_start_identity": IDENTITY_FIELDS,
+    "receipt_prune": RECEIPT_AGE_FIELDS,
+}
+
+
+def _user(receipts: int) -> dict:
+    now = datetime(2026, 1, 1)
+    doc = {
+        "_id": "123456789",
+        "username": "reader",
+        "first_name": "Читатель",
+        "first_play_date": "2025-09-01",
+        "created_at": now,
+        "last_activity": now,
+        "total_points": 4210,
+        "total_tests": 180,
+        "total_questions_answered": 2400,
+        "total_correct_answers": 1900,
+        "total_time_spent": 36000,
+        "battles_played": 12,
+        "battles_won": 7,
+        "battles_lost": 4,
+        "battles_draw": 1,
+        "achievements": {f"achievement_{index}": "2025-10-01" for index in range(12)},
+        "challenge_streak_count": 2,
+        "challenge_streak_last_date": "2025-12-31",
+        "daily_streak": 5,
+        "daily_streak_last": "2025-12-31",
+        "perfect_count": 9,
+        "max_streak_ever": 31,
+        "daily_activity_streak": 5,
+        "daily_activity_last": "2025-12-31",
+        "last_perfect_date": "2025-12-20",
+        "last_daily_bonus": "2025-12-31",
+        "random20_last_bonus_date": "2025-12-30",
+    }
+    for key in ALL_LEVEL_KEYS:
+        doc.update({f"{key}_attempts": 3, f"{key}_correct": 25, f"{key}_total": 30,
+                    f"{key}_best_score": 10})
+    receipt = {"points": 12, "daily_bonus": 5, "new_achievements": [], "applied_at": now}
+    for field in RECEIPT_MAP_FIELDS:
+        doc[field] = {
+            f"{field[:8]}-{index:032x}": dict(receipt, applied_at=now - timedelta(hours=index))
+            for index in range(receipts)
+        }
+    return doc
+
+
+def _project(doc: dict, fields: UserFieldSet) -> dict:
+    projection = dict(fields.projection)
+    if fields is RECEIPT_AGE_FIELDS:
+        receipts = doc.get("miniapp_result_receipts") or {}
+        return {
+            "_id": doc["_id"],
+            "miniapp_result_receipts": {
+                key: {"applied_at": value.get("applied_at")} for key, value in receipts.items()
+            },
+        }
+    if all(value == 0 for value in projection.values()):
+        return {key: value for key, value in doc.items() if key not in projection}
+    return {key: value for key, value in doc.items() if key == "_id" or key in projection}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--receipts", type=int, default=200)
+    args = parser.parse_args()
+
+    doc = _user(args.receipts)
+    full_bytes = len(bson.encode(doc))
+    requests = {}
+    for request, fields in REQUEST_TYPES.items():
+        projected = len(bson.encode(_project(doc, fields)))
+        requests[request] = {
+            "field_set": fields.name,
+            "full_bytes": full_bytes,
+            "projected_bytes": projected,
+            "ratio": round(projected / full_bytes, 4),
+        }
+    report = {
+        "receipts_per_map": args.receipts,
+        "level_counters": len(ALL_LEVEL_KEYS) * 4,
+        "document_bytes": full_bytes,
+        "requests": requests,
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
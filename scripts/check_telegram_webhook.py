@@ -23,7 +23,7 @@ SAFE = 0
 UNSAFE = 1
 UNAVAILABLE = 2
 WEBHOOK_PATH = "/telegram/webhook"
-EXPECTED_MAX_CONNECTIONS = 1
+EXPECTED_MAX_CONNECTIONS = 4
 EXPECTED_ALLOWED_UPDATES = frozenset({"message", "callback_query"})
 DEFAULT_ERROR_MAX_AGE_SECONDS = 300
 
@@ -0,0 +1,260 @@
+"""Bank references instead of embedded question copies in quiz sessions.
+
+Bot sessions (``quiz_sessions``) used to store ``questions_data`` next to
+``question_ids``, and Mini App sessions (``miniapp_sessions``) embedded every
+prepared question (text, shuffled options, explanation, verse). Both copies
+come from the immutable in-memory ``QUESTION_BANK``, so new sessions store
+references and are hydrated on read:
+
+* bot sessions keep ``question_ids`` (content ids, ``get_qid``), add a
+  parallel ``question_digests`` list and drop ``questions_data``;
+* Mini App sessions store ``question_refs`` (``{"id", "order", "digest"}``).
+  ``order`` is the per-session option permutation, so hydration rebuilds
+  exactly the options the user was shown.
+
+A digest fingerprints the card's full content (answer key, explanation, verse
+included).
+
+Both record ``question_bank_version`` (:attr:`QuestionBank.content_hash`).
+A question is only referenced when the bank holds an identical copy under its
+id; anything else (hand-built retry drills, test doubles) is embedded as
+before, and the embedded formats stay readable.
+
+After a deploy that edits the bank, sessions hydrate by id from the new bank.
+Bot content ids hash only text and options, so for both session kinds a card
+whose content changed in any way fails its digest check; references written
+before digests existed are only hydrated while ``question_bank_version`` still
+matches. A failed hydration surfaces as a session without questions, which the
+readers already treat as inconsistent. Version mismatches are counted.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections.abc import Callable, Mapping, Sequence
+from threading import Lock
+
+from question_identity import get_qid
+from runtime_metrics import register_metrics_source
+
+logger = logging.getLogger(__name__)
+
+BANK_VERSION_FIELD = "question_bank_version"
+LEGACY_QUESTIONS_FIELD = "questions_data"
+LEGACY_DIGESTS_FIELD = "question_digests"
+MINIAPP_REFS_FIELD = "question_refs"
+
+
+def _bank():
+    from questions import QUESTION_BANK
+
+    return QUESTION_BANK
+
+
+def bank_version() -> str:
+    return _bank().content_hash
+
+
+class QuestionRefMetrics:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._counts = {
+            "referenced": 0,
+            "embedded": 0,
+            "hydrated": 0,
+            "hydration_failures": 0,
+            "version_mismatches": 0,
+        }
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+QUESTION_REF_METRICS = QuestionRefMetrics()
+register_metrics_source("session_question_refs", QUESTION_REF_METRICS.metrics)
+
+_LEGACY_INDEX_LOCK = Lock()
+_LEGACY_INDEX: tuple[object, dict[str, Mapping]] | None = None
+
+
+def _legacy_index() -> dict[str, Mapping]:
+    """``get_qid`` → bank question, built once per bank object."""
+    global _LEGACY_INDEX
+    bank = _bank()
+    cached = _LEGACY_INDEX
+    if cached is not None and cached[0] is bank:
+        return cached[1]
+    with _LEGACY_INDEX_LOCK:
+        if _LEGACY_INDEX is None or _LEGACY_INDEX[0] is not bank:
+            index: dict[str, Mapping] = {}
+            for slot in range(len(bank)):
+                question = bank.at(slot)
+                index.setdefault(get_qid(question), question)
+            _LEGACY_INDEX = (bank, index)
+        return _LEGACY_INDEX[1]
+
+
+_DIGESTS: tuple[object, dict[str, str]] | None = None
+
+
+def card_digest(question: Mapping) -> str:
+    """sha256 prefix over one card's full content, as in ``content_hash``."""
+    material = json.dumps(question, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+def _bank_digest(key: str, question: Mapping) -> str:
+    """``card_digest`` of a bank card, memoised per bank object and ``key``."""
+    global _DIGESTS
+    bank = _bank()
+    cached = _DIGESTS
+    if cached is None or cached[0] is not bank:
+        cached = _DIGESTS = (bank, {})
+    digests = cached[1]
+    digest = digests.get(key)
+    if digest is None:
+        digest = digests[key] = card_digest(question)
+    return digest
+
+
+def _legacy_digest(qid: str, question: Mapping) -> str:
+    return _bank_digest(f"qid:{qid}", question)
+
+
+def _same_question(stored: Mapping | None, question: Mapping) -> bool:
+    return stored is not None and (stored is question or stored == question)
+
+
+def _note_version(session: Mapping) -> None:
+    if session.get(BANK_VERSION_FIELD) != bank_version():
+        QUESTION_REF_METRICS.count("version_mismatches")
+
+
+# ── bot sessions ──────────────────────────────────────────────
+
+
+def compact_legacy_spec(spec: dict) -> dict:
+    """``spec`` without ``questions_data`` when every question is a bank card.
+
+    The result carries ``question_bank_version`` and ``question_digests``
+    instead. Otherwise ``spec``
+    is returned unchanged (embedded format).
+    """
+    questions = spec.get(LEGACY_QUESTIONS_FIELD)
+    question_ids = spec.get("question_ids")
+    index = _legacy_index()
+    if (
+        not isinstance(questions, list)
+        or not isinstance(question_ids, list)
+        or len(questions) != len(question_ids)
+        or not all(
+            _same_question(index.get(qid), question)
+            for qid, question in zip(question_ids, questions, strict=True)
+        )
+    ):
+        QUESTION_REF_METRICS.count("embedded")
+        return spec
+    compact = {key: value for key, value in spec.items() if key != LEGACY_QUESTIONS_FIELD}
+    compact[BANK_VERSION_FIELD] = bank_version()
+    compact[LEGACY_DIGESTS_FIELD] = [
+        _legacy_digest(qid, index[qid]) for qid in question_ids
+    ]
+    QUESTION_REF_METRICS.count("referenced")
+    return compact
+
+
+def _legacy_cards_current(question_ids, questions, digests, same_version: bool) -> bool:
+    if any(question is None for question in questions):
+        return False
+    if digests is None:
+        return same_version
+    return (
+        isinstance(digests, list)
+        and len(digests) == len(question_ids)
+        and all(
+            digest == _legacy_digest(qid, question)
+            for qid, question, digest in zip(question_ids, questions, digests, strict=True)
+        )
+    )
+
+
+def legacy_session_questions(session: Mapping):
+    """Questions of a bot session: embedded ``questions_data`` or hydrated ids.
+
+    Returns whatever an embedded session stores (callers validate it) and
+    ``None`` when a referenced session cannot be hydrated: an id is missing,
+    a card's digest changed, or digestless ids meet a newer bank version.
+    """
+    if LEGACY_QUESTIONS_FIELD in session or BANK_VERSION_FIELD not in session:
+        return session.get(LEGACY_QUESTIONS_FIELD)
+    question_ids = session.get("question_ids")
+    if not isinstance(question_ids, list):
+        QUESTION_REF_METRICS.count("hydration_failures")
+        return None
+    digests = session.get(LEGACY_DIGESTS_FIELD)
+    same_version = session.get(BANK_VERSION_FIELD) == bank_version()
+    _note_version(session)
+    index = _legacy_index()
+    questions = [index.get(qid) for qid in question_ids]
+    if not _legacy_cards_current(question_ids, questions, digests, same_version):
+        QUESTION_REF_METRICS.count("hydration_failures")
+        logger.warning("quiz session %s references an unavailable question", session.get("_id"))
+        return None
+    QUESTION_REF_METRICS.count("hydrated")
+    return questions
+
+
+# ── Mini App sessions ─────────────────────────────────────────
+
+
+def miniapp_question_refs(
+    selected: Sequence[Mapping], orders: Sequence[Sequence[int]]
+) -> dict | None:
+    """Reference fields for a Mini App session, or ``None`` to embed instead."""
+    bank = _bank()
+    refs = []
+    for question, order in zip(selected, orders, strict=True):
+        question_id = str(question.get("id") or "").strip()
+        if not question_id or not _same_question(bank.question(question_id), question):
+            QUESTION_REF_METRICS.count("embedded")
+            return None
+        refs.append(
+            {"id": question_id, "order": list(order), "digest": _bank_digest(question_id, question)}
+        )
+    QUESTION_REF_METRICS.count("referenced")
+    return {MINIAPP_REFS_FIELD: refs, BANK_VERSION_FIELD: bank_version()}
+
+
+def hydrate_miniapp_questions(
+    session: Mapping, prepare: Callable[[Mapping, Sequence[int]], dict]
+) -> list[dict]:
+    """Prepared questions rebuilt from ``question_refs``; ``[]`` when impossible."""
+    refs = session.get(MINIAPP_REFS_FIELD)
+    if not isinstance(refs, list):
+        return []
+    same_version = session.get(BANK_VERSION_FIELD) == bank_version()
+    _note_version(session)
+    bank = _bank()
+    prepared = []
+    for ref in refs:
+        question = bank.question(ref.get("id")) if isinstance(ref, dict) else None
+        order = ref.get("order") if question is not None else None
+        digest = ref.get("digest") if question is not None else None
+        if (
+            not isinstance(order, list)
+            or sorted(order) != list(range(len(question.get("options") or [])))
+            or (digest is None and not same_version)
+            or (digest is not None and digest != _bank_digest(str(ref["id"]).strip(), question))
+        ):
+            QUESTION_REF_METRICS.count("hydration_failures")
+            logger.warning("Mini App session %s references an unavailable question", session.get("_id"))
+            return []
+        prepared.append(prepare(question, order))
+    QUESTION_REF_METRICS.count("hydrated")
+    return prepared
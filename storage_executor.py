@@ -0,0 +1,169 @@
+"""Dedicated worker lanes for blocking storage calls made from the PTB event loop.
+
+Every synchronous PyMongo boundary on the bot side used to go through
+``asyncio.to_thread``. That is the loop's default executor, sized from the
+CPU count and shared with everything else in the process, so a broadcast
+fan-out or an outbox drain could occupy every worker while answer handlers
+queued behind it.
+
+Storage calls now run in one of two lanes, each with its own thread pool:
+
+* ``interactive`` — handler paths a user is waiting on (quiz answers,
+  battle moves, result screens);
+* ``background`` — outbox/broadcast drains and periodic battle jobs.
+
+Each lane admits at most ``workers + queue`` calls. Further callers wait on
+the event loop (a cheap coroutine wait, not a blocked thread) until a slot
+frees, so a flood of drain work cannot grow an unbounded executor queue.
+Per-lane queue wait (call → start in a worker), run time, saturation and
+failure counts are published as the ``storage_executor`` metrics source.
+Context variables propagate to the worker like ``asyncio.to_thread``.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import time
+import weakref
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, TypeVar
+
+from config import (
+    STORAGE_BACKGROUND_QUEUE,
+    STORAGE_BACKGROUND_WORKERS,
+    STORAGE_INTERACTIVE_QUEUE,
+    STORAGE_INTERACTIVE_WORKERS,
+)
+from runtime_metrics import LatencyHistogram, register_metrics_source
+
+_T = TypeVar("_T")
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# ``run_interactive`` or ``run_background``, chosen by whoever starts the work.
+StorageRunner = Callable[..., Awaitable[Any]]
+
+
+class StorageLane:
+    """One bounded thread pool plus its admission limit and metrics."""
+
+    def __init__(self, name: str, *, workers: int, queue: int) -> None:
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.queue = max(0, int(queue))
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = Lock()
+        # asyncio.Semaphore binds to the loop that first waits on it.
+        self._admission: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._inflight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._saturated = 0
+        self.queue_wait = LatencyHistogram()
+        self.run_time = LatencyHistogram()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=f"storage-{self.name}"
+                )
+            return self._executor
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        with self._lock:
+            semaphore = self._admission.get(loop)
+            if semaphore is None:
+                semaphore = self._admission[loop] = asyncio.Semaphore(self.workers + self.queue)
+            return semaphore
+
+    async def run(self, function: Callable[..., _T], /, *args, **kwargs) -> _T:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore(loop)
+        queued_at = time.perf_counter()
+        if semaphore.locked():
+            with self._lock:
+                self._saturated += 1
+        async with semaphore:
+            with self._lock:
+                self._submitted += 1
+                self._inflight += 1
+            context = contextvars.copy_context()
+            call = functools.partial(self._timed, queued_at, function, args, kwargs)
+            try:
+                return await loop.run_in_executor(self._pool(), context.run, call)
+            finally:
+                with self._lock:
+                    self._inflight -= 1
+
+    def _timed(self, queued_at: float, function, args, kwargs):
+        started = time.perf_counter()
+        self.queue_wait.observe(started - queued_at)
+        try:
+            result = function(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            self.run_time.observe(time.perf_counter() - started)
+        with self._lock:
+            self._completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            counters = {
+                "workers": self.workers,
+                "queue_limit": self.queue,
+                "inflight": self._inflight,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "saturated": self._saturated,
+            }
+        return {
+            **counters,
+            "queue_wait": self.queue_wait.snapshot(),
+            "run_time": self.run_time.snapshot(),
+        }
+
+
+LANES = {
+    INTERACTIVE: StorageLane(
+        INTERACTIVE, workers=STORAGE_INTERACTIVE_WORKERS, queue=STORAGE_INTERACTIVE_QUEUE
+    ),
+    BACKGROUND: StorageLane(
+        BACKGROUND, workers=STORAGE_BACKGROUND_WORKERS, queue=STORAGE_BACKGROUND_QUEUE
+    ),
+}
+register_metrics_source(
+    "storage_executor", lambda: {name: lane.metrics() for name, lane in LANES.items()}
+)
+
+
+async def run_interactive(function: Callable[..., _T], /, *args, **kwargs) -> _T:
+    """Run a blocking storage call a user is waiting on."""
+    return await LANES[INTERACTIVE].run(function, *args, **kwargs)
+
+
+async def run_background(function: Callable[..., _T], /, *args, **kwargs) -> _T:
+    """Run a blocking storage call for a drain or periodic job."""
+    return await LANES[BACKGROUND].run(function, *args, **kwargs)
+
+
+def shutdown_storage_executor() -> None:
+    """Wait for running storage calls and stop the lane threads."""
+    for lane in LANES.values():
+        lane.shutdown()
@@ -10,6 +10,7 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from achievement_catalog import ACHIEVEMENTS, validate_achievement_catalog
 from database import get_user_stats, touch_user_activity
 from telegram_quiz_runtime_state import get_user_data
+from user_records import ACHIEVEMENT_FIELDS
 
 
 def _achievement_catalog() -> Mapping[str, Mapping]:
@@ -34,7 +35,7 @@ async def show_achievements(update, context):
     await query.answer()
     _touch_memory(user_id)
     await asyncio.to_thread(touch_user_activity, user_id)
-    user_stats = await asyncio.to_thread(get_user_stats, user_id) or {}
+    user_stats = await asyncio.to_thread(get_user_stats, user_id, ACHIEVEMENT_FIELDS) or {}
     unlocked_achievements = user_stats.get("achievements", {})
 
     perfect_count = user_stats.get("perfect_count", 0)
@@ -52,24 +52,20 @@ from legacy_battle_session import (
     get_waiting_durable_battles,
     resolve_owned_open_battle_callback,
 )
-from questions import (
-    BATTLE_POOL,
-    intro_part1_questions,
-    intro_part2_questions,
-    intro_part3_questions,
-)
+from questions import QUESTION_BANK
 from quiz_answer_history import build_progress_bar
+from storage_executor import StorageRunner, run_background, run_interactive
 from telegram_conversation_states import BATTLE_ANSWERING
+from telegram_outbox_scheduler import OUTBOX_BATTLES, notify_outbox
 
 logger = logging.getLogger(__name__)
 
 
 def _battle_pool() -> list[dict]:
-    intro_pool = intro_part1_questions + intro_part2_questions + intro_part3_questions
-    pool = list(BATTLE_POOL) + list(intro_pool)
-    if not pool:
+    slots = QUESTION_BANK.selection_indices("battle")
+    if not slots:
         return []
-    return random.sample(pool, min(10, len(pool)))
+    return QUESTION_BANK.materialize(random.sample(slots, min(10, len(slots))))
 
 
 def _role_label(battle: dict, role: str) -> str:
@@ -132,8 +128,8 @@ async def show_battle_menu(update, context):
     query = update.callback_query
     user_id = query.from_user.id
     try:
-        active = await asyncio.to_thread(get_open_durable_battles_for_user, user_id, limit=10)
-        waiting = await asyncio.to_thread(get_waiting_durable_battles, limit=10)
+        active = await run_interactive(get_open_durable_battles_for_user, user_id, limit=10)
+        waiting = await run_interactive(get_waiting_durable_battles, limit=10)
     except (LegacyBattleRecoveryUnavailable, LegacyBattleSessionUnavailable, ValueError):
         await query.answer("⚠️ База битв временно недоступна.", show_alert=True)
         return
@@ -159,7 +155,7 @@ async def create_battle(update, context):
         return
     battle_id = f"battle_{uuid.uuid4().hex[:16]}"
     try:
-        await asyncio.to_thread(
+        await run_interactive(
             create_durable_battle,
             battle_id=battle_id,
             creator_id=user.id,
@@ -188,7 +184,7 @@ async def join_battle(update, context):
     user = query.from_user
     battle_id = (query.data or "").replace("join_battle_", "", 1)
     try:
-        battle = await asyncio.to_thread(
+        battle = await run_interactive(
             claim_durable_battle_opponent,
             battle_id,
             user.id,
@@ -215,9 +211,11 @@ async def join_battle(update, context):
             context.bot,
             battle_id,
             start_payload_builder=_start_payload,
+            run_storage=run_interactive,
         )
     except Exception:
         logger.warning("creator battle-ready notification remains pending", exc_info=True)
+        notify_outbox(OUTBOX_BATTLES)
 
 
 def _parse_start(payload: str | None) -> tuple[str, str]:
@@ -233,7 +231,7 @@ async def start_battle_questions(update, context):
     user_id = query.from_user.id
     try:
         battle_id, requested_role = _parse_start(query.data)
-        battle = await asyncio.to_thread(get_owned_open_durable_battle, battle_id, user_id)
+        battle = await run_interactive(get_owned_open_durable_battle, battle_id, user_id)
     except (LegacyBattleSessionUnavailable, ValueError):
         await query.answer("⚠️ База битв временно недоступна.", show_alert=True)
         return ConversationHandler.END
@@ -245,7 +243,7 @@ async def start_battle_questions(update, context):
         await query.answer("⏳ Сначала дождись соперника.", show_alert=True)
         return ConversationHandler.END
     try:
-        state = await asyncio.to_thread(ensure_battle_progress, battle_id, user_id, role)
+        state = await run_interactive(ensure_battle_progress, battle_id, user_id, role)
     except (LegacyBattleProgressUnavailable, LegacyBattleProgressConflict, LegacyBattleProgressInvalid):
         await query.answer("⚠️ Durable progress сейчас нельзя восстановить.", show_alert=True)
         return ConversationHandler.END
@@ -274,7 +272,7 @@ async def _disable_message_keyboard(bot, chat_id: int, message_id: int) -> None:
 
 async def send_battle_question(bot, chat_id: int, user_id: int, battle_id: str, role: str):
     try:
-        state = await asyncio.to_thread(ensure_battle_progress, battle_id, user_id, role)
+        state = await run_interactive(ensure_battle_progress, battle_id, user_id, role)
     except (LegacyBattleProgressUnavailable, LegacyBattleProgressConflict, LegacyBattleProgressInvalid):
         await bot.send_message(chat_id=chat_id, text="⚠️ Не удалось восстановить durable progress битвы.")
         return
@@ -326,7 +324,7 @@ async def send_battle_question(bot, chat_id: int, user_id: int, battle_id: str,
         logger.warning("battle question Telegram delivery failed", exc_info=True)
         return
     try:
-        await asyncio.to_thread(
+        await run_interactive(
             mark_battle_question_sent,
             battle_id,
             user_id,
@@ -349,7 +347,7 @@ async def battle_answer(update, context):
     user_id = query.from_user.id
     try:
         callback_token, question_index, option_token = parse_battle_answer_callback(query.data)
-        battle = await asyncio.to_thread(
+        battle = await run_interactive(
             resolve_owned_open_battle_callback,
             user_id,
             callback_token,
@@ -361,7 +359,7 @@ async def battle_answer(update, context):
         if question_index < 0 or question_index >= len(questions):
             raise LegacyBattleCallbackInvalid("battle question callback is stale")
         user_answer = resolve_battle_option(questions[question_index].get("options", []), option_token)
-        outcome = await asyncio.to_thread(
+        outcome = await run_interactive(
             record_battle_answer_once,
             battle["_id"],
             user_id,
@@ -412,13 +410,13 @@ async def battle_answer(update, context):
 
 async def finish_battle_for_user(bot, chat_id: int, user_id: int, battle_id: str, role: str):
     try:
-        result = await asyncio.to_thread(
+        result = await run_interactive(
             completed_battle_result_inputs,
             battle_id,
             user_id,
             role,
         )
-        battle = await asyncio.to_thread(
+        battle = await run_interactive(
             record_battle_result,
             battle_id,
             user_id,
@@ -449,14 +447,15 @@ async def finish_battle_for_user(bot, chat_id: int, user_id: int, battle_id: str
 
     if battle.get("creator_finished") and battle.get("opponent_finished"):
         try:
-            await asyncio.to_thread(
+            await run_interactive(
                 claim_final_battle,
                 battle_id,
                 delivery_protocol=BATTLE_DELIVERY_PROTOCOL_OUTBOX,
             )
         except BattleStoreUnavailable:
             logger.warning("shared battle finalization deferred for %s", battle_id, exc_info=True)
-        await drain_battle_outbox(bot, limit=10)
+            notify_outbox(OUTBOX_BATTLES)
+        await drain_battle_outbox(bot, limit=10, run_storage=run_interactive)
         return
 
     await bot.send_message(
@@ -515,11 +514,13 @@ async def _send_final_result(bot, battle: dict, role: str):
     )
 
 
-async def drain_battle_outbox(bot, *, limit: int = 50):
+async def drain_battle_outbox(
+    bot, *, limit: int = 50, run_storage: StorageRunner = run_background
+):
     async def sender(battle: dict, role: str):
         return await _send_final_result(bot, battle, role)
 
-    summary = await drain_pending_battles(sender=sender, limit=limit)
+    summary = await drain_pending_battles(sender=sender, limit=limit, run_storage=run_storage)
     if summary.errors:
         logger.warning("battle outbox drain completed with errors: %s", summary.errors)
     return summary
@@ -530,7 +531,7 @@ async def cancel_battle(update, context):
     query = update.callback_query
     battle_id = (query.data or "").replace("cancel_battle_", "", 1)
     try:
-        deleted = await asyncio.to_thread(
+        deleted = await run_interactive(
             cancel_unstarted_battle,
             battle_id,
             query.from_user.id,
@@ -553,25 +554,31 @@ async def cancel_battle(update, context):
     )
 
 
-async def battle_maintenance_job(context):
+async def battle_maintenance_job(context) -> int:
+    """Sweep ready, finalization and result outboxes; returns sends and finalizations."""
+    handled = 0
     try:
         ready_summary = await ready_delivery.drain_creator_ready_outbox(
             context.bot,
             start_payload_builder=_start_payload,
             limit=50,
         )
+        handled += ready_summary.delivered
         if ready_summary.errors:
             logger.warning("battle-ready outbox sweep errors: %s", ready_summary.errors)
     except Exception:
         logger.exception("battle-ready outbox maintenance failed")
-    finalization = await asyncio.to_thread(finalize_ready_battles, limit=50)
+    finalization = await run_background(finalize_ready_battles, limit=50)
+    handled += finalization.finalized
     if finalization.errors:
         logger.warning("battle finalization sweep errors: %s", finalization.errors)
     try:
-        await drain_battle_outbox(context.bot, limit=50)
+        delivery = await drain_battle_outbox(context.bot, limit=50)
+        handled += delivery.recipient_sends
     except Exception:
         logger.exception("battle outbox maintenance failed")
     try:
-        await asyncio.to_thread(cleanup_stale_waiting_battles, max_age_minutes=10)
+        await run_background(cleanup_stale_waiting_battles, max_age_minutes=10)
     except LegacyBattleCleanupUnavailable:
         logger.warning("battle stale cleanup unavailable", exc_info=True)
+    return handled
@@ -2,7 +2,6 @@
 """Telegram adapter for crash-safe creator-ready battle notifications."""
 from __future__ import annotations
 
-import asyncio
 import logging
 from collections.abc import Callable
 from dataclasses import dataclass
@@ -18,6 +17,7 @@ from legacy_battle_ready_delivery import (
     settle_creator_ready_failure,
 )
 from legacy_delivery_worker import LegacyDeliveryDeferred, LegacyDeliveryPermanentFailure
+from storage_executor import StorageRunner, run_background
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram_delivery_retry import send_with_durable_retry_after
 
@@ -65,9 +65,10 @@ async def deliver_creator_ready_once(
     battle_id: str,
     *,
     start_payload_builder: Callable[[str, str], str],
+    run_storage: StorageRunner = run_background,
 ) -> bool:
     """Attempt one leased creator-ready notification and durably settle it."""
-    claim = await asyncio.to_thread(claim_creator_ready_delivery, battle_id)
+    claim = await run_storage(claim_creator_ready_delivery, battle_id)
     if claim is None:
         return False
     battle_id, creator_id, opponent_name, token, callback_data = _claimed_payload(
@@ -88,7 +89,7 @@ async def deliver_creator_ready_once(
     try:
         await send_with_durable_retry_after(sender)
     except LegacyDeliveryPermanentFailure as exc:
-        settled = await asyncio.to_thread(
+        settled = await run_storage(
             settle_creator_ready_failure,
             battle_id,
             token,
@@ -100,7 +101,7 @@ async def deliver_creator_ready_once(
             ) from exc
         return False
     except LegacyDeliveryDeferred as exc:
-        deferred = await asyncio.to_thread(
+        deferred = await run_storage(
             defer_creator_ready_delivery,
             battle_id,
             token,
@@ -113,7 +114,7 @@ async def deliver_creator_ready_once(
             ) from exc
         return False
     except Exception as exc:
-        released = await asyncio.to_thread(
+        released = await run_storage(
             release_creator_ready_delivery,
             battle_id,
             token,
@@ -123,7 +124,7 @@ async def deliver_creator_ready_once(
             logger.warning("battle-ready transient failure lease release was not confirmed")
         raise
 
-    acknowledged = await asyncio.to_thread(
+    acknowledged = await run_storage(
         mark_creator_ready_delivered,
         battle_id,
         token,
@@ -142,9 +143,10 @@ async def drain_creator_ready_outbox(
     *,
     start_payload_builder: Callable[[str, str], str],
     limit: int = 50,
+    run_storage: StorageRunner = run_background,
 ) -> BattleReadyDrainSummary:
     try:
-        battles = await asyncio.to_thread(get_pending_creator_ready_battles, limit)
+        battles = await run_storage(get_pending_creator_ready_battles, limit)
     except LegacyBattleReadyDeliveryUnavailable as exc:
         return BattleReadyDrainSummary(
             errors=(f"battle-ready-list:{type(exc).__name__}:{exc}"[:500],)
@@ -165,6 +167,7 @@ async def drain_creator_ready_outbox(
                 bot,
                 battle_id,
                 start_payload_builder=start_payload_builder,
+                run_storage=run_storage,
             )
             if sent:
                 delivered += 1
@@ -18,6 +18,7 @@ from legacy_battle_session import (
     claim_durable_battle_opponent,
     create_durable_battle,
 )
+from storage_executor import run_interactive
 
 logger = logging.getLogger(__name__)
 _DEEP_LINK_PREFIX = "duel_"
@@ -105,6 +106,7 @@ async def _notify_creator_ready(bot, battle: dict, opponent_name: str) -> None:
             bot,
             battle_id,
             start_payload_builder=battles._start_payload,
+            run_storage=run_interactive,
         )
     except Exception:
         # The opponent claim already staged the durable marker. A transient
@@ -3,9 +3,11 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import math
 import os
-from dataclasses import dataclass
-from datetime import timedelta
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime, timedelta
 
 from pymongo.errors import PyMongoError
 from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
@@ -14,7 +16,7 @@ from broadcast_integrity import (
     BroadcastStoreUnavailable,
     accept_broadcast_once,
     broadcast_id_for_update,
-    claim_next_broadcast_delivery,
+    claim_broadcast_deliveries,
     defer_broadcast_delivery,
     ensure_broadcast_fanout,
     get_broadcast,
@@ -24,10 +26,22 @@ from broadcast_integrity import (
     release_broadcast_delivery,
     sync_broadcast_completion,
 )
-from config import BROADCAST_SLEEP
+from config import (
+    BROADCAST_CLAIM_BATCH,
+    BROADCAST_CONCURRENCY,
+    BROADCAST_DRAIN_LIMIT,
+    BROADCAST_SLEEP,
+)
+from runtime_metrics import register_metrics_source
+from storage_executor import run_background
+from telegram_outbox_scheduler import OUTBOX_BROADCASTS, notify_outbox
 
 logger = logging.getLogger(__name__)
 
+# One drain must finish well inside a few job ticks; longer provider pauses are
+# persisted on the delivery rows instead of being slept through in-process.
+_DRAIN_BUDGET_SECONDS = 10.0
+
 
 @dataclass(frozen=True)
 class BroadcastDrainSummary:
@@ -36,6 +50,11 @@ class BroadcastDrainSummary:
     terminal_failed: int = 0
     deferred: int = 0
     errors: tuple[str, ...] = ()
+    claim_round_trips: int = 0
+    elapsed_seconds: float = 0.0
+    throughput_per_second: float = 0.0
+    max_lag_seconds: float | None = None
+    rate_limited: bool = False
 
 
 def _admin_user_id() -> int:
@@ -46,10 +65,8 @@ def _admin_user_id() -> int:
 
 
 async def _store_call(function, /, *args, **kwargs):
-    """Run one synchronous Mongo boundary outside the PTB event loop."""
-    if kwargs:
-        return await asyncio.to_thread(lambda: function(*args, **kwargs))
-    return await asyncio.to_thread(function, *args)
+    """Run one synchronous Mongo boundary in the background storage lane."""
+    return await run_background(function, *args, **kwargs)
 
 
 def _recipient_ids_strict() -> list[int]:
@@ -143,201 +160,438 @@ def _broadcast_text(text: str) -> str:
     return f"📢 Сообщение от автора бота:\n\n{text}"
 
 
+class BroadcastRateLimiter:
+    """Process-wide token bucket for Bot API broadcast sends.
+
+    Telegram rate limits are per bot, so every drain shares one bucket. A
+    ``RetryAfter`` pauses all senders for the provider delay and halves the
+    rate; each successful send restores it additively up to the configured rate.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float | None,
+        *,
+        burst: float = 1.0,
+        clock=time.monotonic,
+    ) -> None:
+        rate = float(rate_per_second) if rate_per_second else None
+        if rate is not None and (not math.isfinite(rate) or rate <= 0):
+            rate = None
+        self._max_rate = rate
+        self._rate = rate
+        self._min_rate = max(0.5, rate / 8) if rate else None
+        self._burst = max(1.0, float(burst))
+        self._tokens = self._burst
+        self._clock = clock
+        self._updated = clock()
+        self._paused_until = 0.0
+        self.retry_after_events = 0
+
+    def _refill(self, now: float) -> None:
+        if self._rate is None:
+            return
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+        self._updated = now
+
+    def paused_seconds(self) -> float:
+        return max(0.0, self._paused_until - self._clock())
+
+    def pause(self, seconds: float) -> None:
+        now = self._clock()
+        self._refill(now)
+        self._paused_until = max(self._paused_until, now + max(0.0, float(seconds)))
+        self._tokens = 0.0
+        self.retry_after_events += 1
+        if self._rate is not None:
+            self._rate = max(self._min_rate, self._rate / 2)
+
+    def record_success(self) -> None:
+        if self._rate is not None and self._rate < self._max_rate:
+            self._refill(self._clock())
+            self._rate = min(self._max_rate, self._rate + self._max_rate / 20)
+
+    async def acquire(self, *, deadline: float) -> bool:
+        """Wait for one send token; ``False`` when it cannot arrive before deadline."""
+        while True:
+            now = self._clock()
+            wait = self._paused_until - now
+            if wait <= 0:
+                if self._rate is None:
+                    return True
+                self._refill(now)
+                # Tolerate float residue so a refill that lands a hair below
+                # one whole token cannot spin on sub-resolution sleeps.
+                if self._tokens >= 1 - 1e-9:
+                    self._tokens = max(0.0, self._tokens - 1)
+                    return True
+                wait = (1 - self._tokens) / self._rate
+            if now + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    def snapshot(self) -> dict:
+        return {
+            "configured_rate_per_second": self._max_rate,
+            "rate_per_second": self._rate,
+            "paused_seconds": round(self.paused_seconds(), 3),
+            "retry_after_events": self.retry_after_events,
+        }
+
+
+def _configured_rate_per_second() -> float | None:
+    interval = float(BROADCAST_SLEEP)
+    return 1.0 / interval if interval > 0 else None
+
+
+BROADCAST_RATE_LIMITER = BroadcastRateLimiter(_configured_rate_per_second())
+_LAST_DRAIN: dict = {}
+
+
+def _broadcast_metrics() -> dict:
+    return {"rate_limiter": BROADCAST_RATE_LIMITER.snapshot(), "last_drain": dict(_LAST_DRAIN)}
+
+
+register_metrics_source("broadcast_outbox", _broadcast_metrics)
+
+
+@dataclass
+class _DrainState:
+    claimed: int = 0
+    delivered: int = 0
+    terminal_failed: int = 0
+    deferred: int = 0
+    stop: bool = False
+    rate_limited: bool = False
+    max_lag_seconds: float | None = None
+    errors: list[str] = field(default_factory=list)
+    affected: set[str] = field(default_factory=set)
+
+
+class _ParentCache:
+    """Per-drain memo of immutable broadcast parents; one lookup per parent id."""
+
+    def __init__(self) -> None:
+        self._entries: dict[str, asyncio.Future] = {}
+
+    def prime(self, parent_id: str, parent: dict) -> None:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(parent)
+        self._entries[parent_id] = future
+
+    async def get(self, parent_id: str) -> dict | None:
+        entry = self._entries.get(parent_id)
+        if entry is None:
+            entry = asyncio.ensure_future(_store_call(get_broadcast, parent_id))
+            self._entries[parent_id] = entry
+        return await entry
+
+
+def _lag_seconds(created_at) -> float | None:
+    if not isinstance(created_at, datetime):
+        return None
+    now = datetime.now(UTC)
+    if created_at.tzinfo is None:
+        now = now.replace(tzinfo=None)
+    return max(0.0, (now - created_at).total_seconds())
+
+
+async def _terminal(state: _DrainState, delivery_id: str, claim_token: str, error: str) -> None:
+    if await _store_call(
+        mark_broadcast_delivery_terminal_failure,
+        delivery_id,
+        claim_token,
+        error=error,
+    ):
+        state.terminal_failed += 1
+
+
+async def _return_unsent(
+    state: _DrainState,
+    limiter: BroadcastRateLimiter,
+    delivery_id: str,
+    claim_token: str,
+) -> None:
+    """Give a claimed row back without sending; keep an active provider pause durable."""
+    paused = limiter.paused_seconds()
+    if paused > 0:
+        await _store_call(
+            defer_broadcast_delivery,
+            delivery_id,
+            claim_token,
+            delay_seconds=paused,
+            error="broadcast rate limit pause",
+        )
+    else:
+        await _store_call(
+            release_broadcast_delivery,
+            delivery_id,
+            claim_token,
+            error="broadcast drain stopped before send",
+        )
+    state.deferred += 1
+
+
+async def _deliver_claimed_row(
+    bot,
+    delivery: dict,
+    *,
+    state: _DrainState,
+    parents: _ParentCache,
+    limiter: BroadcastRateLimiter,
+    deadline: float,
+) -> None:
+    delivery_id = delivery.get("_id")
+    parent_id = delivery.get("broadcast_id")
+    claim_token = delivery.get("claim_token")
+    raw_user_id = delivery.get("user_id")
+    if not all(
+        isinstance(value, str) and value
+        for value in (delivery_id, parent_id, claim_token)
+    ):
+        state.errors.append("broadcast-delivery:<invalid>:malformed claimed row")
+        state.stop = True
+        return
+    state.affected.add(parent_id)
+    try:
+        if state.stop:
+            await _return_unsent(state, limiter, delivery_id, claim_token)
+            return
+        if not isinstance(raw_user_id, str) or not raw_user_id.isdigit():
+            await _terminal(state, delivery_id, claim_token, "broadcast recipient id is invalid")
+            return
+        user_id = int(raw_user_id)
+        if user_id <= 0:
+            await _terminal(state, delivery_id, claim_token, "broadcast recipient id is invalid")
+            return
+
+        parent = await parents.get(parent_id)
+        if not isinstance(parent, dict):
+            await _terminal(state, delivery_id, claim_token, "broadcast parent is missing")
+            return
+        text = parent.get("text")
+        if not isinstance(text, str) or not text:
+            await _terminal(state, delivery_id, claim_token, "broadcast text is invalid")
+            return
+
+        if state.stop or not await limiter.acquire(deadline=deadline):
+            state.rate_limited = state.rate_limited or limiter.paused_seconds() > 0
+            state.stop = True
+            await _return_unsent(state, limiter, delivery_id, claim_token)
+            return
+
+        try:
+            await bot.send_message(chat_id=user_id, text=_broadcast_text(text))
+        except (Forbidden, BadRequest) as exc:
+            await _terminal(state, delivery_id, claim_token, f"{type(exc).__name__}: {exc}")
+        except RetryAfter as exc:
+            delay = _retry_after_seconds(exc)
+            limiter.pause(delay)
+            state.rate_limited = True
+            state.stop = True
+            if not await _store_call(
+                defer_broadcast_delivery,
+                delivery_id,
+                claim_token,
+                delay_seconds=delay,
+                error=f"{type(exc).__name__}: {exc}",
+            ):
+                state.errors.append(f"broadcast:{parent_id}:{delivery_id}:defer conflict")
+            state.deferred += 1
+        except (NetworkError, TimedOut) as exc:
+            state.stop = True
+            await _store_call(
+                release_broadcast_delivery,
+                delivery_id,
+                claim_token,
+                error=f"{type(exc).__name__}: {exc}",
+            )
+            state.deferred += 1
+        except Exception as exc:
+            state.stop = True
+            await _store_call(
+                release_broadcast_delivery,
+                delivery_id,
+                claim_token,
+                error=f"{type(exc).__name__}: {exc}",
+            )
+            state.deferred += 1
+            state.errors.append(
+                f"broadcast:{parent_id}:{delivery_id}:{type(exc).__name__}:{exc}"[:500]
+            )
+        else:
+            limiter.record_success()
+            lag = _lag_seconds(delivery.get("created_at_dt"))
+            if lag is not None and (state.max_lag_seconds is None or lag > state.max_lag_seconds):
+                state.max_lag_seconds = lag
+            if await _store_call(
+                mark_broadcast_delivery_delivered,
+                delivery_id,
+                claim_token,
+            ):
+                state.delivered += 1
+            else:
+                state.errors.append(f"broadcast:{parent_id}:{delivery_id}:ack conflict")
+    except (BroadcastStoreUnavailable, TypeError, ValueError) as exc:
+        state.stop = True
+        state.errors.append(
+            f"broadcast:{parent_id}:{delivery_id}:{type(exc).__name__}:{exc}"[:500]
+        )
+        try:
+            await _store_call(
+                release_broadcast_delivery,
+                delivery_id,
+                claim_token,
+                error=f"{type(exc).__name__}: {exc}",
+            )
+        except Exception:
+            pass
+        state.deferred += 1
+
+
+async def _broadcast_sender(bot, rows, **kwargs) -> None:
+    # ``rows`` is one iterator shared by every sender of the batch; taking the
+    # next row is synchronous, so each claimed row is handled exactly once.
+    for delivery in rows:
+        await _deliver_claimed_row(bot, delivery, **kwargs)
+
+
 async def drain_broadcast_outbox(
     bot,
     *,
     limit: int = 20,
     broadcast_id: str | None = None,
+    concurrency: int | None = None,
+    rate_limiter: BroadcastRateLimiter | None = None,
 ) -> BroadcastDrainSummary:
-    """Drain a bounded broadcast batch while isolating per-recipient failures."""
+    """Drain a bounded broadcast batch while isolating per-recipient failures.
+
+    Rows are leased ``BROADCAST_CLAIM_BATCH`` at a time and sent by a small pool
+    of concurrent senders that share the process-wide token bucket. Any
+    provider pause, transport failure or store error stops further sends and
+    returns the remaining leased rows to the outbox.
+    """
     if isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0:
         raise ValueError("limit must be a positive integer")
-
-    errors: list[str] = []
-    affected: set[str] = set()
+    senders = BROADCAST_CONCURRENCY if concurrency is None else concurrency
+    if isinstance(senders, bool) or not isinstance(senders, int) or senders <= 0:
+        raise ValueError("concurrency must be a positive integer")
+    limiter = rate_limiter or BROADCAST_RATE_LIMITER
+    started = time.monotonic()
+    deadline = started + _DRAIN_BUDGET_SECONDS
+
+    state = _DrainState()
+    parents = _ParentCache()
     try:
         if broadcast_id is not None:
             parent = await _store_call(get_broadcast, broadcast_id)
-            parents = [parent] if isinstance(parent, dict) else []
+            pending = [parent] if isinstance(parent, dict) else []
         else:
-            parents = await _store_call(get_pending_broadcasts, limit=20)
-        for parent in parents:
+            pending = await _store_call(get_pending_broadcasts, limit=20)
+        for parent in pending:
             if not isinstance(parent, dict):
                 continue
             parent_id = parent.get("_id") or parent.get("broadcast_id")
             if not isinstance(parent_id, str) or not parent_id:
-                errors.append("broadcast:<unknown>:invalid parent id")
+                state.errors.append("broadcast:<unknown>:invalid parent id")
                 continue
-            affected.add(parent_id)
+            state.affected.add(parent_id)
             if parent.get("fanout_ready") is not True:
-                await _store_call(ensure_broadcast_fanout, parent)
+                parent = await _store_call(ensure_broadcast_fanout, parent)
+            if isinstance(parent, dict):
+                parents.prime(parent_id, parent)
     except (BroadcastStoreUnavailable, ValueError) as exc:
         return BroadcastDrainSummary(
             errors=(f"broadcast-prepare:{type(exc).__name__}:{exc}"[:500],)
         )
 
-    claimed_count = 0
-    delivered_count = 0
-    terminal_failed = 0
-    deferred = 0
-
-    for _ in range(limit):
+    claim_round_trips = 0
+    remaining = limit
+    while remaining > 0 and not state.stop:
+        if time.monotonic() + limiter.paused_seconds() >= deadline:
+            state.rate_limited = True
+            break
         try:
-            delivery = await _store_call(
-                claim_next_broadcast_delivery,
+            batch = await _store_call(
+                claim_broadcast_deliveries,
+                limit=min(remaining, BROADCAST_CLAIM_BATCH),
                 broadcast_id=broadcast_id,
             )
         except BroadcastStoreUnavailable as exc:
-            errors.append(f"broadcast-claim:{type(exc).__name__}:{exc}"[:500])
-            break
-        if delivery is None:
+            state.errors.append(f"broadcast-claim:{type(exc).__name__}:{exc}"[:500])
             break
-        claimed_count += 1
-
-        delivery_id = delivery.get("_id")
-        parent_id = delivery.get("broadcast_id")
-        claim_token = delivery.get("claim_token")
-        raw_user_id = delivery.get("user_id")
-        if not all(
-            isinstance(value, str) and value
-            for value in (delivery_id, parent_id, claim_token)
-        ):
-            errors.append("broadcast-delivery:<invalid>:malformed claimed row")
+        claim_round_trips += 1
+        if not batch:
             break
-        affected.add(parent_id)
-        try:
-            if not isinstance(raw_user_id, str) or not raw_user_id.isdigit():
-                if await _store_call(
-                    mark_broadcast_delivery_terminal_failure,
-                    delivery_id,
-                    claim_token,
-                    error="broadcast recipient id is invalid",
-                ):
-                    terminal_failed += 1
-                continue
-            user_id = int(raw_user_id)
-            if user_id <= 0:
-                if await _store_call(
-                    mark_broadcast_delivery_terminal_failure,
-                    delivery_id,
-                    claim_token,
-                    error="broadcast recipient id is invalid",
-                ):
-                    terminal_failed += 1
-                continue
-
-            parent = await _store_call(get_broadcast, parent_id)
-            if not isinstance(parent, dict):
-                if await _store_call(
-                    mark_broadcast_delivery_terminal_failure,
-                    delivery_id,
-                    claim_token,
-                    error="broadcast parent is missing",
-                ):
-                    terminal_failed += 1
-                continue
-            text = parent.get("text")
-            if not isinstance(text, str) or not text:
-                if await _store_call(
-                    mark_broadcast_delivery_terminal_failure,
-                    delivery_id,
-                    claim_token,
-                    error="broadcast text is invalid",
-                ):
-                    terminal_failed += 1
-                continue
-
-            try:
-                await bot.send_message(chat_id=user_id, text=_broadcast_text(text))
-            except (Forbidden, BadRequest) as exc:
-                if await _store_call(
-                    mark_broadcast_delivery_terminal_failure,
-                    delivery_id,
-                    claim_token,
-                    error=f"{type(exc).__name__}: {exc}",
-                ):
-                    terminal_failed += 1
-            except RetryAfter as exc:
-                delay = _retry_after_seconds(exc)
-                if not await _store_call(
-                    defer_broadcast_delivery,
-                    delivery_id,
-                    claim_token,
-                    delay_seconds=delay,
-                    error=f"{type(exc).__name__}: {exc}",
-                ):
-                    errors.append(f"broadcast:{parent_id}:{delivery_id}:defer conflict")
-                deferred += 1
-                break
-            except (NetworkError, TimedOut) as exc:
-                await _store_call(
-                    release_broadcast_delivery,
-                    delivery_id,
-                    claim_token,
-                    error=f"{type(exc).__name__}: {exc}",
-                )
-                deferred += 1
-                break
-            except Exception as exc:
-                await _store_call(
-                    release_broadcast_delivery,
-                    delivery_id,
-                    claim_token,
-                    error=f"{type(exc).__name__}: {exc}",
-                )
-                deferred += 1
-                errors.append(
-                    f"broadcast:{parent_id}:{delivery_id}:{type(exc).__name__}:{exc}"[:500]
+        state.claimed += len(batch)
+        remaining -= len(batch)
+        rows = iter(batch)
+        outcomes = await asyncio.gather(
+            *(
+                _broadcast_sender(
+                    bot,
+                    rows,
+                    state=state,
+                    parents=parents,
+                    limiter=limiter,
+                    deadline=deadline,
                 )
-                break
-            else:
-                if await _store_call(
-                    mark_broadcast_delivery_delivered,
-                    delivery_id,
-                    claim_token,
-                ):
-                    delivered_count += 1
-                else:
-                    errors.append(f"broadcast:{parent_id}:{delivery_id}:ack conflict")
-            await asyncio.sleep(max(0.0, float(BROADCAST_SLEEP)))
-        except (BroadcastStoreUnavailable, TypeError, ValueError) as exc:
-            errors.append(
-                f"broadcast:{parent_id}:{delivery_id}:{type(exc).__name__}:{exc}"[:500]
-            )
-            try:
-                await _store_call(
-                    release_broadcast_delivery,
-                    delivery_id,
-                    claim_token,
-                    error=f"{type(exc).__name__}: {exc}",
+                for _ in range(min(senders, len(batch)))
+            ),
+            return_exceptions=True,
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                state.stop = True
+                state.errors.append(
+                    f"broadcast-sender:{type(outcome).__name__}:{outcome}"[:500]
                 )
-            except Exception:
-                pass
-            deferred += 1
-            break
 
-    for parent_id in sorted(affected):
+    for parent_id in sorted(state.affected):
         try:
             await _store_call(sync_broadcast_completion, parent_id)
         except (BroadcastStoreUnavailable, ValueError) as exc:
-            errors.append(f"broadcast-sync:{parent_id}:{type(exc).__name__}:{exc}"[:500])
-
-    return BroadcastDrainSummary(
-        claimed=claimed_count,
-        delivered=delivered_count,
-        terminal_failed=terminal_failed,
-        deferred=deferred,
-        errors=tuple(errors),
+            state.errors.append(f"broadcast-sync:{parent_id}:{type(exc).__name__}:{exc}"[:500])
+
+    elapsed = max(0.0, time.monotonic() - started)
+    summary = BroadcastDrainSummary(
+        claimed=state.claimed,
+        delivered=state.delivered,
+        terminal_failed=state.terminal_failed,
+        deferred=state.deferred,
+        errors=tuple(state.errors),
+        claim_round_trips=claim_round_trips,
+        elapsed_seconds=round(elapsed, 3),
+        throughput_per_second=round(state.delivered / elapsed, 3) if elapsed > 0 else 0.0,
+        max_lag_seconds=(
+            round(state.max_lag_seconds, 3) if state.max_lag_seconds is not None else None
+        ),
+        rate_limited=state.rate_limited,
     )
+    _LAST_DRAIN.clear()
+    _LAST_DRAIN.update({key: value for key, value in asdict(summary).items() if key != "errors"})
+    _LAST_DRAIN["errors"] = len(summary.errors)
+    return summary
 
 
-async def broadcast_delivery_job(context) -> None:
+async def broadcast_delivery_job(context) -> int:
     try:
-        summary = await drain_broadcast_outbox(context.bot, limit=20)
+        summary = await drain_broadcast_outbox(context.bot, limit=BROADCAST_DRAIN_LIMIT)
         if summary.errors:
             logger.warning("broadcast outbox drain completed with errors: %s", summary.errors)
+        if summary.delivered:
+            logger.info(
+                "broadcast outbox drain delivered %d in %.2fs (%.1f/s, max lag %ss)",
+                summary.delivered,
+                summary.elapsed_seconds,
+                summary.throughput_per_second,
+                summary.max_lag_seconds,
+            )
     except Exception:
         logger.exception("unexpected broadcast outbox drain failure")
+        return 0
+    return summary.claimed
 
 
 async def broadcast_command(update, context):
@@ -392,6 +646,7 @@ async def broadcast_command(update, context):
 
     count = int(stored.get("recipient_count", len(recipients)) or 0)
     if created:
+        notify_outbox(OUTBOX_BROADCASTS)
         await message.reply_text(
             f"✅ Рассылка сохранена в durable-очередь: {count} получателей. "
             "Доставка продолжится автоматически после перезапуска."
@@ -23,6 +23,7 @@ from legacy_session_lifecycle import (
 )
 from question_identity import get_qid
 from questions import get_pool_by_key, pick_competitive_challenge_questions
+from session_question_refs import legacy_session_questions
 
 logger = logging.getLogger(__name__)
 _COMPETITIVE_MODES = frozenset({"random20", "hardcore20"})
@@ -185,7 +186,7 @@ async def restart_session_handler(update, context):
             return
     else:
         pool = get_pool_by_key(session.get("level_key"))
-        total = len(session.get("questions_data", []))
+        total = len(legacy_session_questions(session) or [])
         questions = random.sample(pool, min(total, len(pool))) if pool else []
 
     if not questions:
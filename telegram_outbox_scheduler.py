@@ -0,0 +1,177 @@
+"""Wake-on-enqueue scheduling for the durable Telegram delivery outboxes.
+
+Reports, result cards, battle results and broadcasts are written to MongoDB
+first and delivered by drain jobs. Those jobs used to poll on fixed
+``run_repeating`` intervals, so an item enqueued just after a tick waited up to
+a minute even on an idle bot. Each outbox is now a *lane* that reschedules
+itself through the PTB JobQueue:
+
+* a controller that leaves work in an outbox calls :func:`notify_outbox`, which
+  runs the lane's drain immediately (or right after the drain in progress);
+* a drain that delivered items runs again after ``min_interval``;
+* a drain that found nothing doubles the interval up to ``max_interval``.
+
+The periodic run remains the recovery path for leases that expire and for
+work left over by a previous process. The bot runs as a single instance, so
+every producer is in-process and no change stream is needed. A lane's drain
+callback is the existing PTB job callback and returns how many items it
+delivered or finalized; items it only listed or deferred do not count.
+
+Controllers deliver inline first and notify only when work is left behind, so
+the latency recorded per lane as ``wakeup_to_delivery`` runs from the first
+such wakeup to the drain run that delivered something. It does not cover
+items delivered inline or found by a periodic run.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from runtime_metrics import LatencyHistogram, register_metrics_source
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_REPORTS = "reports"
+OUTBOX_RESULT_CARDS = "result_cards"
+OUTBOX_BATTLES = "battles"
+OUTBOX_BROADCASTS = "broadcasts"
+
+DrainJob = Callable[[Any], Awaitable[int | None]]
+
+
+@dataclass
+class _Lane:
+    name: str
+    drain: DrainJob
+    min_interval: float
+    max_interval: float
+    interval: float
+    job: Any = None
+    due_now: bool = False
+    running: bool = False
+    rerun: bool = False
+    pending_since: float | None = None
+    runs: int = 0
+    idle_runs: int = 0
+    wakeups: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+
+class OutboxScheduler:
+    """Adaptive, wakeable JobQueue scheduling for named drain jobs."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lanes: dict[str, _Lane] = {}
+        self._job_queue = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def add_lane(
+        self,
+        name: str,
+        drain: DrainJob,
+        *,
+        min_interval: float,
+        max_interval: float,
+    ) -> None:
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("outbox intervals must satisfy 0 < min <= max")
+        self._lanes[name] = _Lane(
+            name=name,
+            drain=drain,
+            min_interval=float(min_interval),
+            max_interval=float(max_interval),
+            interval=float(min_interval),
+        )
+
+    def install(self, job_queue) -> None:
+        """Schedule the first run of every lane after its ``min_interval``."""
+        self._job_queue = job_queue
+        for lane in self._lanes.values():
+            self._schedule(lane, lane.min_interval)
+
+    def _schedule(self, lane: _Lane, delay: float) -> None:
+        if lane.job is not None:
+            lane.job.schedule_removal()
+        lane.job = self._job_queue.run_once(
+            self._run, when=delay, data=lane.name, name=f"outbox:{lane.name}"
+        )
+        lane.due_now = delay <= 0
+
+    def notify(self, name: str) -> None:
+        """Wake lane ``name``; safe to call from any thread, a no-op before install."""
+        loop = self._loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is not None and running is not loop:
+            loop.call_soon_threadsafe(self._wake, name)
+        elif running is not None:
+            self._wake(name)
+
+    def _wake(self, name: str) -> None:
+        lane = self._lanes.get(name)
+        if lane is None or self._job_queue is None:
+            return
+        lane.wakeups += 1
+        if lane.pending_since is None:
+            lane.pending_since = self._clock()
+        if lane.running:
+            lane.rerun = True
+        elif not lane.due_now:
+            self._schedule(lane, 0)
+
+    async def _run(self, context) -> None:
+        self._loop = asyncio.get_running_loop()
+        lane = self._lanes[context.job.data]
+        lane.job = None
+        lane.due_now = False
+        lane.running = True
+        lane.rerun = False
+        pending_since = lane.pending_since
+        try:
+            handled = int(await lane.drain(context) or 0)
+        except Exception:
+            logger.exception("outbox %s drain failed", lane.name)
+            handled = 0
+        finally:
+            lane.running = False
+
+        lane.runs += 1
+        now = self._clock()
+        if handled > 0:
+            if pending_since is not None:
+                lane.latency.observe(now - pending_since)
+            lane.interval = lane.min_interval
+        else:
+            lane.idle_runs += 1
+            lane.interval = min(lane.max_interval, lane.interval * 2)
+        # A wakeup that arrived during this run starts a new pending window.
+        lane.pending_since = now if lane.rerun else None
+        if self._job_queue is not None:
+            self._schedule(lane, 0 if lane.rerun else lane.interval)
+
+    def metrics(self) -> dict:
+        return {
+            name: {
+                "interval_seconds": lane.interval,
+                "runs": lane.runs,
+                "idle_runs": lane.idle_runs,
+                "wakeups": lane.wakeups,
+                "wakeup_to_delivery": lane.latency.snapshot(),
+            }
+            for name, lane in list(self._lanes.items())
+        }
+
+
+OUTBOX_SCHEDULER = OutboxScheduler()
+register_metrics_source("outbox_scheduler", OUTBOX_SCHEDULER.metrics)
+
+
+def notify_outbox(name: str) -> None:
+    OUTBOX_SCHEDULER.notify(name)
@@ -29,6 +29,7 @@ import telegram_course_surface as courses
 import telegram_error_controller as errors
 import telegram_intro_controller as intro
 import telegram_main_menu as main_menu
+import telegram_outbox_scheduler as outboxes
 import telegram_quiz_runtime_controller as quiz
 import telegram_report_controller as reports
 import telegram_report_runtime as report_runtime
@@ -40,12 +41,23 @@ import telegram_settings_controller as settings
 import telegram_static_presentation as static_presentation
 import telegram_stats_controller as stats
 from broadcast_index_safety import ensure_broadcast_indexes
+from config import (
+    BROADCAST_OUTBOX_MAX_INTERVAL,
+    BROADCAST_OUTBOX_MIN_INTERVAL,
+    LEADERBOARD_RECONCILE_INTERVAL,
+    OUTBOX_MAX_INTERVAL,
+    OUTBOX_MIN_INTERVAL,
+)
+from database import flush_activity_touches, flush_question_stats
 from legacy_session_access import ensure_active_session_unique_index
+from schema_readiness import SCHEMA_READINESS
+from storage_executor import shutdown_storage_executor
 from web_api.db_hardening import (
     MiniAppIndexSafetyUnavailable,
     ensure_miniapp_indexes,
 )
 from web_api.telegram_transport import (
+    build_update_processor,
     run_telegram_application,
     validate_telegram_transport_configuration,
 )
@@ -274,11 +286,16 @@ def main() -> None:
     if ensure_miniapp_indexes() is not True:
         raise MiniAppIndexSafetyUnavailable("Mini App index safety is unavailable")
     ensure_broadcast_indexes()
+    # Every registered index/TTL contract is proven here, concurrently; hot
+    # paths afterwards only consult the registry's lock-free readiness map.
+    SCHEMA_READINESS.verify_all()
     result_delivery.install_result_card_renderer(quiz)
+    result_delivery.enable_result_card_images()
 
     app = (
         Application.builder()
         .token(token)
+        .concurrent_updates(build_update_processor())
         .post_init(_sync_public_command_menu_post_init)
         .post_shutdown(quiz._save_all_sessions)
         .build()
@@ -454,25 +471,46 @@ def main() -> None:
         interval=7200,
         first=7200,
     )
-    app.job_queue.run_repeating(
+    # Durable outboxes drain when work is enqueued and back off while empty.
+    outboxes.OUTBOX_SCHEDULER.add_lane(
+        outboxes.OUTBOX_REPORTS,
         reports.report_delivery_job,
-        interval=60,
-        first=10,
+        min_interval=OUTBOX_MIN_INTERVAL,
+        max_interval=OUTBOX_MAX_INTERVAL,
     )
-    app.job_queue.run_repeating(
+    outboxes.OUTBOX_SCHEDULER.add_lane(
+        outboxes.OUTBOX_RESULT_CARDS,
         result_delivery.result_card_delivery_job,
-        interval=60,
-        first=10,
+        min_interval=OUTBOX_MIN_INTERVAL,
+        max_interval=OUTBOX_MAX_INTERVAL,
     )
-    app.job_queue.run_repeating(
+    outboxes.OUTBOX_SCHEDULER.add_lane(
+        outboxes.OUTBOX_BROADCASTS,
         broadcasts.broadcast_delivery_job,
-        interval=2,
-        first=1,
+        min_interval=BROADCAST_OUTBOX_MIN_INTERVAL,
+        max_interval=BROADCAST_OUTBOX_MAX_INTERVAL,
     )
-    app.job_queue.run_repeating(
+    outboxes.OUTBOX_SCHEDULER.add_lane(
+        outboxes.OUTBOX_BATTLES,
         battles.battle_maintenance_job,
-        interval=60,
-        first=10,
+        min_interval=OUTBOX_MIN_INTERVAL,
+        max_interval=OUTBOX_MAX_INTERVAL,
+    )
+    outboxes.OUTBOX_SCHEDULER.install(app.job_queue)
+    app.job_queue.run_repeating(
+        maintenance.schema_revalidation_job,
+        interval=maintenance.SCHEMA_REVALIDATE_INTERVAL,
+        first=maintenance.SCHEMA_REVALIDATE_INTERVAL,
+    )
+    app.job_queue.run_repeating(
+        maintenance.receipt_prune_job,
+        interval=maintenance.RECEIPT_PRUNE_INTERVAL,
+        first=maintenance.RECEIPT_PRUNE_INTERVAL,
+    )
+    app.job_queue.run_repeating(
+        stats.leaderboard_rank_reconcile_job,
+        interval=LEADERBOARD_RECONCILE_INTERVAL,
+        first=5,
     )
 
     app.add_error_handler(errors.build_error_handler(admin_user_id))
@@ -483,6 +521,9 @@ def main() -> None:
         app,
         webhook_before_shutdown=quiz._save_all_sessions,
     )
+    flush_question_stats()
+    flush_activity_touches()
+    shutdown_storage_executor()
 
 
 if __name__ == "__main__":
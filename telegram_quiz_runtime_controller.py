@@ -95,6 +95,8 @@ from question_identity import get_qid
 from questions import get_pool_by_key
 from quiz_answer_history import build_progress_bar, is_wrong
 from session_integrity import QuizSessionAnswerConflict, QuizSessionStoreUnavailable
+from session_question_refs import legacy_session_questions
+from storage_executor import run_interactive
 from telegram_answer_animation import animate_answer_buttons
 from telegram_conversation_states import ANSWERING
 import telegram_main_menu as main_menu
@@ -105,18 +107,19 @@ from telegram_quiz_runtime_state import (
     get_user_lock,
     reset_bad_input,
 )
+from user_records import RANKING_FIELDS
 from utils import safe_edit
 
 logger = logging.getLogger(__name__)
 _T = TypeVar("_T")
 user_data = get_user_data()
+# Strong references for scheduled answer-feedback tasks (asyncio keeps weak ones).
+_feedback_tasks: set[asyncio.Task] = set()
 
 
 async def _run_blocking_io(function: Callable[..., _T], /, *args, **kwargs) -> _T:
-    """Run one synchronous persistence/network boundary outside the PTB loop."""
-    if kwargs:
-        return await asyncio.to_thread(lambda: function(*args, **kwargs))
-    return await asyncio.to_thread(function, *args)
+    """Run one synchronous persistence/network boundary in the interactive storage lane."""
+    return await run_interactive(function, *args, **kwargs)
 
 
 async def _touch_activity(user_id: int) -> None:
@@ -200,7 +203,7 @@ def _lifecycle_keyboard(session: dict, *, include_cancel: bool = True) -> Inline
 
 
 def _session_progress(session: dict) -> tuple[int, int, str]:
-    questions = session.get("questions_data", [])
+    questions = legacy_session_questions(session)
     total = len(questions) if isinstance(questions, list) else 0
     current = session.get("current_index", 0)
     if isinstance(current, bool) or not isinstance(current, int):
@@ -261,7 +264,7 @@ async def _render_result(bot, user_id: int, outcome, *, retry_drill: bool = Fals
     data["result_pending"] = False
     data["user_id"] = user_id
     percentage = round(score / max(total, 1) * 100)
-    position, _entry = await _run_blocking_io(get_user_position, user_id)
+    position, _entry = await _run_blocking_io(get_user_position, user_id, RANKING_FIELDS)
     position_text = f"#{position}" if position else "—"
 
     answered = data.get("answered_questions", [])
@@ -604,6 +607,29 @@ def _cancel_runtime_timer(data: dict) -> None:
     if countdown and not countdown.done():
         countdown.cancel()
     data["countdown_task"] = None
+    feedback = data.get("feedback_task")
+    if feedback and not feedback.done():
+        feedback.cancel()
+    data["feedback_task"] = None
+
+
+def _schedule_answer_feedback(data: dict, presentation) -> None:
+    """Run the cosmetic post-answer stage as a cancellable task outside the user lock."""
+    task = asyncio.create_task(presentation)
+    data["feedback_task"] = task
+    _feedback_tasks.add(task)
+    task.add_done_callback(_feedback_tasks.discard)
+
+
+async def _continue_after_feedback(bot, user_id: int, data: dict, outcome, delay: float) -> None:
+    """Wait out the feedback pause, then advance only if nothing superseded this answer."""
+    await asyncio.sleep(delay)
+    async with get_user_lock(user_id):
+        current = asyncio.current_task()
+        if user_data.get(user_id) is not data or data.get("feedback_task") is not current:
+            return
+        data["feedback_task"] = None
+        await _after_answer(bot, user_id, outcome)
 
 
 async def _disable_question_keyboard(bot, data: dict) -> None:
@@ -823,32 +849,10 @@ async def _handle_inline_answer(update: Update, context, prefix: str):
         await query.answer()
         reset_bad_input(user_id)
 
-        shuffled = data.get("current_options", [])
-        option_index = outcome.option_index if outcome.option_index is not None else 0
-        try:
-            correct_slot = shuffled.index(outcome.correct_text)
-        except ValueError:
-            correct_slot = option_index
-        try:
-            is_numeric = bool(
-                query.message.reply_markup
-                and query.message.reply_markup.inline_keyboard
-                and len(query.message.reply_markup.inline_keyboard[0]) > 1
-            )
-            await animate_answer_buttons(
-                query,
-                option_index,
-                correct_slot,
-                is_numeric,
-                shuffled,
-            )
-        except Exception:
-            logger.debug("answer animation failed", exc_info=True)
-
         if outcome.applied:
+            # Write-behind buffer: no MongoDB round trip on the answer path.
             try:
-                await _run_blocking_io(
-                    record_question_stat,
+                record_question_stat(
                     outcome.question_id,
                     data.get("level_key"),
                     outcome.is_correct,
@@ -857,28 +861,74 @@ async def _handle_inline_answer(update: Update, context, prefix: str):
             except Exception:
                 logger.warning("question analytics failed after durable answer", exc_info=True)
 
-        if outcome.is_correct:
-            suffix = f" 🔥×{outcome.current_streak}" if outcome.current_streak >= 2 else ""
-            feedback = f"✅ *Верно!*{suffix}\n\n_{outcome.correct_text}_"
-            delay = FEEDBACK_DELAY_CORRECT
-        else:
-            feedback = f"❌ *Неверно*\n\n✅ Правильно: *{outcome.correct_text}*"
-            delay = FEEDBACK_DELAY_WRONG
+        # The durable transition is done; animation, feedback and the pause
+        # before the next question run without holding the user lock.
+        _schedule_answer_feedback(
+            data,
+            _present_answer_feedback(
+                context.bot,
+                query,
+                user_id,
+                data,
+                outcome,
+                shuffled=list(data.get("current_options", [])),
+                chat_id=data.get("quiz_chat_id"),
+                message_id=data.get("quiz_message_id"),
+            ),
+        )
 
-        chat_id = data.get("quiz_chat_id")
-        message_id = data.get("quiz_message_id")
-        if chat_id and message_id:
-            try:
-                await context.bot.edit_message_text(
-                    chat_id=chat_id,
-                    message_id=message_id,
-                    text=feedback,
-                    parse_mode="Markdown",
-                )
-            except Exception:
-                pass
-        await asyncio.sleep(delay)
-        await _after_answer(context.bot, user_id, outcome)
+
+async def _present_answer_feedback(
+    bot,
+    query,
+    user_id: int,
+    data: dict,
+    outcome,
+    *,
+    shuffled: list,
+    chat_id,
+    message_id,
+) -> None:
+    option_index = outcome.option_index if outcome.option_index is not None else 0
+    try:
+        correct_slot = shuffled.index(outcome.correct_text)
+    except ValueError:
+        correct_slot = option_index
+    try:
+        is_numeric = bool(
+            query.message.reply_markup
+            and query.message.reply_markup.inline_keyboard
+            and len(query.message.reply_markup.inline_keyboard[0]) > 1
+        )
+        await animate_answer_buttons(
+            query,
+            option_index,
+            correct_slot,
+            is_numeric,
+            shuffled,
+        )
+    except Exception:
+        logger.debug("answer animation failed", exc_info=True)
+
+    if outcome.is_correct:
+        suffix = f" 🔥×{outcome.current_streak}" if outcome.current_streak >= 2 else ""
+        feedback = f"✅ *Верно!*{suffix}\n\n_{outcome.correct_text}_"
+        delay = FEEDBACK_DELAY_CORRECT
+    else:
+        feedback = f"❌ *Неверно*\n\n✅ Правильно: *{outcome.correct_text}*"
+        delay = FEEDBACK_DELAY_WRONG
+
+    if chat_id and message_id:
+        try:
+            await bot.edit_message_text(
+                chat_id=chat_id,
+                message_id=message_id,
+                text=feedback,
+                parse_mode="Markdown",
+            )
+        except Exception:
+            pass
+    await _continue_after_feedback(bot, user_id, data, outcome, delay)
 
 
 async def quiz_inline_answer(update: Update, context):
@@ -936,8 +986,7 @@ async def _handle_question_timeout(
 
         if outcome.applied:
             try:
-                await _run_blocking_io(
-                    record_question_stat,
+                record_question_stat(
                     outcome.question_id,
                     data.get("level_key"),
                     False,
@@ -948,23 +997,46 @@ async def _handle_question_timeout(
 
         chat_id = data.get("quiz_chat_id")
         message_id = data.get("quiz_message_id")
-        text = (
-            f"⏱ *Время вышло ({timeout_seconds} сек)*\n"
-            f"✅ Правильный ответ: *{outcome.correct_text}*"
-        )
-        if chat_id and message_id:
-            try:
-                await bot.edit_message_text(
-                    chat_id=chat_id,
-                    message_id=message_id,
-                    text=text,
-                    parse_mode="Markdown",
-                )
-            except Exception:
-                pass
         data["quiz_message_id"] = None
-        await asyncio.sleep(FEEDBACK_DELAY_WRONG)
-        await _after_answer(bot, user_id, outcome)
+        _schedule_answer_feedback(
+            data,
+            _present_timeout_feedback(
+                bot,
+                user_id,
+                data,
+                outcome,
+                timeout_seconds=timeout_seconds,
+                chat_id=chat_id,
+                message_id=message_id,
+            ),
+        )
+
+
+async def _present_timeout_feedback(
+    bot,
+    user_id: int,
+    data: dict,
+    outcome,
+    *,
+    timeout_seconds: int,
+    chat_id,
+    message_id,
+) -> None:
+    text = (
+        f"⏱ *Время вышло ({timeout_seconds} сек)*\n"
+        f"✅ Правильный ответ: *{outcome.correct_text}*"
+    )
+    if chat_id and message_id:
+        try:
+            await bot.edit_message_text(
+                chat_id=chat_id,
+                message_id=message_id,
+                text=text,
+                parse_mode="Markdown",
+            )
+        except Exception:
+            pass
+    await _continue_after_feedback(bot, user_id, data, outcome, FEEDBACK_DELAY_WRONG)
 
 
 async def _resume_resolved(query, context, resolved) -> None:
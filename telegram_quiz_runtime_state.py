@@ -35,6 +35,7 @@ def create_session_data(
         "processing_answer": False,
         "timer_task": None,
         "countdown_task": None,
+        "feedback_task": None,
         "question_sent_at": None,
         "current_streak": 0,
         "max_streak": 0,
@@ -44,6 +44,9 @@ from legacy_session_access import (
     get_active_quiz_session_strict,
 )
 from report_integrity import ReportStoreUnavailable
+from session_question_refs import legacy_session_questions
+from storage_executor import StorageRunner, run_background, run_interactive
+from telegram_outbox_scheduler import OUTBOX_REPORTS, notify_outbox
 from telegram_report_state import (
     REPORT_CONFIRM,
     REPORT_PHOTO,
@@ -280,7 +283,9 @@ async def _send_report_text(bot, report: dict) -> Any:
     return await bot.send_message(chat_id=_admin_user_id(), text=body[:4096])
 
 
-async def drain_report_outbox(bot, *, limit: int = 50):
+async def drain_report_outbox(
+    bot, *, limit: int = 50, run_storage: StorageRunner = run_background
+):
     async def photo_sender(report: dict):
         return await _send_report_photo(bot, report)
 
@@ -291,17 +296,20 @@ async def drain_report_outbox(bot, *, limit: int = 50):
         photo_sender=photo_sender,
         text_sender=text_sender,
         limit=limit,
+        run_storage=run_storage,
     )
     if summary.errors:
         logger.warning("report outbox drain completed with errors: %s", summary.errors)
     return summary
 
 
-async def report_delivery_job(context):
+async def report_delivery_job(context) -> int:
     try:
-        await drain_report_outbox(context.bot)
+        summary = await drain_report_outbox(context.bot)
     except Exception:
         logger.exception("unexpected report outbox drain failure")
+        return 0
+    return summary.stage_sends
 
 
 async def report_confirm(update, context):
@@ -357,9 +365,10 @@ async def report_confirm(update, context):
         report_drafts.pop(user_id, None)
 
     try:
-        await drain_report_outbox(context.bot, limit=10)
+        await drain_report_outbox(context.bot, limit=10, run_storage=run_interactive)
     except Exception:
         logger.warning("accepted report remains queued for admin delivery", exc_info=True)
+        notify_outbox(OUTBOX_REPORTS)
 
     await safe_edit(
         query,
@@ -413,7 +422,7 @@ async def report_inaccuracy_handler(update, context):
         await query.answer("Некорректная кнопка.", show_alert=True)
         return
 
-    questions = session.get("questions_data")
+    questions = legacy_session_questions(session)
     if (
         not isinstance(questions, list)
         or question_index < 0
@@ -446,6 +455,7 @@ async def report_inaccuracy_handler(update, context):
 
     await query.answer("✅ Неточность сохранена.")
     try:
-        await drain_report_outbox(context.bot, limit=10)
+        await drain_report_outbox(context.bot, limit=10, run_storage=run_interactive)
     except Exception:
         logger.warning("accepted inaccuracy report remains queued", exc_info=True)
+        notify_outbox(OUTBOX_REPORTS)
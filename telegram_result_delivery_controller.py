@@ -5,30 +5,48 @@ This adapter intercepts only the first ``send_message`` performed by its result
 renderer for a persisted outcome, stores that exact rich card in the terminal
 session outbox, and sends it under a durable lease. Later messages pass through
 unchanged. Memory-only retry review remains completely untouched.
+
+When image cards are enabled, a claimed card is sent as a photo whose caption is
+the same text. The photo is rendered under a strict budget, and a slow or
+failed render sends the text card instead. The uploaded ``file_id`` is kept on
+the marker, so a replay resends it and never renders again. If Telegram
+rejects the photo (``BadRequest``: an expired ``file_id``, a caption it will
+not parse), the stored ``file_id`` is dropped and the same text goes out as a
+plain message. Claim, lease, defer, settle and acknowledgement semantics are
+identical for both forms.
 """
 from __future__ import annotations
 
-import asyncio
 import logging
 from dataclasses import dataclass
 from typing import Any
 
+from telegram.error import BadRequest
+
 from legacy_delivery_worker import LegacyDeliveryDeferred, LegacyDeliveryPermanentFailure
 from legacy_result_card_delivery import (
     ResultCardDeliveryConflict,
     ResultCardDeliveryUnavailable,
     claim_result_card_delivery,
     defer_result_card_delivery,
+    forget_result_card_photo,
     get_pending_result_card_sessions,
     mark_result_card_delivered,
+    record_result_card_photo,
     release_result_card_delivery,
     set_result_card_delivery_text,
     settle_result_card_delivery_failure,
 )
+from storage_executor import StorageRunner, run_background, run_interactive
 from telegram_delivery_retry import send_with_durable_retry_after
+from telegram_outbox_scheduler import OUTBOX_RESULT_CARDS, notify_outbox
+from utils import MAX_CAPTION_LEN
 
 logger = logging.getLogger(__name__)
 
+# Installed by the composition root; ``None`` keeps the text-only card.
+_IMAGE_PIPELINE = None
+
 
 class ResultCardDeliveryAcknowledgementPending(RuntimeError):
     """Remote delivery may have happened but durable acknowledgement is pending."""
@@ -86,26 +104,87 @@ def _claimed_payload(claim: dict) -> tuple[dict, str, bool, str]:
     return marker, token, rich, text
 
 
-async def deliver_result_card_once(bot, session_id: str, user_id: int | str) -> bool:
+def _stored_photo(marker: dict) -> str | None:
+    file_id = marker.get("photo_file_id")
+    if isinstance(file_id, str) and file_id.strip():
+        return file_id
+    return None
+
+
+async def _card_photo(bot, user_id: int | str, marker: dict, text: str) -> str | bytes | None:
+    """Reuse the uploaded photo or render a new one; ``None`` means text card."""
+    stored = _stored_photo(marker)
+    if stored is not None:
+        return stored
+    if _IMAGE_PIPELINE is None or len(text) > MAX_CAPTION_LEN:
+        return None
+    try:
+        telegram_user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    score = marker.get("score")
+    total = marker.get("total")
+    if (
+        isinstance(score, bool)
+        or not isinstance(score, int)
+        or isinstance(total, bool)
+        or not isinstance(total, int)
+        or not 0 <= score <= total
+        or total <= 0
+    ):
+        return None
+    return await _IMAGE_PIPELINE.render(bot, user_id=telegram_user_id, score=score, total=total)
+
+
+def _uploaded_file_id(message) -> str | None:
+    sizes = getattr(message, "photo", None)
+    if not sizes:
+        return None
+    file_id = getattr(sizes[-1], "file_id", None)
+    return file_id if isinstance(file_id, str) and file_id else None
+
+
+async def _forget_photo(
+    session_id: str, user_id: int | str, token: str, run_storage: StorageRunner
+) -> None:
+    try:
+        await run_storage(forget_result_card_photo, session_id, user_id, token)
+    except ResultCardDeliveryUnavailable:
+        # A replay would retry the rejected photo once more and fall back again.
+        logger.warning("rejected result-card photo for %s was not cleared", session_id)
+
+
+async def deliver_result_card_once(
+    bot,
+    session_id: str,
+    user_id: int | str,
+    *,
+    run_storage: StorageRunner = run_background,
+) -> bool:
     """Attempt one due leased result-card delivery and durably settle its outcome."""
-    claim = await asyncio.to_thread(claim_result_card_delivery, session_id, user_id)
+    claim = await run_storage(claim_result_card_delivery, session_id, user_id)
     if claim is None:
         return False
     marker, token, rich, text = _claimed_payload(claim)
+    photo = await _card_photo(bot, user_id, marker, text)
 
     async def sender():
-        kwargs: dict[str, Any] = {
-            "chat_id": marker["chat_id"],
-            "text": text,
-        }
+        kwargs: dict[str, Any] = {"chat_id": marker["chat_id"]}
         if rich:
             kwargs["parse_mode"] = "Markdown"
-        return await bot.send_message(**kwargs)
+        if photo is not None:
+            try:
+                return await bot.send_photo(photo=photo, caption=text, **kwargs)
+            except BadRequest as exc:
+                logger.warning("result-card photo for %s rejected; sending text: %s", session_id, exc)
+                if isinstance(photo, str):
+                    await _forget_photo(session_id, user_id, token, run_storage)
+        return await bot.send_message(text=text, **kwargs)
 
     try:
-        await send_with_durable_retry_after(sender)
+        message = await send_with_durable_retry_after(sender)
     except LegacyDeliveryPermanentFailure as exc:
-        settled = await asyncio.to_thread(
+        settled = await run_storage(
             settle_result_card_delivery_failure,
             session_id,
             user_id,
@@ -118,7 +197,7 @@ async def deliver_result_card_once(bot, session_id: str, user_id: int | str) ->
             ) from exc
         return False
     except LegacyDeliveryDeferred as exc:
-        deferred = await asyncio.to_thread(
+        deferred = await run_storage(
             defer_result_card_delivery,
             session_id,
             user_id,
@@ -132,7 +211,7 @@ async def deliver_result_card_once(bot, session_id: str, user_id: int | str) ->
             ) from exc
         return False
     except Exception as exc:
-        await asyncio.to_thread(
+        await run_storage(
             release_result_card_delivery,
             session_id,
             user_id,
@@ -141,7 +220,17 @@ async def deliver_result_card_once(bot, session_id: str, user_id: int | str) ->
         )
         raise
 
-    acknowledged = await asyncio.to_thread(
+    if isinstance(photo, bytes):
+        file_id = _uploaded_file_id(message)
+        if file_id is not None:
+            try:
+                await run_storage(record_result_card_photo, session_id, user_id, token, file_id)
+            except ResultCardDeliveryUnavailable:
+                # Best effort: only a lost acknowledgement would need it, and
+                # then the replay simply renders the card again.
+                logger.warning("result-card photo file_id for %s was not stored", session_id)
+
+    acknowledged = await run_storage(
         mark_result_card_delivered,
         session_id,
         user_id,
@@ -164,7 +253,7 @@ async def deliver_live_result_card(
     text: str,
 ) -> bool:
     """Persist the controller's exact rich card before its first remote send."""
-    stored = await asyncio.to_thread(
+    stored = await run_interactive(
         set_result_card_delivery_text,
         session_id,
         user_id,
@@ -174,13 +263,20 @@ async def deliver_live_result_card(
         # The same marker is already terminally settled; suppress a duplicate
         # direct send from a replayed result renderer.
         return True
-    await deliver_result_card_once(bot, session_id, user_id)
+    try:
+        await deliver_result_card_once(bot, session_id, user_id, run_storage=run_interactive)
+    except Exception:
+        # The durable marker stays pending; let the outbox retry it now.
+        notify_outbox(OUTBOX_RESULT_CARDS)
+        raise
     return True
 
 
-async def drain_result_card_outbox(bot, *, limit: int = 50) -> ResultCardDrainSummary:
+async def drain_result_card_outbox(
+    bot, *, limit: int = 50, run_storage: StorageRunner = run_background
+) -> ResultCardDrainSummary:
     try:
-        sessions = await asyncio.to_thread(get_pending_result_card_sessions, limit)
+        sessions = await run_storage(get_pending_result_card_sessions, limit)
     except ResultCardDeliveryUnavailable as exc:
         return ResultCardDrainSummary(
             errors=(f"result-card-list:{type(exc).__name__}:{exc}"[:500],)
@@ -198,7 +294,9 @@ async def drain_result_card_outbox(bot, *, limit: int = 50) -> ResultCardDrainSu
             errors.append("result-card:<invalid>:pending session identity is invalid")
             continue
         try:
-            sent = await deliver_result_card_once(bot, session_id, user_id)
+            sent = await deliver_result_card_once(
+                bot, session_id, user_id, run_storage=run_storage
+            )
             if sent:
                 delivered += 1
             else:
@@ -215,14 +313,15 @@ async def drain_result_card_outbox(bot, *, limit: int = 50) -> ResultCardDrainSu
     )
 
 
-async def result_card_delivery_job(context):
+async def result_card_delivery_job(context) -> int:
     try:
         summary = await drain_result_card_outbox(context.bot)
     except Exception:
         logger.exception("unexpected result-card outbox drain failure")
-        return
+        return 0
     if summary.errors:
         logger.warning("result-card outbox drain completed with errors: %s", summary.errors)
+    return summary.delivered
 
 
 class _ResultCardBotProxy:
@@ -269,6 +368,19 @@ class _ResultCardBotProxy:
         return None
 
 
+def enable_result_card_images(pipeline=None) -> bool:
+    """Composition-root opt-in for budgeted image result cards."""
+    global _IMAGE_PIPELINE
+    if pipeline is None:
+        from result_card_image import RESULT_CARD_IMAGES
+
+        pipeline = RESULT_CARD_IMAGES
+    if _IMAGE_PIPELINE is pipeline:
+        return False
+    _IMAGE_PIPELINE = pipeline
+    return True
+
+
 def install_result_card_renderer(quiz_module) -> bool:
     """Install one explicit composition-root wrapper around quiz._render_result."""
     renderer = getattr(quiz_module, "_render_result", None)
@@ -1,12 +1,17 @@
 """Process-local production maintenance jobs with no durable-state authority."""
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
 from collections.abc import MutableMapping
 
 from config import GC_INTERVAL as GC_INTERVAL
 from config import GC_STALE_THRESHOLD
+from config import RECEIPT_PRUNE_BATCH
+from config import RECEIPT_PRUNE_INTERVAL as RECEIPT_PRUNE_INTERVAL
+from config import SCHEMA_REVALIDATE_INTERVAL as SCHEMA_REVALIDATE_INTERVAL
+from schema_readiness import SCHEMA_READINESS
 from telegram_quiz_runtime_state import get_user_data
 
 logger = logging.getLogger(__name__)
@@ -43,3 +48,27 @@ async def cleanup_stale_userdata_job(
     )
     if deleted:
         logger.info("GC removed %d stale user_data entries", deleted)
+
+
+async def schema_revalidation_job(context) -> None:
+    """PTB JobQueue adapter: re-audit verified index contracts off-loop."""
+    del context
+    results = await asyncio.to_thread(SCHEMA_READINESS.revalidate)
+    failed = sorted(name for name, ready in results.items() if not ready)
+    if failed:
+        logger.error("storage schema requirements failing closed: %s", ", ".join(failed))
+
+
+async def receipt_prune_job(context) -> None:
+    """PTB JobQueue adapter: prune stale Mini App result receipts off-loop."""
+    del context
+    from web_api.result_store import sweep_old_receipts
+
+    swept = await asyncio.to_thread(sweep_old_receipts, RECEIPT_PRUNE_BATCH)
+    if swept["pruned"]:
+        logger.info(
+            "pruned %d Mini App result receipts for %d users in %.3fs",
+            swept["pruned"],
+            swept["users"],
+            swept["seconds"],
+        )
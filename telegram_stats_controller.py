@@ -20,7 +20,9 @@ from database import (
     get_user_history,
     get_user_position,
     get_weekly_leaderboard,
+    reconcile_leaderboard_rank_index,
 )
+from user_records import RANKING_FIELDS
 from utils import safe_edit
 
 
@@ -137,6 +139,12 @@ async def show_my_stats(query):
     )
 
 
+async def leaderboard_rank_reconcile_job(context):
+    """Periodically rebuild the in-process rank index from MongoDB off-loop."""
+    del context
+    await asyncio.to_thread(reconcile_leaderboard_rank_index)
+
+
 async def show_general_leaderboard(query, page: int = 0):
     """Render the paged general leaderboard with all Mongo reads off-loop."""
     users = await asyncio.to_thread(get_leaderboard_page, page)
@@ -155,7 +163,7 @@ async def show_general_leaderboard(query, page: int = 0):
             medal = {1: "🥇", 2: "🥈", 3: "🥉"}.get(i, f"{i}.")
             text += f"\n{medal} *{name}* — 💎{pts} • 🎯{tests}\n"
 
-    position, my_entry = await asyncio.to_thread(get_user_position, user_id)
+    position, my_entry = await asyncio.to_thread(get_user_position, user_id, RANKING_FIELDS)
     if my_entry and position:
         text += f"\n━━━━━━━━━━━━\n👤 *Ваше место:* #{position}"
 
@@ -205,7 +213,7 @@ async def show_history(update, context):
             end_time = session.get("end_time")
             dt = end_time.strftime("%d.%m %H:%M") if hasattr(end_time, "strftime") else "—"
             score = session.get("correct_count", 0)
-            total = session.get("total_questions", len(session.get("questions_data", [])))
+            total = session.get("total_questions", len(session.get("question_ids", [])))
             name = session.get("level_name", "?")
             pct = round(score / max(total, 1) * 100)
             text += f"• {dt} — _{name}_: *{score}/{total}* ({pct}%)\n"
@@ -42,7 +42,7 @@ def test_miniapp_chapter_start_to_learning_progress_is_server_authoritative(monk
     sessions = MemorySessions()
     monkeypatch.setattr(quiz_start.core, "miniapp_sessions", lambda: sessions)
     monkeypatch.setattr(database, "init_user_stats", lambda *_args, **_kwargs: True)
-    monkeypatch.setattr(database, "get_user_stats", lambda user_id: {"_id": str(user_id)})
+    monkeypatch.setattr(database, "get_user_stats", lambda user_id, fields=None: {"_id": str(user_id)})
     monkeypatch.setattr(quiz_start.random, "sample", lambda population, count: list(population)[:count])
 
     body, message, status = quiz_start.start_quiz(
@@ -57,7 +57,7 @@ def test_miniapp_chapter_start_to_learning_progress_is_server_authoritative(monk
     assert set(body["question"]) == {"id", "question", "options"}
     assert sessions.inserted["stats_level_key"] == chapter
     assert sessions.inserted["is_challenge"] is False
-    assert len(sessions.inserted["questions"]) == 10
+    assert len(quiz_start.core.session_questions(sessions.inserted)) == 10
 
     captured = {}
 
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import database
+from activity_touch_buffer import ActivityTouchBuffer
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+class _Writer:
+    def __init__(self, modified=None, fail=None):
+        self.batches = []
+        self.modified = modified
+        self.fail = fail
+
+    def __call__(self, rows):
+        self.batches.append(rows)
+        if self.fail is not None:
+            result, self.fail = self.fail, None
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return (len(rows) if self.modified is None else self.modified), []
+
+
+def _buffer(writer, **kwargs):
+    options = {"flush_interval": 60, "granularity": 60, "max_pending": 100}
+    options.update(kwargs)
+    return ActivityTouchBuffer(writer, **options)
+
+
+def test_touches_coalesce_to_latest_timestamp_and_skip_within_granularity():
+    writer = _Writer()
+    buffer = _buffer(writer)
+    for second in range(30):
+        buffer.touch("42", T0 + timedelta(seconds=second))
+    buffer.touch("7", T0)
+
+    assert buffer.flush() == 2
+    assert sorted(writer.batches[0]) == [("42", T0 + timedelta(seconds=29)), ("7", T0)]
+
+    assert buffer.touch("42", T0 + timedelta(seconds=80)) is False
+    assert buffer.touch("42", T0 + timedelta(seconds=90)) is True
+    metrics = buffer.metrics()
+    assert (metrics["touches"], metrics["coalesced"], metrics["skipped_recent"]) == (33, 29, 1)
+    assert metrics["written"] == 2
+    assert metrics["pending_users"] == 1
+    buffer.close()
+
+
+def test_other_writes_supersede_pending_touches():
+    writer = _Writer()
+    buffer = _buffer(writer)
+    buffer.touch("42", T0)
+
+    buffer.note_written("42", T0 + timedelta(seconds=5))
+
+    assert buffer.flush() == 0
+    assert writer.batches == []
+    assert buffer.touch("42", T0 + timedelta(seconds=30)) is False
+    assert buffer.metrics()["superseded"] == 1
+    buffer.close()
+
+
+def test_server_skips_keep_only_a_lower_bound_in_memory():
+    writer = _Writer(modified=0)
+    buffer = _buffer(writer)
+    buffer.touch("42", T0)
+
+    assert buffer.flush() == 0
+    assert buffer.metrics()["skipped_stored"] == 1
+    # Stored value is only known to be >= T0 - 60s.
+    assert buffer.touch("42", T0 + timedelta(seconds=30)) is True
+    buffer.close()
+
+
+def test_failed_flush_is_requeued_and_close_writes_it():
+    writer = _Writer(fail=RuntimeError("mongo down"))
+    buffer = _buffer(writer)
+    buffer.touch("42", T0)
+
+    assert buffer.flush() == 0
+    assert buffer.metrics()["requeued"] == 1
+    buffer.close()
+    assert writer.batches[-1] == [("42", T0)]
+    assert (buffer.metrics()["written"], buffer.metrics()["pending_users"]) == (1, 0)
+
+
+def test_database_writer_guards_on_stored_granularity(monkeypatch):
+    calls = []
+
+    class Users:
+        def bulk_write(self, operations, ordered):
+            calls.append((operations, ordered))
+            return SimpleNamespace(modified_count=1)
+
+    monkeypatch.setattr(database, "collection", Users())
+
+    assert database._write_activity_touches([("42", T0)]) == (1, [])
+
+    (operations, ordered), = calls
+    assert ordered is False
+    floor = T0 - timedelta(seconds=database.ACTIVITY_TOUCH_GRANULARITY)
+    assert operations[0]._filter == {"_id": "42", "last_activity": {"$not": {"$gte": floor}}}
+    assert operations[0]._doc == {"$set": {"last_activity": T0}}
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import questions
+from web_api import bank_manifest as manifest_module
+from web_api.bank_manifest import build_bank_manifest
+from web_api.quiz import question_id
+from web_api.routes import create_app
+
+
+def test_manifest_matches_the_registry_counts():
+    manifest = manifest_module.bank_manifest()
+
+    registry = questions.POOL_REGISTRY
+    assert dict(manifest.pools) == {key: len(value) for key, value in registry.items()}
+    assert manifest.total_questions == len(
+        {question_id(q) for key, pool in registry.items() if key != "random_all" for q in pool}
+    )
+    assert manifest_module.bank_manifest() is manifest
+
+
+def test_content_hash_tracks_question_content():
+    pools = {"a": [{"id": "q1", "question": "Who?", "options": ["x", "y"], "correct": 0}]}
+    before = build_bank_manifest(pools)
+    assert build_bank_manifest(pools).content_hash == before.content_hash
+
+    pools["a"][0]["options"] = ["x", "z"]
+    assert build_bank_manifest(pools).content_hash != before.content_hash
+
+
+def test_pools_route_serves_the_manifest_with_a_strong_etag(monkeypatch):
+    client = create_app().test_client()
+
+    def no_rehash(_question):
+        raise AssertionError("requests must not hash the bank")
+
+    monkeypatch.setattr(manifest_module, "question_id", no_rehash)
+
+    response = client.get("/api/pools")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-cache"
+    etag = response.headers["ETag"]
+    assert etag == f'"{manifest_module.bank_manifest().content_hash}"'
+    assert response.get_json() == dict(manifest_module.bank_manifest().pools)
+
+    revalidated = client.get("/api/pools", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+
+    stats = client.get("/stats").get_json()
+    assert stats["total_questions"] == manifest_module.bank_manifest().total_questions
+    assert stats["bank_hash"] == manifest_module.bank_manifest().content_hash
@@ -17,9 +17,12 @@ class Cursor:
     def __init__(self, docs):
         self.docs = list(docs)
 
-    def sort(self, key, direction):
+    def sort(self, key, direction=None):
         del direction
-        self.docs.sort(key=lambda item: item.get(key))
+        if isinstance(key, list):
+            self.docs.sort(key=lambda item: tuple(item.get(name) for name, _ in key))
+        else:
+            self.docs.sort(key=lambda item: item.get(key))
         return self
 
     def limit(self, limit):
@@ -38,6 +41,8 @@ def _matches(doc, query):
             continue
         actual = doc.get(key)
         if isinstance(expected, dict):
+            if "$in" in expected and actual not in expected["$in"]:
+                return False
             if "$ne" in expected and actual == expected["$ne"]:
                 return False
             if "$exists" in expected and (key in doc) != expected["$exists"]:
@@ -118,6 +123,16 @@ class Deliveries:
                 self.docs[key] = doc
         return SimpleNamespace(upserted_count=0)
 
+    def find(self, query, projection=None):
+        docs = [
+            deepcopy(self.docs[key])
+            for key in sorted(self.docs)
+            if _matches(self.docs[key], query)
+        ]
+        if projection is not None:
+            docs = [{"_id": doc["_id"]} for doc in docs]
+        return Cursor(docs)
+
     def find_one_and_update(self, query, update, sort=None, return_document=None):
         del sort, return_document
         for key in sorted(self.docs):
@@ -261,6 +276,42 @@ def test_delivery_lease_ack_and_completion_are_restart_safe(monkeypatch):
     assert "retention_at_dt" in deliveries.docs[claimed["_id"]]
 
 
+def test_batch_claim_leases_many_rows_once_and_skips_leased_rows(monkeypatch):
+    _broadcasts, deliveries = install(monkeypatch)
+    parent, _created = integrity.accept_broadcast_once(
+        broadcast_id="telegram_update_52",
+        admin_id=1,
+        admin_chat_id=1,
+        text="News",
+        recipient_ids=[11, 12, 13, 14, 15],
+    )
+    integrity.ensure_broadcast_fanout(parent)
+    single = integrity.claim_next_broadcast_delivery(broadcast_id="telegram_update_52")
+    assert single["user_id"] == "11"
+
+    batch = integrity.claim_broadcast_deliveries(
+        limit=3, broadcast_id="telegram_update_52"
+    )
+
+    assert [row["user_id"] for row in batch] == ["12", "13", "14"]
+    assert len({row["claim_token"] for row in batch}) == 1
+    assert batch[0]["claim_token"] != single["claim_token"]
+    assert all(row["attempts"] == 1 for row in batch)
+    rest = integrity.claim_broadcast_deliveries(limit=10, broadcast_id="telegram_update_52")
+    assert [row["user_id"] for row in rest] == ["15"]
+    assert integrity.claim_broadcast_deliveries(limit=10) == []
+
+    assert integrity.mark_broadcast_delivery_delivered(
+        batch[1]["_id"], batch[1]["claim_token"]
+    ) is True
+    assert integrity.mark_broadcast_delivery_delivered(
+        batch[2]["_id"], single["claim_token"]
+    ) is False
+    assert deliveries.docs[batch[1]["_id"]]["done"] is True
+    with pytest.raises(ValueError):
+        integrity.claim_broadcast_deliveries(limit=0)
+
+
 def test_rate_limit_deferral_survives_restart_and_blocks_early_reclaim(monkeypatch):
     broadcasts, deliveries = install(monkeypatch)
     parent, _created = integrity.accept_broadcast_once(
@@ -49,7 +49,7 @@ def test_chapter4_starts_through_server_authoritative_quiz_path(monkeypatch):
     sessions = MemorySessions()
     monkeypatch.setattr(quiz_start.core, "miniapp_sessions", lambda: sessions)
     monkeypatch.setattr(database, "init_user_stats", lambda *_args, **_kwargs: True)
-    monkeypatch.setattr(database, "get_user_stats", lambda user_id: {"_id": str(user_id)})
+    monkeypatch.setattr(database, "get_user_stats", lambda user_id, fields=None: {"_id": str(user_id)})
     monkeypatch.setattr(quiz_start.random, "sample", lambda population, count: list(population)[:count])
 
     body, message, status = quiz_start.start_quiz(
@@ -72,9 +72,11 @@ def test_chapter4_starts_through_server_authoritative_quiz_path(monkeypatch):
     assert sessions.inserted["stats_level_key"] == "chapter4"
     assert sessions.inserted["is_challenge"] is False
     assert sessions.inserted["question_count"] == 10
-    assert all("correct" in item for item in sessions.inserted["questions"])
-    assert all("review_record_id" not in item for item in sessions.inserted["questions"])
-    assert all("research_claim_id" not in item for item in sessions.inserted["questions"])
+    stored_questions = quiz.session_questions(sessions.inserted)
+    assert len(stored_questions) == 10
+    assert all("correct" in item for item in stored_questions)
+    assert all("review_record_id" not in item for item in stored_questions)
+    assert all("research_claim_id" not in item for item in stored_questions)
 
 
 def test_chapter4_cannot_enter_challenge_path(monkeypatch):
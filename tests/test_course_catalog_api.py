@@ -21,15 +21,16 @@ def _keys(payload: dict) -> set[str]:
     }
 
 
-def test_public_catalog_is_server_authoritative_and_not_cached():
+def test_public_catalog_is_server_authoritative_and_revalidated():
     app = create_app()
     client = app.test_client()
 
     response = client.get("/api/catalog")
     assert response.status_code == 200
-    assert response.headers["Cache-Control"] == "no-store, max-age=0"
+    assert response.headers["Cache-Control"] == "no-cache"
 
     payload = response.get_json()
+    assert response.headers["ETag"] == f'"{payload["revision"]}"'
     chapter2 = _course(payload, "chapter2")
     chapter3 = _course(payload, "chapter3")
     assert chapter2["scoring_mode"] == "learning"
@@ -5,9 +5,14 @@ import threading
 
 os.environ.setdefault("ADMIN_USER_ID", "1")
 
+import legacy_battle_delivery_drain as battle_drain
+import legacy_battle_delivery_flow as battle_flow
+import legacy_delivery_worker as delivery_worker
 import legacy_report_delivery_drain as report_drain
+import telegram_battle_ready_delivery as ready_delivery
 import telegram_broadcast_controller as broadcast
 import telegram_report_controller as reports
+import telegram_result_delivery_controller as result_delivery
 
 
 def test_report_queue_lookup_does_not_block_event_loop(monkeypatch):
@@ -89,18 +94,43 @@ def test_report_acceptance_and_cooldown_use_thread_boundaries():
     assert "asyncio.to_thread(" in inaccuracy_source
 
 
-def test_report_drain_listing_and_repair_use_thread_boundaries():
+def test_report_drain_listing_and_repair_use_the_storage_lane():
     source = inspect.getsource(report_drain.drain_pending_reports)
-    assert "asyncio.to_thread(get_pending_reports" in source
-    assert source.count("asyncio.to_thread(") >= 4
+    assert "run_storage(get_pending_reports" in source
+    assert source.count("await run_storage(") >= 4
     assert "repair_report_delivery_aggregate" in source
 
 
+def test_outbox_drains_never_bypass_the_storage_lanes():
+    modules = (
+        battle_drain,
+        battle_flow,
+        delivery_worker,
+        ready_delivery,
+        report_drain,
+        result_delivery,
+    )
+    for module in modules:
+        source = inspect.getsource(module)
+        assert "to_thread(" not in source, module.__name__
+        assert "run_storage: StorageRunner = run_background" in source, module.__name__
+
+
 def test_broadcast_async_paths_use_store_boundary_not_direct_store_calls():
-    drain_source = inspect.getsource(broadcast.drain_broadcast_outbox)
+    drain_source = "\n".join(
+        inspect.getsource(item)
+        for item in (
+            broadcast.drain_broadcast_outbox,
+            broadcast._deliver_claimed_row,
+            broadcast._terminal,
+            broadcast._return_unsent,
+            broadcast._ParentCache,
+        )
+    )
     command_source = inspect.getsource(broadcast.broadcast_command)
     assert drain_source.count("await _store_call(") >= 8
-    assert "claim_next_broadcast_delivery" in drain_source
+    assert "_store_call(get_broadcast" in drain_source
+    assert "claim_broadcast_deliveries" in drain_source
     assert "mark_broadcast_delivery_delivered" in drain_source
     assert "sync_broadcast_completion" in drain_source
     assert command_source.count("await _store_call(") >= 2
@@ -110,7 +140,7 @@ def test_broadcast_async_paths_use_store_boundary_not_direct_store_calls():
 
 def test_broadcast_store_boundary_adds_no_local_lock_or_retry_loop():
     source = inspect.getsource(broadcast._store_call)
-    assert "asyncio.to_thread" in source
+    assert "run_background(" in source
     assert "Lock(" not in source
     assert "while " not in source
     assert "sleep(" not in source
@@ -67,7 +67,8 @@ def test_render_uses_checks_pass_autodeploy_and_fail_closed_readiness():
     assert "autoDeployTrigger: checksPass" in render
     assert "autoDeploy:" not in render
     assert "- key: TELEGRAM_TRANSPORT\n        value: webhook" in render
-    assert '- key: TELEGRAM_WEBHOOK_MAX_CONNECTIONS\n        value: "1"' in render
+    assert '- key: TELEGRAM_WEBHOOK_MAX_CONNECTIONS\n        value: "4"' in render
+    assert '- key: WEB_THREADS\n        value: "8"' in render
     assert '- key: MAX_REQUEST_BODY_BYTES\n        value: "1048576"' in render
     assert '- key: MINIAPP_MAX_REQUEST_BODY_BYTES\n        value: "65536"' in render
     assert '- key: MAX_REQUEST_HEADER_BYTES\n        value: "65536"' in render
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import time
+import timeit
+from urllib.parse import urlencode
+
+import pytest
+
+from web_api import auth
+
+TOKEN = "123456:TEST_TOKEN"
+
+
+def signed_init_data(token: str, *, auth_date: int | None = None) -> str:
+    data = {
+        "auth_date": str(auth_date if auth_date is not None else int(time.time())),
+        "query_id": "memo-query",
+        "user": json.dumps({"id": 987654321, "first_name": "Memo"}, separators=(",", ":")),
+    }
+    check = "\n".join(f"{key}={value}" for key, value in sorted(data.items()))
+    secret = hmac.new(b"WebAppData", token.encode(), hashlib.sha256).digest()
+    data["hash"] = hmac.new(secret, check.encode(), hashlib.sha256).hexdigest()
+    return urlencode(data)
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo(monkeypatch):
+    monkeypatch.setenv("BOT_TOKEN", TOKEN)
+    monkeypatch.delenv("TELEGRAM_INIT_DATA_MAX_AGE_SECONDS", raising=False)
+    memo = auth.VerifiedInitDataMemo()
+    monkeypatch.setattr(auth, "INIT_DATA_MEMO", memo)
+    return memo
+
+
+def test_repeated_init_data_skips_parsing_and_hmac(monkeypatch, fresh_memo):
+    init_data = signed_init_data(TOKEN)
+    first = auth.verify_init_data_payload(init_data)
+
+    def no_reparse(*_args, **_kwargs):
+        raise AssertionError("memoized initData must not be parsed again")
+
+    monkeypatch.setattr(auth, "parse_qsl", no_reparse)
+    again = auth.verify_init_data_payload(init_data)
+
+    assert again == first
+    assert again.user is not first.user
+    assert fresh_memo.metrics()["hits"] == 1
+
+
+def test_memo_hit_still_enforces_auth_date_age(monkeypatch):
+    init_data = signed_init_data(TOKEN, auth_date=int(time.time()) - 120)
+    assert auth.verify_init_data_payload(init_data) is not None
+
+    monkeypatch.setenv("TELEGRAM_INIT_DATA_MAX_AGE_SECONDS", "60")
+    assert auth.verify_init_data_payload(init_data) is None
+
+
+def test_memo_is_bound_to_the_bot_token(monkeypatch):
+    init_data = signed_init_data(TOKEN)
+    assert auth.verify_init_data_payload(init_data) is not None
+
+    monkeypatch.setenv("BOT_TOKEN", "654321:ROTATED")
+    assert auth.verify_init_data_payload(init_data) is None
+
+
+def test_memo_entries_expire_and_stay_bounded():
+    now = [100.0]
+    memo = auth.VerifiedInitDataMemo(capacity=2, ttl_seconds=10, clock=lambda: now[0])
+    verified = auth.VerifiedInitData(user={"id": 1}, auth_date=1, start_param=None, query_id=None)
+    for key in (b"a", b"b", b"c"):
+        memo.put((b"s", key), verified)
+
+    assert memo.get((b"s", b"a"), now=2, max_age=60) is None
+    assert memo.get((b"s", b"c"), now=2, max_age=60) is verified
+    now[0] += 10
+    assert memo.get((b"s", b"c"), now=2, max_age=60) is None
+    assert memo.metrics() == {"entries": 1, "hits": 1, "misses": 2, "expired": 1}
+
+
+def test_microbenchmark_memoized_verification_beats_full_verification(monkeypatch):
+    init_data = signed_init_data(TOKEN)
+
+    def best_of(repeat=5, number=300):
+        return min(timeit.repeat(lambda: auth.verify_init_data_payload(init_data), repeat=repeat, number=number))
+
+    monkeypatch.setattr(auth, "INIT_DATA_MEMO", auth.VerifiedInitDataMemo(ttl_seconds=0))
+    full = best_of()
+    monkeypatch.setattr(auth, "INIT_DATA_MEMO", auth.VerifiedInitDataMemo())
+    auth.verify_init_data_payload(init_data)
+    memoized = best_of()
+
+    assert memoized * 2 < full, f"memoized {memoized:.4f}s vs full {full:.4f}s per 300 calls"
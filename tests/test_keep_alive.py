@@ -102,7 +102,7 @@ def client(monkeypatch):
     monkeypatch.setenv("APP_ENV", "production")
     monkeypatch.setenv("TELEGRAM_INIT_DATA_MAX_AGE_SECONDS", "3600")
     monkeypatch.setattr(database, "init_user_stats", lambda *args, **kwargs: True)
-    monkeypatch.setattr(database, "get_user_stats", lambda user_id: {"_id": str(user_id)})
+    monkeypatch.setattr(database, "get_user_stats", lambda user_id, fields=None: {"_id": str(user_id)})
     keep_alive.app.config.update(TESTING=True)
     return keep_alive.app.test_client(), token
 
@@ -209,7 +209,7 @@ def test_server_authoritative_quiz_and_idempotent_replay(client, monkeypatch):
 
     session_id = body["session_id"]
     private_session = sessions.docs[session_id]
-    first = private_session["questions"][0]
+    first = quiz_module.session_questions(private_session)[0]
     correct = first["correct"]
 
     answer = http.post(
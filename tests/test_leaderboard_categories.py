@@ -0,0 +1,189 @@
+from types import SimpleNamespace
+
+import pytest
+
+import database
+import leaderboard_categories as categories
+from schema_readiness import SCHEMA_READINESS
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Cursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def sort(self, spec):
+        for field, direction in reversed(spec):
+            self.rows.sort(key=lambda row: row.get(field, 0), reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        return self.rows[:count]
+
+
+class FakeLeaderboard:
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+        self.finds = []
+        self.aggregations = 0
+        self.indexes = {}
+        self.updates = []
+        self.database = {categories.MIGRATIONS_COLLECTION: FakeMarkers()}
+
+    def find(self, query, *args):
+        self.finds.append(query)
+        ((field, condition),) = query.items()
+        rows = [dict(doc) for doc in self.docs.values() if doc.get(field, 0) > condition["$gt"]]
+        return _Cursor(rows)
+
+    def aggregate(self, pipeline):
+        self.aggregations += 1
+        return []
+
+    def update_one(self, query, update, upsert=False):
+        self.updates.append(update)
+        doc = self.docs.setdefault(query["_id"], {"_id": query["_id"]})
+        for field, amount in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + amount
+        return SimpleNamespace(modified_count=1)
+
+    def update_many(self, query, pipeline):
+        assert query == {}
+        fields = pipeline[0]["$set"]
+        for doc in self.docs.values():
+            for field, expression in fields.items():
+                doc[field] = sum(
+                    doc.get(term["$ifNull"][0][1:], 0) for term in expression["$add"]
+                )
+        return SimpleNamespace(matched_count=len(self.docs))
+
+    def index_information(self):
+        return dict(self.indexes)
+
+    def create_index(self, key, *, name, partialFilterExpression):
+        self.indexes[name] = {"key": list(key), "partialFilterExpression": partialFilterExpression}
+
+
+class FakeMarkers:
+    def __init__(self):
+        self.docs = {}
+
+    def find_one(self, query, projection=None):
+        return self.docs.get(query["_id"])
+
+    def update_one(self, query, update, upsert=False):
+        self.docs[query["_id"]] = {"_id": query["_id"], **update["$set"]}
+
+
+@pytest.fixture
+def leaderboard(monkeypatch):
+    store = FakeLeaderboard(
+        [
+            {"_id": "1", "first_name": "A", "nero_correct": 4, "nero_total": 5},
+            {"_id": "2", "first_name": "B", "intro1_correct": 6, "intro1_total": 10,
+             "hard_attempts": 1, "hard_correct": 3, "hard_total": 10},
+            {"_id": "3", "first_name": "C", "hard_p1_attempts": 1, "hard_p1_correct": 3,
+             "hard_p1_total": 5},
+        ]
+    )
+    monkeypatch.setattr(database, "collection", store)
+    monkeypatch.setattr(categories, "LEADERBOARD_CACHE", categories.LeaderboardCache(10))
+    monkeypatch.setattr(database, "LEADERBOARD_CACHE", categories.LEADERBOARD_CACHE)
+    yield store
+    SCHEMA_READINESS.reset(categories.SCHEMA_NAME)
+
+
+def test_category_increments_follow_level_membership():
+    assert categories.category_increments("geography", 3, 4) == {
+        categories.CONTEXT_CORRECT: 3,
+        categories.CONTEXT_TOTAL: 4,
+    }
+    assert categories.category_increments("hard_p2", 2, 5) == {
+        categories.HARD_CORRECT: 2,
+        categories.HARD_TOTAL: 5,
+        categories.HARD_ATTEMPTS: 1,
+    }
+    assert categories.category_increments("easy_p1", 2, 5) == {}
+
+
+def test_unverified_schema_keeps_the_aggregation(leaderboard):
+    assert database.get_context_leaderboard(limit=5) == []
+    assert database.get_hard_leaderboard(limit=5) == []
+    assert leaderboard.aggregations == 2
+    assert leaderboard.finds == []
+
+
+def test_backfill_then_index_reads_rank_users_and_cache_repeats(leaderboard):
+    assert categories.ensure_category_leaderboard_schema(leaderboard) is True
+    assert set(leaderboard.indexes) == {"leaderboard_category_context", "leaderboard_category_hard"}
+    categories.audit_category_leaderboard_indexes(leaderboard)
+
+    context = database.get_context_leaderboard(limit=5)
+    hard = database.get_hard_leaderboard(limit=5)
+    database.get_context_leaderboard(limit=5)
+
+    assert [(row["_id"], row["_context_correct"], row["_context_acc"]) for row in context] == [
+        ("2", 6, 60),
+        ("1", 4, 80),
+    ]
+    # Equal correct answers: fewer questions ranks first.
+    assert [(row["_id"], row["_hard_correct"], row["_hard_total"]) for row in hard] == [
+        ("3", 3, 5),
+        ("2", 3, 10),
+    ]
+    assert leaderboard.aggregations == 0
+    assert leaderboard.finds == [categories.CONTEXT_FILTER, categories.HARD_FILTER]
+    assert categories.LEADERBOARD_CACHE.metrics()["hits"] == 1
+
+
+def test_backfill_runs_once_per_marker(leaderboard):
+    categories.ensure_category_leaderboard_schema(leaderboard)
+    leaderboard.docs["1"]["nero_correct"] = 100
+
+    categories.ensure_category_leaderboard_schema(leaderboard)
+    assert leaderboard.docs["1"][categories.CONTEXT_CORRECT] == 4
+
+    categories.ensure_category_leaderboard_schema(leaderboard, force_backfill=True)
+    assert leaderboard.docs["1"][categories.CONTEXT_CORRECT] == 100
+
+
+def test_incompatible_index_fails_closed_to_aggregation(leaderboard):
+    leaderboard.indexes["leaderboard_category_hard"] = {"key": [("other", 1)]}
+
+    assert categories.ensure_category_leaderboard_schema(leaderboard) is False
+    assert not categories.category_leaderboard_ready(leaderboard)
+    assert SCHEMA_READINESS.failure(categories.SCHEMA_NAME, leaderboard) is not None
+
+
+def test_result_write_increments_category_totals(leaderboard):
+    database.add_to_leaderboard(9, "u9", "New", "intro2", 7, 10, 60)
+
+    doc = leaderboard.docs["9"]
+    assert doc[categories.CONTEXT_CORRECT] == 7
+    assert doc[categories.CONTEXT_TOTAL] == 10
+    assert categories.HARD_CORRECT not in doc
+
+
+def test_cache_expires_and_is_bound_to_the_handle():
+    clock = _Clock()
+    cache = categories.LeaderboardCache(10, clock=clock)
+    handle, other = object(), object()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return [{"_id": str(len(loads))}]
+
+    assert cache.get(handle, "k", loader) == [{"_id": "1"}]
+    assert cache.get(handle, "k", loader) == [{"_id": "1"}]
+    assert cache.get(other, "k", loader) == [{"_id": "2"}]
+    clock.now += 11
+    assert cache.get(other, "k", loader) == [{"_id": "3"}]
+    assert cache.metrics() == {"ttl_seconds": 10.0, "entries": 1, "hits": 1, "misses": 3}
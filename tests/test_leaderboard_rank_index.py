@@ -0,0 +1,312 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+from urllib.parse import urlencode
+
+import pytest
+
+import database
+from leaderboard_rank_index import LeaderboardRankIndex
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _doc(uid, points, tests=1, name=None):
+    return {
+        "_id": str(uid),
+        "total_points": points,
+        "total_tests": tests,
+        "username": f"u{uid}",
+        "first_name": name or f"User {uid}",
+    }
+
+
+def _loaded_index(*docs, clock=None):
+    index = LeaderboardRankIndex(max_age_seconds=60, clock=clock or _Clock())
+    index.reconcile(docs)
+    return index
+
+
+def test_unloaded_index_never_answers():
+    index = LeaderboardRankIndex(max_age_seconds=60)
+    index.apply_delta("1", 10)
+    index.observe(_doc(1, 10))
+
+    assert index.position(10) is None
+    assert index.points_to_next_place(10) == (False, None)
+    assert index.page(0, 10) is None
+    assert index.page_after(10, "1", 10) is None
+    assert index.total() is None
+    assert index.metrics()["fallbacks"] == 5
+
+
+def test_position_gap_and_pages_follow_points_then_id_order():
+    index = _loaded_index(_doc(1, 50), _doc(2, 30), _doc(3, 50), _doc(4, 10), _doc(5, 30))
+
+    assert index.position(50) == 1
+    assert index.position(30) == 3
+    assert index.position(10) == 5
+    assert index.position(0) == 6
+    assert index.points_to_next_place(50) == (True, None)
+    assert index.points_to_next_place(30) == (True, 20)
+    assert index.points_to_next_place(10) == (True, 20)
+    assert index.total() == 5
+
+    first = index.page(0, 2)
+    assert [(row["_id"], row["_rank"]) for row in first] == [("1", 1), ("3", 2)]
+    second = index.page(1 * 2, 2)
+    assert [(row["_id"], row["_rank"]) for row in second] == [("2", 3), ("5", 4)]
+
+    keyset = index.page_after(first[-1]["total_points"], first[-1]["_id"], 2)
+    assert keyset == second
+    tail = index.page_after(30, "5", 10)
+    assert [(row["_id"], row["_rank"]) for row in tail] == [("4", 5)]
+
+
+def test_deltas_and_observed_documents_move_users_between_ranks():
+    index = _loaded_index(_doc(1, 50), _doc(2, 30))
+
+    index.apply_delta("2", 25, tests=1, first_name="Renamed")
+    index.apply_delta("9", 5, tests=1, username="new", first_name="Newcomer")
+
+    assert index.position(55) == 1
+    assert [row["_id"] for row in index.page(0, 10)] == ["2", "1", "9"]
+    assert index.page(0, 1)[0]["first_name"] == "Renamed"
+    assert index.page(0, 1)[0]["total_tests"] == 2
+
+    index.observe(_doc(1, 70))
+    assert [row["_id"] for row in index.page(0, 10)] == ["1", "2", "9"]
+    assert index.total() == 3
+
+
+def test_stale_index_falls_back_until_reconciled_again():
+    clock = _Clock()
+    index = _loaded_index(_doc(1, 5), clock=clock)
+    assert index.position(5) == 1
+
+    clock.now += 61
+    assert index.position(5) is None
+    assert index.metrics()["ready"] is False
+
+    index.reconcile([_doc(1, 5), _doc(2, 9)])
+    assert index.position(5) == 2
+
+
+def test_reconcile_reports_drift_and_keeps_rows_written_during_the_scan():
+    index = _loaded_index(_doc(1, 10), _doc(2, 20))
+    index.apply_delta("1", 100)
+
+    def scan():
+        yield _doc(1, 10)
+        # A write acknowledged while the cursor is being consumed.
+        index.apply_delta("2", 7)
+        yield _doc(2, 20)
+        yield _doc(3, 1)
+
+    drift = index.reconcile(scan())
+
+    # User 1 drifted (index had 110, Mongo says 10); user 2 keeps the live row.
+    assert drift == 2
+    rows = {row["_id"]: row["total_points"] for row in index.page(0, 10)}
+    assert rows == {"1": 10, "2": 27, "3": 1}
+    assert index.metrics()["last_reconcile_drift"] == 2
+
+
+def test_concurrent_deltas_keep_keys_and_rows_consistent():
+    index = _loaded_index(*(_doc(uid, 0) for uid in range(50)))
+
+    def worker(offset):
+        for step in range(200):
+            index.apply_delta(str((offset + step) % 50), 1)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    rows = index.page(0, 100)
+    assert sum(row["total_points"] for row in rows) == 800
+    assert [row["total_points"] for row in rows] == sorted(
+        (row["total_points"] for row in rows), reverse=True
+    )
+
+
+class _Cursor(list):
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            super().sort(key=lambda doc, f=field: doc.get(f, 0), reverse=direction < 0)
+        return self
+
+    def skip(self, count):
+        return _Cursor(self[count:])
+
+    def limit(self, count):
+        return _Cursor(self[:count])
+
+
+class _Leaderboard:
+    def __init__(self, *docs):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+        self.count_calls = 0
+
+    def find_one(self, query, *args, **kwargs):
+        doc = self.docs.get(query.get("_id"))
+        return dict(doc) if doc else None
+
+    def find(self, query=None, projection=None):
+        return _Cursor(dict(doc) for doc in self.docs.values() if _matches(doc, query or {}))
+
+    def count_documents(self, query):
+        self.count_calls += 1
+        return sum(1 for doc in self.docs.values() if _matches(doc, query))
+
+    def insert_one(self, document):
+        self.docs[document["_id"]] = dict(document)
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["_id"], {"_id": query["_id"]})
+        for field, value in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + value
+        doc.update(update.get("$set", {}))
+
+
+def _matches(doc, query):
+    for key, expected in query.items():
+        if key == "$or":
+            if not any(_matches(doc, branch) for branch in expected):
+                return False
+            continue
+        value = doc.get(key, 0)
+        if isinstance(expected, dict):
+            for op, operand in expected.items():
+                if op == "$gt" and not value > operand:
+                    return False
+                if op == "$lt" and not value < operand:
+                    return False
+                if op == "$lte" and not value <= operand:
+                    return False
+        elif value != expected:
+            return False
+    return True
+
+
+@pytest.fixture
+def leaderboard(monkeypatch):
+    store = _Leaderboard(_doc(1, 40), _doc(2, 25), _doc(3, 25), _doc(4, 5))
+    monkeypatch.setattr(database, "collection", store)
+    monkeypatch.setattr(
+        database,
+        "LEADERBOARD_RANK_INDEX",
+        LeaderboardRankIndex(max_age_seconds=60),
+    )
+    return store
+
+
+def test_database_reads_use_mongo_until_index_is_reconciled(leaderboard):
+    position, entry = database.get_user_position(3)
+    assert (position, entry["_id"]) == (2, "3")
+    assert leaderboard.count_calls == 1
+
+    assert database.reconcile_leaderboard_rank_index() is True
+    position, _entry = database.get_user_position(3)
+    assert position == 2
+    assert database.get_points_to_next_place(3) == 15
+    assert database.get_points_to_next_place(1) is None
+    assert database.get_total_users() == 4
+    assert leaderboard.count_calls == 1
+
+
+def test_leaderboard_writes_feed_the_index(leaderboard):
+    database.reconcile_leaderboard_rank_index()
+
+    database.update_battle_stats(4, "win")
+    database.add_to_leaderboard(4, "u4", "Climber", "hard", 10, 10, 60)
+
+    assert leaderboard.docs["4"]["total_points"] == 40
+    assert database.get_points_to_next_place(4) is None
+    page = database.get_leaderboard_page(0, per_page=2)
+    assert [(row["_id"], row["first_name"]) for row in page] == [("1", "User 1"), ("4", "Climber")]
+    assert leaderboard.count_calls == 0
+
+
+def test_new_users_and_daily_bonus_feed_the_index(leaderboard):
+    database.reconcile_leaderboard_rank_index()
+
+    assert database.init_user_stats(9, "u9", "Newcomer") is True
+    assert database.get_total_users() == 5
+    database.check_daily_bonus(9)
+
+    # 5 bonus points: tied with user 4, 20 behind users 2 and 3.
+    assert database.get_points_to_next_place(9) == 20
+    assert leaderboard.count_calls == 0
+
+
+def test_keyset_page_matches_between_index_and_mongo_fallback(leaderboard):
+    fallback = database.get_leaderboard_page_after(40, "1", per_page=2)
+    database.reconcile_leaderboard_rank_index()
+    indexed = database.get_leaderboard_page_after(40, "1", per_page=2)
+
+    assert [(row["_id"], row["_rank"]) for row in fallback] == [("2", 2), ("3", 3)]
+    assert [(row["_id"], row["_rank"]) for row in indexed] == [("2", 2), ("3", 3)]
+
+
+def test_api_leaderboard_cursor_is_sealed_and_strictly_parsed(monkeypatch):
+    from web_api.routes import _encode_leaderboard_cursor, _leaderboard_cursor
+
+    monkeypatch.setenv("BOT_TOKEN", "123456:TEST_TOKEN")
+    sealed = _encode_leaderboard_cursor(25, "987654321")
+
+    assert "987654321" not in sealed
+    assert _leaderboard_cursor(sealed) == (25, "987654321")
+    assert _leaderboard_cursor(_encode_leaderboard_cursor(-2, "17")) == (-2, "17")
+    forged = sealed[:-2] + ("AA" if sealed[-2:] != "AA" else "BB")
+    for raw in ("", "25:3", "x" * 200, forged, sealed[:10]):
+        assert _leaderboard_cursor(raw) is None
+
+    monkeypatch.setenv("BOT_TOKEN", "654321:OTHER_TOKEN")
+    assert _leaderboard_cursor(sealed) is None
+
+
+def _signed_init_data(token, user_id=123):
+    data = {
+        "auth_date": str(int(time.time())),
+        "user": json.dumps({"id": user_id, "first_name": "Test"}, separators=(",", ":")),
+    }
+    check = "\n".join(f"{key}={value}" for key, value in sorted(data.items()))
+    secret = hmac.new(b"WebAppData", token.encode(), hashlib.sha256).digest()
+    data["hash"] = hmac.new(secret, check.encode(), hashlib.sha256).hexdigest()
+    return urlencode(data)
+
+
+def test_api_leaderboard_pages_never_expose_user_ids(leaderboard, monkeypatch):
+    import keep_alive
+
+    token = "123456:TEST_TOKEN"
+    monkeypatch.setenv("BOT_TOKEN", token)
+    monkeypatch.setenv("TELEGRAM_INIT_DATA_MAX_AGE_SECONDS", "3600")
+    monkeypatch.setattr(database, "init_user_stats", lambda *args, **kwargs: True)
+    for uid in range(1000000001, 1000000031):
+        leaderboard.docs[str(uid)] = {**_doc(uid, uid % 7, name="Player"), "username": "player"}
+    database.reconcile_leaderboard_rank_index()
+    http = keep_alive.app.test_client()
+    headers = {"X-Telegram-Init-Data": _signed_init_data(token)}
+
+    first = http.get("/api/leaderboard?cat=general", headers=headers)
+    cursor = first.get_json()["next"]
+    second = http.get(f"/api/leaderboard?cat=general&after={cursor}", headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    for response in (first, second):
+        text = response.get_data(as_text=True)
+        assert not any(uid in text for uid in leaderboard.docs if len(uid) > 2)
+    ranks = [row["rank"] for row in second.get_json()["users"]]
+    assert ranks == list(range(21, 35))
@@ -22,7 +22,7 @@ def test_battle_only_drain_delivers_outbox_finals(monkeypatch):
     )
     seen = []
 
-    async def deliver(battle, _sender):
+    async def deliver(battle, _sender, **_kwargs):
         seen.append(battle["_id"])
         return SimpleNamespace(
             creator_sent=True,
@@ -62,7 +62,7 @@ def test_one_battle_failure_does_not_starve_next(monkeypatch):
     )
     seen = []
 
-    async def deliver(battle, _sender):
+    async def deliver(battle, _sender, **_kwargs):
         if battle["_id"] == "bad":
             raise RuntimeError("boom")
         seen.append("good")
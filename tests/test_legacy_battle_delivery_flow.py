@@ -25,7 +25,7 @@ async def _sender(_battle, _role):
 
 def test_both_recipients_use_durable_delivery_worker(monkeypatch):
     calls = []
-    async def deliver(battle_id, user_id, sender):
+    async def deliver(battle_id, user_id, sender, **_kwargs):
         calls.append((battle_id, user_id, sender))
         return True
     monkeypatch.setattr(flow, "deliver_battle_recipient_once", deliver)
@@ -38,7 +38,7 @@ def test_both_recipients_use_durable_delivery_worker(monkeypatch):
 
 def test_one_recipient_failure_does_not_block_other(monkeypatch):
     calls = []
-    async def deliver(_battle_id, user_id, _sender_fn):
+    async def deliver(_battle_id, user_id, _sender_fn, **_kwargs):
         calls.append(user_id)
         if user_id == 10:
             raise RuntimeError("telegram down")
@@ -52,7 +52,7 @@ def test_one_recipient_failure_does_not_block_other(monkeypatch):
 
 
 def test_existing_lease_is_pending_not_success(monkeypatch):
-    async def deliver(*_args):
+    async def deliver(*_args, **_kwargs):
         return False
     monkeypatch.setattr(flow, "deliver_battle_recipient_once", deliver)
     result = run(flow.deliver_final_battle_once(_battle(), _sender))
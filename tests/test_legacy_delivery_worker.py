@@ -36,6 +36,28 @@ def test_battle_delivery_claim_send_ack(monkeypatch):
     assert events[1][0] == "ack"
 
 
+def test_storage_steps_run_in_the_lane_the_caller_chose(monkeypatch):
+    def claim(*_args):
+        return {"battle": {"_id": "b1"}, "role": "creator", "claim_token": "tok"}
+
+    def acknowledge(*_args):
+        return True
+
+    monkeypatch.setattr(worker, "claim_battle_result_delivery", claim)
+    monkeypatch.setattr(worker, "mark_battle_result_delivered", acknowledge)
+    lane = []
+
+    async def run_inline(function, /, *args, **kwargs):
+        lane.append(function.__name__)
+        return function(*args, **kwargs)
+
+    async def sender(_battle, _role):
+        return None
+
+    assert run(worker.deliver_battle_recipient_once("b1", 10, sender, run_storage=run_inline)) is True
+    assert lane == ["claim", "acknowledge"]
+
+
 def test_battle_sender_failure_releases_for_retry(monkeypatch):
     released = []
     monkeypatch.setattr(
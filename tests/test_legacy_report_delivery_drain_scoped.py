@@ -26,7 +26,7 @@ def test_report_only_drain_delivers_pending_reports(monkeypatch):
     )
     seen = []
 
-    async def deliver(report_id, _photo, _text):
+    async def deliver(report_id, _photo, _text, **_kwargs):
         seen.append(report_id)
         return (report_id == "r1", True)
 
@@ -72,7 +72,7 @@ def test_worker_error_after_stage_settlement_is_repaired_without_retry_error(mon
         lambda _report_id: next(repair_results),
     )
 
-    async def deliver(_report_id, _photo, _text):
+    async def deliver(_report_id, _photo, _text, **_kwargs):
         raise drain.ReportStoreUnavailable("aggregate ack lost")
 
     monkeypatch.setattr(drain, "deliver_report_once", deliver)
@@ -112,7 +112,7 @@ def test_one_report_failure_does_not_starve_next(monkeypatch):
     )
     seen = []
 
-    async def deliver(report_id, _photo, _text):
+    async def deliver(report_id, _photo, _text, **_kwargs):
         if report_id == "bad":
             raise RuntimeError("telegram down")
         seen.append(report_id)
@@ -131,7 +131,7 @@ def test_existing_lease_is_deferred(monkeypatch):
     monkeypatch.setattr(
         drain,
         "deliver_report_once",
-        lambda *_args: _async_result((False, False)),
+        lambda *_args, **_kwargs: _async_result((False, False)),
     )
     result = run(drain.drain_pending_reports(photo_sender=_noop, text_sender=_noop))
     assert result.deferred == 1
@@ -113,3 +113,19 @@ def test_retry_after_is_persisted_as_utc_due_time(monkeypatch):
     assert update["$set"]["result_card_delivery.last_error"] == "RetryAfter"
     assert "result_card_delivery.claim_token" in update["$unset"]
     assert "result_card_delivery.lease_until" in update["$unset"]
+
+
+def test_photo_file_id_is_recorded_only_under_the_live_lease(monkeypatch):
+    collection = Mock()
+    collection.update_one.return_value = SimpleNamespace(modified_count=1)
+    monkeypatch.setattr(delivery, "_collection", lambda: collection)
+    monkeypatch.setattr(delivery, "_owner_id", lambda user_id: str(user_id))
+
+    assert delivery.record_result_card_photo("s1", 42, "lease-token", "AgACAgI") is True
+
+    query, update = collection.update_one.call_args.args
+    assert query["result_card_delivery.claim_token"] == "lease-token"
+    assert query["result_card_delivery.delivered"] == {"$ne": True}
+    assert update == {"$set": {"result_card_delivery.photo_file_id": "AgACAgI"}}
+    with pytest.raises(ValueError, match="file_id"):
+        delivery.record_result_card_photo("s1", 42, "lease-token", " ")
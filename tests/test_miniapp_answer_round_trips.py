@@ -0,0 +1,167 @@
+from copy import deepcopy
+from datetime import datetime
+
+import pytest
+
+import web_api.quiz as quiz
+
+
+USER = {"id": 101, "username": "user", "first_name": "User"}
+
+
+def _matches(doc, query):
+    return all(doc.get(key) == value for key, value in query.items())
+
+
+class Sessions:
+    """Miniapp-session fake that applies filters and counts round trips."""
+
+    def __init__(self, doc):
+        self.doc = deepcopy(doc)
+        self.calls = []
+
+    def find_one(self, query):
+        self.calls.append("find_one")
+        return deepcopy(self.doc) if _matches(self.doc, query) else None
+
+    def update_one(self, query, update):
+        self.calls.append("update_one")
+        if _matches(self.doc, query):
+            self.doc.update(deepcopy(update["$set"]))
+
+    def find_one_and_update(self, query, update, return_document=None):
+        self.calls.append("find_one_and_update")
+        if not _matches(self.doc, query):
+            return None
+        for key, value in update.get("$inc", {}).items():
+            self.doc[key] = self.doc.get(key, 0) + value
+        self.doc.update(deepcopy(update.get("$set", {})))
+        for key, value in update.get("$push", {}).items():
+            self.doc.setdefault(key, []).append(deepcopy(value))
+        return deepcopy(self.doc)
+
+
+def _session(count=3):
+    questions = [
+        {"id": f"q{index}", "question": "?", "options": ["A", "B"], "correct": 0}
+        for index in range(1, count + 1)
+    ]
+    return {
+        "_id": "s1",
+        "user_id": "101",
+        "status": "in_progress",
+        "pool_key": "easy_p1",
+        "mode": "relaxed",
+        "is_challenge": False,
+        "questions": questions,
+        "question_count": count,
+        "current_index": 0,
+        "correct_count": 0,
+        "current_streak": 0,
+        "max_streak": 0,
+        "answered": [],
+        "time_limit": None,
+        "started_at_dt": datetime(2026, 8, 11, 12, 0, 0),
+        "completion_time_protocol": quiz.COMPLETION_TIME_PROTOCOL_DURABLE,
+        "question_sent_at": 100.0,
+    }
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    store = Sessions(_session())
+    monkeypatch.setattr(quiz, "miniapp_sessions", lambda: store)
+    monkeypatch.setattr(quiz.time, "time", lambda: 101.0)
+    monkeypatch.setattr(quiz, "_finalize_quiz", lambda _session, _user: {
+        "points": 3,
+        "daily_bonus": 0,
+        "new_achievements": [],
+    })
+    yield store
+    quiz._SESSION_VIEWS.discard("s1")
+
+
+def _answer(question_id, chosen=0):
+    return quiz.answer_quiz(USER, {"session_id": "s1", "question_id": question_id, "chosen": chosen})
+
+
+def _present(sessions):
+    body, _message, status = quiz.get_current_question(USER, {"session_id": "s1"})
+    assert status == 200
+    return body
+
+
+def test_answers_after_presentation_take_one_round_trip(sessions):
+    _present(sessions)
+    sessions.calls.clear()
+    before = quiz.ANSWER_PATH_METRICS.metrics()["round_trips"].get("1", 0)
+
+    first, _, status = _answer("q1")
+    assert status == 200 and first["ok"] is True and first["finished"] is False
+    second, _, status = _answer("q2", chosen=1)
+    assert status == 200 and second["ok"] is False
+
+    assert sessions.calls == ["find_one_and_update", "find_one_and_update"]
+    assert sessions.doc["current_index"] == 2
+    assert [item["id"] for item in sessions.doc["answered"]] == ["q1", "q2"]
+    assert quiz.ANSWER_PATH_METRICS.metrics()["round_trips"]["1"] == before + 2
+
+
+def test_stale_view_cannot_commit_and_falls_back_to_a_fresh_read(sessions):
+    _present(sessions)
+    # Another writer advanced the attempt behind this process's back.
+    sessions.doc["current_index"] = 1
+    sessions.doc["answered"] = [{"id": "q1", "chosen": 1, "correct": 0, "ok": False}]
+    sessions.calls.clear()
+
+    body, _message, status = _answer("q2")
+
+    assert status == 200 and body["ok"] is True
+    # The view disagrees with the tapped question, so it is not even tried.
+    assert sessions.calls == ["find_one", "find_one_and_update"]
+    assert [item["id"] for item in sessions.doc["answered"]] == ["q1", "q2"]
+    assert quiz.ANSWER_PATH_METRICS.metrics()["conflicts"] >= 1
+
+
+def test_repeated_tap_replays_the_committed_answer(sessions):
+    _present(sessions)
+    first, _, _ = _answer("q1")
+    sessions.calls.clear()
+
+    replay, _message, status = _answer("q1", chosen=1)
+
+    assert status == 200
+    assert replay["ok"] is first["ok"] is True
+    assert "find_one_and_update" not in sessions.calls
+    assert len(sessions.doc["answered"]) == 1
+
+
+def test_representation_changes_the_guard(sessions):
+    _present(sessions)
+    sessions.doc["question_sent_at"] = 100.5
+    sessions.calls.clear()
+
+    _body, _message, status = _answer("q1")
+
+    assert status == 200
+    assert sessions.calls == ["find_one_and_update", "find_one", "find_one_and_update"]
+
+
+def test_final_answer_forgets_the_view_and_finalizes(sessions):
+    _present(sessions)
+    _answer("q1")
+    _answer("q2")
+
+    body, _message, status = _answer("q3")
+
+    assert status == 200 and body["finished"] is True and body["points"] == 3
+    assert quiz._SESSION_VIEWS.get(sessions, "s1", "101") is None
+
+
+def test_cancel_forgets_the_view(sessions):
+    _present(sessions)
+    assert quiz._SESSION_VIEWS.get(sessions, "s1", "101") is not None
+
+    quiz.cancel_quiz(USER, {"session_id": "s1"})
+
+    assert quiz._SESSION_VIEWS.get(sessions, "s1", "101") is None
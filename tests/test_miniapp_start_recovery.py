@@ -132,7 +132,7 @@ def test_exact_complete_active_is_finalized_before_new_session(monkeypatch):
 
     monkeypatch.setattr(quiz, "_finalize_quiz", fake_finalize)
     monkeypatch.setattr(database, "init_user_stats", lambda *_args, **_kwargs: True)
-    monkeypatch.setattr(database, "get_user_stats", lambda _uid: {"_id": "101"})
+    monkeypatch.setattr(database, "get_user_stats", lambda _uid, fields=None: {"_id": "101"})
 
     body, message, status = quiz.start_quiz(
         USER,
@@ -176,3 +176,31 @@ def test_active_lookup_outage_never_falls_through_to_new_insert(monkeypatch):
     assert status == 503
     assert message == "database temporarily unavailable"
     assert sessions.inserted == []
+
+
+def test_complete_referenced_session_without_question_count_is_finalized(monkeypatch):
+    from questions import QUESTION_BANK
+    from session_question_refs import miniapp_question_refs
+
+    selected = [QUESTION_BANK.at(slot) for slot in range(10)]
+    orders = [list(range(len(item["options"]))) for item in selected]
+    existing = active_session(current_index=10)
+    del existing["questions"], existing["question_count"]
+    existing.update(miniapp_question_refs(selected, orders))
+    sessions = FakeSessions(active=existing)
+    install_common(monkeypatch, sessions)
+    finalized = []
+    monkeypatch.setattr(
+        quiz, "_finalize_quiz", lambda session, user: finalized.append(session["_id"]) or {}
+    )
+    monkeypatch.setattr(database, "init_user_stats", lambda *_args, **_kwargs: True)
+    monkeypatch.setattr(database, "get_user_stats", lambda _uid, fields=None: {"_id": "101"})
+
+    _body, message, status = quiz.start_quiz(
+        USER,
+        {"pool_key": "easy_p1", "mode": "relaxed", "count": 10, "challenge": False},
+    )
+
+    assert (status, message) == (200, None)
+    assert finalized == ["session-existing"]
+    assert len(sessions.inserted) == 1
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import mongo_client
+from config import MONGO_MAX_POOL_SIZE, MONGO_WAIT_QUEUE_TIMEOUT_MS
+
+
+def _started(name, command, request_id, connection_id=("db", 27017)):
+    return SimpleNamespace(
+        command_name=name,
+        command=command,
+        request_id=request_id,
+        connection_id=connection_id,
+    )
+
+
+def _finished(name, request_id, micros, failure=None, connection_id=("db", 27017)):
+    return SimpleNamespace(
+        command_name=name,
+        request_id=request_id,
+        connection_id=connection_id,
+        duration_micros=micros,
+        failure=failure,
+    )
+
+
+def test_command_latency_is_recorded_per_collection_and_command():
+    metrics = mongo_client.MongoMetrics()
+    metrics.started(_started("find", {"find": "leaderboard", "filter": {}}, 1))
+    metrics.started(_started("update", {"update": "quiz_sessions"}, 2))
+    metrics.started(_started("getMore", {"getMore": 99, "collection": "leaderboard"}, 3))
+    metrics.started(_started("hello", {"hello": 1}, 4))
+    metrics.succeeded(_finished("find", 1, 4_000))
+    metrics.failed(_finished("update", 2, 120_000, failure={"codeName": "WriteConflict"}))
+    metrics.succeeded(_finished("getMore", 3, 1_000))
+    metrics.succeeded(_finished("hello", 4, 500))
+
+    commands = metrics.metrics()["commands"]
+
+    assert next(iter(commands)) == "quiz_sessions.update"
+    assert commands["quiz_sessions.update"]["failures"] == {"WriteConflict": 1}
+    assert commands["leaderboard.find"]["count"] == 1
+    assert commands["leaderboard.find"]["sum_seconds"] == 0.004
+    assert commands["leaderboard.getMore"]["count"] == 1
+    assert commands["-.hello"]["count"] == 1
+
+
+def test_series_are_capped_and_pool_wait_is_recorded():
+    metrics = mongo_client.MongoMetrics(max_series=1)
+    for request_id, collection in enumerate(("a", "b", "c")):
+        metrics.started(_started("find", {"find": collection}, request_id))
+        metrics.succeeded(_finished("find", request_id, 100))
+    metrics.connection_checked_out(SimpleNamespace(duration=0.02))
+    metrics.connection_check_out_failed(SimpleNamespace(duration=5.0, reason="timeout"))
+
+    snapshot = metrics.metrics()
+
+    assert set(snapshot["commands"]) == {"a.find", "_other.find"}
+    assert snapshot["commands"]["_other.find"]["count"] == 2
+    assert snapshot["pool"]["checkouts"] == 1
+    assert snapshot["pool"]["checkout_failures"] == {"timeout": 1}
+    assert snapshot["pool"]["wait"]["count"] == 2
+
+
+def test_factory_applies_pool_settings_and_listeners(monkeypatch):
+    monkeypatch.setattr(mongo_client, "available_compressors", lambda: ["zlib"])
+
+    client = mongo_client.create_mongo_client("mongodb://localhost:1/", connect=False)
+    try:
+        pool = client.options.pool_options
+        assert pool.max_pool_size == MONGO_MAX_POOL_SIZE
+        assert pool.wait_queue_timeout == MONGO_WAIT_QUEUE_TIMEOUT_MS / 1000
+        assert mongo_client.MONGO_METRICS in client.options.event_listeners
+    finally:
+        client.close()
+
+
+def test_unavailable_compressors_are_skipped(monkeypatch):
+    monkeypatch.setattr(mongo_client, "_module_available", lambda name: name == "zlib")
+
+    assert mongo_client.available_compressors(("zstd", "snappy", "zlib")) == ["zlib"]
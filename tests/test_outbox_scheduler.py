@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from telegram_outbox_scheduler import OutboxScheduler
+
+
+class FakeJob:
+    def __init__(self, callback, when, data):
+        self.callback = callback
+        self.when = when
+        self.data = data
+        self.removed = False
+
+    def schedule_removal(self):
+        self.removed = True
+
+
+class FakeJobQueue:
+    def __init__(self):
+        self.jobs = []
+
+    def run_once(self, callback, *, when, data, name):
+        job = FakeJob(callback, when, data)
+        self.jobs.append(job)
+        return job
+
+    def live(self):
+        return [job for job in self.jobs if not job.removed]
+
+    async def fire(self, job):
+        job.removed = True
+        await job.callback(SimpleNamespace(job=job, bot=None))
+
+
+def _scheduler(results, *, clock=None):
+    now = clock or [0.0]
+    scheduler = OutboxScheduler(clock=lambda: now[0])
+
+    async def drain(_context):
+        return results.pop(0)
+
+    scheduler.add_lane("reports", drain, min_interval=10, max_interval=40)
+    queue = FakeJobQueue()
+    scheduler.install(queue)
+    return scheduler, queue, now
+
+
+def test_idle_lane_backs_off_and_work_resets_the_interval():
+    scheduler, queue, _now = _scheduler([0, 0, 0, 2])
+
+    delays = []
+    for _ in range(4):
+        (job,) = queue.live()
+        delays.append(job.when)
+        asyncio.run(queue.fire(job))
+    delays.append(queue.live()[0].when)
+
+    assert delays == [10, 20, 40, 40, 10]
+    assert scheduler.metrics()["reports"]["idle_runs"] == 3
+
+
+def test_enqueue_wakes_the_lane_immediately_and_records_latency():
+    scheduler, queue, now = _scheduler([1])
+
+    async def enqueue_twice():
+        scheduler.notify("reports")
+        scheduler.notify("reports")
+
+    asyncio.run(enqueue_twice())
+    (job,) = queue.live()
+    assert job.when == 0
+    assert len(queue.jobs) == 2
+
+    now[0] = 0.25
+    asyncio.run(queue.fire(job))
+
+    metrics = scheduler.metrics()["reports"]
+    assert metrics["wakeups"] == 2
+    assert metrics["wakeup_to_delivery"]["count"] == 1
+    assert queue.live()[0].when == 10
+
+
+def test_enqueue_during_a_drain_reruns_right_after_it():
+    scheduler, queue, _now = _scheduler([])
+
+    async def drain(_context):
+        scheduler.notify("reports")
+        return 0
+
+    scheduler._lanes["reports"].drain = drain
+    asyncio.run(queue.fire(queue.live()[0]))
+
+    assert queue.live()[0].when == 0
+
+
+def test_enqueue_from_a_worker_thread_is_marshalled_onto_the_loop():
+    scheduler, queue, _now = _scheduler([0])
+
+    async def scenario():
+        await queue.fire(queue.live()[0])
+        worker = threading.Thread(target=scheduler.notify, args=("reports",))
+        worker.start()
+        worker.join()
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+
+    assert queue.live()[0].when == 0
+
+
+def test_lane_intervals_are_validated():
+    with pytest.raises(ValueError):
+        OutboxScheduler().add_lane("x", None, min_interval=10, max_interval=5)
@@ -119,20 +119,24 @@ def test_database_writer_detection_covers_known_mutating_helpers():
         "advance_quiz_session",
         "create_battle_doc",
         "insert_report",
-        "touch_user_activity",
+        "_write_activity_touches",
     } <= writers
 
 
 def test_activity_touch_remains_a_last_activity_only_write():
     functions = _function_map(DATABASE_SOURCE, "database.py")
-    touch = functions["touch_user_activity"]
+    assert not any(
+        "." in target and target.rsplit(".", 1)[-1] in MONGO_MUTATION_METHODS
+        for target in _direct_call_targets(functions["touch_user_activity"])
+    )
+    touch = functions["_write_activity_touches"]
     targets = _direct_call_targets(touch)
     mutation_targets = {
         target
         for target in targets
         if "." in target and target.rsplit(".", 1)[-1] in MONGO_MUTATION_METHODS
     }
-    assert mutation_targets == {"collection.update_one"}
+    assert mutation_targets == {"collection.bulk_write"}
 
     string_constants = {
         node.value
@@ -106,3 +106,11 @@ def test_false_miniapp_hardening_result_is_not_accepted_as_safe(monkeypatch):
 
     with pytest.raises(MiniAppIndexSafetyUnavailable, match="safety is unavailable"):
         production.main()
+
+
+def test_schema_registry_is_verified_at_boot_and_revalidated_in_background():
+    main_start = SOURCE.index("def main() -> None:")
+    verify = SOURCE.index("SCHEMA_READINESS.verify_all()", main_start)
+    assert SOURCE.index("ensure_broadcast_indexes()", main_start) < verify
+    assert verify < SOURCE.index("Application.builder()", main_start)
+    assert "maintenance.schema_revalidation_job" in SOURCE
@@ -0,0 +1,115 @@
+from datetime import UTC, datetime
+from threading import Barrier
+
+import pytest
+
+import database
+import profile_cache
+from web_api import profile
+from web_api.routes import _render_profile
+
+
+class FakeUsers:
+    def __init__(self, docs):
+        self.docs = docs
+        self.find_ones = 0
+
+    def find_one(self, query, projection=None):
+        self.find_ones += 1
+        doc = self.docs.get(query["_id"])
+        return dict(doc) if doc else None
+
+    def count_documents(self, query):
+        threshold = query["total_points"]["$gt"]
+        return sum(1 for doc in self.docs.values() if doc.get("total_points", 0) > threshold)
+
+
+@pytest.fixture
+def users(monkeypatch):
+    store = FakeUsers(
+        {
+            "1": {"_id": "1", "first_name": "A", "total_points": 50,
+                  "achievements": {"first": "01.01.2026"}, "challenge_streak_count": 2,
+                  "challenge_streak_last_date": "2026-01-02"},
+            "2": {"_id": "2", "first_name": "B", "total_points": 80},
+        }
+    )
+    # Both history readers wait for each other: assembly deadlocks unless they overlap.
+    barrier = Barrier(2, timeout=2)
+
+    def bot_history(user_id, limit=10):
+        barrier.wait()
+        return [{"level_key": "easy_p1", "end_time": datetime(2026, 1, 1, tzinfo=UTC)}]
+
+    def miniapp_history(user_id, limit=10):
+        barrier.wait()
+        return [{"source": "miniapp", "end_time": datetime(2026, 1, 3, tzinfo=UTC)}]
+
+    monkeypatch.setattr(database, "collection", store)
+    monkeypatch.setattr(database.LEADERBOARD_RANK_INDEX, "position", lambda points: None)
+    monkeypatch.setattr(database, "get_user_history", bot_history)
+    monkeypatch.setattr(profile, "get_miniapp_history", miniapp_history)
+    monkeypatch.setattr(profile, "PROFILE_CACHE", profile_cache.ProfileCache(16, 60))
+    monkeypatch.setattr(profile_cache, "PROFILE_CACHE", profile.PROFILE_CACHE)
+    return store
+
+
+def test_profile_reads_user_document_once_and_histories_concurrently(users):
+    result = profile.profile_for(1, _render_profile)
+
+    assert users.find_ones == 1
+    assert result["position"] == 2
+    assert result["entry"] is result["stats"]
+    assert result["entry"]["total_points"] == 50 and "_id" not in result["entry"]
+    assert [item.get("source") for item in result["history"]] == ["miniapp", None]
+    assert result["history"][0]["end_time"] == "2026-01-03T00:00:00+00:00"
+    assert result["achievements"] == {"first": "01.01.2026"}
+    assert result["streak"] == {"count": 2, "last": "2026-01-02"}
+
+
+def test_cached_profile_is_served_until_a_result_write_invalidates_it(users):
+    first = profile.profile_for(1, _render_profile)
+    assert profile.profile_for(1, _render_profile) is first
+    assert users.find_ones == 1
+
+    users.docs["1"]["total_points"] = 90
+    profile_cache.invalidate_profile(1)
+
+    refreshed = profile.profile_for(1, _render_profile)
+    assert refreshed["position"] == 1
+    assert users.find_ones == 2
+    assert profile.PROFILE_CACHE.metrics()["hits"] == 1
+
+
+def test_unknown_user_profile_is_not_cached(users):
+    assert profile.profile_for(9, _render_profile)["position"] is None
+    assert profile.profile_for(9, _render_profile)["entry"] == {}
+    assert profile.PROFILE_CACHE.metrics()["entries"] == 0
+
+
+def test_invalidation_during_assembly_rejects_the_stale_put():
+    cache = profile_cache.ProfileCache(4, 60)
+    handle = object()
+
+    token = cache.begin(7)
+    cache.invalidate(7)
+    assert cache.put(handle, 7, {"stale": True}, token) is False
+    assert cache.get(handle, 7) is None
+
+    fresh = cache.begin(7)
+    assert cache.put(handle, 7, {"fresh": True}, fresh) is True
+    assert cache.get(handle, 7) == {"fresh": True}
+    assert cache.get(object(), 7) is None
+
+
+def test_forgotten_invalidations_fail_safe_for_old_tokens():
+    cache = profile_cache.ProfileCache(1, 60)
+    handle = object()
+
+    token = cache.begin(1)
+    for user_id in range(10):
+        cache.invalidate(user_id)
+
+    # User 1's record was evicted from the bounded log; its old token still loses.
+    assert cache.put(handle, 1, {"stale": True}, token) is False
+    assert cache.put(handle, 1, {"fresh": True}, cache.begin(1)) is True
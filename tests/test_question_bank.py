@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+import questions
+from questions import (
+    CHALLENGE_FALLBACK_POOL,
+    CHALLENGE_POOLS,
+    POOL_REGISTRY,
+    QUESTION_BANK,
+    QuestionBank,
+)
+
+
+def test_every_registry_pool_compiles_to_the_same_question_objects():
+    for key, pool in POOL_REGISTRY.items():
+        compiled = QUESTION_BANK.pool(key)
+        assert isinstance(compiled, tuple)
+        assert len(compiled) == len(pool)
+        assert all(left is right for left, right in zip(compiled, pool, strict=True))
+        assert QUESTION_BANK.pool_ids(key) == tuple(
+            str(item.get("id") or "").strip() for item in pool
+        )
+
+
+def test_shared_question_objects_occupy_one_slot():
+    easy = QUESTION_BANK.pool_indices("easy")
+    easy_p1 = QUESTION_BANK.pool_indices("easy_p1")
+    assert easy[: len(easy_p1)] == easy_p1
+    distinct = {id(item) for pool in POOL_REGISTRY.values() for item in pool}
+    assert len(QUESTION_BANK) >= len(distinct)
+    assert len(QUESTION_BANK.ids) == len(QUESTION_BANK)
+
+
+def test_challenge_level_id_arrays_match_challenge_pools():
+    for level, pool in CHALLENGE_POOLS.items():
+        assert QUESTION_BANK.selection_ids(f"challenge_{level}") == tuple(
+            item["id"] for item in pool
+        )
+    assert QUESTION_BANK.selection("challenge_fallback") == tuple(CHALLENGE_FALLBACK_POOL)
+    assert "challenge_easy" not in QUESTION_BANK.pools
+
+
+def test_id_index_resolves_normalized_ids():
+    question = POOL_REGISTRY["hard"][0]
+    qid = question["id"]
+    assert QUESTION_BANK.question(qid) is question
+    assert QUESTION_BANK.question(f"  {qid} ") is question
+    assert QUESTION_BANK.question("missing-id") is None
+
+
+def test_compiled_containers_are_immutable():
+    with pytest.raises(TypeError):
+        QUESTION_BANK.pools["easy"] = ()
+    with pytest.raises(AttributeError):
+        QUESTION_BANK.pool("easy").append({})
+
+
+def test_bank_normalizes_ids_and_keeps_first_slot_for_duplicates():
+    first = {"id": " q1 "}
+    duplicate = {"id": "q1"}
+    blank = {"question": "no id"}
+    bank = QuestionBank({"a": [first, blank], "b": [duplicate, first]})
+
+    assert bank.ids == ("q1", "", "q1")
+    assert bank.pool_indices("b") == (2, 0)
+    assert bank.question("q1") is first
+    with pytest.raises(KeyError):
+        bank.pool("missing")
+
+
+def test_battle_selection_samples_compiled_slots(monkeypatch):
+    import telegram_battle_controller as battles
+
+    monkeypatch.setattr(battles.random, "sample", lambda population, count: list(population)[:count])
+    picked = battles._battle_pool()
+
+    assert picked == list(questions.BATTLE_POOL[:10])
+
+
+def test_challenge_selection_is_reproducible_per_seed():
+    first = questions.pick_competitive_challenge_questions("random20", rng=random.Random(7))
+    second = questions.pick_competitive_challenge_questions("random20", rng=random.Random(7))
+    assert [item["id"] for item in first] == [item["id"] for item in second]
+    assert all(QUESTION_BANK.question(item["id"]) is item for item in first)
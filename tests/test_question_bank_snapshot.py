@@ -0,0 +1,93 @@
+import ast
+
+import questions
+from questions import bank_snapshot
+
+_HASH = b"\x01" * 32
+
+
+def test_snapshot_round_trips_curated_leaf_pools(tmp_path):
+    path = tmp_path / "bank.pickle"
+    bank_snapshot.write_snapshot(questions._curate_leaf_pools(), path, expected_hash=_HASH)
+
+    loaded = bank_snapshot.load_snapshot(path, expected_hash=_HASH)
+
+    assert loaded is not None
+    assert loaded["easy_p1"] == questions.easy_questions
+    assert loaded["intro3"] == questions.intro_part3_questions
+    assert set(loaded) == {
+        key for key in questions.POOL_REGISTRY if key in loaded
+    } == set(questions._RANDOM_ALL_LEAF_KEYS)
+
+
+def test_snapshot_pools_are_wired_like_curated_pools():
+    assert questions.POOL_REGISTRY["easy_p1"] is questions.easy_questions
+    assert questions.POOL_REGISTRY["easy"][0] is questions.easy_questions[0]
+    assert questions.BATTLE_POOL is questions.COMPETITIVE_POOL
+    assert questions.CHALLENGE_FALLBACK_POOL is questions.CHAPTER1_COMPETITIVE_POOL
+    challenge_card = questions.CHALLENGE_POOLS["easy"][0]
+    assert any(item is challenge_card for item in questions.POOL_REGISTRY["easy"])
+
+
+def test_stale_source_hash_falls_back_to_curation(tmp_path):
+    path = tmp_path / "bank.pickle"
+    bank_snapshot.write_snapshot({"easy_p1": []}, path, expected_hash=_HASH)
+
+    assert bank_snapshot.load_snapshot(path, expected_hash=b"\x02" * 32) is None
+
+
+def test_corrupt_or_missing_snapshot_falls_back(tmp_path):
+    path = tmp_path / "bank.pickle"
+    assert bank_snapshot.load_snapshot(path, expected_hash=_HASH) is None
+
+    bank_snapshot.write_snapshot({"easy_p1": []}, path, expected_hash=_HASH)
+    blob = bytearray(path.read_bytes())
+    blob[-1] ^= 0xFF
+    path.write_bytes(bytes(blob))
+    assert bank_snapshot.load_snapshot(path, expected_hash=_HASH) is None
+
+    path.write_bytes(b"not a snapshot")
+    assert bank_snapshot.load_snapshot(path, expected_hash=_HASH) is None
+
+
+def test_disable_switch_forces_curation(tmp_path, monkeypatch):
+    path = tmp_path / "bank.pickle"
+    bank_snapshot.write_snapshot({"easy_p1": []}, path, expected_hash=_HASH)
+    monkeypatch.setenv(bank_snapshot.DISABLE_ENV, "1")
+
+    assert bank_snapshot.load_snapshot(path, expected_hash=_HASH) is None
+
+
+def test_source_hash_tracks_every_curation_input(tmp_path):
+    (tmp_path / "chapter1.py").write_text("CARDS = []\n", encoding="utf-8")
+    (tmp_path / "content_truth.py").write_text("RULES = {}\n", encoding="utf-8")
+    sources = ("chapter1.py", "content_truth.py")
+    baseline = bank_snapshot.source_hash(tmp_path, sources)
+
+    (tmp_path / "content_truth.py").write_text("RULES = {'x': 1}\n", encoding="utf-8")
+    assert bank_snapshot.source_hash(tmp_path, sources) != baseline
+
+    (tmp_path / "content_truth.py").write_text("RULES = {}\n", encoding="utf-8")
+    assert bank_snapshot.source_hash(tmp_path, sources) == baseline
+
+
+def test_curation_sources_cover_the_curation_import_closure():
+    sources = set(bank_snapshot.CURATION_SOURCES)
+    curated = sources - {"__init__.py", "bank_snapshot.py"}
+    for name in sorted(curated):
+        tree = ast.parse((bank_snapshot.PACKAGE_DIR / name).read_text(encoding="utf-8"))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.level == 1:
+                targets = [node.module] if node.module else [alias.name for alias in node.names]
+                for target in targets:
+                    assert f"{target.replace('.', '/')}.py" in sources, f"{name} -> {target}"
+
+    init = ast.parse((bank_snapshot.PACKAGE_DIR / "__init__.py").read_text(encoding="utf-8"))
+    curate = next(
+        node
+        for node in init.body
+        if isinstance(node, ast.FunctionDef) and node.name == "_curate_leaf_pools"
+    )
+    for node in ast.walk(curate):
+        if isinstance(node, ast.ImportFrom):
+            assert f"{node.module}.py" in sources
@@ -0,0 +1,188 @@
+import threading
+
+from pymongo.errors import BulkWriteError
+
+import database
+from question_analytics import stat_update_pipeline
+from question_stats_buffer import QuestionStatBuffer
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Writer:
+    def __init__(self, fail=None):
+        self.batches = []
+        self.fail = fail
+        self.called = threading.Event()
+
+    def __call__(self, rows):
+        self.batches.append(rows)
+        self.called.set()
+        if self.fail is not None:
+            result, self.fail = self.fail, None
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return []
+
+
+def _buffer(writer, **kwargs):
+    options = {"flush_interval": 60, "flush_batch": 100, "max_pending": 100}
+    options.update(kwargs)
+    return QuestionStatBuffer(writer, **options)
+
+
+def test_answers_coalesce_into_one_row_per_question():
+    writer = _Writer()
+    buffer = _buffer(writer, clock=_Clock())
+    for index in range(50):
+        buffer.record("q1", "easy", index % 2 == 0, 2.0)
+    buffer.record("q2", "hard", False, 5.5)
+
+    assert buffer.flush() == 51
+    rows = sorted(writer.batches[0])
+    assert rows == [("q1", 50, 25, 100.0, "easy"), ("q2", 1, 0, 5.5, "hard")]
+    assert buffer.flush() == 0
+    buffer.close()
+
+
+def test_batch_threshold_wakes_background_flusher():
+    writer = _Writer()
+    buffer = _buffer(writer, flush_batch=2)
+
+    buffer.record("q1", "easy", True, 1.0)
+    buffer.record("q2", "easy", True, 1.0)
+
+    assert writer.called.wait(2)
+    buffer.close()
+    assert buffer.metrics()["written"] == 2
+
+
+def test_pending_questions_are_bounded_and_drops_are_counted():
+    writer = _Writer()
+    buffer = _buffer(writer, flush_batch=1, max_pending=2)
+    buffer._stopped.set()  # keep the flusher off; flush manually
+
+    assert buffer.record("q1", "easy", True, 1.0)
+    assert buffer.record("q2", "easy", True, 1.0)
+    assert buffer.record("q3", "easy", True, 1.0) is False
+    assert buffer.record("q1", "easy", False, 1.0)
+
+    metrics = buffer.metrics()
+    assert metrics["pending_questions"] == 2
+    assert metrics["pending_answers"] == 3
+    assert metrics["dropped"] == 1
+
+
+def test_raising_writer_counts_the_batch_as_lost_instead_of_retrying():
+    writer = _Writer(fail=ConnectionError("mongo down"))
+    buffer = _buffer(writer)
+    buffer._stopped.set()
+    buffer.record("q1", "easy", True, 1.0)
+    buffer.record("q1", "easy", False, 1.0)
+
+    assert buffer.flush() == 0
+    metrics = buffer.metrics()
+    # The bulk write may have landed before the error; retrying could double-count.
+    assert (metrics["lost"], metrics["requeued"], metrics["written"]) == (2, 0, 0)
+    assert metrics["flush_failures"] == 1
+    assert metrics["pending_questions"] == 0
+    assert buffer.flush() == 0
+    assert len(writer.batches) == 1
+
+
+def test_failed_rows_are_requeued_and_lag_is_reported():
+    clock = _Clock()
+    writer = _Writer(fail=[0])
+    buffer = _buffer(writer, clock=clock)
+    buffer._stopped.set()
+    buffer.record("q1", "easy", True, 1.0)
+    clock.now += 7
+
+    assert buffer.flush() == 0
+    metrics = buffer.metrics()
+    assert metrics["requeued"] == 1
+    assert metrics["flush_failures"] == 1
+    assert metrics["lag_seconds"] == 0.0
+
+    clock.now += 3
+    assert buffer.metrics()["lag_seconds"] == 3.0
+    assert buffer.flush() == 1
+    assert buffer.metrics()["lag_seconds"] is None
+
+
+def test_partial_bulk_failure_requeues_only_failed_rows():
+    writer = _Writer(fail=[1])
+    buffer = _buffer(writer)
+    buffer._stopped.set()
+    buffer.record("q1", "easy", True, 1.0)
+    buffer.record("q2", "easy", True, 1.0)
+
+    assert buffer.flush() == 1
+    failed_id = writer.batches[0][1][0]
+    assert list(buffer._pending) == [failed_id]
+    assert buffer.metrics()["requeued"] == 1
+
+
+def test_failed_rows_without_room_are_counted_as_lost():
+    buffer = None
+
+    def writer(rows):
+        # New questions fill the buffer while the failing write is in flight.
+        buffer.record("late-1", "easy", True, 1.0)
+        buffer.record("late-2", "easy", True, 1.0)
+        return [0]
+
+    buffer = _buffer(writer, flush_batch=1, max_pending=2)
+    buffer._stopped.set()
+    buffer.record("q1", "easy", True, 1.0)
+
+    assert buffer.flush() == 0
+    metrics = buffer.metrics()
+    assert metrics["lost"] == 1
+    assert metrics["pending_questions"] == 2
+
+
+def test_close_writes_remainder_and_stops_flusher():
+    writer = _Writer()
+    buffer = _buffer(writer)
+    buffer.record("q1", "easy", True, 1.0)
+    thread = buffer._thread
+
+    buffer.close()
+
+    assert thread is not None and not thread.is_alive()
+    assert writer.batches == [[("q1", 1, 1, 1.0, "easy")]]
+    assert buffer.metrics()["written"] == 1
+
+
+def test_database_writer_issues_one_unordered_bulk_upsert(monkeypatch):
+    class Stats:
+        def __init__(self):
+            self.calls = []
+
+        def bulk_write(self, operations, ordered):
+            self.calls.append((operations, ordered))
+            if len(self.calls) > 1:
+                raise BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "boom"}]})
+
+    stats = Stats()
+    monkeypatch.setattr(database, "questions_stats_collection", stats)
+    rows = [("q1", 3, 2, 4.5, "easy"), ("q2", 1, 0, 1.0, "hard")]
+
+    assert database._write_question_stats(rows) == []
+    operations, ordered = stats.calls[0]
+    assert ordered is False
+    assert operations[0]._filter == {"_id": "q1"}
+    assert operations[0]._doc == stat_update_pipeline(3, 2, 4.5, "easy")
+    assert operations[0]._doc[0]["$set"]["total_attempts"] == {
+        "$add": [{"$ifNull": ["$total_attempts", 0]}, 3]
+    }
+    assert operations[0]._upsert is True
+    assert database._write_question_stats(rows) == [1]
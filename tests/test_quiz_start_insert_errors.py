@@ -23,7 +23,7 @@ class FailingInsertSessions:
 def _start_with_sessions(monkeypatch, sessions):
     monkeypatch.setattr(quiz, "miniapp_sessions", lambda: sessions)
     monkeypatch.setattr(database, "init_user_stats", lambda *_args, **_kwargs: True)
-    monkeypatch.setattr(database, "get_user_stats", lambda user_id: {"_id": str(user_id)})
+    monkeypatch.setattr(database, "get_user_stats", lambda user_id, fields=None: {"_id": str(user_id)})
 
     return quiz.start_quiz(
         {"id": 991401, "username": "tester", "first_name": "Test"},
@@ -0,0 +1,154 @@
+import asyncio
+import io
+from types import SimpleNamespace
+
+from PIL import Image
+
+from result_card_image import ProfileAvatarCache, ResultCardImagePipeline, _draw_card
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _png(size=(64, 64)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 10, 10)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class ProfileBot:
+    def __init__(self, *, photo=True, delay=0.0, error=None):
+        self.photo = photo
+        self.delay = delay
+        self.error = error
+        self.calls = []
+
+    async def get_chat(self, user_id):
+        self.calls.append(("get_chat", user_id))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        photo = SimpleNamespace(big_file_id="big") if self.photo else None
+        return SimpleNamespace(first_name="Анна", photo=photo)
+
+    async def get_file(self, file_id):
+        self.calls.append(("get_file", file_id))
+        return SimpleNamespace(download_as_bytearray=self._download)
+
+    async def _download(self):
+        self.calls.append(("download",))
+        return bytearray(_png())
+
+
+def _pipeline(*, budget=2.0, clock=None, draw=None):
+    cache = ProfileAvatarCache(
+        capacity=2,
+        ttl_seconds=600,
+        negative_ttl_seconds=60,
+        clock=clock or _Clock(),
+    )
+    kwargs = {"draw": draw} if draw is not None else {}
+    return ResultCardImagePipeline(budget_seconds=budget, avatars=cache, **kwargs)
+
+
+def test_rendered_card_is_png_and_second_card_hits_avatar_cache():
+    pipeline = _pipeline()
+    bot = ProfileBot()
+
+    first = run(pipeline.render(bot, user_id=42, score=8, total=10))
+    second = run(pipeline.render(bot, user_id=42, score=9, total=10))
+
+    assert first.startswith(b"\x89PNG\r\n\x1a\n")
+    assert second.startswith(b"\x89PNG\r\n\x1a\n")
+    assert bot.calls == [("get_chat", 42), ("get_file", "big"), ("download",)]
+    metrics = pipeline.metrics()
+    assert metrics["rendered"] == 2
+    assert metrics["avatars"]["hits"] == 1
+    assert metrics["render_latency"]["count"] == 2
+
+
+def test_missing_photo_and_lookup_failures_are_negatively_cached():
+    clock = _Clock()
+    pipeline = _pipeline(clock=clock)
+    no_photo = ProfileBot(photo=False)
+
+    assert run(pipeline.render(no_photo, user_id=1, score=1, total=2)) is not None
+    assert run(pipeline.render(no_photo, user_id=1, score=1, total=2)) is not None
+    assert no_photo.calls == [("get_chat", 1)]
+    assert pipeline.metrics()["avatars"]["negative_hits"] == 1
+
+    broken = ProfileBot(error=RuntimeError("file API down"))
+    assert run(pipeline.render(broken, user_id=2, score=1, total=2)) is not None
+    assert run(pipeline.render(broken, user_id=2, score=1, total=2)) is not None
+    assert broken.calls == [("get_chat", 2)]
+
+    clock.now += 61
+    run(pipeline.render(no_photo, user_id=1, score=1, total=2))
+    assert no_photo.calls == [("get_chat", 1), ("get_chat", 1)]
+
+
+def test_slow_profile_lookup_exceeds_budget_but_still_warms_cache():
+    pipeline = _pipeline(budget=0.05)
+    bot = ProfileBot(delay=0.2)
+
+    async def scenario():
+        first = await pipeline.render(bot, user_id=7, score=3, total=4)
+        await asyncio.sleep(0.3)
+        bot.delay = 0.0
+        second = await pipeline.render(bot, user_id=7, score=3, total=4)
+        return first, second
+
+    first, second = run(scenario())
+
+    assert first is None
+    assert second is not None
+    assert [call[0] for call in bot.calls].count("get_chat") == 1
+    assert pipeline.metrics()["budget_exceeded"] == 1
+
+
+def test_slow_or_failing_draw_returns_none_for_text_fallback():
+    import time
+
+    def slow_draw(*_args):
+        time.sleep(0.2)
+        return b"late"
+
+    def broken_draw(*_args):
+        raise OSError("font table corrupt")
+
+    slow = _pipeline(budget=0.05, draw=slow_draw)
+    broken = _pipeline(draw=broken_draw)
+    bot = ProfileBot(photo=False)
+
+    assert run(slow.render(bot, user_id=1, score=1, total=1)) is None
+    assert run(broken.render(bot, user_id=1, score=1, total=1)) is None
+    assert slow.metrics()["budget_exceeded"] == 1
+    assert broken.metrics()["failed"] == 1
+
+
+def test_avatar_cache_is_bounded_lru():
+    cache = ProfileAvatarCache(capacity=2, ttl_seconds=10, negative_ttl_seconds=5, clock=_Clock())
+    cache.put(1, first_name="a", avatar=object())
+    cache.put(2, first_name="b", avatar=None)
+    assert cache.get(1) is not None
+    cache.put(3, first_name="c", avatar=object())
+
+    assert cache.get(2) is None
+    assert cache.get(1).first_name == "a"
+    assert cache.snapshot()["size"] == 2
+
+
+def test_draw_card_uses_placeholder_without_avatar():
+    payload = _draw_card("", None, 5, 10)
+    image = Image.open(io.BytesIO(payload))
+    assert image.size == (600, 280)
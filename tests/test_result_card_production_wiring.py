@@ -17,3 +17,12 @@ def test_production_installs_and_drains_durable_result_card_outbox():
     transport = SOURCE.index("run_telegram_application(", main)
 
     assert install < build < job < transport
+
+
+def test_production_enables_budgeted_image_cards_after_renderer_install():
+    main = SOURCE.index("def main() -> None:")
+    install = SOURCE.index("result_delivery.install_result_card_renderer(quiz)", main)
+    images = SOURCE.index("result_delivery.enable_result_card_images()", main)
+    build = SOURCE.index("Application.builder()", main)
+
+    assert install < images < build
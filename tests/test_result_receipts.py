@@ -0,0 +1,346 @@
+import copy
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+import database
+import legacy_bonus_store
+import result_receipts
+from schema_readiness import SCHEMA_READINESS
+
+
+def _get(doc, path):
+    current = doc
+    for part in path.split("."):
+        if not isinstance(current, dict) or part not in current:
+            return None, False
+        current = current[part]
+    return current, True
+
+
+def _matches(doc, query):
+    for path, expected in query.items():
+        value, found = _get(doc, path)
+        if isinstance(expected, dict) and "$exists" in expected:
+            if found != expected["$exists"]:
+                return False
+        elif not found or value != expected:
+            return False
+    return True
+
+
+def _set(doc, path, value):
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[leaf] = value
+
+
+def _unset(doc, path):
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.get(part, {})
+    doc.pop(leaf, None)
+
+
+class FakeSession:
+    def __init__(self, transaction):
+        self.transaction = transaction
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def start_transaction(self):
+        return self.transaction
+
+
+class FakeTransaction:
+    """Snapshots both collections and restores them when the block raises."""
+
+    def __init__(self, collections):
+        self.collections = collections
+        self.snapshot = None
+
+    def __enter__(self):
+        self.snapshot = [copy.deepcopy(c.docs) for c in self.collections]
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            for collection, docs in zip(self.collections, self.snapshot, strict=True):
+                collection.docs = docs
+        return False
+
+
+class FakeUsers:
+    def __init__(self, *docs):
+        self.docs = {doc["_id"]: copy.deepcopy(doc) for doc in docs}
+        self.queries = []
+        self.receipts = None
+        self.database = SimpleNamespace(
+            client=SimpleNamespace(start_session=self._start_session)
+        )
+
+    def _start_session(self):
+        return FakeSession(FakeTransaction((self, self.receipts)))
+
+    def find_one(self, query, projection=None, **kwargs):
+        for doc in self.docs.values():
+            if _matches(doc, query):
+                return copy.deepcopy(doc)
+        return None
+
+    def _apply(self, query, update):
+        for doc in self.docs.values():
+            if _matches(doc, query):
+                for path, value in update.get("$set", {}).items():
+                    _set(doc, path, value)
+                for path, value in update.get("$inc", {}).items():
+                    _set(doc, path, (_get(doc, path)[0] or 0) + value)
+                for path, value in update.get("$max", {}).items():
+                    _set(doc, path, max(_get(doc, path)[0] or value, value))
+                for path in update.get("$unset", {}):
+                    _unset(doc, path)
+                return doc
+        return None
+
+    def update_one(self, query, update, **kwargs):
+        self.queries.append(query)
+        before = copy.deepcopy(self.docs)
+        doc = self._apply(query, update)
+        return SimpleNamespace(
+            matched_count=int(doc is not None),
+            modified_count=int(self.docs != before),
+            acknowledged=True,
+        )
+
+    def find_one_and_update(self, query, update, **kwargs):
+        self.queries.append(query)
+        doc = self._apply(query, update)
+        return copy.deepcopy(doc) if doc is not None else None
+
+    def find(self, query, projection=None):
+        return SimpleNamespace(
+            batch_size=lambda size: [copy.deepcopy(doc) for doc in self.docs.values()]
+        )
+
+    def update_many(self, query, update):
+        for doc in self.docs.values():
+            for path, expected in query.items():
+                if doc.get(path) == expected:
+                    doc.pop(path)
+
+
+class FakeReceipts:
+    def __init__(self):
+        self.docs = {}
+        self.reads = 0
+
+    def insert_one(self, document, **kwargs):
+        if document["_id"] in self.docs:
+            raise DuplicateKeyError("E11000 duplicate key")
+        self.docs[document["_id"]] = copy.deepcopy(document)
+
+    def find_one(self, query, projection=None, **kwargs):
+        self.reads += 1
+        doc = self.docs.get(query["_id"])
+        return copy.deepcopy(doc) if doc else None
+
+
+@pytest.fixture
+def layout(monkeypatch):
+    def enable(users):
+        receipts = FakeReceipts()
+        users.receipts = receipts
+        monkeypatch.setenv(result_receipts.LAYOUT_ENV, "collection")
+        monkeypatch.setattr(
+            database, "db", {result_receipts.RECEIPTS_COLLECTION: receipts}, raising=False
+        )
+        SCHEMA_READINESS.mark_ready(result_receipts.SCHEMA_NAME, receipts)
+        return receipts
+
+    yield enable
+    SCHEMA_READINESS.reset(result_receipts.SCHEMA_NAME)
+
+
+def test_embedded_layout_keeps_the_atomic_set_and_guard(monkeypatch):
+    monkeypatch.delenv(result_receipts.LAYOUT_ENV, raising=False)
+    users = FakeUsers({"_id": "42", "total_points": 0})
+    path = "daily_bonus_receipts.20260101"
+
+    first = result_receipts.write_once(
+        users, {"_id": "42"}, {"$inc": {"total_points": 5}}, uid="42", path=path, receipt={"bonus": 5}
+    )
+    replay = result_receipts.write_once(
+        users, {"_id": "42"}, {"$inc": {"total_points": 5}}, uid="42", path=path, receipt={"bonus": 5}
+    )
+
+    assert (first.applied, replay.applied) == (True, False)
+    assert users.queries[0] == {"_id": "42", path: {"$exists": False}}
+    assert users.docs["42"]["total_points"] == 5
+    assert result_receipts.read_receipt(users.docs["42"], "42", path) == ({"bonus": 5}, True)
+
+
+def test_collection_layout_inserts_receipt_and_update_together(layout):
+    users = FakeUsers({"_id": "42", "total_points": 0})
+    receipts = layout(users)
+    path = "legacy_result_receipts.abc"
+
+    first = result_receipts.write_once(
+        users, {"_id": "42"}, {"$inc": {"total_points": 7}}, uid="42", path=path,
+        receipt={"completed_at": "2026-01-01T00:00:00"}, return_after=True,
+    )
+    replay = result_receipts.write_once(
+        users, {"_id": "42"}, {"$inc": {"total_points": 7}}, uid="42", path=path,
+        receipt={"completed_at": "2026-01-01T00:00:00"}, return_after=True,
+    )
+
+    assert first.applied and first.after["total_points"] == 7
+    assert replay.applied is False
+    assert users.docs["42"]["total_points"] == 7
+    assert "legacy_result_receipts" not in users.docs["42"]
+    stored = receipts.docs["42:legacy_result_receipts.abc"]
+    assert (stored["kind"], stored["key"]) == ("legacy_result_receipts", "abc")
+    assert stored["applied_at"] == "2026-01-01T00:00:00"
+    assert result_receipts.read_receipt(users.docs["42"], "42", path)[1] is True
+
+
+def test_lost_user_cas_rolls_back_the_receipt(layout):
+    users = FakeUsers({"_id": "42", "total_tests": 3})
+    receipts = layout(users)
+
+    write = result_receipts.write_once(
+        users, {"_id": "42", "total_tests": 2}, {"$inc": {"total_tests": 1}},
+        uid="42", path="miniapp_result_receipts.r1", receipt={"points": 1},
+    )
+
+    assert write.applied is False
+    assert receipts.docs == {}
+    assert users.docs["42"]["total_tests"] == 3
+
+
+def test_no_op_user_update_still_commits_the_receipt(layout):
+    # A result recovered after midnight: the stored bonus date is already later.
+    users = FakeUsers({"_id": "42", "speed_last_bonus_date": "2026-01-02"})
+    receipts = layout(users)
+    path = "challenge_bonus_receipts.speed.20260101"
+
+    write = result_receipts.write_once(
+        users, {"_id": "42"}, {"$max": {"speed_last_bonus_date": "2026-01-01"}},
+        uid="42", path=path, receipt={"bonus": 0},
+    )
+
+    assert write.applied is True
+    assert users.docs["42"]["speed_last_bonus_date"] == "2026-01-02"
+    assert receipts.docs["42:" + path]["receipt"] == {"bonus": 0}
+
+
+def test_unmigrated_embedded_receipt_still_blocks_a_replay(layout):
+    users = FakeUsers(
+        {"_id": "42", "total_points": 5, "daily_bonus_receipts": {"20260101": {"bonus": 5}}}
+    )
+    receipts = layout(users)
+
+    write = result_receipts.write_once(
+        users, {"_id": "42"}, {"$inc": {"total_points": 5}},
+        uid="42", path="daily_bonus_receipts.20260101", receipt={"bonus": 5},
+    )
+
+    assert write.applied is False
+    assert receipts.docs == {}
+    assert users.docs["42"]["total_points"] == 5
+
+
+def test_migration_moves_unchanged_receipts_and_bonus_claims_read_them(layout, monkeypatch):
+    owner = legacy_bonus_store._owner("result-1")
+    users = FakeUsers(
+        {
+            "_id": "42",
+            "total_points": 15,
+            "last_daily_bonus": "2026-01-01",
+            "daily_bonus_receipts": {
+                "20260101": {"bonus": 10, "eligible": True, "result_owner": owner}
+            },
+            "normal_bonus_result_owners": {"20260101": owner},
+            "challenge_bonus_receipts": {"random20": {"20260101": {"bonus": 3}}},
+        }
+    )
+    receipts = layout(users)
+    monkeypatch.setattr(database, "collection", users)
+
+    report = result_receipts.migrate_embedded_receipts(users, receipts)
+
+    assert (report["users"], report["receipts"]) == (1, 2)
+    assert set(receipts.docs) == {
+        "42:daily_bonus_receipts.20260101",
+        "42:challenge_bonus_receipts.random20.20260101",
+    }
+    assert "daily_bonus_receipts" not in users.docs["42"]
+    assert "challenge_bonus_receipts" not in users.docs["42"]
+    assert users.docs["42"]["normal_bonus_result_owners"] == {"20260101": owner}
+
+    claim = legacy_bonus_store.claim_daily_bonus_for_result(
+        user_id=42, result_id="result-1", day="2026-01-01", daily_streak=3
+    )
+
+    assert claim == {"bonus": 10, "eligible": True, "claimed_now": False}
+    assert users.docs["42"]["total_points"] == 15
+
+
+def test_readiness_loss_after_migration_refuses_instead_of_writing_embedded(layout, monkeypatch):
+    users = FakeUsers(
+        {
+            "_id": "42",
+            "total_points": 15,
+            "last_daily_bonus": "2026-01-01",
+            "daily_bonus_receipts": {"20260101": {"bonus": 10, "eligible": True}},
+        }
+    )
+    receipts = layout(users)
+    monkeypatch.setattr(database, "collection", users)
+    result_receipts.migrate_embedded_receipts(users, receipts)
+    SCHEMA_READINESS.mark_failed(result_receipts.SCHEMA_NAME, receipts, "hello failed")
+
+    with pytest.raises(result_receipts.ResultReceiptsUnavailable):
+        result_receipts.write_once(
+            users, {"_id": "42"}, {"$inc": {"total_points": 10}},
+            uid="42", path="daily_bonus_receipts.20260101", receipt={"bonus": 10},
+        )
+    with pytest.raises(legacy_bonus_store.LegacyResultStoreUnavailable):
+        legacy_bonus_store.claim_daily_bonus_for_result(
+            user_id=42, result_id="result-2", day="2026-01-01", daily_streak=3
+        )
+
+    assert users.docs["42"]["total_points"] == 15
+    assert "daily_bonus_receipts" not in users.docs["42"]
+    assert result_receipts.RECEIPT_METRICS.metrics()["active"] is False
+
+
+def test_schema_fails_closed_without_transactions():
+    class StandaloneReceipts:
+        database = SimpleNamespace(
+            client=SimpleNamespace(
+                admin=SimpleNamespace(command=lambda name: {"isWritablePrimary": True})
+            )
+        )
+
+        def __init__(self):
+            self.created = []
+
+        def index_information(self):
+            return {}
+
+        def create_index(self, key, name, **options):
+            self.created.append(name)
+
+    receipts = StandaloneReceipts()
+    try:
+        assert result_receipts.ensure_result_receipts_schema(receipts) is False
+        assert set(receipts.created) == set(result_receipts._INDEXES)
+        assert SCHEMA_READINESS.is_ready(result_receipts.SCHEMA_NAME, receipts) is False
+    finally:
+        SCHEMA_READINESS.reset(result_receipts.SCHEMA_NAME)
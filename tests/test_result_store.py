@@ -79,15 +79,31 @@ class FakeUserCollection:
         return SimpleNamespace(modified_count=1)
 
 
+def _session_matches(doc, query):
+    for key, value in query.items():
+        if isinstance(value, dict) and "$in" in value:
+            if doc.get(key) not in value["$in"]:
+                return False
+        elif doc.get(key) != value:
+            return False
+    return True
+
+
 class FakeSessionCollection:
     def __init__(self, doc):
         self.doc = copy.deepcopy(doc) if doc is not None else None
+        self.find_calls = []
 
     def find_one(self, query, *args, **kwargs):
         if self.doc is not None and all(self.doc.get(key) == value for key, value in query.items()):
             return copy.deepcopy(self.doc)
         return None
 
+    def find(self, query, *args, **kwargs):
+        self.find_calls.append(query)
+        docs = [self.doc] if self.doc is not None else []
+        return [copy.deepcopy(doc) for doc in docs if _session_matches(doc, query)]
+
     def update_one(self, query, update, **kwargs):
         if self.doc is None or not all(self.doc.get(key) == value for key, value in query.items()):
             return SimpleNamespace(modified_count=0)
@@ -174,6 +190,36 @@ def test_regular_result_receipt_prevents_duplicate_aggregate(monkeypatch):
     assert users.doc["miniapp_result_receipts"]["session-regular"]["points"] == 12
 
 
+def test_applied_result_moves_user_in_rank_index_once(monkeypatch):
+    from leaderboard_rank_index import LeaderboardRankIndex
+
+    users = FakeUserCollection(base_user())
+    index = LeaderboardRankIndex(max_age_seconds=60)
+    index.reconcile([users.doc, {**base_user(7), "total_points": 10}])
+    monkeypatch.setattr(database, "collection", users)
+    monkeypatch.setattr(database, "LEADERBOARD_RANK_INDEX", index)
+
+    for _replay in range(2):
+        result_store.apply_regular_result_once(
+            user_id=123,
+            result_id="session-ranked",
+            username="tester",
+            first_name="Ranked",
+            level_key="easy_p1",
+            score=7,
+            total=10,
+            time_seconds=30,
+            score_multiplier=1.0,
+            is_perfect=False,
+            max_streak=3,
+        )
+
+    top = index.page(0, 1)[0]
+    assert (top["_id"], top["total_points"], top["total_tests"]) == ("123", 12, 1)
+    assert top["first_name"] == "Ranked"
+    assert index.position(10) == 2
+
+
 def test_challenge_receipt_prevents_duplicate_bonus_and_achievement(monkeypatch):
     users = FakeUserCollection(base_user())
     monkeypatch.setattr(database, "collection", users)
@@ -298,3 +344,73 @@ def test_old_receipt_is_pruned_after_source_session_disappears(monkeypatch):
     result_store._prune_old_receipts(123)
 
     assert "session-gone" not in users.doc.get("miniapp_result_receipts", {})
+
+
+class FakeSessionSet(FakeSessionCollection):
+    def __init__(self, docs):
+        super().__init__(None)
+        self.docs = [copy.deepcopy(doc) for doc in docs]
+
+    def find_one(self, query, *args, **kwargs):
+        raise AssertionError("receipt pruning must not look sessions up one by one")
+
+    def find(self, query, *args, **kwargs):
+        self.find_calls.append(query)
+        return [copy.deepcopy(doc) for doc in self.docs if _session_matches(doc, query)]
+
+
+def test_receipt_pruning_checks_all_candidates_with_one_in_query(monkeypatch):
+    old = _now_utc_naive() - timedelta(days=2)
+    user = base_user()
+    user["miniapp_result_receipts"] = {
+        "session-finished": {"points": 1, "applied_at": old},
+        "session-finalizing": {"points": 2, "applied_at": old},
+        "session-gone": {"points": 3, "applied_at": old},
+        "session-fresh": {"points": 4, "applied_at": _now_utc_naive()},
+    }
+    users = FakeUserCollection(user)
+    sessions = FakeSessionSet(
+        [
+            {"_id": "session-finished", "user_id": "123", "status": "finished"},
+            {"_id": "session-finalizing", "user_id": "123", "status": "finalizing"},
+            {"_id": "session-fresh", "user_id": "123", "status": "finished"},
+        ]
+    )
+    monkeypatch.setattr(database, "collection", users)
+    monkeypatch.setattr(database, "db", FakeDB(sessions), raising=False)
+
+    assert result_store._prune_old_receipts(123) == 2
+
+    assert len(sessions.find_calls) == 1
+    assert sorted(sessions.find_calls[0]["_id"]["$in"]) == [
+        "session-finalizing",
+        "session-finished",
+        "session-gone",
+    ]
+    assert sorted(users.doc["miniapp_result_receipts"]) == ["session-finalizing", "session-fresh"]
+
+
+def test_result_write_marks_user_for_sweep_instead_of_pruning_inline(monkeypatch):
+    queue = result_store.ReceiptPruneQueue(max_pending=1)
+    monkeypatch.setattr(result_store, "RECEIPT_PRUNE_QUEUE", queue)
+    pruned = []
+    monkeypatch.setattr(result_store, "_prune_old_receipts", lambda uid: pruned.append(uid) or 3)
+
+    queue.mark(123)
+    queue.mark(123)
+    queue.mark(456)
+
+    assert pruned == []
+    assert queue.metrics()["pending_users"] == 1
+    assert queue.metrics()["skipped_marks"] == 1
+
+    swept = result_store.sweep_old_receipts(limit=10)
+
+    assert pruned == ["123"]
+    assert swept["users"] == 1 and swept["pruned"] == 3
+    metrics = queue.metrics()
+    assert metrics["pending_users"] == 0
+    assert metrics["sweeps"] == 1
+    assert metrics["receipts_pruned"] == 3
+    assert metrics["last_sweep"]["users"] == 1
+    assert metrics["sweep"]["count"] == 1
@@ -0,0 +1,191 @@
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import database
+import legacy_session_access as access
+from schema_readiness import SCHEMA_READINESS, SchemaReadinessRegistry, SchemaRequirement
+from web_api.launch_attribution import parse_launch_param, persist_launch_attribution
+
+
+class CountingSessions:
+    """Quiz-session fake that counts ``listIndexes`` (``index_information``)."""
+
+    def __init__(self):
+        self.indexes = {}
+        self.list_indexes = 0
+        self.inserted = []
+
+    def index_information(self):
+        self.list_indexes += 1
+        return dict(self.indexes)
+
+    def create_index(self, keys, **kwargs):
+        self.indexes[kwargs["name"]] = {
+            "key": list(keys),
+            "unique": kwargs.get("unique"),
+            "partialFilterExpression": kwargs.get("partialFilterExpression"),
+        }
+        return kwargs["name"]
+
+    def insert_one(self, doc):
+        self.inserted.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+
+def _install(monkeypatch):
+    sessions = CountingSessions()
+    monkeypatch.setattr(database, "quiz_sessions_collection", sessions)
+    monkeypatch.setattr(database, "_now_utc", lambda: datetime(2026, 9, 1, 12, 0, 0))
+    return sessions
+
+
+def _launch(user_id):
+    return access.create_quiz_session_strict(
+        user_id=user_id,
+        mode="level",
+        question_ids=["q1"],
+        questions_data=[{"question": "Q1"}],
+        level_key="easy",
+        level_name="Easy",
+        time_limit=30,
+        chat_id=100,
+    )
+
+
+def test_launches_after_boot_issue_no_list_indexes(monkeypatch):
+    sessions = _install(monkeypatch)
+
+    assert access.ensure_active_session_unique_index() is True
+    boot_calls = sessions.list_indexes
+    for user_id in range(20):
+        _launch(user_id)
+
+    assert sessions.list_indexes == boot_calls == 1
+    assert len(sessions.inserted) == 20
+    assert SCHEMA_READINESS.is_ready(access.ACTIVE_SESSION_SCHEMA, sessions)
+
+
+def test_unverified_handle_is_proven_lazily_once(monkeypatch):
+    sessions = _install(monkeypatch)
+
+    _launch(1)
+    _launch(2)
+
+    assert sessions.list_indexes == 1
+    assert access._ACTIVE_INDEX in sessions.indexes
+
+
+def test_index_dropped_at_runtime_fails_launches_closed_until_repaired(monkeypatch):
+    sessions = _install(monkeypatch)
+    _launch(1)
+    sessions.indexes.pop(access._ACTIVE_INDEX)
+
+    results = SCHEMA_READINESS.revalidate()
+
+    assert results[access.ACTIVE_SESSION_SCHEMA] is False
+    assert SCHEMA_READINESS.metrics()["requirements"][access.ACTIVE_SESSION_SCHEMA] == "failed"
+    calls = sessions.list_indexes
+    with pytest.raises(access.QuizSessionAccessSchemaInvalid, match="failed revalidation"):
+        _launch(2)
+    assert len(sessions.inserted) == 1
+    assert sessions.list_indexes == calls
+
+    # The next pass retries the idempotent ensure and reopens launches.
+    assert SCHEMA_READINESS.revalidate()[access.ACTIVE_SESSION_SCHEMA] is True
+    _launch(3)
+    assert len(sessions.inserted) == 2
+
+
+def test_launch_attribution_indexes_are_verified_once_per_database():
+    class Attributions:
+        def __init__(self):
+            self.indexes = {}
+            self.list_indexes = 0
+
+        def create_index(self, keys, *, name, **options):
+            self.indexes[name] = {"key": list(keys), **options}
+
+        def index_information(self):
+            self.list_indexes += 1
+            return dict(self.indexes)
+
+        def update_one(self, *_args, **_kwargs):
+            return None
+
+    collection = Attributions()
+    db = type("Db", (), {"__getitem__": lambda self, name: collection})()
+    context = parse_launch_param("v1_site_app__home")
+
+    for auth_date in range(1_700_000_000, 1_700_000_010):
+        persist_launch_attribution(
+            database=db,
+            user_id=7,
+            auth_date=auth_date,
+            query_id=None,
+            context=context,
+        )
+
+    assert collection.list_indexes == 1
+
+
+_HANDLE = object()
+
+
+def _requirement(name, ensure, handle=_HANDLE, audit=lambda _h: None):
+    return SchemaRequirement(
+        name=name,
+        spec={"index": name},
+        handle=lambda: handle,
+        ensure=ensure,
+        audit=audit,
+    )
+
+
+def test_boot_verification_runs_concurrently_and_records_version():
+    registry = SchemaReadinessRegistry()
+    barrier = threading.Barrier(3, timeout=2)
+
+    def ensure_for(name):
+        def ensure(handle):
+            barrier.wait()
+            registry.mark_ready(name, handle)
+
+        return ensure
+
+    for name in ("a", "b", "c"):
+        registry.register(_requirement(name, ensure_for(name)))
+    registry.register(_requirement("unconfigured", ensure_for("x"), handle=None))
+
+    version = registry.verify_all()
+
+    assert version is not None and registry.schema_version == version
+    assert registry.metrics()["requirements"] == {
+        "a": "ready",
+        "b": "ready",
+        "c": "ready",
+        "unconfigured": "unverified",
+    }
+
+
+def test_boot_verification_raises_first_failure_after_all_checks():
+    registry = SchemaReadinessRegistry()
+    seen = []
+
+    def broken(_handle):
+        seen.append("broken")
+        raise RuntimeError("unique index has incompatible options")
+
+    def healthy(handle):
+        seen.append("healthy")
+        registry.mark_ready("healthy", handle)
+
+    registry.register(_requirement("broken", broken))
+    registry.register(_requirement("healthy", healthy))
+
+    with pytest.raises(RuntimeError, match="incompatible options"):
+        registry.verify_all()
+    assert sorted(seen) == ["broken", "healthy"]
+    assert registry.schema_version is None
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import database
+import legacy_session_access as access
+import session_question_refs as refs
+from question_identity import get_qid
+from questions import QUESTION_BANK
+from web_api import quiz
+
+
+class RecordingSessions:
+    def __init__(self):
+        self.inserted = []
+
+    def index_information(self):
+        return {
+            access._ACTIVE_INDEX: {
+                "key": [("user_id", 1)],
+                "unique": True,
+                "partialFilterExpression": {"status": "in_progress"},
+            }
+        }
+
+    def insert_one(self, doc):
+        self.inserted.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+
+def _bank_questions(count=3):
+    return [QUESTION_BANK.at(slot) for slot in range(count)]
+
+
+def _create_bot_session(monkeypatch, questions):
+    collection = RecordingSessions()
+    monkeypatch.setattr(database, "quiz_sessions_collection", collection)
+    monkeypatch.setattr(database, "_now_utc", lambda: datetime(2026, 10, 1))
+    doc = access.create_quiz_session_strict(
+        user_id=42,
+        mode="level",
+        question_ids=[get_qid(question) for question in questions],
+        questions_data=questions,
+        level_key="easy",
+        level_name="Easy",
+        time_limit=None,
+        chat_id=100,
+    )
+    assert collection.inserted == [doc]
+    return doc
+
+
+def test_miniapp_bank_questions_round_trip_through_refs():
+    selected = _bank_questions()
+
+    prepared, fields = quiz.prepare_session_questions(selected)
+
+    assert "questions" not in fields
+    assert fields["question_bank_version"] == QUESTION_BANK.content_hash
+    assert [ref["id"] for ref in fields["question_refs"]] == [q["id"] for q in selected]
+    assert quiz.session_questions(fields) == prepared
+    for question, card in zip(selected, prepared, strict=True):
+        assert card["options"][card["correct"]] == question["options"][question["correct"]]
+
+
+def test_embedded_miniapp_sessions_still_read_and_foreign_cards_stay_embedded():
+    foreign = {"id": "drill-1", "question": "Q", "options": ["a", "b"], "correct": 1}
+
+    prepared, fields = quiz.prepare_session_questions([*_bank_questions(1), foreign])
+
+    assert fields == {"questions": prepared}
+    assert quiz.session_questions(fields) is prepared
+
+
+def test_unresolvable_miniapp_refs_read_as_an_empty_session():
+    before = refs.QUESTION_REF_METRICS.metrics()
+    session = {
+        "question_refs": [{"id": QUESTION_BANK.at(0)["id"], "order": [0]}],
+        "question_bank_version": "previous-deploy",
+    }
+
+    assert quiz.session_questions(session) == []
+
+    after = refs.QUESTION_REF_METRICS.metrics()
+    assert after["hydration_failures"] == before["hydration_failures"] + 1
+    assert after["version_mismatches"] == before["version_mismatches"] + 1
+
+
+class EditedBank:
+    """The live bank after a deploy that changed one card in place."""
+
+    def __init__(self, edited):
+        self.edited = edited
+        self.content_hash = "next-deploy"
+
+    def question(self, question_id):
+        if question_id == self.edited["id"]:
+            return self.edited
+        return QUESTION_BANK.question(question_id)
+
+
+def _answer_key_edited(question):
+    edited = dict(question)
+    edited["correct"] = (question["correct"] + 1) % len(question["options"])
+    return edited
+
+
+def test_miniapp_card_with_an_edited_answer_key_is_not_hydrated(monkeypatch):
+    selected = _bank_questions(2)
+    _prepared, fields = quiz.prepare_session_questions(selected)
+    _prepared, untouched = quiz.prepare_session_questions(selected[:1])
+    bank = EditedBank(_answer_key_edited(selected[1]))
+    monkeypatch.setattr(refs, "_bank", lambda: bank)
+    before = refs.QUESTION_REF_METRICS.metrics()["hydration_failures"]
+
+    assert quiz.session_questions(fields) == []
+    assert refs.QUESTION_REF_METRICS.metrics()["hydration_failures"] == before + 1
+    # Cards the deploy left alone still hydrate despite the new bank version.
+    assert len(quiz.session_questions(untouched)) == 1
+
+
+def test_digestless_miniapp_refs_require_the_same_bank_version(monkeypatch):
+    question = QUESTION_BANK.at(0)
+    ref = {"id": question["id"], "order": list(range(len(question["options"])))}
+    session = {"question_refs": [ref], "question_bank_version": QUESTION_BANK.content_hash}
+
+    assert len(quiz.session_questions(session)) == 1
+
+    monkeypatch.setattr(refs, "_bank", lambda: EditedBank(_answer_key_edited(question)))
+    assert quiz.session_questions(session) == []
+
+
+def test_bot_sessions_store_ids_and_hydrate_from_the_bank(monkeypatch):
+    questions = _bank_questions()
+
+    doc = _create_bot_session(monkeypatch, questions)
+
+    assert "questions_data" not in doc
+    assert doc["question_bank_version"] == QUESTION_BANK.content_hash
+    assert refs.legacy_session_questions(doc) == questions
+
+
+def test_bot_sessions_embed_questions_the_bank_does_not_hold(monkeypatch):
+    questions = [{"question": "Retry drill", "options": ["a", "b"], "correct": 0}]
+
+    doc = _create_bot_session(monkeypatch, questions)
+
+    assert doc["questions_data"] == questions
+    assert "question_bank_version" not in doc
+    assert refs.legacy_session_questions(doc) == questions
+
+
+def test_bot_session_with_a_missing_question_hydrates_to_none():
+    session = {
+        "_id": "s1",
+        "question_ids": [get_qid(QUESTION_BANK.at(0)), "edited-away"],
+        "question_bank_version": QUESTION_BANK.content_hash,
+    }
+
+    assert refs.legacy_session_questions(session) is None
+
+
+def test_bot_session_card_with_an_edited_answer_key_is_not_hydrated(monkeypatch):
+    questions = _bank_questions(2)
+    doc = _create_bot_session(monkeypatch, questions)
+    untouched = _create_bot_session(monkeypatch, questions[:1])
+    # The answer key changed but text and options did not, so get_qid is stable.
+    edited = _answer_key_edited(questions[1])
+    index = {get_qid(question): question for question in questions}
+    index[get_qid(edited)] = edited
+    monkeypatch.setattr(refs, "_bank", lambda: EditedBank(edited))
+    monkeypatch.setattr(refs, "_legacy_index", lambda: index)
+
+    assert len(doc["question_digests"]) == 2
+    assert refs.legacy_session_questions(doc) is None
+    assert refs.legacy_session_questions(untouched) == questions[:1]
+
+
+def test_digestless_bot_sessions_require_the_same_bank_version(monkeypatch):
+    question = QUESTION_BANK.at(0)
+    session = {
+        "question_ids": [get_qid(question)],
+        "question_bank_version": QUESTION_BANK.content_hash,
+    }
+
+    assert refs.legacy_session_questions(session) == [question]
+
+    monkeypatch.setattr(refs, "_bank", lambda: EditedBank(question))
+    monkeypatch.setattr(refs, "_legacy_index", lambda: {get_qid(question): question})
+    assert refs.legacy_session_questions(session) is None
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import gzip
+import re
+
+import pytest
+
+from web_api import routes
+from web_api.static_assets import IMMUTABLE_CACHE_CONTROL, StaticBundle
+
+
+@pytest.fixture
+def bundle_dir(tmp_path):
+    (tmp_path / "index.html").write_text(
+        '<script src="https://telegram.org/js/telegram-web-app.js"></script>\n'
+        '<link rel="stylesheet" href="style.css">\n'
+        '<script src="app.js"></script>\n',
+        encoding="utf-8",
+    )
+    (tmp_path / "app.js").write_text("console.log('quiz');\n" * 200, encoding="utf-8")
+    (tmp_path / "style.css").write_text("body{}", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def client(bundle_dir, monkeypatch):
+    monkeypatch.setattr(routes, "STATIC_DIR", bundle_dir)
+    return routes.create_app().test_client()
+
+
+def test_index_points_at_content_versioned_assets(bundle_dir):
+    bundle = StaticBundle.load(bundle_dir)
+    html = bundle.get("index.html").variants["identity"].decode()
+
+    assert f'src="app.js?v={bundle.get("app.js").version}"' in html
+    assert f'href="style.css?v={bundle.get("style.css").version}"' in html
+    assert 'src="https://telegram.org/js/telegram-web-app.js"' in html
+
+
+def test_versioned_asset_is_immutable_and_unversioned_revalidates(client, bundle_dir):
+    version = StaticBundle.load(bundle_dir).get("app.js").version
+
+    pinned = client.get(f"/miniapp/app.js?v={version}")
+    assert pinned.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+
+    stale = client.get("/app.js?v=old")
+    assert stale.headers["Cache-Control"] == "no-cache"
+    assert stale.headers["ETag"] == f'"{version}"'
+    assert stale.data == (bundle_dir / "app.js").read_bytes()
+
+
+def test_precompressed_variant_and_conditional_requests(client, bundle_dir):
+    response = client.get("/miniapp/app.js", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.data) == (bundle_dir / "app.js").read_bytes()
+
+    etag = response.headers["ETag"]
+    repeat = client.get(
+        "/miniapp/app.js", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+
+    # A variant's ETag never validates another encoding.
+    identity = client.get("/miniapp/app.js", headers={"If-None-Match": etag})
+    assert identity.status_code == 200
+    assert "Content-Encoding" not in identity.headers
+
+
+def test_index_revalidates_and_unknown_paths_keep_their_fallbacks(client):
+    index = client.get("/")
+    assert index.headers["Cache-Control"] == "no-cache"
+    assert re.search(r'app\.js\?v=[0-9a-f]{20}', index.get_data(as_text=True))
+    assert client.get("/", headers={"If-None-Match": index.headers["ETag"]}).status_code == 304
+
+    assert client.get("/miniapp/quiz/deep-link").data == index.data
+    assert client.get("/missing.js").status_code == 404
+
+
+def test_catalog_is_answered_with_304_when_unchanged(client):
+    first = client.get("/api/catalog")
+    again = client.get("/api/catalog", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert again.status_code == 304
+    assert again.data == b""
@@ -0,0 +1,101 @@
+import asyncio
+import contextvars
+import threading
+
+import storage_executor
+from storage_executor import StorageLane
+
+REQUEST = contextvars.ContextVar("request", default=None)
+
+
+def test_lane_runs_off_loop_with_kwargs_context_and_metrics():
+    lane = StorageLane("test", workers=2, queue=0)
+    loop_thread = threading.get_ident()
+
+    def call(value, *, scale):
+        return value * scale, REQUEST.get(), threading.get_ident()
+
+    async def scenario():
+        REQUEST.set("r1")
+        return await lane.run(call, 3, scale=2)
+
+    try:
+        value, request, thread = asyncio.run(scenario())
+    finally:
+        lane.shutdown()
+
+    assert (value, request) == (6, "r1")
+    assert thread != loop_thread
+    metrics = lane.metrics()
+    assert (metrics["submitted"], metrics["completed"], metrics["inflight"]) == (1, 1, 0)
+    assert metrics["queue_wait"]["count"] == metrics["run_time"]["count"] == 1
+
+
+def test_admission_is_bounded_and_saturation_is_counted():
+    lane = StorageLane("test", workers=1, queue=1)
+    release = threading.Event()
+    started = []
+
+    def blocking(index):
+        started.append(index)
+        release.wait(2)
+        return index
+
+    async def scenario():
+        tasks = [asyncio.create_task(lane.run(blocking, index)) for index in range(4)]
+        await asyncio.sleep(0.05)
+        inflight = lane.metrics()["inflight"]
+        release.set()
+        return inflight, await asyncio.gather(*tasks)
+
+    try:
+        inflight, results = asyncio.run(scenario())
+    finally:
+        release.set()
+        lane.shutdown()
+
+    assert inflight == 2
+    assert results == [0, 1, 2, 3]
+    assert lane.metrics()["saturated"] == 2
+
+
+def test_busy_background_lane_does_not_delay_interactive_calls(monkeypatch):
+    background = StorageLane("background", workers=1, queue=0)
+    interactive = StorageLane("interactive", workers=1, queue=0)
+    monkeypatch.setitem(storage_executor.LANES, storage_executor.BACKGROUND, background)
+    monkeypatch.setitem(storage_executor.LANES, storage_executor.INTERACTIVE, interactive)
+    release = threading.Event()
+
+    async def scenario():
+        drain = asyncio.create_task(storage_executor.run_background(release.wait, 2))
+        await asyncio.sleep(0.02)
+        answer = await asyncio.wait_for(storage_executor.run_interactive(lambda: "ok"), 0.5)
+        release.set()
+        await drain
+        return answer
+
+    try:
+        assert asyncio.run(scenario()) == "ok"
+    finally:
+        release.set()
+        background.shutdown()
+        interactive.shutdown()
+
+
+def test_failures_are_counted_and_reraised():
+    lane = StorageLane("test", workers=1, queue=0)
+
+    def broken():
+        raise ValueError("boom")
+
+    async def scenario():
+        try:
+            await lane.run(broken)
+        except ValueError as exc:
+            return str(exc)
+
+    try:
+        assert asyncio.run(scenario()) == "boom"
+    finally:
+        lane.shutdown()
+    assert lane.metrics()["failed"] == 1
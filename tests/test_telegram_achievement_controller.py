@@ -56,7 +56,7 @@ def test_achievement_db_touch_and_stats_read_run_off_event_loop(monkeypatch):
     def touch(user_id):
         calls.append(("touch", user_id, threading.get_ident()))
 
-    def get_stats(user_id):
+    def get_stats(user_id, fields=None):
         calls.append(("stats", user_id, threading.get_ident()))
         return {
             "achievements": {"first_steps": "15.08.2026"},
@@ -92,8 +92,8 @@ def test_achievement_db_touch_and_stats_read_run_off_event_loop(monkeypatch):
 def test_achievement_screen_handles_missing_user_stats(monkeypatch):
     monkeypatch.setattr(achievements, "ACHIEVEMENTS", CATALOG)
     monkeypatch.setattr(achievements, "get_user_data", lambda: {})
-    monkeypatch.setattr(achievements, "touch_user_activity", lambda _user_id: None)
-    monkeypatch.setattr(achievements, "get_user_stats", lambda _user_id: None)
+    monkeypatch.setattr(achievements, "touch_user_activity", lambda _user_id, fields=None: None)
+    monkeypatch.setattr(achievements, "get_user_stats", lambda _user_id, fields=None: None)
     query = _Query()
 
     _run(achievements.show_achievements(_Update(query), object()))
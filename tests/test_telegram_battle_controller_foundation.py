@@ -24,7 +24,7 @@ def test_question_delivery_precedes_durable_timer_marker():
     send = async_function("send_battle_question")
     assert "await bot.send_message(" in send
     assert "mark_battle_question_sent" in send
-    assert "asyncio.to_thread(" in send
+    assert "run_interactive(" in send
     assert send.index("await bot.send_message(") < send.index("mark_battle_question_sent")
 
 
@@ -34,7 +34,7 @@ def test_answer_cas_precedes_telegram_feedback():
     assert "resolve_owned_open_battle_callback" in answer
     assert "resolve_battle_option(" in answer
     assert "record_battle_answer_once" in answer
-    assert answer.count("asyncio.to_thread(") >= 2
+    assert answer.count("run_interactive(") >= 2
     assert "await query.answer(" in answer
     assert answer.index("record_battle_answer_once") < answer.index("await query.answer(")
     for mutation in (
@@ -49,7 +49,7 @@ def test_terminal_ledger_precedes_participant_receipt_and_outbox_final():
     finish = async_function("finish_battle_for_user")
     assert "completed_battle_result_inputs" in finish
     assert "record_battle_result" in finish
-    assert finish.count("asyncio.to_thread(") >= 2
+    assert finish.count("run_interactive(") >= 2
     assert finish.index("completed_battle_result_inputs") < finish.index("record_battle_result")
     assert "claim_final_battle" in finish
     assert "delivery_protocol=BATTLE_DELIVERY_PROTOCOL_OUTBOX" in "".join(finish.split())
@@ -60,14 +60,14 @@ def test_creator_cannot_start_before_opponent_exists():
     start = async_function("start_battle_questions")
     assert 'battle.get("opponent_id") is None' in start
     assert "ensure_battle_progress" in start
-    assert "asyncio.to_thread(" in start
+    assert "run_interactive(" in start
     assert start.index('battle.get("opponent_id") is None') < start.index("ensure_battle_progress")
 
 
 def test_cancel_never_uses_legacy_destructive_delete():
     cancel = async_function("cancel_battle")
     assert "cancel_unstarted_battle" in cancel
-    assert "asyncio.to_thread(" in cancel
+    assert "run_interactive(" in cancel
     assert "delete_battle_for_participant(" not in cancel
 
 
@@ -119,7 +119,7 @@ def test_drain_recovers_pending_battle_after_restart(monkeypatch):
     )
     delivered = []
 
-    async def deliver(bot_arg, battle_id, *, start_payload_builder):
+    async def deliver(bot_arg, battle_id, *, start_payload_builder, **_kwargs):
         assert bot_arg is bot
         assert start_payload_builder is payload
         delivered.append(battle_id)
@@ -116,7 +116,7 @@ def test_handle_start_deep_link_claims_exact_battle_and_routes_creator_notice(mo
         claims.append((args, kwargs))
         return _battle(battle_id)
 
-    async def deliver(bot, battle_id_arg, *, start_payload_builder):
+    async def deliver(bot, battle_id_arg, *, start_payload_builder, **_kwargs):
         ready_calls.append((bot, battle_id_arg, start_payload_builder))
         return True
 
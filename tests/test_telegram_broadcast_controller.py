@@ -46,6 +46,17 @@ def run(coro):
     return asyncio.run(coro)
 
 
+@pytest.fixture(autouse=True)
+def _fresh_rate_limiter(monkeypatch):
+    # The production bucket is process-wide; a RetryAfter in one test must not
+    # pause the drains of the next one.
+    monkeypatch.setattr(
+        broadcasts,
+        "BROADCAST_RATE_LIMITER",
+        broadcasts.BroadcastRateLimiter(None),
+    )
+
+
 def test_recipient_snapshot_distinguishes_empty_collection_from_outage(monkeypatch):
     class Users:
         def __init__(self, docs=None, error=None):
@@ -199,7 +210,7 @@ def _install_one_delivery(monkeypatch, *, send_error=None):
         "claim_token": "claim",
         "user_id": "10",
     }
-    claims = iter([delivery, None])
+    claims = iter([[delivery], []])
     monkeypatch.setattr(
         broadcasts,
         "get_pending_broadcasts",
@@ -209,7 +220,7 @@ def _install_one_delivery(monkeypatch, *, send_error=None):
     )
     monkeypatch.setattr(
         broadcasts,
-        "claim_next_broadcast_delivery",
+        "claim_broadcast_deliveries",
         lambda **_kwargs: next(claims),
     )
     monkeypatch.setattr(
@@ -241,7 +252,7 @@ def test_delivery_worker_materializes_pending_parent_before_claim(monkeypatch):
         "ensure_broadcast_fanout",
         lambda stored: prepared.append(stored["_id"]) or {**stored, "fanout_ready": True},
     )
-    monkeypatch.setattr(broadcasts, "claim_next_broadcast_delivery", lambda **_kwargs: None)
+    monkeypatch.setattr(broadcasts, "claim_broadcast_deliveries", lambda **_kwargs: [])
     monkeypatch.setattr(
         broadcasts,
         "sync_broadcast_completion",
@@ -346,3 +357,169 @@ def test_transient_network_failure_releases_lease_and_defers(monkeypatch):
     assert summary.deferred == 1
     assert summary.delivered == 0
     assert releases[0][0:2] == (delivery["_id"], "claim")
+
+
+def _install_many_deliveries(monkeypatch, count, *, parent_text="hello"):
+    rows = [
+        {
+            "_id": f"telegram_update_1:{user_id}",
+            "broadcast_id": "telegram_update_1",
+            "claim_token": "batch",
+            "user_id": str(user_id),
+        }
+        for user_id in range(1, count + 1)
+    ]
+    claim_calls = []
+
+    def claim(*, limit, broadcast_id=None):
+        claim_calls.append(limit)
+        batch, rows[:] = rows[:limit], rows[limit:]
+        return batch
+
+    parent_reads = []
+    monkeypatch.setattr(
+        broadcasts,
+        "get_pending_broadcasts",
+        lambda limit=20: [
+            {"_id": "telegram_update_1", "fanout_ready": True, "text": parent_text}
+        ],
+    )
+    monkeypatch.setattr(broadcasts, "claim_broadcast_deliveries", claim)
+    monkeypatch.setattr(
+        broadcasts,
+        "get_broadcast",
+        lambda broadcast_id: parent_reads.append(broadcast_id)
+        or {"_id": broadcast_id, "text": parent_text},
+    )
+    monkeypatch.setattr(
+        broadcasts,
+        "sync_broadcast_completion",
+        lambda _broadcast_id: {"completed": False},
+    )
+    return claim_calls, parent_reads
+
+
+class ConcurrentBot:
+    def __init__(self, *, retry_after_on=None):
+        self.sent = []
+        self.active = 0
+        self.max_active = 0
+        self.retry_after_on = retry_after_on
+
+    async def send_message(self, *, chat_id, text):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if chat_id == self.retry_after_on:
+                raise RetryAfter(30)
+            self.sent.append((chat_id, text))
+        finally:
+            self.active -= 1
+
+
+def test_drain_claims_in_batches_sends_concurrently_and_reads_parent_once(monkeypatch):
+    claim_calls, parent_reads = _install_many_deliveries(monkeypatch, 7)
+    monkeypatch.setattr(broadcasts, "BROADCAST_CLAIM_BATCH", 3)
+    acks = []
+    monkeypatch.setattr(
+        broadcasts,
+        "mark_broadcast_delivery_delivered",
+        lambda delivery_id, token: acks.append(delivery_id) or True,
+    )
+    bot = ConcurrentBot()
+
+    summary = run(broadcasts.drain_broadcast_outbox(bot, limit=10, concurrency=3))
+
+    assert claim_calls == [3, 3, 3, 3]
+    assert summary.claim_round_trips == 4
+    assert summary.claimed == 7
+    assert summary.delivered == 7
+    assert sorted(chat_id for chat_id, _text in bot.sent) == list(range(1, 8))
+    assert bot.max_active == 3
+    # The pending listing primes the per-drain cache; no per-recipient reread.
+    assert parent_reads == []
+    assert summary.elapsed_seconds > 0
+    assert summary.throughput_per_second > 0
+    assert summary.rate_limited is False
+
+
+def test_retry_after_pauses_shared_bucket_and_returns_unsent_rows(monkeypatch):
+    _install_many_deliveries(monkeypatch, 4)
+    monkeypatch.setattr(
+        broadcasts,
+        "mark_broadcast_delivery_delivered",
+        lambda delivery_id, token: True,
+    )
+    deferrals = []
+    monkeypatch.setattr(
+        broadcasts,
+        "defer_broadcast_delivery",
+        lambda delivery_id, token, *, delay_seconds, error: deferrals.append(
+            (delivery_id, delay_seconds)
+        )
+        or True,
+    )
+    monkeypatch.setattr(
+        broadcasts,
+        "release_broadcast_delivery",
+        lambda *_args, **_kwargs: (_ for _ in ()).throw(
+            AssertionError("paused rows must be deferred, not released")
+        ),
+    )
+    limiter = broadcasts.BroadcastRateLimiter(1000)
+    bot = ConcurrentBot(retry_after_on=1)
+
+    summary = run(
+        broadcasts.drain_broadcast_outbox(
+            bot, limit=4, concurrency=1, rate_limiter=limiter
+        )
+    )
+
+    assert summary.rate_limited is True
+    assert summary.delivered == 0
+    assert summary.deferred == 4
+    assert deferrals[0] == ("telegram_update_1:1", 30.0)
+    assert all(delay > 29 for _delivery_id, delay in deferrals)
+    assert limiter.paused_seconds() > 29
+    assert limiter.snapshot()["rate_per_second"] == 500
+
+    # The next tick sees the shared pause and does not claim at all.
+    claims = []
+    monkeypatch.setattr(
+        broadcasts,
+        "claim_broadcast_deliveries",
+        lambda **kwargs: claims.append(kwargs) or [],
+    )
+    second = run(broadcasts.drain_broadcast_outbox(bot, limit=4, rate_limiter=limiter))
+    assert claims == []
+    assert second.rate_limited is True
+
+
+def test_token_bucket_spaces_sends_and_recovers_rate_after_success():
+    now = [100.0]
+    limiter = broadcasts.BroadcastRateLimiter(10, clock=lambda: now[0])
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    async def scenario():
+        original = broadcasts.asyncio.sleep
+        broadcasts.asyncio.sleep = fake_sleep
+        try:
+            assert await limiter.acquire(deadline=1000) is True
+            assert await limiter.acquire(deadline=1000) is True
+            limiter.pause(5)
+            assert await limiter.acquire(deadline=now[0] + 1) is False
+            assert await limiter.acquire(deadline=1000) is True
+        finally:
+            broadcasts.asyncio.sleep = original
+
+    asyncio.run(scenario())
+    assert sleeps[0] == pytest.approx(0.1)
+    assert limiter.snapshot()["rate_per_second"] == 5
+    for _ in range(10):
+        limiter.record_success()
+    assert limiter.snapshot()["rate_per_second"] == 10
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import telegram_quiz_runtime_controller as quiz
+from legacy_live_answer import LiveAnswerOutcome
+
+USER_ID = 4242
+
+
+def _outcome(**overrides):
+    values = {
+        "applied": True,
+        "persisted": True,
+        "question_index": 0,
+        "option_index": 1,
+        "question_id": "q-1",
+        "user_answer": "beta",
+        "correct_text": "beta",
+        "is_correct": True,
+        "latency_seconds": 1.5,
+        "current_index": 1,
+        "correct_count": 1,
+        "current_streak": 1,
+        "max_streak": 1,
+        "fastest_answer": 1.5,
+    }
+    values.update(overrides)
+    return LiveAnswerOutcome(**values)
+
+
+class FakeBot:
+    def __init__(self):
+        self.edits = []
+
+    async def edit_message_text(self, **kwargs):
+        self.edits.append(kwargs["text"])
+
+
+class FakeQuery:
+    def __init__(self):
+        self.from_user = SimpleNamespace(id=USER_ID)
+        self.data = "qa:attempt:0:1"
+        self.message = SimpleNamespace(reply_markup=None)
+        self.answers = []
+
+    async def answer(self, *args, **kwargs):
+        self.answers.append((args, kwargs))
+
+
+def _install(monkeypatch, *, animation_gate: asyncio.Event | None = None):
+    data = {
+        "quiz_chat_id": 1,
+        "quiz_message_id": 77,
+        "current_options": ["alpha", "beta"],
+        "questions": [{}, {}],
+        "level_key": "easy_p1",
+        "timer_task": None,
+        "countdown_task": None,
+        "feedback_task": None,
+    }
+    advanced = []
+    stats = []
+
+    async def animate(*args):
+        if animation_gate is not None:
+            await animation_gate.wait()
+
+    async def after_answer(bot, user_id, outcome):
+        advanced.append((user_id, outcome.current_index))
+
+    monkeypatch.setitem(quiz.user_data, USER_ID, data)
+    monkeypatch.setattr(quiz, "apply_live_answer_once", lambda *args, **kwargs: _outcome())
+    monkeypatch.setattr(quiz, "animate_answer_buttons", animate)
+    monkeypatch.setattr(quiz, "_after_answer", after_answer)
+    monkeypatch.setattr(quiz, "record_question_stat", lambda *args: stats.append(args))
+    monkeypatch.setattr(quiz, "FEEDBACK_DELAY_CORRECT", 0.01)
+    monkeypatch.setattr(quiz, "FEEDBACK_DELAY_WRONG", 0.01)
+    return data, advanced, stats
+
+
+def test_user_lock_is_released_before_answer_presentation(monkeypatch):
+    gate = asyncio.Event()
+    data, advanced, stats = _install(monkeypatch, animation_gate=gate)
+    bot = FakeBot()
+    query = FakeQuery()
+
+    async def scenario():
+        update = SimpleNamespace(callback_query=query)
+        await quiz._handle_inline_answer(update, SimpleNamespace(bot=bot), "qa")
+        task = data["feedback_task"]
+        assert task is not None and not task.done()
+        assert not quiz.get_user_lock(USER_ID).locked()
+        assert query.answers and stats and advanced == []
+        gate.set()
+        await asyncio.wait_for(task, timeout=1)
+
+    asyncio.run(scenario())
+
+    assert bot.edits == ["✅ *Верно!*\n\n_beta_"]
+    assert advanced == [(USER_ID, 1)]
+    assert data["feedback_task"] is None
+
+
+def test_cancelling_runtime_timers_cancels_pending_feedback(monkeypatch):
+    gate = asyncio.Event()
+    data, advanced, _stats = _install(monkeypatch, animation_gate=gate)
+
+    async def scenario():
+        update = SimpleNamespace(callback_query=FakeQuery())
+        await quiz._handle_inline_answer(update, SimpleNamespace(bot=FakeBot()), "qa")
+        task = data["feedback_task"]
+        quiz._cancel_runtime_timer(data)
+        gate.set()
+        await asyncio.gather(task, return_exceptions=True)
+        return task
+
+    task = asyncio.run(scenario())
+
+    assert task.cancelled()
+    assert advanced == []
+    assert data["feedback_task"] is None
+
+
+def test_superseded_session_does_not_advance_after_feedback(monkeypatch):
+    data, advanced, _stats = _install(monkeypatch)
+
+    async def scenario():
+        update = SimpleNamespace(callback_query=FakeQuery())
+        await quiz._handle_inline_answer(update, SimpleNamespace(bot=FakeBot()), "qa")
+        task = data["feedback_task"]
+        quiz.user_data[USER_ID] = dict(data)
+        await asyncio.wait_for(task, timeout=1)
+
+    asyncio.run(scenario())
+
+    assert advanced == []
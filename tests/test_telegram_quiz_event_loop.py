@@ -61,7 +61,7 @@ def test_quiz_latency_sensitive_persistence_uses_thread_boundary():
 
 def test_blocking_boundary_has_no_process_local_mutex_or_retry_loop():
     source = inspect.getsource(quiz._run_blocking_io)
-    assert "asyncio.to_thread" in source
+    assert "run_interactive(" in source
     assert "Lock(" not in source
     assert "while " not in source
     assert "sleep(" not in source
@@ -103,3 +103,15 @@ def test_inaccuracy_uses_durable_session_and_worker_threads(monkeypatch):
     assert len(accept_threads) == 1
     assert lookup_threads[0] != event_loop_thread
     assert accept_threads[0] != event_loop_thread
+
+
+def test_report_job_counts_sends_not_listed_reports(monkeypatch):
+    from legacy_report_delivery_drain import ReportDeliveryDrainSummary
+
+    async def drain(bot, **_kwargs):
+        # Two reports were listed, but both are still waiting out a retry-after.
+        return ReportDeliveryDrainSummary(reports_seen=2, stage_sends=0, deferred=2)
+
+    monkeypatch.setattr(reports, "drain_report_outbox", drain)
+
+    assert run(reports.report_delivery_job(SimpleNamespace(bot=object()))) == 0
@@ -1,7 +1,8 @@
 import asyncio
 from types import SimpleNamespace
 
-from telegram.error import RetryAfter
+import pytest
+from telegram.error import BadRequest, RetryAfter
 
 import telegram_result_delivery_controller as controller
 
@@ -133,3 +134,178 @@ def test_memory_only_renderer_remains_direct(monkeypatch):
     run(quiz._render_result(bot, 42, SimpleNamespace()))
 
     assert bot.calls == [((), {"chat_id": 777, "text": "memory result"})]
+
+
+class PhotoBot(Bot):
+    async def send_photo(self, **kwargs):
+        self.calls.append(("photo", kwargs))
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(
+            message_id=len(self.calls),
+            photo=[SimpleNamespace(file_id="small"), SimpleNamespace(file_id="uploaded-id")],
+        )
+
+
+class Pipeline:
+    def __init__(self, payload=b"\x89PNG card"):
+        self.payload = payload
+        self.renders = []
+
+    async def render(self, bot, *, user_id, score, total):
+        self.renders.append((user_id, score, total))
+        return self.payload
+
+
+def _image_cards(monkeypatch, pipeline):
+    monkeypatch.setattr(controller, "_IMAGE_PIPELINE", pipeline)
+
+
+def test_image_card_uploads_photo_and_records_file_id_before_ack(monkeypatch):
+    bot = PhotoBot()
+    pipeline = Pipeline()
+    _image_cards(monkeypatch, pipeline)
+    steps = []
+    monkeypatch.setattr(controller, "claim_result_card_delivery", lambda *_args, **_kwargs: _claim())
+    monkeypatch.setattr(
+        controller,
+        "record_result_card_photo",
+        lambda session_id, user_id, token, file_id: steps.append(("photo", token, file_id)) or True,
+    )
+    monkeypatch.setattr(
+        controller,
+        "mark_result_card_delivered",
+        lambda session_id, user_id, token: steps.append(("ack", token)) or True,
+    )
+
+    assert run(controller.deliver_result_card_once(bot, "s1", "42")) is True
+    assert pipeline.renders == [(42, 2, 3)]
+    assert bot.calls == [(
+        "photo",
+        {
+            "chat_id": 777,
+            "photo": b"\x89PNG card",
+            "caption": "*rich* result",
+            "parse_mode": "Markdown",
+        },
+    )]
+    assert steps == [("photo", "token-1", "uploaded-id"), ("ack", "token-1")]
+
+
+def test_stored_file_id_is_resent_without_rendering(monkeypatch):
+    bot = PhotoBot()
+    pipeline = Pipeline()
+    _image_cards(monkeypatch, pipeline)
+    claim = _claim()
+    claim["marker"]["photo_file_id"] = "uploaded-id"
+    monkeypatch.setattr(controller, "claim_result_card_delivery", lambda *_args, **_kwargs: claim)
+    recorded = []
+    monkeypatch.setattr(controller, "record_result_card_photo", lambda *args: recorded.append(args) or True)
+    monkeypatch.setattr(controller, "mark_result_card_delivered", lambda *_args: True)
+
+    assert run(controller.deliver_result_card_once(bot, "s1", 42)) is True
+    assert pipeline.renders == []
+    assert recorded == []
+    assert bot.calls[0][1]["photo"] == "uploaded-id"
+
+
+def test_render_over_budget_falls_back_to_the_unchanged_text_card(monkeypatch):
+    bot = PhotoBot()
+    _image_cards(monkeypatch, Pipeline(payload=None))
+    monkeypatch.setattr(controller, "claim_result_card_delivery", lambda *_args, **_kwargs: _claim())
+    monkeypatch.setattr(controller, "mark_result_card_delivered", lambda *_args: True)
+
+    assert run(controller.deliver_result_card_once(bot, "s1", 42)) is True
+    assert bot.calls == [((), {"chat_id": 777, "text": "*rich* result", "parse_mode": "Markdown"})]
+
+
+def test_caption_sized_cards_only(monkeypatch):
+    bot = PhotoBot()
+    pipeline = Pipeline()
+    _image_cards(monkeypatch, pipeline)
+    monkeypatch.setattr(
+        controller,
+        "claim_result_card_delivery",
+        lambda *_args, **_kwargs: _claim(text="x" * 1500),
+    )
+    monkeypatch.setattr(controller, "mark_result_card_delivered", lambda *_args: True)
+
+    assert run(controller.deliver_result_card_once(bot, "s1", 42)) is True
+    assert pipeline.renders == []
+    assert bot.calls[0][1]["text"] == "x" * 1500
+
+
+def test_image_card_retry_after_keeps_durable_defer_semantics(monkeypatch):
+    bot = PhotoBot()
+    bot.error = RetryAfter(9)
+    _image_cards(monkeypatch, Pipeline())
+    monkeypatch.setattr(controller, "claim_result_card_delivery", lambda *_args, **_kwargs: _claim())
+    deferred = []
+    monkeypatch.setattr(
+        controller,
+        "defer_result_card_delivery",
+        lambda session_id, user_id, token, **kwargs: deferred.append(kwargs["delay_seconds"]) or True,
+    )
+    monkeypatch.setattr(
+        controller,
+        "record_result_card_photo",
+        lambda *_args: pytest.fail("nothing was uploaded"),
+    )
+    monkeypatch.setattr(
+        controller,
+        "mark_result_card_delivered",
+        lambda *_args: pytest.fail("deferred card must not be acknowledged"),
+    )
+
+    assert run(controller.deliver_result_card_once(bot, "s1", 42)) is False
+    assert deferred == [9.0]
+
+
+def test_lost_file_id_write_still_acknowledges_delivery(monkeypatch):
+    bot = PhotoBot()
+    _image_cards(monkeypatch, Pipeline())
+    monkeypatch.setattr(controller, "claim_result_card_delivery", lambda *_args, **_kwargs: _claim())
+
+    def unavailable(*_args):
+        raise controller.ResultCardDeliveryUnavailable("down")
+
+    acknowledged = []
+    monkeypatch.setattr(controller, "record_result_card_photo", unavailable)
+    monkeypatch.setattr(controller, "mark_result_card_delivered", lambda *args: acknowledged.append(args) or True)
+
+    assert run(controller.deliver_result_card_once(bot, "s1", 42)) is True
+    assert acknowledged == [("s1", 42, "token-1")]
+
+
+def test_rejected_stored_photo_is_forgotten_and_text_card_is_sent(monkeypatch):
+    class RejectingPhotoBot(PhotoBot):
+        async def send_photo(self, **kwargs):
+            self.calls.append(("photo", kwargs))
+            raise BadRequest("Wrong file identifier/http url specified")
+
+    bot = RejectingPhotoBot()
+    _image_cards(monkeypatch, Pipeline())
+    claim = _claim()
+    claim["marker"]["photo_file_id"] = "expired-id"
+    monkeypatch.setattr(controller, "claim_result_card_delivery", lambda *_args, **_kwargs: claim)
+    steps = []
+    monkeypatch.setattr(
+        controller,
+        "forget_result_card_photo",
+        lambda session_id, user_id, token: steps.append(("forget", token)) or True,
+    )
+    monkeypatch.setattr(
+        controller,
+        "settle_result_card_delivery_failure",
+        lambda *_args, **_kwargs: pytest.fail("a rejected photo is not a failed delivery"),
+    )
+    monkeypatch.setattr(
+        controller,
+        "mark_result_card_delivered",
+        lambda session_id, user_id, token: steps.append(("ack", token)) or True,
+    )
+
+    assert run(controller.deliver_result_card_once(bot, "s1", 42)) is True
+    assert bot.calls[0][1]["photo"] == "expired-id"
+    assert bot.calls[1] == ((), {"chat_id": 777, "text": "*rich* result", "parse_mode": "Markdown"})
+    assert steps == [("forget", "token-1"), ("ack", "token-1")]
@@ -43,7 +43,7 @@ def test_stats_command_reads_user_position_off_event_loop_thread(monkeypatch):
     worker_threads = []
     keyboard = object()
 
-    def get_position(user_id):
+    def get_position(user_id, fields=None):
         assert user_id == 42
         worker_threads.append(threading.get_ident())
         return None, None
@@ -71,7 +71,7 @@ def test_inline_my_stats_reads_user_position_off_event_loop_thread(monkeypatch):
     event_loop_thread = threading.get_ident()
     worker_threads = []
 
-    def get_position(user_id):
+    def get_position(user_id, fields=None):
         assert user_id == 42
         worker_threads.append(threading.get_ident())
         return None, None
@@ -99,7 +99,7 @@ def test_general_leaderboard_moves_all_mongo_reads_off_event_loop_thread(monkeyp
         calls.append(("total", None, threading.get_ident()))
         return 0
 
-    def get_position(user_id):
+    def get_position(user_id, fields=None):
         calls.append(("position", user_id, threading.get_ident()))
         return None, None
 
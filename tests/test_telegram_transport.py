@@ -1,4 +1,5 @@
 import asyncio
+import time
 from threading import Event as ThreadEvent
 from threading import Thread
 
@@ -384,3 +385,276 @@ def test_webhook_lifecycle_fails_before_start_when_registration_rejected(monkeyp
         asyncio.run(scenario())
     assert app.events == ["initialize", "shutdown"]
     assert telegram_transport.TELEGRAM_WEBHOOK_BRIDGE.ready() is False
+
+
+class TrackedApplication:
+    """Minimal PTB-like application: a fetcher feeds the tracked processor."""
+
+    def __init__(self, handler, *, max_concurrent_updates=1):
+        self.bot = FakeBot()
+        self.update_queue = asyncio.Queue()
+        self.update_processor = telegram_transport.TrackedUpdateProcessor(
+            max_concurrent_updates
+        )
+        self._handler = handler
+        self._tasks = set()
+
+    async def fetch_forever(self):
+        while True:
+            update = await self.update_queue.get()
+            task = asyncio.create_task(
+                self.update_processor.process_update(update, self._handler(update))
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            self.update_queue.task_done()
+
+
+def _run_tracked_loop(application):
+    loop = asyncio.new_event_loop()
+    thread = Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    fetcher = asyncio.run_coroutine_threadsafe(application.fetch_forever(), loop)
+    return loop, thread, fetcher
+
+
+def _stop_tracked_loop(application, loop, thread, fetcher):
+    telegram_transport.TELEGRAM_WEBHOOK_BRIDGE.clear(application)
+    fetcher.cancel()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=2)
+    loop.close()
+
+
+def test_tracked_bridge_acks_own_update_while_another_is_still_running():
+    slow_release = ThreadEvent()
+    slow_started = ThreadEvent()
+    handled = []
+
+    async def handler(update):
+        if update.update_id == 1:
+            slow_started.set()
+            await asyncio.to_thread(slow_release.wait, 2)
+        handled.append(update.update_id)
+
+    app = TrackedApplication(handler, max_concurrent_updates=2)
+    loop, thread, fetcher = _run_tracked_loop(app)
+    bridge = telegram_transport.TELEGRAM_WEBHOOK_BRIDGE
+    bridge.configure(app, loop, ack_mode="processed", max_inflight=4)
+    slow_errors = []
+
+    def submit_slow():
+        try:
+            bridge.submit({"update_id": 1})
+        except Exception as exc:  # pragma: no cover - failure path only
+            slow_errors.append(exc)
+
+    slow_thread = Thread(target=submit_slow, daemon=True)
+    slow_thread.start()
+    try:
+        assert slow_started.wait(timeout=1)
+        bridge.submit({"update_id": 2})
+        assert handled == [2]
+        assert slow_thread.is_alive()
+        slow_release.set()
+        slow_thread.join(timeout=2)
+        assert slow_thread.is_alive() is False
+        metrics = bridge.metrics()
+    finally:
+        slow_release.set()
+        _stop_tracked_loop(app, loop, thread, fetcher)
+    assert slow_errors == []
+    assert handled == [2, 1]
+    assert metrics["per_update_tracking"] is True
+    assert metrics["inflight"] == 0
+    assert metrics["pending_updates"] == 0
+    assert metrics["processing_seconds"]["count"] >= 2
+    assert metrics["handler_seconds"]["count"] >= 2
+
+
+def test_enqueued_ack_mode_answers_before_processing_and_keeps_slot_until_done():
+    release = ThreadEvent()
+    handled = []
+
+    async def handler(update):
+        await asyncio.to_thread(release.wait, 2)
+        handled.append(update.update_id)
+
+    app = TrackedApplication(handler)
+    loop, thread, fetcher = _run_tracked_loop(app)
+    bridge = telegram_transport.TELEGRAM_WEBHOOK_BRIDGE
+    bridge.configure(app, loop, ack_mode="enqueued", max_inflight=1)
+    try:
+        bridge.submit({"update_id": 7})
+        assert handled == []
+        assert bridge.metrics()["inflight"] == 1
+        with pytest.raises(
+            telegram_transport.WebhookNotReady,
+            match="in-flight limit reached",
+        ):
+            bridge.submit({"update_id": 8})
+        release.set()
+        deadline = time.monotonic() + 2
+        while bridge.metrics()["inflight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        metrics = bridge.metrics()
+    finally:
+        release.set()
+        _stop_tracked_loop(app, loop, thread, fetcher)
+    assert handled == [7]
+    assert metrics["inflight"] == 0
+    assert metrics["rejected_busy"] >= 1
+    assert metrics["ack_mode"] == "enqueued"
+
+
+def test_tracked_processing_timeout_keeps_update_accounted_until_ptb_finishes(monkeypatch):
+    monkeypatch.setattr(telegram_transport, "_BRIDGE_PROCESS_TIMEOUT_SECONDS", 0.05)
+    release = ThreadEvent()
+
+    async def handler(update):
+        del update
+        await asyncio.to_thread(release.wait, 2)
+
+    app = TrackedApplication(handler)
+    loop, thread, fetcher = _run_tracked_loop(app)
+    bridge = telegram_transport.TELEGRAM_WEBHOOK_BRIDGE
+    bridge.configure(app, loop, ack_mode="processed", max_inflight=2)
+    try:
+        with pytest.raises(telegram_transport.WebhookNotReady, match="in time"):
+            bridge.submit({"update_id": 9})
+        assert bridge.metrics()["inflight"] == 1
+        release.set()
+        deadline = time.monotonic() + 2
+        while bridge.metrics()["inflight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert bridge.metrics()["inflight"] == 0
+    finally:
+        release.set()
+        _stop_tracked_loop(app, loop, thread, fetcher)
+
+
+def test_webhook_ack_mode_and_inflight_limit_are_validated(monkeypatch):
+    monkeypatch.delenv("TELEGRAM_WEBHOOK_ACK_MODE", raising=False)
+    monkeypatch.delenv("TELEGRAM_WEBHOOK_MAX_INFLIGHT", raising=False)
+    assert telegram_transport.telegram_webhook_ack_mode() == "processed"
+    assert telegram_transport.telegram_webhook_max_inflight() == 8
+    monkeypatch.setenv("TELEGRAM_WEBHOOK_ACK_MODE", "never")
+    with pytest.raises(telegram_transport.TransportConfigurationError):
+        telegram_transport.telegram_webhook_ack_mode()
+    for invalid in ("0", "101", "lots"):
+        monkeypatch.setenv("TELEGRAM_WEBHOOK_MAX_INFLIGHT", invalid)
+        with pytest.raises(telegram_transport.TransportConfigurationError):
+            telegram_transport.telegram_webhook_max_inflight()
+
+
+def test_production_application_uses_tracked_update_processor():
+    from pathlib import Path
+
+    source = (Path(__file__).resolve().parents[1] / "telegram_production.py").read_text(
+        encoding="utf-8"
+    )
+    assert ".concurrent_updates(build_update_processor())" in source
+    processor = telegram_transport.build_update_processor()
+    assert isinstance(processor, telegram_transport.TrackedUpdateProcessor)
+
+
+def _message_update(update_id, *, user_id, chat_id=None):
+    from telegram import Update
+
+    return Update.de_json(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": chat_id or user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "U"},
+                "text": "x",
+            },
+        },
+        bot=None,
+    )
+
+
+def test_processor_orders_updates_per_user_and_runs_users_concurrently():
+    processor = telegram_transport.TrackedUpdateProcessor(
+        4, bridge=telegram_transport.TelegramWebhookBridge()
+    )
+    events = []
+
+    async def handler(update, delay):
+        user_id = update.effective_user.id
+        events.append(("start", user_id, update.update_id))
+        await asyncio.sleep(delay)
+        events.append(("end", user_id, update.update_id))
+
+    async def scenario():
+        updates = [
+            (_message_update(1, user_id=10), 0.05),
+            (_message_update(2, user_id=10), 0.0),
+            (_message_update(3, user_id=20), 0.0),
+        ]
+        tasks = [
+            asyncio.create_task(processor.process_update(update, handler(update, delay)))
+            for update, delay in updates
+        ]
+        await asyncio.sleep(0.01)
+        metrics = processor.metrics()
+        await asyncio.gather(*tasks)
+        return metrics
+
+    metrics = asyncio.run(scenario())
+
+    assert processor.max_concurrent_updates > 1
+    user_ten = [event for event in events if event[1] == 10]
+    assert user_ten == [("start", 10, 1), ("end", 10, 1), ("start", 10, 2), ("end", 10, 2)]
+    # The other user finished while user 10 was still inside its slow first update.
+    assert events.index(("end", 20, 3)) < events.index(("end", 10, 1))
+    assert metrics["waiting"] == 1
+    assert metrics["deepest_keys"] == {"chat:10": 2, "user:10": 2}
+    final = processor.metrics()
+    assert final["running"] == 0 and final["waiting"] == 0 and final["active_keys"] == 0
+    assert final["completed"] == 3
+    assert final["handler_seconds"]["count"] == 3
+
+
+def test_processor_global_cap_limits_running_handlers():
+    processor = telegram_transport.TrackedUpdateProcessor(
+        2, bridge=telegram_transport.TelegramWebhookBridge()
+    )
+    running = 0
+    peak = 0
+
+    async def handler():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    async def scenario():
+        await asyncio.gather(
+            *(
+                processor.process_update(_message_update(n, user_id=100 + n), handler())
+                for n in range(6)
+            )
+        )
+
+    asyncio.run(scenario())
+
+    assert peak == 2
+    assert processor.metrics()["completed"] == 6
+
+
+def test_single_slot_processor_keeps_ptb_sequential_mode():
+    processor = telegram_transport.TrackedUpdateProcessor(1)
+    assert processor.max_concurrent_updates == 1
+
+
+def test_max_concurrent_updates_is_validated(monkeypatch):
+    monkeypatch.delenv("TELEGRAM_MAX_CONCURRENT_UPDATES", raising=False)
+    assert telegram_transport.telegram_max_concurrent_updates() == 16
+    for invalid in ("0", "257", "many"):
+        monkeypatch.setenv("TELEGRAM_MAX_CONCURRENT_UPDATES", invalid)
+        with pytest.raises(telegram_transport.TransportConfigurationError):
+            telegram_transport.telegram_max_concurrent_updates()
@@ -15,7 +15,7 @@ SPEC.loader.exec_module(preflight)
 def _safe_info(**overrides):
     info = {
         "url": "https://example.com/telegram/webhook",
-        "max_connections": 1,
+        "max_connections": 4,
         "allowed_updates": ["message", "callback_query"],
         "pending_update_count": 0,
     }
@@ -37,7 +37,7 @@ def test_classify_accepts_exact_webhook_contract():
     ("overrides", "needle"),
     [
         ({"url": "https://wrong.example/telegram/webhook"}, "webhook URL"),
-        ({"max_connections": 4}, "max_connections"),
+        ({"max_connections": 1}, "max_connections"),
         ({"allowed_updates": ["message"]}, "allowed_updates"),
         ({"pending_update_count": -1}, "pending_update_count"),
     ],
@@ -148,7 +148,7 @@ def test_preflight_is_read_only_and_matches_runtime_transport_contract():
         "drop_index(",
     )
     assert all(token not in source for token in forbidden)
-    assert 'EXPECTED_MAX_CONNECTIONS = 1' in source
+    assert 'EXPECTED_MAX_CONNECTIONS = 4' in source
     assert 'EXPECTED_ALLOWED_UPDATES = frozenset({"message", "callback_query"})' in source
     assert 'WEBHOOK_ALLOWED_UPDATES = ("message", "callback_query")' in transport
     assert 'TELEGRAM_WEBHOOK_MAX_CONNECTIONS", "1"' in transport
@@ -0,0 +1,99 @@
+import copy
+
+import database
+import user_records
+from web_api import result_store
+
+
+def _user():
+    return {
+        "_id": "42",
+        "username": "reader",
+        "first_name": "Reader",
+        "total_points": 70,
+        "total_tests": 3,
+        "achievements": {"first": "2026-01-01"},
+        "perfect_count": 1,
+        "last_daily_bonus": "",
+        "daily_activity_streak": 4,
+        "random20_last_bonus_date": "2000-01-01",
+        "easy_attempts": 2,
+        "miniapp_result_receipts": {"r1": {"points": 3}},
+        "daily_bonus_receipts": {"d1": {"points": 5}},
+    }
+
+
+class ProjectingUsers:
+    """Applies top-level inclusion/exclusion projections like MongoDB does."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.projections = []
+
+    def find_one(self, query, projection=None, **kwargs):
+        if query.get("_id") != self.doc["_id"]:
+            return None
+        self.projections.append(projection)
+        doc = copy.deepcopy(self.doc)
+        if projection is None:
+            return doc
+        if all(value == 0 for value in projection.values()):
+            return {key: value for key, value in doc.items() if key not in projection}
+        return {key: value for key, value in doc.items() if key == "_id" or key in projection}
+
+    def update_one(self, *args, **kwargs):
+        return None
+
+    def count_documents(self, query):
+        return 0
+
+
+def test_profile_reads_drop_receipt_maps_only(monkeypatch):
+    users = ProjectingUsers(_user())
+    monkeypatch.setattr(database, "collection", users)
+
+    entry = database.get_user_stats(42)
+
+    assert "miniapp_result_receipts" not in entry
+    assert "daily_bonus_receipts" not in entry
+    assert entry["easy_attempts"] == 2
+    assert entry["achievements"] == {"first": "2026-01-01"}
+
+
+def test_hot_paths_read_their_named_field_sets(monkeypatch):
+    users = ProjectingUsers(_user())
+    monkeypatch.setattr(database, "collection", users)
+    monkeypatch.setattr(database, "invalidate_profile", lambda uid: None)
+
+    assert database.check_daily_bonus(42) == 10
+    assert database.is_bonus_eligible(42, "random20") is True
+    assert database.update_achievement_stats(42, False, 2)["perfect_count"] == 1
+    assert database.get_user_achievements(42)[0] == {"first": "2026-01-01"}
+    database.init_user_stats(42, "reader", "Reader")
+    position, entry = database.get_user_position(42, user_records.RANKING_FIELDS)
+
+    assert position is not None
+    assert set(entry) <= set(user_records.RANKING_FIELDS.projection)
+    assert users.projections[:5] == [
+        dict(user_records.BONUS_FIELDS.projection),
+        user_records.BONUS_FIELDS.including(["random20_last_bonus_date"]),
+        dict(user_records.ACHIEVEMENT_FIELDS.projection),
+        dict(user_records.ACHIEVEMENT_FIELDS.projection),
+        dict(user_records.IDENTITY_FIELDS.projection),
+    ]
+    assert None not in users.projections
+    reads = user_records.USER_READS.metrics()["reads"]
+    assert {"bonus", "achievement", "identity", "ranking"} <= set(reads)
+
+
+def test_receipt_prune_projects_receipt_ages_only(monkeypatch):
+    users = ProjectingUsers(_user())
+    monkeypatch.setattr(database, "collection", users)
+    monkeypatch.setattr(database, "db", object(), raising=False)
+
+    assert result_store._prune_old_receipts(42) == 0
+
+    (projection,) = users.projections
+    assert projection == dict(user_records.RECEIPT_AGE_FIELDS.projection)
+    ages = projection["miniapp_result_receipts"]["$cond"][1]["$arrayToObject"]["$map"]["in"]
+    assert ages["v"] == {"applied_at": "$$receipt.v.applied_at"}
@@ -0,0 +1,161 @@
+"""Named projections for reading ``leaderboard`` user documents.
+
+A user document carries 92 pre-seeded per-level counters
+(``<level>_attempts/_correct/_total/_best_score``). It also carries the
+idempotency receipt maps, which grow with every result, bonus and battle
+(see ``scripts/check_result_storage_growth.py``). Most readers need a
+handful of fields, but they used to fetch the whole document. Every user
+read now names the field set it needs:
+
+* ``PROFILE_FIELDS`` — everything except the receipt maps (Mini App profile,
+  ``/stats``, the achievements screen);
+* ``RANKING_FIELDS`` — the rank-index row (position, points to next place);
+* ``ACHIEVEMENT_FIELDS`` — achievement counters and challenge streaks;
+* ``BONUS_FIELDS`` — daily/challenge bonus dates;
+* ``IDENTITY_FIELDS`` — existence and display names;
+* ``RECEIPT_AGE_FIELDS`` — only ``applied_at`` of each Mini App receipt, for
+  the background prune.
+
+Reads are counted per field set in the ``user_records`` metrics source.
+``python scripts/bench_user_projection.py`` reports the BSON bytes that each
+set transfers for a representative user.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from threading import Lock
+from types import MappingProxyType
+
+from leaderboard_rank_index import RANK_FIELDS
+from runtime_metrics import register_metrics_source
+
+# Idempotency maps and migration evidence that only the result writers read.
+RECEIPT_MAP_FIELDS = (
+    "miniapp_result_receipts",
+    "legacy_result_receipts",
+    "legacy_learning_receipts",
+    "daily_bonus_receipts",
+    "normal_bonus_result_owners",
+    "challenge_bonus_receipts",
+    "challenge_bonus_result_owners",
+    "battle_result_receipts",
+)
+
+
+@dataclass(frozen=True)
+class UserFieldSet:
+    """A named ``find_one`` projection over user documents."""
+
+    name: str
+    projection: Mapping[str, object]
+
+    def including(self, fields: Iterable[str]) -> dict:
+        """Projection with ``fields`` added (inclusion sets only)."""
+        projection = dict(self.projection)
+        for field in fields:
+            projection[field] = 1
+        return projection
+
+
+def _including(name: str, fields: Iterable[str]) -> UserFieldSet:
+    return UserFieldSet(name, MappingProxyType({field: 1 for field in fields}))
+
+
+PROFILE_FIELDS = UserFieldSet(
+    "profile", MappingProxyType({field: 0 for field in RECEIPT_MAP_FIELDS})
+)
+RANKING_FIELDS = _including("ranking", RANK_FIELDS)
+ACHIEVEMENT_FIELDS = _including(
+    "achievement",
+    (
+        "achievements",
+        "total_tests",
+        "perfect_count",
+        "last_perfect_date",
+        "max_streak_ever",
+        "daily_activity_streak",
+        "daily_activity_last",
+        "challenge_streak_count",
+        "challenge_streak_last_date",
+    ),
+)
+BONUS_FIELDS = _including(
+    "bonus",
+    (
+        "last_daily_bonus",
+        "daily_activity_streak",
+        "random20_last_bonus_date",
+        "hardcore20_last_bonus_date",
+    ),
+)
+IDENTITY_FIELDS = _including("identity", ("username", "first_name"))
+
+_RECEIPTS = "$miniapp_result_receipts"
+RECEIPT_AGE_FIELDS = UserFieldSet(
+    "receipt_ages",
+    MappingProxyType(
+        {
+            "miniapp_result_receipts": {
+                "$cond": [
+                    {"$eq": [{"$type": _RECEIPTS}, "object"]},
+                    {
+                        "$arrayToObject": {
+                            "$map": {
+                                "input": {"$objectToArray": _RECEIPTS},
+                                "as": "receipt",
+                                "in": {
+                                    "k": "$$receipt.k",
+                                    "v": {"applied_at": "$$receipt.v.applied_at"},
+                                },
+                            }
+                        }
+                    },
+                    {},
+                ]
+            }
+        }
+    ),
+)
+
+FIELD_SETS = (
+    PROFILE_FIELDS,
+    RANKING_FIELDS,
+    ACHIEVEMENT_FIELDS,
+    BONUS_FIELDS,
+    IDENTITY_FIELDS,
+    RECEIPT_AGE_FIELDS,
+)
+
+
+class UserReadCounter:
+    """Per-field-set read counts for the metrics endpoint."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._reads: dict[str, int] = {}
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._reads[name] = self._reads.get(name, 0) + 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"reads": dict(self._reads)}
+
+
+USER_READS = UserReadCounter()
+register_metrics_source("user_records", USER_READS.metrics)
+
+
+def read_user(
+    collection,
+    uid: str,
+    fields: UserFieldSet,
+    *,
+    extra: Iterable[str] = (),
+) -> dict | None:
+    """``find_one`` of user ``uid`` restricted to ``fields`` (plus ``extra``)."""
+    USER_READS.count(fields.name)
+    projection = fields.including(extra) if extra else dict(fields.projection)
+    return collection.find_one({"_id": uid}, projection)
@@ -9,6 +9,7 @@ import re
 import time
 import logging
 import asyncio
+import functools
 from datetime import UTC, datetime
 
 from telegram import Update
@@ -270,8 +271,12 @@ def _find_font(bold: bool = False) -> str | None:
     return None
 
 
+@functools.lru_cache(maxsize=1)
 def _load_fonts() -> dict:
-    """Загружает шрифты с fallback на default."""
+    """Загружает шрифты один раз на процесс, с fallback на default.
+
+    Результат общий для всех карточек и потоков рендера — не мутировать.
+    """
     try:
         from PIL import ImageFont
     except ImportError:
@@ -298,61 +303,199 @@ def _load_fonts() -> dict:
     return fonts
 
 
+_AVATAR_SIZE = (120, 120)
+_CARD_SIZE = (600, 280)
+
+
+@functools.lru_cache(maxsize=4)
+def _gradient_background(width: int, height: int):
+    """Фоновый градиент карточки; рисуется один раз, дальше только copy()."""
+    from PIL import Image
+
+    r1, g1, b1 = _COLORS["bg_top"]
+    r2, g2, b2 = _COLORS["bg_bottom"]
+    column = Image.new("RGB", (1, height))
+    column.putdata([
+        (
+            int(r1 + (r2 - r1) * y / height),
+            int(g1 + (g2 - g1) * y / height),
+            int(b1 + (b2 - b1) * y / height),
+        )
+        for y in range(height)
+    ])
+    return column.resize((width, height), Image.NEAREST)
+
+
+@functools.lru_cache(maxsize=1)
+def _avatar_mask():
+    from PIL import Image, ImageDraw
+
+    mask = Image.new("L", _AVATAR_SIZE, 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, _AVATAR_SIZE[0], _AVATAR_SIZE[1]), fill=255)
+    return mask
+
+
+def _avatar_from_bytes(payload: bytes):
+    """Декодирует фото профиля в круглую RGBA-аватарку 120x120 (CPU, вне event loop)."""
+    from PIL import Image
+
+    avatar_img = Image.open(io.BytesIO(payload)).convert("RGBA")
+    avatar_img = avatar_img.resize(_AVATAR_SIZE, Image.LANCZOS)
+    avatar_img.putalpha(_avatar_mask())
+    return avatar_img
+
+
+@functools.lru_cache(maxsize=64)
+def _placeholder_avatar(initial: str):
+    """Заглушка — круг с инициалом; кешируется по букве, не мутировать."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    avatar_img = Image.new("RGBA", _AVATAR_SIZE, _COLORS["avatar_bg"])
+    draw_tmp = ImageDraw.Draw(avatar_img)
+    font = _load_fonts().get("avatar") or ImageFont.load_default()
+
+    # Центрируем букву
+    try:
+        bbox = draw_tmp.textbbox((0, 0), initial, font=font)
+        tw = bbox[2] - bbox[0]
+        th = bbox[3] - bbox[1]
+    except Exception:
+        tw, th = 40, 50
+    x = (_AVATAR_SIZE[0] - tw) // 2
+    y = (_AVATAR_SIZE[1] - th) // 2 - 5
+    draw_tmp.text((x, y), initial, fill=_COLORS["avatar_text"], font=font)
+
+    avatar_img.putalpha(_avatar_mask())
+    return avatar_img
+
+
+def _avatar_initial(first_name: str) -> str:
+    return first_name[0].upper() if first_name else "?"
+
+
 async def _load_avatar(bot, user_id: int, first_name: str):
     """Загружает аватарку пользователя или создаёт заглушку."""
     try:
-        from PIL import Image, ImageDraw, ImageFont
+        import PIL  # noqa: F401
     except ImportError:
         return None
 
-    avatar_size = (120, 120)
-
     # Пробуем загрузить реальную аватарку
     try:
         photos = await bot.get_user_profile_photos(user_id, limit=1)
         if photos.total_count > 0:
             file_obj = await photos.photos[0][-1].get_file()
             file_bytes = await file_obj.download_as_bytearray()
-            avatar_img = Image.open(io.BytesIO(bytes(file_bytes))).convert("RGBA")
-            avatar_img = avatar_img.resize(avatar_size, Image.LANCZOS)
-
-            # Круглая маска
-            mask = Image.new("L", avatar_size, 0)
-            ImageDraw.Draw(mask).ellipse(
-                (0, 0, avatar_size[0], avatar_size[1]), fill=255
-            )
-            avatar_img.putalpha(mask)
-            return avatar_img
+            return _avatar_from_bytes(bytes(file_bytes))
     except Exception as e:
         logger.debug("Avatar load failed for %d: %s", user_id, e)
 
-    # Заглушка — круг с инициалом
-    avatar_img = Image.new("RGBA", avatar_size, _COLORS["avatar_bg"])
-    draw_tmp = ImageDraw.Draw(avatar_img)
-    initial = (first_name[0].upper() if first_name else "?")
+    return _placeholder_avatar(_avatar_initial(first_name))
+
 
+def render_result_png(
+    *,
+    first_name: str,
+    score: int,
+    total: int,
+    rank_name: str,
+    avatar_img=None,
+) -> bytes:
+    """Синхронно рисует PNG-карточку результата из закешированных ассетов.
+
+    CPU-bound: вызывать через ``asyncio.to_thread``. Бросает исключение при
+    ошибке Pillow — решение о fallback принимает вызывающий код.
+    """
+    from PIL import ImageDraw
+
+    pct = round(score / max(total, 1) * 100)
     fonts = _load_fonts()
-    font = fonts.get("avatar", ImageFont.load_default())
 
-    # Центрируем букву
-    try:
-        bbox = draw_tmp.textbbox((0, 0), initial, font=font)
-        tw = bbox[2] - bbox[0]
-        th = bbox[3] - bbox[1]
-    except Exception:
-        tw, th = 40, 50
-    x = (avatar_size[0] - tw) // 2
-    y = (avatar_size[1] - th) // 2 - 5
-    draw_tmp.text((x, y), initial, fill=_COLORS["avatar_text"], font=font)
+    # Холст
+    W, H = _CARD_SIZE
+    img = _gradient_background(W, H).copy()
+    draw = ImageDraw.Draw(img)
 
-    # Круглая маска
-    mask = Image.new("L", avatar_size, 0)
-    ImageDraw.Draw(mask).ellipse(
-        (0, 0, avatar_size[0], avatar_size[1]), fill=255
+    # Аватарка
+    if avatar_img:
+        ay = (H - _AVATAR_SIZE[1]) // 2
+        img.paste(avatar_img, (30, ay), avatar_img.split()[3])
+
+    x_text = 180
+
+    # Имя
+    name_truncated = (first_name or "Игрок")[:20]
+    draw.text(
+        (x_text, 30), name_truncated,
+        fill=_COLORS["text_name"],
+        font=fonts.get("title"),
     )
-    avatar_img.putalpha(mask)
 
-    return avatar_img
+    # Ранг
+    # Убираем эмодзи для Pillow (они не рендерятся)
+    rank_clean = re.sub(
+        r'[\U00010000-\U0010ffff]', '', rank_name
+    ).strip()
+    draw.text(
+        (x_text, 68), rank_clean or rank_name,
+        fill=_COLORS["text_rank"],
+        font=fonts.get("sub"),
+    )
+
+    # Счёт — крупно
+    draw.text(
+        (x_text, 100), f"{score}/{total}",
+        fill=_COLORS["text_score"],
+        font=fonts.get("score"),
+    )
+
+    # Процент
+    draw.text(
+        (x_text, 165), f"{pct}%  правильных ответов",
+        fill=_COLORS["text_pct"],
+        font=fonts.get("sub"),
+    )
+
+    # Прогресс-бар
+    bar_x, bar_y = x_text, 200
+    bar_w, bar_h = W - x_text - 30, 18
+    draw.rounded_rectangle(
+        [bar_x, bar_y, bar_x + bar_w, bar_y + bar_h],
+        radius=9, fill=_COLORS["bar_bg"],
+    )
+    fill_w = int(bar_w * pct / 100)
+    if fill_w > 0:
+        if pct >= 70:
+            bar_color = _COLORS["bar_good"]
+        elif pct >= 50:
+            bar_color = _COLORS["bar_mid"]
+        else:
+            bar_color = _COLORS["bar_bad"]
+        draw.rounded_rectangle(
+            [bar_x, bar_y, bar_x + fill_w, bar_y + bar_h],
+            radius=9, fill=bar_color,
+        )
+
+    # Нижняя подпись
+    draw.text(
+        (x_text, 230), "Библейский тест-бот · 1 Петра",
+        fill=_COLORS["text_footer"],
+        font=fonts.get("small"),
+    )
+
+    # Дата
+    date_str = _today_utc_display()
+    draw.text(
+        (W - 120, 230), date_str,
+        fill=_COLORS["text_footer"],
+        font=fonts.get("small"),
+    )
+
+    # Без optimize=True: полный перебор фильтров zlib на порядок дороже
+    # самой отрисовки, а выигрыш в размере для градиента копеечный.
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", compress_level=6)
+    return buf.getvalue()
 
 
 async def generate_result_image(
@@ -368,115 +511,21 @@ async def generate_result_image(
     Возвращает bytes или None при ошибке / отсутствии Pillow.
     """
     try:
-        from PIL import Image, ImageDraw, ImageFont
+        import PIL  # noqa: F401
     except ImportError:
         logger.warning("Pillow not installed — skipping image generation")
         return None
 
     try:
-        pct = round(score / max(total, 1) * 100)
-
-        # Аватарка
         avatar_img = await _load_avatar(bot, user_id, first_name)
-
-        # Шрифты
-        fonts = _load_fonts()
-
-        # Холст
-        W, H = 600, 280
-        img = Image.new("RGB", (W, H), _COLORS["bg_top"])
-        draw = ImageDraw.Draw(img)
-
-        # Фоновый градиент
-        r1, g1, b1 = _COLORS["bg_top"]
-        r2, g2, b2 = _COLORS["bg_bottom"]
-        for y in range(H):
-            t = y / H
-            r = int(r1 + (r2 - r1) * t)
-            g = int(g1 + (g2 - g1) * t)
-            b = int(b1 + (b2 - b1) * t)
-            draw.line([(0, y), (W, y)], fill=(r, g, b))
-
-        # Аватарка
-        if avatar_img:
-            ay = (H - 120) // 2
-            img.paste(avatar_img, (30, ay), avatar_img.split()[3])
-
-        x_text = 180
-
-        # Имя
-        name_truncated = (first_name or "Игрок")[:20]
-        draw.text(
-            (x_text, 30), name_truncated,
-            fill=_COLORS["text_name"],
-            font=fonts.get("title"),
-        )
-
-        # Ранг
-        # Убираем эмодзи для Pillow (они не рендерятся)
-        rank_clean = re.sub(
-            r'[\U00010000-\U0010ffff]', '', rank_name
-        ).strip()
-        draw.text(
-            (x_text, 68), rank_clean or rank_name,
-            fill=_COLORS["text_rank"],
-            font=fonts.get("sub"),
-        )
-
-        # Счёт — крупно
-        draw.text(
-            (x_text, 100), f"{score}/{total}",
-            fill=_COLORS["text_score"],
-            font=fonts.get("score"),
+        return await asyncio.to_thread(
+            render_result_png,
+            first_name=first_name,
+            score=score,
+            total=total,
+            rank_name=rank_name,
+            avatar_img=avatar_img,
         )
-
-        # Процент
-        draw.text(
-            (x_text, 165), f"{pct}%  правильных ответов",
-            fill=_COLORS["text_pct"],
-            font=fonts.get("sub"),
-        )
-
-        # Прогресс-бар
-        bar_x, bar_y = x_text, 200
-        bar_w, bar_h = W - x_text - 30, 18
-        draw.rounded_rectangle(
-            [bar_x, bar_y, bar_x + bar_w, bar_y + bar_h],
-            radius=9, fill=_COLORS["bar_bg"],
-        )
-        fill_w = int(bar_w * pct / 100)
-        if fill_w > 0:
-            if pct >= 70:
-                bar_color = _COLORS["bar_good"]
-            elif pct >= 50:
-                bar_color = _COLORS["bar_mid"]
-            else:
-                bar_color = _COLORS["bar_bad"]
-            draw.rounded_rectangle(
-                [bar_x, bar_y, bar_x + fill_w, bar_y + bar_h],
-                radius=9, fill=bar_color,
-            )
-
-        # Нижняя подпись
-        draw.text(
-            (x_text, 230), "Библейский тест-бот · 1 Петра",
-            fill=_COLORS["text_footer"],
-            font=fonts.get("small"),
-        )
-
-        # Дата
-        date_str = _today_utc_display()
-        draw.text(
-            (W - 120, 230), date_str,
-            fill=_COLORS["text_footer"],
-            font=fonts.get("small"),
-        )
-
-        # Конвертируем в bytes
-        buf = io.BytesIO()
-        img.save(buf, format="PNG", optimize=True)
-        return buf.getvalue()
-
     except Exception as e:
         logger.error("generate_result_image error: %s", e, exc_info=True)
         return None
@@ -9,6 +9,7 @@ from flask import g, jsonify, request
 from pymongo.errors import DuplicateKeyError, PyMongoError
 from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
 
+from runtime_metrics import metrics_snapshot
 from .auth import get_user_from_request, get_verified_init_data_from_request
 from .db_hardening import ensure_miniapp_indexes
 from .launch_attribution import parse_launch_param, persist_launch_attribution
@@ -150,6 +151,49 @@ def create_app():
             200 if ready else 503,
         )
 
+    def _operator_denied():
+        """Bearer METRICS_TOKEN gate: 404 while unset, 401 for a wrong token."""
+        expected_token = os.getenv("METRICS_TOKEN", "").strip()
+        if not expected_token:
+            return jsonify({"error": "not found"}), 404
+        supplied = request.headers.get("Authorization", "")
+        scheme, _, supplied_token = supplied.partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(
+            supplied_token.strip(), expected_token
+        ):
+            return jsonify({"error": "unauthorized"}), 401
+        return None
+
+    @app.get("/production/metrics")
+    def _production_metrics():
+        """Process-local runtime metrics for operators; hidden unless a token is set."""
+        denied = _operator_denied()
+        if denied is not None:
+            return denied
+        return jsonify({"metrics": metrics_snapshot()})
+
+    @app.get("/production/analytics/questions")
+    def _production_question_analytics():
+        """Paginated question analytics (``sort``, ``bucket``, ``after``, ``limit``)."""
+        denied = _operator_denied()
+        if denied is not None:
+            return denied
+        from database import get_question_analytics_page
+
+        try:
+            page = get_question_analytics_page(
+                sort=request.args.get("sort", "hardest"),
+                bucket=request.args.get("bucket") or None,
+                after=request.args.get("after") or None,
+                limit=int(request.args.get("limit", 20)),
+            )
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        except PyMongoError:
+            logger.exception("question analytics read failed")
+            return jsonify({"error": "storage unavailable"}), 503
+        return jsonify(page)
+
     @app.post(WEBHOOK_PATH)
     def _telegram_webhook():
         try:
@@ -276,10 +320,11 @@ def create_app():
             or request.path.startswith("/telegram/")
             or request.path.startswith("/production/")
         ):
-            response.headers["Cache-Control"] = "no-store"
+            # Routes may opt into revalidation (ETag + no-cache); default is no-store.
+            response.headers.setdefault("Cache-Control", "no-store")
             response.headers["Pragma"] = "no-cache"
         else:
-            # Assets are not content-hashed yet, so avoid stale Mini App bundles.
+            # Bundle responses set their own policy (immutable or ETag-revalidated).
             response.headers.setdefault("Cache-Control", "no-cache")
         return response
 
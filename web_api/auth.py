@@ -1,4 +1,12 @@
-"""Telegram Mini App authentication helpers."""
+"""Telegram Mini App authentication helpers.
+
+A Mini App sends the same signed initData with every API call. The HMAC key
+derived from the bot token is computed once per token. Successfully verified
+initData is memoized by its SHA-256 for ``INIT_DATA_MEMO_TTL`` seconds, so
+repeated calls skip parsing, HMAC and JSON decoding. A memo hit still applies
+the current ``auth_date`` age limit, and only valid signatures are ever
+memoized.
+"""
 from __future__ import annotations
 
 import hashlib
@@ -6,13 +14,20 @@ import hmac
 import json
 import os
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from threading import Lock
 from urllib.parse import parse_qsl
 
 from flask import g, jsonify, request
 
+from runtime_metrics import register_metrics_source
+
 DEFAULT_INIT_DATA_MAX_AGE = 24 * 60 * 60
 MAX_INIT_DATA_LENGTH = 16 * 1024
+INIT_DATA_MEMO_TTL = 300
+INIT_DATA_MEMO_SIZE = 4096
 
 
 @dataclass(frozen=True)
@@ -25,6 +40,89 @@ class VerifiedInitData:
     query_id: str | None
 
 
+@lru_cache(maxsize=4)
+def _secret_key(token: str) -> bytes:
+    return hmac.new(b"WebAppData", token.encode("utf-8"), hashlib.sha256).digest()
+
+
+@lru_cache(maxsize=4)
+def _parse_max_age(raw: str) -> int:
+    return int(raw)
+
+
+def _max_age() -> int:
+    raw = os.getenv("TELEGRAM_INIT_DATA_MAX_AGE_SECONDS")
+    return DEFAULT_INIT_DATA_MAX_AGE if raw is None else _parse_max_age(raw)
+
+
+class VerifiedInitDataMemo:
+    """Thread-safe TTL LRU of verified initData, keyed by secret and initData digest."""
+
+    def __init__(
+        self,
+        capacity: int = INIT_DATA_MEMO_SIZE,
+        ttl_seconds: float = INIT_DATA_MEMO_TTL,
+        clock=time.monotonic,
+    ) -> None:
+        self.capacity = max(1, int(capacity))
+        self.ttl_seconds = float(ttl_seconds)
+        self._clock = clock
+        self._lock = Lock()
+        self._entries: OrderedDict[tuple[bytes, bytes], tuple[float, VerifiedInitData]] = (
+            OrderedDict()
+        )
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+
+    def get(self, key: tuple[bytes, bytes], *, now: int, max_age: int) -> VerifiedInitData | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, verified = entry
+            if self._clock() >= expires_at or now - verified.auth_date > max_age:
+                del self._entries[key]
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return verified
+
+    def put(self, key: tuple[bytes, bytes], verified: VerifiedInitData) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, verified)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "expired": self._expired,
+            }
+
+
+INIT_DATA_MEMO = VerifiedInitDataMemo()
+register_metrics_source("miniapp_init_data", INIT_DATA_MEMO.metrics)
+
+
+def _detached(verified: VerifiedInitData) -> VerifiedInitData:
+    # Each request gets its own ``user`` dict; the memoized one stays pristine.
+    return replace(verified, user=dict(verified.user))
+
+
 def verify_init_data_payload(init_data: str) -> VerifiedInitData | None:
     """Verify Telegram initData and return only fields covered by its HMAC."""
     token = os.getenv("BOT_TOKEN", "").strip()
@@ -32,13 +130,20 @@ def verify_init_data_payload(init_data: str) -> VerifiedInitData | None:
         return None
 
     try:
+        secret_key = _secret_key(token)
+        now = int(time.time())
+        max_age = _max_age()
+        memo_key = (secret_key, hashlib.sha256(init_data.encode("utf-8")).digest())
+        memoized = INIT_DATA_MEMO.get(memo_key, now=now, max_age=max_age)
+        if memoized is not None:
+            return _detached(memoized)
+
         data = dict(parse_qsl(init_data, keep_blank_values=True, strict_parsing=True))
         received_hash = data.pop("hash", None)
         if not received_hash:
             return None
 
         check_string = "\n".join(f"{key}={value}" for key, value in sorted(data.items()))
-        secret_key = hmac.new(b"WebAppData", token.encode("utf-8"), hashlib.sha256).digest()
         calculated_hash = hmac.new(
             secret_key,
             check_string.encode("utf-8"),
@@ -48,13 +153,6 @@ def verify_init_data_payload(init_data: str) -> VerifiedInitData | None:
             return None
 
         auth_date = int(data.get("auth_date", "0"))
-        now = int(time.time())
-        max_age = int(
-            os.getenv(
-                "TELEGRAM_INIT_DATA_MAX_AGE_SECONDS",
-                DEFAULT_INIT_DATA_MAX_AGE,
-            )
-        )
         if auth_date <= 0 or auth_date > now + 60 or now - auth_date > max_age:
             return None
 
@@ -65,12 +163,14 @@ def verify_init_data_payload(init_data: str) -> VerifiedInitData | None:
         if isinstance(user_id, bool) or not isinstance(user_id, int) or user_id <= 0:
             return None
 
-        return VerifiedInitData(
+        verified = VerifiedInitData(
             user=user,
             auth_date=auth_date,
             start_param=data.get("start_param") or None,
             query_id=data.get("query_id") or None,
         )
+        INIT_DATA_MEMO.put(memo_key, verified)
+        return _detached(verified)
     except (TypeError, ValueError, json.JSONDecodeError):
         return None
 
@@ -0,0 +1,82 @@
+"""Deploy-time manifest of the public question bank.
+
+``/stats`` used to hash every question of every ``POOL_REGISTRY`` pool on each
+request to count unique ids, and ``/api/pools`` rebuilt the size map each
+time. The bank only changes with a deploy, so pool sizes, the unique question
+count and a content hash are computed once (warmed by ``create_app``) and
+served from memory. The content hash doubles as the strong ETag of
+``/api/pools``, so uptime monitors can revalidate with ``If-None-Match``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from threading import Lock
+
+from .quiz import question_id
+
+
+@dataclass(frozen=True)
+class BankManifest:
+    pools: Mapping[str, int]
+    total_questions: int
+    content_hash: str
+    pools_body: bytes
+
+    @property
+    def etag(self) -> str:
+        return self.content_hash
+
+
+def build_bank_manifest(registry: Mapping[str, Sequence[dict]]) -> BankManifest:
+    """Sizes, unique id count and content hash of ``registry``.
+
+    ``random_all`` is a union of other pools and is excluded from the unique
+    count, as ``/stats`` always did. The hash covers every pool's ordered ids
+    and each distinct question's full content, so any edit changes it.
+    """
+    pools = {key: len(value) for key, value in registry.items()}
+    digest = hashlib.sha256()
+    unique_ids: set[str] = set()
+    hashed: set[str] = set()
+    for key in sorted(registry):
+        digest.update(f"pool\x1f{key}\x1e".encode())
+        for question in registry[key]:
+            qid = question_id(question)
+            digest.update(qid.encode("utf-8") + b"\x1e")
+            if key != "random_all":
+                unique_ids.add(qid)
+            if qid not in hashed:
+                hashed.add(qid)
+                material = json.dumps(question, sort_keys=True, ensure_ascii=False, default=str)
+                digest.update(material.encode("utf-8") + b"\x1d")
+    return BankManifest(
+        pools=pools,
+        total_questions=len(unique_ids),
+        content_hash=digest.hexdigest()[:32],
+        pools_body=json.dumps(pools, ensure_ascii=False).encode("utf-8"),
+    )
+
+
+_LOCK = Lock()
+_MANIFEST: BankManifest | None = None
+
+
+def bank_manifest() -> BankManifest:
+    """The process-wide manifest; a failed build is retried on the next call."""
+    global _MANIFEST
+    if _MANIFEST is None:
+        with _LOCK:
+            if _MANIFEST is None:
+                from questions import POOL_REGISTRY
+
+                _MANIFEST = build_bank_manifest(POOL_REGISTRY)
+    return _MANIFEST
+
+
+def reset_bank_manifest() -> None:
+    global _MANIFEST
+    with _LOCK:
+        _MANIFEST = None
@@ -10,6 +10,8 @@ from __future__ import annotations
 import logging
 from threading import Lock
 
+from schema_readiness import SCHEMA_READINESS, SchemaRequirement
+
 logger = logging.getLogger(__name__)
 _INDEX_LOCK = Lock()
 _INDEXES_READY = False
@@ -24,6 +26,7 @@ OPEN_FILTER = {"status": {"$in": list(OPEN_STATUSES)}}
 # Compatibility name retained for tests/callers; uniqueness now covers every
 # unfinished state, not only the question-answering phase.
 ACTIVE_FILTER = OPEN_FILTER
+SCHEMA_NAME = "miniapp_sessions.indexes"
 
 
 class MiniAppIndexSafetyUnavailable(RuntimeError):
@@ -112,18 +115,50 @@ def find_duplicate_active_users(sessions, *, limit: int = 20) -> list[dict]:
     )
 
 
+def _miniapp_database():
+    import database
+
+    return getattr(database, "db", None)
+
+
+def _drifted(db) -> bool:
+    return db is not None and SCHEMA_READINESS.failure(SCHEMA_NAME, db) is not None
+
+
+def audit_miniapp_indexes(db) -> None:
+    """Read-only proof of the final retention/uniqueness contract."""
+    final_info = db["miniapp_sessions"].index_information()
+    if LEGACY_TTL_NAME in final_info:
+        raise MiniAppIndexSafetyUnavailable("legacy Mini App TTL is still present")
+    if not _index_matches(
+        final_info.get(TERMINAL_TTL_NAME),
+        key=[("updated_at_dt", 1)],
+        expire_after=TERMINAL_RETENTION_SECONDS,
+        partial_filter=TERMINAL_FILTER,
+    ):
+        raise MiniAppIndexSafetyUnavailable("Mini App terminal TTL is not safe")
+    if not _index_matches(
+        final_info.get(UNIQUE_ACTIVE_NAME),
+        key=[("user_id", 1)],
+        partial_filter=OPEN_FILTER,
+        unique=True,
+    ):
+        raise MiniAppIndexSafetyUnavailable("Mini App open-session uniqueness is not safe")
+
+
 def ensure_miniapp_indexes() -> bool:
     global _INDEXES_READY
-    if _INDEXES_READY:
+    # The memo is per process; background revalidation can revoke it when an
+    # index drifts, and this call then re-proves the contract before answering.
+    if _INDEXES_READY and not _drifted(_miniapp_database()):
         return True
 
     with _INDEX_LOCK:
-        if _INDEXES_READY:
-            return True
         try:
-            import database
-
-            db = getattr(database, "db", None)
+            db = _miniapp_database()
+            if _INDEXES_READY and not _drifted(db):
+                return True
+            _INDEXES_READY = False
             if db is None:
                 return False
             sessions = db["miniapp_sessions"]
@@ -197,28 +232,39 @@ def ensure_miniapp_indexes() -> bool:
             # Read back the final contracts. A create_index call returning
             # without exception is not sufficient proof if an incompatible
             # index raced into existence under the same name.
-            final_info = sessions.index_information()
-            if LEGACY_TTL_NAME in final_info:
-                raise MiniAppIndexSafetyUnavailable("legacy Mini App TTL is still present")
-            if not _index_matches(
-                final_info.get(TERMINAL_TTL_NAME),
-                key=[("updated_at_dt", 1)],
-                expire_after=TERMINAL_RETENTION_SECONDS,
-                partial_filter=TERMINAL_FILTER,
-            ):
-                raise MiniAppIndexSafetyUnavailable("Mini App terminal TTL is not safe")
-            if not _index_matches(
-                final_info.get(UNIQUE_ACTIVE_NAME),
-                key=[("user_id", 1)],
-                partial_filter=OPEN_FILTER,
-                unique=True,
-            ):
-                raise MiniAppIndexSafetyUnavailable("Mini App open-session uniqueness is not safe")
+            audit_miniapp_indexes(db)
 
             _INDEXES_READY = True
+            SCHEMA_READINESS.mark_ready(SCHEMA_NAME, db)
             return True
         except MiniAppIndexSafetyUnavailable:
             raise
         except Exception as exc:
             logger.warning("Mini App index hardening pending: %s", exc)
             raise MiniAppIndexSafetyUnavailable("Mini App index hardening failed") from exc
+
+
+SCHEMA_READINESS.register(
+    SchemaRequirement(
+        name=SCHEMA_NAME,
+        spec={
+            TERMINAL_TTL_NAME: {
+                "key": [["updated_at_dt", 1]],
+                "expireAfterSeconds": TERMINAL_RETENTION_SECONDS,
+                "partialFilterExpression": TERMINAL_FILTER,
+            },
+            "idx_miniapp_user_status": {"key": [["user_id", 1], ["status", 1]]},
+            "idx_miniapp_history": {
+                "key": [["user_id", 1], ["status", 1], ["finished_at_dt", -1]]
+            },
+            UNIQUE_ACTIVE_NAME: {
+                "key": [["user_id", 1]],
+                "unique": True,
+                "partialFilterExpression": OPEN_FILTER,
+            },
+        },
+        handle=_miniapp_database,
+        ensure=lambda _db: ensure_miniapp_indexes(),
+        audit=audit_miniapp_indexes,
+    )
+)
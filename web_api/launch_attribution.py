@@ -12,6 +12,8 @@ from datetime import UTC, datetime, timedelta
 
 from pymongo import ASCENDING
 
+from schema_readiness import SCHEMA_READINESS, SchemaRequirement
+
 SOURCE_KEYS = frozenset(
     {
         "site_app",
@@ -50,6 +52,7 @@ COLLECTION_NAME = "miniapp_launch_attributions"
 RETENTION_DAYS = 90
 TTL_INDEX_NAME = "miniapp_launch_attribution_retention"
 SOURCE_TIME_INDEX_NAME = "miniapp_launch_attribution_source_time"
+SCHEMA_NAME = "miniapp_launch_attributions.indexes"
 
 # Return CTAs are intentionally sparse. Every URL here is a reviewed canonical
 # public surface. Provider sources and chapter sources without a proven article
@@ -154,7 +157,13 @@ def ensure_launch_attribution_indexes(database) -> None:
         name=SOURCE_TIME_INDEX_NAME,
     )
 
-    indexes = collection.index_information()
+    audit_launch_attribution_indexes(database)
+    SCHEMA_READINESS.mark_ready(SCHEMA_NAME, database)
+
+
+def audit_launch_attribution_indexes(database) -> None:
+    """Read-only check that both attribution indexes still match their spec."""
+    indexes = database[COLLECTION_NAME].index_information()
     ttl = indexes.get(TTL_INDEX_NAME, {})
     if (
         ttl.get("key") != [("retention.expires_at", ASCENDING)]
@@ -191,7 +200,11 @@ def persist_launch_attribution(
     if context.kind != "v1" or not context.source or not context.destination:
         return False
 
-    ensure_launch_attribution_indexes(database)
+    if not SCHEMA_READINESS.is_ready(SCHEMA_NAME, database):
+        failure = SCHEMA_READINESS.failure(SCHEMA_NAME, database)
+        if failure is not None:
+            raise RuntimeError(f"launch attribution indexes failed revalidation: {failure}")
+        ensure_launch_attribution_indexes(database)
     seen_at = now or datetime.now(UTC)
     auth_seen_at = datetime.fromtimestamp(auth_date, UTC)
     event_key = _event_key(
@@ -218,3 +231,23 @@ def persist_launch_attribution(
         upsert=True,
     )
     return True
+
+
+def _attribution_database():
+    import database as database_module
+
+    return getattr(database_module, "db", None)
+
+
+SCHEMA_READINESS.register(
+    SchemaRequirement(
+        name=SCHEMA_NAME,
+        spec={
+            TTL_INDEX_NAME: {"key": [["retention.expires_at", ASCENDING]], "expireAfterSeconds": 0},
+            SOURCE_TIME_INDEX_NAME: {"key": [["source", ASCENDING], ["first_seen_at", ASCENDING]]},
+        },
+        handle=_attribution_database,
+        ensure=ensure_launch_attribution_indexes,
+        audit=audit_launch_attribution_indexes,
+    )
+)
@@ -0,0 +1,105 @@
+"""Profile assembly behind ``/api/me``.
+
+The route used to make five serial MongoDB calls, three of which re-read the
+same leaderboard user document (position, stats, achievements). The assembler
+reads that document once and derives position and achievements from it, and
+runs the two history queries (bot ``quiz_sessions`` aggregation and Mini App
+sessions) on a small thread pool while the document is read.
+
+The rendered profile is kept in :data:`profile_cache.PROFILE_CACHE`; result
+writers invalidate it, so the TTL only bounds staleness from writes that do
+not go through a result path (e.g. a username change).
+"""
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from config import PROFILE_FANOUT_WORKERS
+from profile_cache import PROFILE_CACHE
+from runtime_metrics import LatencyHistogram, register_metrics_source
+
+from .quiz import get_miniapp_history
+
+HISTORY_LIMIT = 10
+
+_POOL_LOCK = Lock()
+_POOL: ThreadPoolExecutor | None = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadPoolExecutor(
+                    max_workers=max(1, int(PROFILE_FANOUT_WORKERS)),
+                    thread_name_prefix="profile-io",
+                )
+    return _POOL
+
+
+class ProfileMetrics:
+    """Whole-request and cold-assembly latency for ``/api/me``."""
+
+    def __init__(self) -> None:
+        self.request = LatencyHistogram()
+        self.assembly = LatencyHistogram()
+
+    def metrics(self) -> dict:
+        return {
+            "request": self.request.snapshot(),
+            "assembly": self.assembly.snapshot(),
+            "cache": PROFILE_CACHE.metrics(),
+        }
+
+
+PROFILE_METRICS = ProfileMetrics()
+register_metrics_source("miniapp_profile", PROFILE_METRICS.metrics)
+
+
+def assemble_profile(user_id: int) -> dict:
+    """Raw profile parts: one user-document read plus two concurrent history reads."""
+    import database
+
+    pool = _pool()
+    bot_history = pool.submit(database.get_user_history, user_id, limit=HISTORY_LIMIT)
+    miniapp_history = pool.submit(get_miniapp_history, user_id, limit=HISTORY_LIMIT)
+
+    entry = database.get_user_stats(user_id)
+    position = database.user_position_from(entry) if entry else None
+    achievements, streak_count, streak_date = database.user_achievements_from(entry)
+    return {
+        "position": position,
+        "entry": entry,
+        "history": miniapp_history.result() + bot_history.result(),
+        "achievements": achievements,
+        "streak": {"count": streak_count, "last": streak_date},
+    }
+
+
+def profile_for(user_id: int, render: Callable[[dict], dict]) -> dict:
+    """Cached rendered profile of ``user_id``; ``render`` turns raw parts into JSON.
+
+    Users without a leaderboard document are not cached, which also keeps a
+    transient read failure (reported as a missing document) from sticking.
+    """
+    import database
+
+    started = time.perf_counter()
+    handle = database.collection
+    cached = PROFILE_CACHE.get(handle, user_id)
+    if cached is not None:
+        PROFILE_METRICS.request.observe(time.perf_counter() - started)
+        return cached
+
+    token = PROFILE_CACHE.begin(user_id)
+    raw = assemble_profile(user_id)
+    profile = render(raw)
+    PROFILE_METRICS.assembly.observe(time.perf_counter() - started)
+    if raw["entry"]:
+        PROFILE_CACHE.put(handle, user_id, profile, token)
+    PROFILE_METRICS.request.observe(time.perf_counter() - started)
+    return profile
@@ -10,8 +10,13 @@ from datetime import UTC, datetime
 
 from pymongo.errors import DuplicateKeyError, PyMongoError
 
+from profile_cache import invalidate_profile
+from runtime_metrics import register_metrics_source
+from session_question_refs import hydrate_miniapp_questions, miniapp_question_refs
+
 from .db_hardening import OPEN_STATUSES, ensure_miniapp_indexes
 from .result_store import apply_challenge_result_once, apply_regular_result_once
+from .session_views import AnswerPathMetrics, SessionViewCache
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +28,12 @@ MODE_CONFIG = {
 TIMEOUT_NETWORK_GRACE_SECONDS = 1.0
 COMPLETION_TIME_PROTOCOL_DURABLE = "answer_completed_at_v1"
 
+# Last-known in-progress sessions (filled by start/current/answer) and the
+# per-call round-trip accounting of /api/quiz/answer.
+_SESSION_VIEWS = SessionViewCache()
+ANSWER_PATH_METRICS = AnswerPathMetrics()
+register_metrics_source("miniapp_answer", ANSWER_PATH_METRICS.metrics)
+
 
 def _now() -> datetime:
     """UTC timestamp matching the repository's existing naive-UTC Mongo model."""
@@ -37,16 +48,23 @@ def question_id(question: dict) -> str:
     return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
 
 
-def prepare_question(question: dict) -> dict:
+def shuffled_order(question: dict) -> list[int]:
+    """A random option permutation: ``order[i]`` is the original index shown at ``i``."""
+    order = list(range(len(question.get("options") or [])))
+    random.shuffle(order)
+    return order
+
+
+def prepare_question(question: dict, order: list[int] | None = None) -> dict:
     options = list(question.get("options") or [])
     correct = int(question.get("correct", -1))
     if not options or correct < 0 or correct >= len(options):
         raise ValueError("question has invalid options/correct index")
 
-    indexed = list(enumerate(options))
-    random.shuffle(indexed)
-    shuffled_options = [text for _, text in indexed]
-    shuffled_correct = next(i for i, (original_idx, _) in enumerate(indexed) if original_idx == correct)
+    if order is None:
+        order = shuffled_order(question)
+    shuffled_options = [options[original_idx] for original_idx in order]
+    shuffled_correct = order.index(correct)
     return {
         "id": question_id(question),
         "question": str(question.get("question", "")),
@@ -58,6 +76,25 @@ def prepare_question(question: dict) -> dict:
     }
 
 
+def prepare_session_questions(selected: list[dict]) -> tuple[list[dict], dict]:
+    """Prepared questions plus the session fields that store them.
+
+    Bank cards are stored as ``question_refs``; anything else is embedded.
+    """
+    orders = [shuffled_order(question) for question in selected]
+    prepared = [prepare_question(question, order) for question, order in zip(selected, orders, strict=True)]
+    refs = miniapp_question_refs(selected, orders)
+    return prepared, refs if refs is not None else {"questions": prepared}
+
+
+def session_questions(session: dict) -> list[dict]:
+    """Prepared questions of a session: embedded (older sessions) or hydrated refs."""
+    embedded = session.get("questions")
+    if embedded is not None:
+        return embedded
+    return hydrate_miniapp_questions(session, prepare_question)
+
+
 def public_question(question: dict) -> dict:
     return {"id": question["id"], "question": question["question"], "options": list(question["options"])}
 
@@ -119,7 +156,7 @@ def get_miniapp_history(user_id: int, limit: int = 10) -> list[dict]:
 
 
 def _current_question_payload(session: dict) -> dict | None:
-    questions = session.get("questions") or []
+    questions = session_questions(session)
     index = int(session.get("current_index", 0))
     if index < 0 or index >= len(questions):
         return None
@@ -139,7 +176,7 @@ def _current_question_payload(session: dict) -> dict | None:
 
 def _answered_review_payload(session: dict) -> list[dict]:
     """Expose only already-answered questions for reload/review recovery."""
-    questions = {str(item.get("id")): item for item in session.get("questions") or []}
+    questions = {str(item.get("id")): item for item in session_questions(session)}
     recovered: list[dict] = []
     for answer in session.get("answered") or []:
         question = questions.get(str(answer.get("id")))
@@ -223,7 +260,7 @@ def get_active_quiz(user: dict) -> tuple[dict | None, str | None, int]:
     if not session:
         return {"active": False}, None, 200
 
-    questions = session.get("questions") or []
+    questions = session_questions(session)
     total = int(session.get("question_count") or len(questions))
     index = int(session.get("current_index", 0))
     if total <= 0 or index < 0 or index > total:
@@ -265,6 +302,7 @@ def cancel_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int
         return None, "database unavailable", 503
 
     user_id = str(user["id"])
+    _SESSION_VIEWS.discard(session_id)
     try:
         session = sessions.find_one({"_id": session_id, "user_id": user_id})
     except PyMongoError:
@@ -288,7 +326,7 @@ def cancel_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int
     if session.get("status") != "in_progress":
         return None, "quiz session is not active", 409
 
-    questions = session.get("questions") or []
+    questions = session_questions(session)
     total = int(session.get("question_count") or len(questions))
     index = int(session.get("current_index", 0))
     if total <= 0 or index < 0 or index > total:
@@ -339,7 +377,7 @@ def cancel_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int
     if latest and latest.get("status") == "abandoned":
         return {"cancelled": True, "already_cancelled": True}, None, 200
     if latest:
-        latest_total = int(latest.get("question_count") or len(latest.get("questions") or []))
+        latest_total = int(latest.get("question_count") or len(session_questions(latest)))
         latest_index = int(latest.get("current_index", 0))
         if latest_index == latest_total and latest.get("status") in {"in_progress", "finalizing", "score_error", "finished"}:
             finalized = _finalize_quiz(latest, user) if latest.get("status") != "finished" else _stored_result(latest)
@@ -418,7 +456,7 @@ def start_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int]
 
         open_total = int(
             open_session.get("question_count")
-            or len(open_session.get("questions") or [])
+            or len(session_questions(open_session))
         )
         open_index = int(open_session.get("current_index", 0))
         if open_total <= 0 or open_index != open_total:
@@ -432,13 +470,14 @@ def start_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int]
 
     try:
         from database import get_user_stats, init_user_stats
+        from user_records import IDENTITY_FIELDS
 
         init_user_stats(
             int(user["id"]),
             user.get("username", ""),
             user.get("first_name", ""),
         )
-        if get_user_stats(int(user["id"])) is None:
+        if get_user_stats(int(user["id"]), IDENTITY_FIELDS) is None:
             return None, "user profile unavailable", 503
     except Exception:
         logger.exception("failed to initialise user profile")
@@ -446,7 +485,7 @@ def start_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int]
 
     selected = random.sample(pool, count)
     try:
-        questions = [prepare_question(question) for question in selected]
+        questions, question_fields = prepare_session_questions(selected)
     except (TypeError, ValueError):
         logger.exception("invalid question data in pool %s", pool_key)
         return None, "question data is invalid", 500
@@ -467,7 +506,7 @@ def start_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int]
         "stats_level_key": stats_level_key(pool_key, is_challenge=is_challenge, mode=mode),
         "mode": mode,
         "is_challenge": is_challenge,
-        "questions": questions,
+        **question_fields,
         "question_count": len(questions),
         "current_index": 0,
         "correct_count": 0,
@@ -503,6 +542,7 @@ def start_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int]
     current = _active_session_payload(document, resumed=False)
     if current is None:
         return None, "created quiz session is inconsistent", 500
+    _SESSION_VIEWS.put(sessions, document)
     return current, None, 200
 
 
@@ -520,7 +560,7 @@ def get_current_question(user: dict, payload: dict) -> tuple[dict | None, str |
     if not session or session.get("status") != "in_progress":
         return None, "quiz session not found or already finished", 409
 
-    questions = session.get("questions") or []
+    questions = session_questions(session)
     index = int(session.get("current_index", 0))
     if index < 0 or index >= len(questions):
         return None, "quiz session is inconsistent", 409
@@ -542,6 +582,7 @@ def get_current_question(user: dict, payload: dict) -> tuple[dict | None, str |
     current = _current_question_payload(session)
     if current is None:
         return None, "quiz session is inconsistent", 409
+    _SESSION_VIEWS.put(sessions, session)
     return {"session_id": session_id, **current}, None, 200
 
 
@@ -641,7 +682,7 @@ def _finalize_quiz(session: dict, user: dict) -> dict | None:
     if claimed.get("status") == "finished":
         return _stored_result(claimed)
 
-    total = int(claimed.get("question_count") or len(claimed.get("questions", [])))
+    total = int(claimed.get("question_count") or len(session_questions(claimed)))
     score = int(claimed.get("correct_count", 0))
     uid = int(user["id"])
     username = user.get("username", "")
@@ -717,6 +758,7 @@ def _finalize_quiz(session: dict, user: dict) -> dict | None:
                 }
             },
         )
+        invalidate_profile(uid)
         stored = sessions.find_one({"_id": result_id})
     except Exception:
         logger.exception("failed to mark Mini App result finished")
@@ -732,7 +774,7 @@ def _replay_answer_response(session: dict, requested_question_id: str, user: dic
     if not answered:
         return None
 
-    questions = session.get("questions") or []
+    questions = session_questions(session)
     question = next((item for item in questions if item.get("id") == requested_question_id), None)
     if not question:
         return None
@@ -766,54 +808,37 @@ def _replay_answer_response(session: dict, requested_question_id: str, user: dic
     }
 
 
-def answer_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int]:
-    session_id = str(payload.get("session_id", "")).strip()
-    requested_question_id = str(payload.get("question_id", "")).strip()
-    try:
-        chosen = int(payload.get("chosen", -1))
-    except (TypeError, ValueError):
-        return None, "invalid answer", 400
-    if not session_id:
-        return None, "session_id is required", 400
-    if not requested_question_id:
-        return None, "question_id is required", 400
-
-    sessions = miniapp_sessions()
-    if sessions is None:
-        return None, "database unavailable", 503
-
-    user_id = str(user["id"])
-    session = sessions.find_one({"_id": session_id, "user_id": user_id})
-    if not session:
-        return None, "quiz session not found", 409
-
-    replay = _replay_answer_response(session, requested_question_id, user)
-    if replay is not None:
-        return replay, None, 200
-
-    session = sessions.find_one({"_id": session_id, "user_id": user_id}) or session
+def _answer_plan(
+    session: dict,
+    *,
+    session_id: str,
+    user_id: str,
+    requested_question_id: str,
+    chosen: int,
+) -> tuple[dict | None, tuple[None, str, int] | None]:
+    """Score the tap against ``session`` and build its guarded update."""
     if session.get("status") in {"finalizing", "score_error"}:
-        return None, "result finalization is incomplete; retry the last answer", 503
+        return None, (None, "result finalization is incomplete; retry the last answer", 503)
     if session.get("status") != "in_progress":
-        return None, "quiz session is not active", 409
+        return None, (None, "quiz session is not active", 409)
 
     index = int(session.get("current_index", 0))
-    questions = session.get("questions") or []
+    questions = session_questions(session)
     if index < 0 or index >= len(questions):
-        return None, "quiz session is inconsistent", 409
+        return None, (None, "quiz session is inconsistent", 409)
 
     question = questions[index]
     if requested_question_id != question.get("id"):
-        return None, "question already processed or out of order", 409
+        return None, (None, "question already processed or out of order", 409)
     option_count = len(question.get("options") or [])
     if chosen < -1 or chosen >= option_count:
-        return None, "answer index out of range", 400
+        return None, (None, "answer index out of range", 400)
 
     now_ts = time.time()
     sent_at = session.get("question_sent_at")
     time_limit = session.get("time_limit")
     if time_limit and not sent_at:
-        return None, "question has not been presented", 409
+        return None, (None, "question has not been presented", 409)
     elapsed_question = max(0.0, now_ts - float(sent_at or now_ts))
     timed_out = bool(
         time_limit
@@ -835,71 +860,170 @@ def answer_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int
         set_fields["completed_at_dt"] = answer_time
         set_fields["completion_time_protocol"] = COMPLETION_TIME_PROTOCOL_DURABLE
 
+    return {
+        "question": question,
+        "questions": questions,
+        "pool_key": session.get("pool_key"),
+        "ok": ok,
+        "timed_out": timed_out,
+        "correct_index": correct_index,
+        "elapsed": elapsed_question,
+        "max_streak": max_streak,
+        # Ordering/replay guards: the update applies only to the exact state
+        # this answer was scored against.
+        "filter": {
+            "_id": session_id,
+            "user_id": user_id,
+            "status": "in_progress",
+            "current_index": index,
+            "question_sent_at": sent_at,
+        },
+        "update": {
+            "$inc": {"current_index": 1, "correct_count": 1 if ok else 0},
+            "$set": set_fields,
+            "$push": {
+                "answered": {
+                    "id": question["id"],
+                    "chosen": chosen,
+                    "correct": correct_index,
+                    "ok": ok,
+                    "timed_out": timed_out,
+                    "elapsed_seconds": round(elapsed_question, 3),
+                }
+            },
+        },
+    }, None
+
+
+def _commit_answer(sessions, plan: dict) -> dict | None:
+    from pymongo import ReturnDocument
+
+    return sessions.find_one_and_update(
+        plan["filter"],
+        plan["update"],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def answer_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int]:
+    started = time.perf_counter()
+    trace = {"round_trips": 0, "view_hit": False, "conflict": False, "finalized": False}
     try:
-        from pymongo import ReturnDocument
+        return _answer_quiz(user, payload, trace)
+    finally:
+        ANSWER_PATH_METRICS.observe(time.perf_counter() - started, **trace)
 
-        updated = sessions.find_one_and_update(
-            {
-                "_id": session_id,
-                "user_id": user_id,
-                "status": "in_progress",
-                "current_index": index,
-            },
-            {
-                "$inc": {"current_index": 1, "correct_count": 1 if ok else 0},
-                "$set": set_fields,
-                "$push": {
-                    "answered": {
-                        "id": question["id"],
-                        "chosen": chosen,
-                        "correct": correct_index,
-                        "ok": ok,
-                        "timed_out": timed_out,
-                        "elapsed_seconds": round(elapsed_question, 3),
-                    }
-                },
-            },
-            return_document=ReturnDocument.AFTER,
-        )
-    except Exception:
-        logger.exception("failed to advance Mini App session")
-        return None, "could not save answer", 503
 
-    if not updated:
-        latest = sessions.find_one({"_id": session_id, "user_id": user_id})
-        replay = _replay_answer_response(latest or {}, requested_question_id, user)
+def _answer_quiz(
+    user: dict,
+    payload: dict,
+    trace: dict,
+) -> tuple[dict | None, str | None, int]:
+    session_id = str(payload.get("session_id", "")).strip()
+    requested_question_id = str(payload.get("question_id", "")).strip()
+    try:
+        chosen = int(payload.get("chosen", -1))
+    except (TypeError, ValueError):
+        return None, "invalid answer", 400
+    if not session_id:
+        return None, "session_id is required", 400
+    if not requested_question_id:
+        return None, "question_id is required", 400
+
+    sessions = miniapp_sessions()
+    if sessions is None:
+        return None, "database unavailable", 503
+
+    user_id = str(user["id"])
+    scope = {
+        "session_id": session_id,
+        "user_id": user_id,
+        "requested_question_id": requested_question_id,
+        "chosen": chosen,
+    }
+    plan = None
+    updated = None
+
+    # Common case: the last-known document is current, so the conditional
+    # update is the only round trip. Any mismatch falls through to a re-read.
+    view = _SESSION_VIEWS.get(sessions, session_id, user_id)
+    if view is not None:
+        trace["view_hit"] = True
+        plan, _error = _answer_plan(view, **scope)
+        if plan is not None:
+            try:
+                trace["round_trips"] += 1
+                updated = _commit_answer(sessions, plan)
+            except Exception:
+                logger.exception("failed to advance Mini App session")
+                return None, "could not save answer", 503
+        if updated is None:
+            trace["conflict"] = True
+            _SESSION_VIEWS.discard(session_id)
+
+    if updated is None:
+        trace["round_trips"] += 1
+        session = sessions.find_one({"_id": session_id, "user_id": user_id})
+        if not session:
+            return None, "quiz session not found", 409
+
+        replay = _replay_answer_response(session, requested_question_id, user)
         if replay is not None:
             return replay, None, 200
-        if latest and latest.get("status") in {"finalizing", "score_error"}:
-            return None, "result finalization is incomplete; retry the last answer", 503
-        return None, "answer could not be committed", 409
 
+        plan, error = _answer_plan(session, **scope)
+        if error is not None:
+            return error
+
+        try:
+            trace["round_trips"] += 1
+            updated = _commit_answer(sessions, plan)
+        except Exception:
+            logger.exception("failed to advance Mini App session")
+            return None, "could not save answer", 503
+
+        if not updated:
+            trace["round_trips"] += 1
+            latest = sessions.find_one({"_id": session_id, "user_id": user_id})
+            replay = _replay_answer_response(latest or {}, requested_question_id, user)
+            if replay is not None:
+                return replay, None, 200
+            if latest and latest.get("status") in {"finalizing", "score_error"}:
+                return None, "result finalization is incomplete; retry the last answer", 503
+            return None, "answer could not be committed", 409
+
+    question = plan["question"]
+    ok = plan["ok"]
     try:
         from database import record_question_stat
 
-        record_question_stat(question["id"], session["pool_key"], ok, elapsed_question)
+        record_question_stat(question["id"], plan["pool_key"], ok, plan["elapsed"])
     except Exception:
         logger.exception("failed to record question stat")
 
-    total = int(updated.get("question_count") or len(questions))
+    total = int(updated.get("question_count") or len(plan["questions"]))
     finished = int(updated.get("current_index", 0)) >= total
     result = {"points": 0, "daily_bonus": 0, "new_achievements": []}
     if finished:
+        _SESSION_VIEWS.discard(session_id)
+        trace["finalized"] = True
         finalized = _finalize_quiz(updated, user)
         if finalized is None:
             return None, "result persistence failed; retry the last answer", 503
         result = finalized
+    else:
+        _SESSION_VIEWS.put(sessions, updated)
 
     return {
         "ok": ok,
-        "timed_out": timed_out,
-        "correct_index": correct_index,
+        "timed_out": plan["timed_out"],
+        "correct_index": plan["correct_index"],
         "explanation": question.get("explanation", ""),
         "verse": question.get("verse", ""),
         "topic": question.get("topic", ""),
         "finished": finished,
         "score": int(updated.get("correct_count", 0)),
         "total": total,
-        "max_streak": max_streak,
+        "max_streak": plan["max_streak"],
         **result,
     }, None, 200
@@ -175,7 +175,7 @@ def start_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int]
 
         open_total = int(
             open_session.get("question_count")
-            or len(open_session.get("questions") or [])
+            or len(core.session_questions(open_session))
         )
         open_index = int(open_session.get("current_index", 0))
         if open_total <= 0 or open_index != open_total:
@@ -189,13 +189,14 @@ def start_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int]
 
     try:
         from database import get_user_stats, init_user_stats
+        from user_records import IDENTITY_FIELDS
 
         init_user_stats(
             int(user["id"]),
             user.get("username", ""),
             user.get("first_name", ""),
         )
-        if get_user_stats(int(user["id"])) is None:
+        if get_user_stats(int(user["id"]), IDENTITY_FIELDS) is None:
             return None, "user profile unavailable", 503
     except Exception:
         logger.exception("failed to initialise user profile")
@@ -220,7 +221,7 @@ def start_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int]
         return None, "question selection returned an invalid count", 503
 
     try:
-        prepared = [core.prepare_question(question) for question in selected]
+        prepared, question_fields = core.prepare_session_questions(selected)
     except (TypeError, ValueError):
         logger.exception("invalid question data selected for quiz start")
         return None, "question data is invalid", 500
@@ -246,7 +247,7 @@ def start_quiz(user: dict, payload: dict) -> tuple[dict | None, str | None, int]
         ),
         "mode": mode,
         "is_challenge": is_challenge,
-        "questions": prepared,
+        **question_fields,
         "question_count": len(prepared),
         "current_index": 0,
         "correct_count": 0,
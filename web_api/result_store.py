@@ -5,7 +5,9 @@ update as points/attempts. If the process dies before the quiz session is marked
 finished, a retry sees the receipt and returns the already-applied result.
 Receipts are retained beyond the normal session TTL and are pruned lazily only
 when their source session is gone or terminal, so recoverable finalizations keep
-an exactly-once receipt for as long as they need it.
+an exactly-once receipt for as long as they need it. Pruning runs off the
+request path: a result write only marks its user, and a periodic sweep checks
+each marked user's old receipts with one ``$in`` session lookup.
 
 Scoring results are additionally serialized by an optimistic CAS on the durable
 ``total_tests`` counter. That counter is shared with the legacy Telegram result
@@ -18,17 +20,26 @@ from __future__ import annotations
 
 import logging
 import re
+import time
 from datetime import UTC, datetime, timedelta
+from threading import Lock
 
 from pymongo.errors import DuplicateKeyError
 
+from leaderboard_categories import category_increments
+from profile_cache import invalidate_profile
 from questions.pool_policy import is_non_scoring_learning_pool
+from result_receipts import active_receipts, delete_receipts, read_receipt, write_once
+from runtime_metrics import LatencyHistogram, register_metrics_source
+from user_records import RECEIPT_AGE_FIELDS, read_user
 
 logger = logging.getLogger(__name__)
 _RESULT_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 _RECEIPT_RETENTION = timedelta(hours=24)
 _TERMINAL_SESSION_STATUSES = frozenset({"finished", "abandoned"})
 _RESULT_CAS_RETRIES = 8
+_RECEIPT_PRUNE_PENDING_LIMIT = 10_000
+_RECEIPT_MAP = "miniapp_result_receipts"
 
 
 def _now_utc_naive() -> datetime:
@@ -58,12 +69,14 @@ def _receipt_week_id(receipt: dict) -> str:
 def _receipt_field(result_id: str) -> str:
     if not _RESULT_ID_RE.fullmatch(result_id or ""):
         raise ValueError("invalid Mini App result id")
-    return f"miniapp_result_receipts.{result_id}"
+    return f"{_RECEIPT_MAP}.{result_id}"
 
 
 def _receipt_from(entry: dict | None, result_id: str) -> dict | None:
-    receipts = (entry or {}).get("miniapp_result_receipts") or {}
-    receipt = receipts.get(result_id) if isinstance(receipts, dict) else None
+    """Receipt of ``result_id`` embedded in ``entry`` or in ``result_receipts``."""
+    if not entry:
+        return None
+    receipt, _found = read_receipt(entry, str(entry.get("_id")), f"{_RECEIPT_MAP}.{result_id}")
     return dict(receipt) if isinstance(receipt, dict) else None
 
 
@@ -203,45 +216,161 @@ def _sync_weekly_challenge_result(
     raise RuntimeError("weekly leaderboard best could not be persisted monotonically")
 
 
-def _prune_old_receipts(user_id: int) -> None:
-    """Remove only old receipts whose source session can no longer be recovered."""
+def _prune_old_receipts(user_id: int) -> int:
+    """Remove only old receipts whose source session can no longer be recovered.
+
+    Returns the number of receipts removed.
+    """
     import database
 
     collection = database.collection
     db = getattr(database, "db", None)
     if collection is None or db is None:
-        return
+        return 0
 
+    uid = str(user_id)
     try:
-        entry = collection.find_one({"_id": str(user_id)}) or {}
-        receipts = entry.get("miniapp_result_receipts") or {}
+        entry = read_user(collection, uid, RECEIPT_AGE_FIELDS) or {}
+        receipts = entry.get(_RECEIPT_MAP) or {}
         if not isinstance(receipts, dict):
-            return
+            return 0
 
         cutoff = _now_utc_naive() - _RECEIPT_RETENTION
-        sessions = db["miniapp_sessions"]
-        stale: list[str] = []
-        for result_id, receipt in receipts.items():
-            applied_at = receipt.get("applied_at") if isinstance(receipt, dict) else None
-            if not isinstance(applied_at, datetime) or applied_at >= cutoff:
-                continue
-
-            session = sessions.find_one(
-                {"_id": result_id, "user_id": str(user_id)},
+        embedded = [
+            result_id
+            for result_id, receipt in receipts.items()
+            if isinstance(receipt, dict)
+            and isinstance(receipt.get("applied_at"), datetime)
+            and receipt["applied_at"] < cutoff
+        ]
+        external_store = active_receipts()
+        external = [] if external_store is None else [
+            row["key"]
+            for row in external_store.find(
+                {"user_id": uid, "kind": _RECEIPT_MAP, "applied_at": {"$lt": cutoff}},
+                {"key": 1},
+            )
+        ]
+        candidates = embedded + external
+        if not candidates:
+            return 0
+
+        recoverable = {
+            session["_id"]
+            for session in db["miniapp_sessions"].find(
+                {"_id": {"$in": candidates}, "user_id": uid},
                 {"status": 1},
             )
-            if session is None or session.get("status") in _TERMINAL_SESSION_STATUSES:
-                stale.append(result_id)
+            if session.get("status") not in _TERMINAL_SESSION_STATUSES
+        }
+        stale = [result_id for result_id in candidates if result_id not in recoverable]
+        if not stale:
+            return 0
 
-        if stale:
+        stale_embedded = [result_id for result_id in embedded if result_id in stale]
+        if stale_embedded:
             cleanup = collection.update_one(
-                {"_id": str(user_id)},
-                {"$unset": {_receipt_field(result_id): "" for result_id in stale}},
+                {"_id": uid},
+                {"$unset": {_receipt_field(result_id): "" for result_id in stale_embedded}},
             )
             if not _acknowledged(cleanup):
                 logger.warning("Mini App receipt pruning write was not acknowledged")
+                return 0
+        stale_external = [_receipt_field(result_id) for result_id in external if result_id in stale]
+        delete_receipts(external_store, uid, stale_external)
+        return len(stale)
     except Exception:
         logger.warning("could not safely prune old Mini App result receipts", exc_info=True)
+        return 0
+
+
+class ReceiptPruneQueue:
+    """Users with fresh receipts, pruned later by :func:`sweep_old_receipts`.
+
+    The set is bounded; a user marked while it is full is skipped and counted,
+    and is picked up again on that user's next result write.
+    """
+
+    def __init__(self, *, max_pending: int = _RECEIPT_PRUNE_PENDING_LIMIT) -> None:
+        self.max_pending = max(1, int(max_pending))
+        self._lock = Lock()
+        self._pending: dict[str, None] = {}
+        self._skipped = 0
+        self._sweeps = 0
+        self._users_checked = 0
+        self._receipts_pruned = 0
+        self._last_sweep: dict | None = None
+        self._sweep_latency = LatencyHistogram()
+
+    def mark(self, user_id) -> None:
+        uid = str(user_id)
+        with self._lock:
+            if uid in self._pending:
+                return
+            if len(self._pending) >= self.max_pending:
+                self._skipped += 1
+                return
+            self._pending[uid] = None
+
+    def take(self, limit: int) -> list[str]:
+        with self._lock:
+            batch = list(self._pending)[: max(0, int(limit))]
+            for uid in batch:
+                del self._pending[uid]
+            return batch
+
+    def record_sweep(self, *, users: int, pruned: int, seconds: float) -> None:
+        self._sweep_latency.observe(seconds)
+        with self._lock:
+            self._sweeps += 1
+            self._users_checked += users
+            self._receipts_pruned += pruned
+            self._last_sweep = {"users": users, "pruned": pruned, "seconds": round(seconds, 4)}
+
+    def metrics(self) -> dict:
+        with self._lock:
+            snapshot = {
+                "pending_users": len(self._pending),
+                "skipped_marks": self._skipped,
+                "sweeps": self._sweeps,
+                "users_checked": self._users_checked,
+                "receipts_pruned": self._receipts_pruned,
+                "last_sweep": dict(self._last_sweep) if self._last_sweep else None,
+            }
+        snapshot["sweep"] = self._sweep_latency.snapshot()
+        return snapshot
+
+
+RECEIPT_PRUNE_QUEUE = ReceiptPruneQueue()
+register_metrics_source("miniapp_receipt_pruning", RECEIPT_PRUNE_QUEUE.metrics)
+
+
+def sweep_old_receipts(limit: int = 200) -> dict:
+    """Prune receipts for up to ``limit`` marked users; return counts and time."""
+    started = time.perf_counter()
+    users = RECEIPT_PRUNE_QUEUE.take(limit)
+    pruned = sum(_prune_old_receipts(uid) for uid in users)
+    seconds = time.perf_counter() - started
+    if users:
+        RECEIPT_PRUNE_QUEUE.record_sweep(users=len(users), pruned=pruned, seconds=seconds)
+    return {"users": len(users), "pruned": pruned, "seconds": seconds}
+
+
+def _mirror_rank_index(uid: str, update: dict) -> None:
+    """Mirror an applied ``total_points`` increment into the bot's rank index."""
+    import database
+
+    inc = update.get("$inc") or {}
+    if "total_points" not in inc:
+        return
+    names = update.get("$set") or {}
+    database.LEADERBOARD_RANK_INDEX.apply_delta(
+        uid,
+        inc["total_points"],
+        tests=inc.get("total_tests", 0),
+        username=names.get("username"),
+        first_name=names.get("first_name"),
+    )
 
 
 def _persist_once(
@@ -260,22 +389,23 @@ def _persist_once(
     field = _receipt_field(result_id)
     stored_receipt = dict(receipt)
     stored_receipt["applied_at"] = _now_utc_naive()
-    update.setdefault("$set", {})[field] = stored_receipt
-    query = {"_id": uid, field: {"$exists": False}}
+    query = {"_id": uid}
     if expected:
         query.update(expected)
     try:
-        result = collection.update_one(query, update, upsert=False)
-        if not _acknowledged(result):
+        write = write_once(collection, query, update, uid=uid, path=field, receipt=stored_receipt)
+        if not write.acknowledged:
             logger.error("Mini App result write was not acknowledged for %s", result_id)
             return None
-        if getattr(result, "modified_count", 0) == 1:
-            _prune_old_receipts(user_id)
+        if write.applied:
+            RECEIPT_PRUNE_QUEUE.mark(user_id)
+            invalidate_profile(user_id)
+            _mirror_rank_index(uid, update)
             return dict(stored_receipt)
 
         existing = _receipt_from(collection.find_one({"_id": uid}), result_id)
         if existing is not None:
-            _prune_old_receipts(user_id)
+            RECEIPT_PRUNE_QUEUE.mark(user_id)
         return existing
     except Exception:
         logger.exception("failed to persist Mini App result receipt %s", result_id)
@@ -329,6 +459,7 @@ def _apply_learning_result_once(
             f"{level_key}_attempts": 1,
             f"{level_key}_correct": score,
             f"{level_key}_total": total,
+            **category_increments(level_key, score, total),
         },
         "$set": {
             "username": username or "",
@@ -450,6 +581,7 @@ def apply_regular_result_once(
             f"{level_key}_attempts": 1,
             f"{level_key}_correct": score,
             f"{level_key}_total": total,
+            **category_increments(level_key, score, total),
         }
         if is_perfect:
             inc_fields["perfect_count"] = 1
@@ -1,13 +1,17 @@
 """Flask application for health, Mini App static files and API routes."""
 from __future__ import annotations
 
+import base64
+import hashlib
+import hmac
 import logging
 import os
 import pathlib
 import random
 from datetime import UTC, datetime
+from functools import lru_cache
 
-from flask import Flask, jsonify, request, send_file, send_from_directory
+from flask import Flask, abort, jsonify, request
 
 from course_catalog import COURSE_ENTRIES, SURFACE_MINIAPP, course_for_pool, public_catalog
 from .auth import require_user
@@ -17,12 +21,13 @@ from .quiz import (
     cancel_quiz,
     get_active_quiz,
     get_current_question,
-    get_miniapp_history,
     prepare_question,
     public_question,
-    question_id,
 )
+from .bank_manifest import bank_manifest
+from .profile import HISTORY_LIMIT, profile_for
 from .quiz_start import start_quiz
+from .static_assets import INDEX_FILE, StaticBundle
 from .ttl_cache import TTLValueCache
 
 logger = logging.getLogger(__name__)
@@ -56,6 +61,7 @@ _PUBLIC_ERROR_MESSAGES = {
     "questions unavailable": "questions unavailable",
     "profile unavailable": "profile unavailable",
     "invalid leaderboard category": "invalid leaderboard category",
+    "invalid leaderboard cursor": "invalid leaderboard cursor",
     "leaderboard unavailable": "leaderboard unavailable",
     "database unavailable": "database unavailable",
     "database temporarily unavailable": "database temporarily unavailable",
@@ -143,6 +149,73 @@ def _total_users() -> int:
         return 0
 
 
+_CURSOR_TAG_BYTES = 16
+_CURSOR_PLAIN_BYTES = 32
+_CURSOR_MAX_LENGTH = 128
+
+
+@lru_cache(maxsize=4)
+def _cursor_keys(token: str) -> tuple[bytes, bytes]:
+    root = hmac.new(b"LeaderboardCursor", token.encode("utf-8"), hashlib.sha256).digest()
+    return (
+        hmac.new(root, b"mac", hashlib.sha256).digest(),
+        hmac.new(root, b"enc", hashlib.sha256).digest(),
+    )
+
+
+def _cursor_xor(key: bytes, tag: bytes, data: bytes) -> bytes:
+    stream = b"".join(
+        hmac.new(key, tag + bytes([block]), hashlib.sha256).digest()
+        for block in range((len(data) + 31) // 32)
+    )
+    return bytes(left ^ right for left, right in zip(data, stream, strict=False))
+
+
+def _encode_leaderboard_cursor(points: int, user_id) -> str | None:
+    """Seal the ``(total_points, user_id)`` keyset position for the client.
+
+    The cursor carries a Telegram id, which public payloads never expose, so
+    it is encrypted and authenticated with a key derived from ``BOT_TOKEN``:
+    a SIV-style HMAC-SHA256 tag over the padded plaintext doubles as the
+    keystream nonce.
+    """
+    token = os.getenv("BOT_TOKEN", "").strip()
+    if not token:
+        return None
+    mac_key, enc_key = _cursor_keys(token)
+    plain = f"{int(points)}:{user_id}".encode("ascii").ljust(_CURSOR_PLAIN_BYTES, b" ")
+    tag = hmac.new(mac_key, plain, hashlib.sha256).digest()[:_CURSOR_TAG_BYTES]
+    sealed = tag + _cursor_xor(enc_key, tag, plain)
+    return base64.urlsafe_b64encode(sealed).decode("ascii").rstrip("=")
+
+
+def _leaderboard_cursor(raw: str) -> tuple[int, str] | None:
+    """Open a cursor made by :func:`_encode_leaderboard_cursor`; None if forged."""
+    token = os.getenv("BOT_TOKEN", "").strip()
+    raw = str(raw or "")
+    if not token or not raw or len(raw) > _CURSOR_MAX_LENGTH:
+        return None
+    try:
+        sealed = base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4))
+    except ValueError:
+        return None
+    tag, body = sealed[:_CURSOR_TAG_BYTES], sealed[_CURSOR_TAG_BYTES:]
+    if len(tag) < _CURSOR_TAG_BYTES or not body:
+        return None
+    mac_key, enc_key = _cursor_keys(token)
+    plain = _cursor_xor(enc_key, tag, body)
+    expected = hmac.new(mac_key, plain, hashlib.sha256).digest()[:_CURSOR_TAG_BYTES]
+    if not hmac.compare_digest(expected, tag):
+        return None
+    points, separator, user_id = plain.decode("ascii", "replace").rstrip(" ").partition(":")
+    if not separator or not user_id.isdigit() or len(user_id) > 20:
+        return None
+    try:
+        return int(points), user_id
+    except ValueError:
+        return None
+
+
 def _public_user_document(document: dict | None) -> dict:
     allowed = set(_PUBLIC_USER_FIELDS)
     level_keys = {entry.pool_key for entry in COURSE_ENTRIES}
@@ -188,25 +261,36 @@ def _serialize_history(items: list[dict]) -> list[dict]:
     return result
 
 
+def _render_profile(raw: dict) -> dict:
+    entry = _public_user_document(raw["entry"])
+    history = sorted(raw["history"], key=_history_timestamp, reverse=True)[:HISTORY_LIMIT]
+    return {
+        "position": raw["position"],
+        "entry": entry,
+        "stats": entry,
+        "history": _serialize_history(history),
+        "achievements": raw["achievements"],
+        "streak": raw["streak"],
+    }
+
+
 def _hard_leaderboard(limit: int = 20) -> list[dict]:
-    try:
-        from database import collection
-        if collection is None:
-            return []
-        hard_keys = ("hard", "hard_p1", "hard_p2")
-        pipeline = [
-            {"$match": {"$or": [{f"{key}_attempts": {"$gt": 0}} for key in hard_keys]}},
-            {"$addFields": {
-                "_hard_correct": {"$add": [{"$ifNull": [f"${key}_correct", 0]} for key in hard_keys]},
-                "_hard_total": {"$add": [{"$ifNull": [f"${key}_total", 0]} for key in hard_keys]},
-            }},
-            {"$sort": {"_hard_correct": -1, "_hard_total": 1}},
-            {"$limit": max(1, min(int(limit), 100))},
-        ]
-        return list(collection.aggregate(pipeline))
-    except Exception:
-        logger.exception("hard leaderboard aggregation failed")
+    from database import get_hard_leaderboard
+
+    return get_hard_leaderboard(limit=limit)
+
+
+def _general_leaderboard_first_page() -> list[dict]:
+    import database
+    from leaderboard_categories import LEADERBOARD_CACHE
+
+    if database.collection is None:
         return []
+    return LEADERBOARD_CACHE.get(
+        database.collection,
+        ("general", 0, 20),
+        lambda: database.get_leaderboard_page(0, per_page=20),
+    )
 
 
 def _public_mode_catalog() -> dict[str, dict]:
@@ -241,8 +325,24 @@ def _attach_course_key(body: dict | None) -> dict | None:
     return body
 
 
+def _versioned_catalog(app: Flask) -> tuple[bytes, str]:
+    """Catalog body and its revision; both only change with a deploy."""
+    body = public_catalog(surface=SURFACE_MINIAPP)
+    body["modes"] = _public_mode_catalog()
+    revision = hashlib.sha256(app.json.dumps(body).encode("utf-8")).hexdigest()[:20]
+    body["revision"] = revision
+    return app.json.dumps(body).encode("utf-8"), revision
+
+
 def create_app() -> Flask:
-    app = Flask(__name__, static_folder=str(STATIC_DIR) if STATIC_DIR.is_dir() else None, static_url_path="")
+    app = Flask(__name__, static_folder=None)
+    static_bundle = StaticBundle.load(STATIC_DIR)
+    catalog_document: list[tuple[bytes, str]] = []
+
+    try:
+        bank_manifest()
+    except Exception:
+        logger.exception("question bank manifest unavailable at startup")
 
     @app.get("/live")
     def live():
@@ -260,9 +360,9 @@ def create_app() -> Flask:
 
     @app.get("/")
     def home():
-        index = STATIC_DIR / "index.html"
-        if index.is_file():
-            return send_file(index)
+        response = static_bundle.response(INDEX_FILE, request)
+        if response is not None:
+            return response
         return _json_error("miniapp is not installed", 404)
 
     @app.get("/app")
@@ -274,21 +374,29 @@ def create_app() -> Flask:
     @app.get("/miniapp/<path:path>")
     @app.get("/app/<path:path>")
     def miniapp_static(path: str):
-        if (STATIC_DIR / path).is_file():
-            return send_from_directory(str(STATIC_DIR), path)
-        return home()
+        return static_bundle.response(path, request) or home()
+
+    @app.get("/<path:path>")
+    def root_static(path: str):
+        # ``/`` and ``/app`` resolve the bundle's relative URLs against the root.
+        response = static_bundle.response(path, request)
+        if response is None:
+            abort(404)
+        return response
 
     @app.get("/api/catalog")
     def catalog():
         """Public, deployment-fresh learning catalog; no question/source internals."""
         try:
-            body = public_catalog(surface=SURFACE_MINIAPP)
-            body["modes"] = _public_mode_catalog()
-            response = jsonify(body)
-            # A pool can appear/disappear only with a server deploy. Avoid a
-            # browser/proxy keeping the previous deployment's availability.
-            response.headers["Cache-Control"] = "no-store, max-age=0"
-            return response
+            if not catalog_document:
+                catalog_document.append(_versioned_catalog(app))
+            body, revision = catalog_document[0]
+            response = app.response_class(body, mimetype="application/json")
+            response.set_etag(revision)
+            # A pool can appear/disappear only with a server deploy. Clients
+            # revalidate every time, so a new deploy is seen on the next open.
+            response.headers["Cache-Control"] = "no-cache"
+            return response.make_conditional(request)
         except Exception:
             logger.exception("course catalog unavailable")
             return _json_error("course catalog unavailable", 503)
@@ -297,15 +405,8 @@ def create_app() -> Flask:
     @app.get("/api/stats")
     def stats():
         try:
-            from questions import POOL_REGISTRY
-            pools = {key: len(value) for key, value in POOL_REGISTRY.items()}
-            unique_ids = {
-                question_id(question)
-                for key, questions in POOL_REGISTRY.items()
-                if key != "random_all"
-                for question in questions
-            }
-            return jsonify({"status": "ok", "database": "connected" if _database_ready() else "unavailable", "total_users": _total_users(), "total_questions": len(unique_ids), "pools": pools, "uptime_seconds": _uptime_seconds()})
+            manifest = bank_manifest()
+            return jsonify({"status": "ok", "database": "connected" if _database_ready() else "unavailable", "total_users": _total_users(), "total_questions": manifest.total_questions, "pools": dict(manifest.pools), "bank_hash": manifest.content_hash, "uptime_seconds": _uptime_seconds()})
         except Exception:
             logger.exception("stats endpoint failed")
             return _json_error("stats unavailable", 503)
@@ -317,8 +418,12 @@ def create_app() -> Flask:
     @app.get("/api/pools")
     def pools():
         try:
-            from questions import POOL_REGISTRY
-            return jsonify({key: len(value) for key, value in POOL_REGISTRY.items()})
+            manifest = bank_manifest()
+            response = app.response_class(manifest.pools_body, mimetype="application/json")
+            response.set_etag(manifest.etag)
+            # Revalidate every time instead of no-store: the body only changes with a deploy.
+            response.headers["Cache-Control"] = "no-cache"
+            return response.make_conditional(request)
         except Exception:
             logger.exception("pool registry unavailable")
             return _json_error("question pools unavailable", 503)
@@ -384,14 +489,7 @@ def create_app() -> Flask:
             return error
         uid = int(user["id"])
         try:
-            from database import get_user_achievements, get_user_history, get_user_position, get_user_stats
-            position, entry = get_user_position(uid)
-            stats_data = get_user_stats(uid) or {}
-            bot_history = get_user_history(uid, limit=10)
-            miniapp_history = get_miniapp_history(uid, limit=10)
-            history = sorted(miniapp_history + bot_history, key=_history_timestamp, reverse=True)[:10]
-            achievements, streak_count, streak_date = get_user_achievements(uid)
-            return jsonify({"user": user, "position": position, "entry": _public_user_document(entry), "stats": _public_user_document(stats_data), "history": _serialize_history(history), "achievements": achievements, "streak": {"count": streak_count, "last": streak_date}})
+            return jsonify({"user": user, **profile_for(uid, _render_profile)})
         except Exception:
             logger.exception("api/me failed")
             return _json_error("profile unavailable", 503)
@@ -404,10 +502,19 @@ def create_app() -> Flask:
         category = request.args.get("cat", "general")
         if category not in {"general", "context", "hard"}:
             return _json_error("invalid leaderboard category", 400)
+        after = request.args.get("after")
+        cursor = None
+        if after is not None:
+            cursor = _leaderboard_cursor(after)
+            if category != "general" or cursor is None:
+                return _json_error("invalid leaderboard cursor", 400)
         try:
-            from database import get_context_leaderboard, get_leaderboard_page
-            if category == "general":
-                raw_users = get_leaderboard_page(0, per_page=20)
+            from database import get_context_leaderboard, get_leaderboard_page_after
+            if cursor is not None:
+                raw_users = get_leaderboard_page_after(cursor[0], cursor[1], per_page=20)
+                score_key = "total_points"
+            elif category == "general":
+                raw_users = _general_leaderboard_first_page()
                 score_key = "total_points"
             elif category == "context":
                 raw_users = get_context_leaderboard(limit=20)
@@ -415,8 +522,14 @@ def create_app() -> Flask:
             else:
                 raw_users = _hard_leaderboard(limit=20)
                 score_key = "_hard_correct"
-            users = [{"rank": rank, "username": item.get("username", ""), "first_name": item.get("first_name", "Пользователь"), "score": item.get(score_key, 0), "total_tests": item.get("total_tests", 0)} for rank, item in enumerate(raw_users, start=1)]
-            return jsonify({"cat": category, "users": users})
+            users = [{"rank": item.get("_rank", rank), "username": item.get("username", ""), "first_name": item.get("first_name", "Пользователь"), "score": item.get(score_key, 0), "total_tests": item.get("total_tests", 0)} for rank, item in enumerate(raw_users, start=1)]
+            body = {"cat": category, "users": users}
+            if category == "general" and len(raw_users) == 20:
+                last = raw_users[-1]
+                body["next"] = _encode_leaderboard_cursor(
+                    int(last.get("total_points", 0)), last.get("_id")
+                )
+            return jsonify(body)
         except Exception:
             logger.exception("leaderboard endpoint failed")
             return _json_error("leaderboard unavailable", 503)
@@ -0,0 +1,112 @@
+"""Last-known Mini App session documents for the single-round-trip answer path.
+
+``answer_quiz`` needs the current question, its ``question_sent_at`` and the
+streak counters to build its conditional update. Start, current-question and
+answer responses already hold that document, so it is kept here instead of
+being re-read on the next tap. A view is only ever used to *build* a guarded
+``find_one_and_update``: the filter pins ``status``, ``current_index`` and
+``question_sent_at`` to the values the view was computed from, so a stale view
+cannot commit anything and the caller re-reads MongoDB on conflict.
+
+Views are bound to the collection handle they were read from, so a different
+database (or a test double) never sees another handle's documents.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+
+from runtime_metrics import LatencyHistogram
+from schema_readiness import same_handle
+
+
+class SessionViewCache:
+    """Thread-safe LRU of in-progress session documents keyed by session id."""
+
+    def __init__(self, capacity: int = 2048) -> None:
+        self.capacity = max(1, int(capacity))
+        self._lock = Lock()
+        self._views: OrderedDict[str, tuple[object, dict]] = OrderedDict()
+
+    def get(self, handle: object, session_id: str, user_id: str) -> dict | None:
+        with self._lock:
+            entry = self._views.get(session_id)
+            if entry is None:
+                return None
+            stored_handle, view = entry
+            if not same_handle(stored_handle, handle) or view.get("user_id") != user_id:
+                return None
+            self._views.move_to_end(session_id)
+            return view
+
+    def put(self, handle: object, session: dict | None) -> None:
+        """Remember ``session``; anything not in progress is forgotten instead."""
+        if not session:
+            return
+        session_id = str(session.get("_id"))
+        if session.get("status") != "in_progress":
+            self.discard(session_id)
+            return
+        with self._lock:
+            self._views[session_id] = (handle, session)
+            self._views.move_to_end(session_id)
+            while len(self._views) > self.capacity:
+                self._views.popitem(last=False)
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._views.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._views.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._views)
+
+
+class AnswerPathMetrics:
+    """Latency and MongoDB round trips per ``/api/quiz/answer`` call."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._latency = LatencyHistogram()
+        self._round_trips: dict[int, int] = {}
+        self._view_hits = 0
+        self._view_misses = 0
+        self._conflicts = 0
+        self._finalized = 0
+
+    def observe(
+        self,
+        seconds: float,
+        *,
+        round_trips: int,
+        view_hit: bool,
+        conflict: bool,
+        finalized: bool,
+    ) -> None:
+        self._latency.observe(seconds)
+        with self._lock:
+            self._round_trips[round_trips] = self._round_trips.get(round_trips, 0) + 1
+            if view_hit:
+                self._view_hits += 1
+            else:
+                self._view_misses += 1
+            if conflict:
+                self._conflicts += 1
+            if finalized:
+                self._finalized += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            snapshot = {
+                "round_trips": {str(key): value for key, value in sorted(self._round_trips.items())},
+                "view_hits": self._view_hits,
+                "view_misses": self._view_misses,
+                "conflicts": self._conflicts,
+                "finalized": self._finalized,
+            }
+        snapshot["latency"] = self._latency.snapshot()
+        return snapshot
@@ -0,0 +1,146 @@
+"""In-memory, precompressed delivery of the Mini App bundle.
+
+Every file under ``miniapp/`` is read once when the app is created. For each
+file the loader keeps the bytes, a content digest and gzip and, if the optional
+``brotli`` package is installed, brotli variants. A variant is kept only when it
+is smaller. ``index.html`` is rewritten so that every local script and
+stylesheet URL carries ``?v=<digest>``.
+
+* A request whose ``v`` matches the asset's digest gets a year-long
+  ``immutable`` cache lifetime. A deploy that changes the file changes the URL
+  ``index.html`` points to.
+* Every other request (``index.html`` itself, or old or unversioned URLs) gets
+  ``no-cache`` plus a strong per-encoding ETag and is answered with ``304`` on
+  ``If-None-Match``.
+
+A repeat cold open on a mobile network therefore costs one ``304`` for
+``index.html`` and no asset requests at all.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from flask import Request, Response
+
+try:  # optional: ``pip install brotli`` adds ``br`` variants
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+INDEX_FILE = "index.html"
+
+_COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+_LOCAL_ASSET_REF = re.compile(r'(?P<attr>src|href)="(?P<path>[A-Za-z0-9_.\-/]+\.(?:js|css))"')
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:20]
+
+
+def _mimetype(path: str) -> str:
+    if path.endswith(".js"):
+        return "text/javascript; charset=utf-8"
+    guessed = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if guessed.startswith("text/") or guessed in {"application/json", "image/svg+xml"}:
+        return f"{guessed}; charset=utf-8"
+    return guessed
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    path: str
+    mimetype: str
+    version: str
+    # encoding ("identity", "br", "gzip") -> body
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+    def etag(self, encoding: str) -> str:
+        return self.version if encoding == "identity" else f"{self.version}.{encoding}"
+
+
+def _build_asset(path: str, data: bytes) -> StaticAsset:
+    mimetype = _mimetype(path)
+    variants = {"identity": data}
+    if mimetype.startswith(_COMPRESSIBLE_TYPES):
+        compressed = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(data, quality=11)
+        for encoding, body in compressed.items():
+            if len(body) < len(data):
+                variants[encoding] = body
+    return StaticAsset(path=path, mimetype=mimetype, version=_digest(data), variants=variants)
+
+
+def _version_index(html: str, versions: dict[str, str]) -> str:
+    def replace(match: re.Match) -> str:
+        version = versions.get(match.group("path"))
+        if version is None:
+            return match.group(0)
+        return f'{match.group("attr")}="{match.group("path")}?v={version}"'
+
+    return _LOCAL_ASSET_REF.sub(replace, html)
+
+
+class StaticBundle:
+    """Immutable snapshot of a static directory, keyed by relative POSIX path."""
+
+    def __init__(self, assets: dict[str, StaticAsset]) -> None:
+        self._assets = assets
+
+    @classmethod
+    def load(cls, root: Path) -> StaticBundle:
+        if not root.is_dir():
+            return cls({})
+        files = {
+            path.relative_to(root).as_posix(): path.read_bytes()
+            for path in sorted(root.rglob("*"))
+            if path.is_file()
+        }
+        assets = {
+            name: _build_asset(name, data) for name, data in files.items() if name != INDEX_FILE
+        }
+        if INDEX_FILE in files:
+            versions = {name: asset.version for name, asset in assets.items()}
+            html = _version_index(files[INDEX_FILE].decode("utf-8"), versions)
+            assets[INDEX_FILE] = _build_asset(INDEX_FILE, html.encode("utf-8"))
+        return cls(assets)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._assets
+
+    def get(self, path: str) -> StaticAsset | None:
+        return self._assets.get(path)
+
+    def response(self, path: str, request: Request) -> Response | None:
+        """Serve ``path`` for ``request``; ``None`` when the bundle has no such file."""
+        asset = self._assets.get(path)
+        if asset is None:
+            return None
+        encoding = "identity"
+        for candidate in ("br", "gzip"):
+            if candidate in asset.variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+        etag = asset.etag(encoding)
+        immutable = path != INDEX_FILE and request.args.get("v") == asset.version
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = (
+            IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        )
+        if len(asset.variants) > 1:
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
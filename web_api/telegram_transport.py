@@ -3,6 +3,12 @@
 The existing Waitress/Flask service owns the public HTTP port. In webhook mode
 it validates Telegram's secret header and forwards parsed updates into PTB's
 ``Application.update_queue`` instead of starting PTB's optional webhook server.
+
+With :class:`TrackedUpdateProcessor` installed on the Application, a webhook
+request waits only for its own update instead of the whole queue to drain.
+The same processor runs updates from different users concurrently (up to
+``TELEGRAM_MAX_CONCURRENT_UPDATES`` handlers at once) while updates sharing a
+user or chat still run strictly one after another in arrival order.
 """
 from __future__ import annotations
 
@@ -13,13 +19,19 @@ import logging
 import os
 import re
 import signal
+import time
 from collections.abc import Awaitable, Callable
+from concurrent.futures import Future as ConcurrentFuture
 from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
 from threading import Event as ThreadEvent
 from threading import Lock
 from urllib.parse import urlsplit
 
 from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from runtime_metrics import LatencyHistogram, register_metrics_source
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +41,13 @@ _WEBHOOK_SECRET_RE = re.compile(r"^[A-Za-z0-9_-]{16,256}$")
 _SUPPORTED_WEBHOOK_PORTS = frozenset({80, 88, 443, 8443})
 _BRIDGE_PROCESS_TIMEOUT_SECONDS = 30.0
 _BRIDGE_DRAIN_TIMEOUT_SECONDS = 3.0
+WEBHOOK_ACK_PROCESSED = "processed"
+WEBHOOK_ACK_ENQUEUED = "enqueued"
+_DEFAULT_WEBHOOK_MAX_INFLIGHT = 8
+_DEFAULT_MAX_CONCURRENT_UPDATES = 16
+# Updates PTB may hand to the processor at once; waiting ones hold no handler slot.
+_MAX_ADMITTED_UPDATES = 256
+_DEEPEST_KEYS_REPORTED = 5
 
 
 class TransportConfigurationError(RuntimeError):
@@ -120,6 +139,62 @@ def telegram_webhook_max_connections() -> int:
     return value
 
 
+def telegram_webhook_ack_mode() -> str:
+    """Return when a webhook POST is acknowledged to Telegram.
+
+    ``processed`` (default) answers after this update's handlers finished, so a
+    crash before that point makes Telegram redeliver it. ``enqueued`` answers as
+    soon as PTB accepted the update; it frees Waitress threads faster but an
+    update still queued in memory is lost on crash.
+    """
+    mode = (
+        os.getenv("TELEGRAM_WEBHOOK_ACK_MODE", WEBHOOK_ACK_PROCESSED).strip().lower()
+        or WEBHOOK_ACK_PROCESSED
+    )
+    if mode not in {WEBHOOK_ACK_PROCESSED, WEBHOOK_ACK_ENQUEUED}:
+        raise TransportConfigurationError(
+            "TELEGRAM_WEBHOOK_ACK_MODE must be 'processed' or 'enqueued'"
+        )
+    return mode
+
+
+def telegram_webhook_max_inflight() -> int:
+    raw = (
+        os.getenv("TELEGRAM_WEBHOOK_MAX_INFLIGHT", str(_DEFAULT_WEBHOOK_MAX_INFLIGHT)).strip()
+        or str(_DEFAULT_WEBHOOK_MAX_INFLIGHT)
+    )
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise TransportConfigurationError(
+            "TELEGRAM_WEBHOOK_MAX_INFLIGHT must be an integer from 1 to 100"
+        ) from exc
+    if value < 1 or value > 100:
+        raise TransportConfigurationError(
+            "TELEGRAM_WEBHOOK_MAX_INFLIGHT must be an integer from 1 to 100"
+        )
+    return value
+
+
+def telegram_max_concurrent_updates() -> int:
+    """Global cap on update handlers running at once; ``1`` restores sequential PTB."""
+    raw = (
+        os.getenv("TELEGRAM_MAX_CONCURRENT_UPDATES", str(_DEFAULT_MAX_CONCURRENT_UPDATES)).strip()
+        or str(_DEFAULT_MAX_CONCURRENT_UPDATES)
+    )
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise TransportConfigurationError(
+            "TELEGRAM_MAX_CONCURRENT_UPDATES must be an integer from 1 to 256"
+        ) from exc
+    if value < 1 or value > _MAX_ADMITTED_UPDATES:
+        raise TransportConfigurationError(
+            "TELEGRAM_MAX_CONCURRENT_UPDATES must be an integer from 1 to 256"
+        )
+    return value
+
+
 def _env_truthy(name: str) -> bool:
     return os.getenv(name, "").strip().lower() in {"1", "true", "yes", "on"}
 
@@ -127,6 +202,7 @@ def _env_truthy(name: str) -> bool:
 def validate_telegram_transport_configuration() -> str:
     """Validate transport-specific startup requirements without side effects."""
     mode = telegram_transport_mode()
+    telegram_max_concurrent_updates()
     if mode == "polling":
         return mode
 
@@ -137,9 +213,18 @@ def validate_telegram_transport_configuration() -> str:
     telegram_webhook_url()
     telegram_webhook_secret()
     telegram_webhook_max_connections()
+    telegram_webhook_ack_mode()
+    telegram_webhook_max_inflight()
     return mode
 
 
+@dataclass
+class _PendingUpdate:
+    update: object
+    completion: ConcurrentFuture
+    enqueued_at: float
+
+
 class TelegramWebhookBridge:
     """Thread-safe bridge from Waitress threads to PTB's asyncio update queue."""
 
@@ -150,10 +235,33 @@ class TelegramWebhookBridge:
         self._active_submissions = 0
         self._idle = ThreadEvent()
         self._idle.set()
-
-    def configure(self, application, loop: asyncio.AbstractEventLoop) -> None:
+        self._ack_mode = WEBHOOK_ACK_PROCESSED
+        self._max_inflight = _DEFAULT_WEBHOOK_MAX_INFLIGHT
+        # Accepted updates whose processing has not been reported yet. Keyed by
+        # object identity: the entry keeps the Update alive, so ids cannot be
+        # reused while pending, and Telegram redeliveries get separate entries.
+        self._pending: dict[int, _PendingUpdate] = {}
+        self._inflight = 0
+        self._acknowledged = 0
+        self._rejected_busy = 0
+        self._timed_out = 0
+        self._processing_latency = LatencyHistogram()
+        self._handler_latency = LatencyHistogram()
+
+    def configure(
+        self,
+        application,
+        loop: asyncio.AbstractEventLoop,
+        *,
+        ack_mode: str | None = None,
+        max_inflight: int | None = None,
+    ) -> None:
         if loop.is_closed():
             raise RuntimeError("cannot configure Telegram webhook bridge with a closed event loop")
+        resolved_ack_mode = ack_mode or telegram_webhook_ack_mode()
+        if resolved_ack_mode not in {WEBHOOK_ACK_PROCESSED, WEBHOOK_ACK_ENQUEUED}:
+            raise TransportConfigurationError("unsupported Telegram webhook ack mode")
+        resolved_max_inflight = max_inflight or telegram_webhook_max_inflight()
         with self._lock:
             if self._active_submissions:
                 raise RuntimeError(
@@ -161,6 +269,10 @@ class TelegramWebhookBridge:
                 )
             self._application = application
             self._loop = loop
+            self._ack_mode = resolved_ack_mode
+            self._max_inflight = max(1, int(resolved_max_inflight))
+            self._pending.clear()
+            self._inflight = 0
 
     def clear(self, application=None) -> None:
         with self._lock:
@@ -190,10 +302,39 @@ class TelegramWebhookBridge:
             )
 
     @staticmethod
-    async def _enqueue_and_wait_for_processing(application, update) -> None:
-        """Enqueue one update and wait until PTB marks queued work as processed."""
+    def _tracks_updates(application) -> bool:
+        return isinstance(getattr(application, "update_processor", None), TrackedUpdateProcessor)
+
+    @staticmethod
+    async def _enqueue_and_wait_for_processing(
+        application,
+        update,
+        *,
+        wait_for_queue_drain: bool = True,
+    ) -> None:
+        """Enqueue one update; without per-update tracking, wait for the whole queue."""
         await application.update_queue.put(update)
-        await application.update_queue.join()
+        if wait_for_queue_drain:
+            await application.update_queue.join()
+
+    def _release_pending(self, update) -> _PendingUpdate | None:
+        with self._lock:
+            pending = self._pending.get(id(update))
+            if pending is None or pending.update is not update:
+                return None
+            del self._pending[id(update)]
+            self._inflight -= 1
+            return pending
+
+    def mark_processed(self, update, handler_seconds: float) -> None:
+        """Called by :class:`TrackedUpdateProcessor` once PTB finished one update."""
+        self._handler_latency.observe(handler_seconds)
+        pending = self._release_pending(update)
+        if pending is None:
+            return
+        self._processing_latency.observe(time.monotonic() - pending.enqueued_at)
+        if not pending.completion.done():
+            pending.completion.set_result(None)
 
     def submit(self, payload: dict) -> None:
         with self._lock:
@@ -201,9 +342,17 @@ class TelegramWebhookBridge:
             loop = self._loop
             if application is None or loop is None or loop.is_closed():
                 raise WebhookNotReady("Telegram application is not ready")
+            if self._inflight >= self._max_inflight:
+                self._rejected_busy += 1
+                raise WebhookNotReady("Telegram webhook in-flight limit reached")
+            ack_mode = self._ack_mode
+            self._inflight += 1
             self._active_submissions += 1
             self._idle.clear()
 
+        tracked = self._tracks_updates(application)
+        pending: _PendingUpdate | None = None
+        deadline = time.monotonic() + _BRIDGE_PROCESS_TIMEOUT_SECONDS
         try:
             try:
                 update = Update.de_json(data=payload, bot=application.bot)
@@ -217,26 +366,268 @@ class TelegramWebhookBridge:
             ):
                 raise InvalidWebhookUpdate("invalid Telegram update")
 
+            if tracked:
+                # From here on the in-flight slot belongs to the pending entry and
+                # is released exactly once by whoever removes that entry.
+                pending = _PendingUpdate(update, ConcurrentFuture(), time.monotonic())
+                with self._lock:
+                    self._pending[id(update)] = pending
+
             future = asyncio.run_coroutine_threadsafe(
-                self._enqueue_and_wait_for_processing(application, update), loop
+                self._enqueue_and_wait_for_processing(
+                    application,
+                    update,
+                    wait_for_queue_drain=not tracked and ack_mode == WEBHOOK_ACK_PROCESSED,
+                ),
+                loop,
             )
             try:
-                future.result(timeout=_BRIDGE_PROCESS_TIMEOUT_SECONDS)
+                future.result(timeout=max(0.0, deadline - time.monotonic()))
             except FutureTimeoutError as exc:
-                future.cancel()
+                if future.cancel() and pending is not None:
+                    self._release_pending(update)
+                self._record_timeout()
                 raise WebhookNotReady(
                     "Telegram update processing did not complete in time"
                 ) from exc
             except Exception as exc:
+                if pending is not None:
+                    self._release_pending(update)
                 raise WebhookNotReady("Telegram update queue is unavailable") from exc
+
+            if pending is not None and ack_mode == WEBHOOK_ACK_PROCESSED:
+                try:
+                    pending.completion.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeoutError as exc:
+                    # The update is queued or running; its slot stays occupied
+                    # until PTB finishes it, and Telegram will retry this POST.
+                    self._record_timeout()
+                    raise WebhookNotReady(
+                        "Telegram update processing did not complete in time"
+                    ) from exc
+            with self._lock:
+                self._acknowledged += 1
         finally:
             with self._lock:
+                if pending is None:
+                    self._inflight -= 1
                 self._active_submissions -= 1
                 if self._active_submissions == 0:
                     self._idle.set()
 
+    def _record_timeout(self) -> None:
+        with self._lock:
+            self._timed_out += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            application = self._application
+            snapshot = {
+                "ready": application is not None,
+                "ack_mode": self._ack_mode,
+                "per_update_tracking": self._tracks_updates(application),
+                "inflight": self._inflight,
+                "max_inflight": self._max_inflight,
+                "active_submissions": self._active_submissions,
+                "pending_updates": len(self._pending),
+                "acknowledged": self._acknowledged,
+                "rejected_busy": self._rejected_busy,
+                "timed_out": self._timed_out,
+            }
+        queue = getattr(application, "update_queue", None)
+        try:
+            snapshot["queue_depth"] = int(queue.qsize()) if queue is not None else 0
+        except Exception:
+            snapshot["queue_depth"] = None
+        snapshot["processing_seconds"] = self._processing_latency.snapshot()
+        snapshot["handler_seconds"] = self._handler_latency.snapshot()
+        return snapshot
+
+
+def update_ordering_keys(update: object) -> tuple[str, ...]:
+    """Keys whose updates must not overlap: the effective user and chat."""
+    if not isinstance(update, Update):
+        return ()
+    keys = []
+    user = update.effective_user
+    if user is not None:
+        keys.append(f"user:{user.id}")
+    chat = update.effective_chat
+    if chat is not None:
+        keys.append(f"chat:{chat.id}")
+    return tuple(keys)
+
+
+def _complete_after(predecessors: list[asyncio.Future], done: asyncio.Future) -> None:
+    """Resolve ``done`` once every predecessor has resolved (now or later)."""
+    remaining = [future for future in predecessors if not future.done()]
+    if not remaining:
+        if not done.done():
+            done.set_result(None)
+        return
+    left = len(remaining)
+
+    def _one_finished(_future: asyncio.Future) -> None:
+        nonlocal left
+        left -= 1
+        if left == 0 and not done.done():
+            done.set_result(None)
+
+    for future in remaining:
+        future.add_done_callback(_one_finished)
+
+
+class TrackedUpdateProcessor(BaseUpdateProcessor):
+    """PTB update processor with per-user/chat ordering and completion tracking.
+
+    ``max_concurrent_updates`` caps handlers running at once. With ``1`` it
+    processes updates exactly like PTB's default sequential processor. Above
+    that PTB admits up to ``max(max_concurrent_updates, 256)`` updates; each one
+    first waits for the previous update of its user and of its chat (a FIFO
+    chain per key, linked in arrival order) and only then takes a handler slot,
+    so a user waiting on their own earlier update never blocks anyone else.
+    Every finished update is reported to the webhook bridge.
+    """
+
+    __slots__ = (
+        "_bridge",
+        "_completed",
+        "_depths",
+        "_handler_latency",
+        "_handler_slots",
+        "_max_running",
+        "_metrics_lock",
+        "_ordering_wait",
+        "_peak_key_depth",
+        "_running",
+        "_tails",
+        "_waiting",
+    )
+
+    def __init__(
+        self,
+        max_concurrent_updates: int = 1,
+        *,
+        bridge: TelegramWebhookBridge | None = None,
+    ) -> None:
+        running = int(max_concurrent_updates)
+        if running < 1:
+            raise ValueError("`max_concurrent_updates` must be a positive integer!")
+        super().__init__(running if running == 1 else max(running, _MAX_ADMITTED_UPDATES))
+        self._bridge = bridge
+        self._max_running = running
+        self._handler_slots = asyncio.Semaphore(running)
+        self._tails: dict[str, asyncio.Future] = {}
+        self._depths: dict[str, int] = {}
+        self._metrics_lock = Lock()
+        self._waiting = 0
+        self._running = 0
+        self._completed = 0
+        self._peak_key_depth = 0
+        self._ordering_wait = LatencyHistogram()
+        self._handler_latency = LatencyHistogram()
+
+    def _enter_keys(self, keys: tuple[str, ...], mine: asyncio.Future) -> list[asyncio.Future]:
+        # Runs without an await, so chains are linked in admission order.
+        predecessors = []
+        with self._metrics_lock:
+            for key in keys:
+                tail = self._tails.get(key)
+                if tail is not None and tail is not mine:
+                    predecessors.append(tail)
+                self._tails[key] = mine
+                depth = self._depths.get(key, 0) + 1
+                self._depths[key] = depth
+                self._peak_key_depth = max(self._peak_key_depth, depth)
+            self._waiting += 1
+        return predecessors
+
+    def _leave_keys(self, keys: tuple[str, ...], mine: asyncio.Future) -> None:
+        with self._metrics_lock:
+            for key in keys:
+                if self._tails.get(key) is mine:
+                    del self._tails[key]
+                depth = self._depths.get(key, 0) - 1
+                if depth > 0:
+                    self._depths[key] = depth
+                else:
+                    self._depths.pop(key, None)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable) -> None:
+        keys = update_ordering_keys(update)
+        mine = asyncio.get_running_loop().create_future()
+        predecessors = self._enter_keys(keys, mine)
+        queued_at = time.monotonic()
+        started = None
+        waiting = True
+        try:
+            if predecessors:
+                await asyncio.wait(predecessors)
+            async with self._handler_slots:
+                started = time.monotonic()
+                with self._metrics_lock:
+                    self._waiting -= 1
+                    self._running += 1
+                    waiting = False
+                self._ordering_wait.observe(started - queued_at)
+                await coroutine
+        finally:
+            finished = time.monotonic()
+            with self._metrics_lock:
+                if waiting:
+                    self._waiting -= 1
+                else:
+                    self._running -= 1
+                self._completed += 1
+            if started is None:
+                # Never ran (cancelled while queued): close the coroutine PTB built.
+                close = getattr(coroutine, "close", None)
+                if close is not None:
+                    close()
+            else:
+                self._handler_latency.observe(finished - started)
+            # A successor may only start once everything this update waited on is done.
+            _complete_after(predecessors, mine)
+            self._leave_keys(keys, mine)
+            bridge = self._bridge or TELEGRAM_WEBHOOK_BRIDGE
+            bridge.mark_processed(update, finished - (started if started is not None else queued_at))
+
+    async def initialize(self) -> None:
+        return None
+
+    async def shutdown(self) -> None:
+        return None
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            deepest = sorted(self._depths.items(), key=lambda item: (-item[1], item[0]))
+            snapshot = {
+                "max_running": self._max_running,
+                "max_admitted": self.max_concurrent_updates,
+                "running": self._running,
+                "waiting": self._waiting,
+                "completed": self._completed,
+                "active_keys": len(self._depths),
+                "queued_keys": sum(1 for depth in self._depths.values() if depth > 1),
+                "peak_key_depth": self._peak_key_depth,
+                "deepest_keys": {
+                    key: depth for key, depth in deepest[:_DEEPEST_KEYS_REPORTED] if depth > 1
+                },
+            }
+        snapshot["ordering_wait_seconds"] = self._ordering_wait.snapshot()
+        snapshot["handler_seconds"] = self._handler_latency.snapshot()
+        return snapshot
+
+
+def build_update_processor() -> TrackedUpdateProcessor:
+    """Update processor for the production Application in both transports."""
+    processor = TrackedUpdateProcessor(telegram_max_concurrent_updates())
+    register_metrics_source("telegram_updates", processor.metrics)
+    return processor
+
 
 TELEGRAM_WEBHOOK_BRIDGE = TelegramWebhookBridge()
+register_metrics_source("telegram_webhook", TELEGRAM_WEBHOOK_BRIDGE.metrics)
 
 
 async def _call_shutdown_hook(